@@ -1,5 +1,8 @@
 import os
 
+from . import dir_index
+from . import vfs
+
 DIRNAME = "gamedata"
 log_level = os.getenv("LOG_LEVEL", "INFO")
 
@@ -61,12 +64,27 @@ def FindFile(relpath, prefix, extensions):
     absPath = AbsPath(relpath, prefix)
     if log_level == "DEBUG":
         print("Looking for file: " + absPath + " (extensions: " + str(extensions) + ")")
-    if os.path.isfile(absPath):
-        return True, absPath
-    absPath = os.path.splitext(absPath)[0]
-    for extension in extensions:
-        if os.path.isfile(absPath + "." + extension):
-            return True, absPath + "." + extension
+    index = dir_index.get_index(prefix)
+    if index is not None and not os.path.normpath(relpath).startswith(".."):
+        # case-insensitive lookup in the cached directory listings instead of an isfile per extension
+        found = index.find(relpath, extensions)
+        if found is not None:
+            return True, found
+    else:
+        if os.path.isfile(absPath):
+            return True, absPath
+        absPath = os.path.splitext(absPath)[0]
+        for extension in extensions:
+            if os.path.isfile(absPath + "." + extension):
+                return True, absPath + "." + extension
+    # not a loose file: look into the .pk3 archives of the base folder; returns the entry's virtual
+    # path, read it with vfs.open_file / vfs.read_bytes (vfs.real_path extracts it, for images)
+    if prefix != "":
+        fs = vfs.get_vfs(prefix)
+        if fs is not None:
+            key = fs.find(relpath, extensions)
+            if key is not None:
+                return True, fs.virtual_path(key)
     return False, ""
 
 
@@ -1,65 +1,124 @@
 import os
 from typing import Any, Dict, List, Optional, Tuple
-from .SoF2G2DataParser import parse_shader_file, parse_g2skin_to_json
+from .SoF2G2DataParser import parse_g2skin_to_json
 from .SoF2G2DataParser import get_npcs_folder_data
 from .wpn_parser import parse_wpn_file, parse_inview_file
 from .item_parser import parse_item_file
+from . import npc_index
+from . import weapon_catalog
+from . import search_index
+from . import parse_cache
+from . import corpus_loader
+from . import vfs
+from . import dir_index
+from . import shader_ir
+from .data_cache import DataCache
 
 log_level = os.getenv("LOG_LEVEL", "INFO")
 
-# Shader-related caches
-_cached_shader_query: Optional[str] = None
-_cached_shader_items: Optional[List[Tuple[str, str, str]]] = None
-_cached_shader_data: Dict[str, Dict[str, Any]] = {}
-
-# Skin-related caches
+# Parsed game data, one namespace per kind of data. Entries are validated against the
+# mtime/size of the files they were built from. SOF2_DATA_CACHE_MB sets the memory budget.
+cache = DataCache(
+    max_bytes=int(float(os.getenv("SOF2_DATA_CACHE_MB", "512")) * 1024 * 1024)
+)
+cache.register_namespace("shaders", max_entries=256)
+# the NPC loader modifies the skin data it gets, so hand out copies
+cache.register_namespace("skins", max_entries=16, copy_on_read=True)
+cache.register_namespace("npcs", max_entries=4)
+cache.register_namespace("npc_enum_items", max_entries=4)
+cache.register_namespace("npc_index", max_entries=4)
+cache.register_namespace("skeletons", max_entries=4)
+
+SKINS_DIR = "models/characters/skins"
+
+# model name of the last get_skins() query, preferred by get_shaders_folder_data
 _cached_model_name: str = ""
-_cached_items: List[Tuple[str, str, str]] = []
-_cached_skin_data: Dict[str, Dict[str, Any]] = {}
 
-# NPC-related caches
-_cached_npc_basepath: str = ""
-_cached_npc_items: List[Tuple[str, str, str]] = []
-_cached_npc_data: Dict[str, Dict[str, Any]] = {}
+
+def source_paths(basepath: str, reldir: str, extension: str) -> List[str]:
+    """
+    Everything a game folder's contents depend on, for stamp validation: the loose folder
+    (catches added/removed files), the .pk3 archives and every file with the extension in it.
+    """
+    index = dir_index.get_index(basepath)
+    folder = (index.resolve_dir(reldir) if index is not None else None) or os.path.join(
+        basepath, *reldir.split("/")
+    )
+    return [folder] + vfs.pk3_files(basepath) + vfs.folder_files(basepath, reldir, extension)
 
 
 def reset_shader_cache():
-    global _cached_shader_query, _cached_shader_items, _cached_shader_data
-    _cached_shader_query = None
-    _cached_shader_items = None
-    _cached_shader_data = {}
+    cache.invalidate_namespace("shaders")
 
 
 def reset_skin_cache():
-    global _cached_model_name, _cached_items, _cached_skin_data
+    global _cached_model_name
     _cached_model_name = ""
-    _cached_items = []
-    _cached_skin_data = {}
+    cache.invalidate_namespace("skins")
 
 
 def reset_npc_cache():
-    global _cached_npc_basepath, _cached_npc_items, _cached_npc_data
-    _cached_npc_basepath = ""
-    _cached_npc_items = []
-    _cached_npc_data = {}
+    cache.invalidate_namespace("npcs")
+    cache.invalidate_namespace("npc_enum_items")
+
+
+def invalidate(path: str) -> int:
+    """Drop all cached data built from path (a file or a folder), e.g. after editing it."""
+    return cache.invalidate(path)
+
+
+def _load_shader_file(file_path: str) -> Dict[str, shader_ir.Shader]:
+    """{lowercase name: compiled Shader} of one .shader file."""
+    return cache.get_or_load(
+        "shaders",
+        file_path,
+        lambda: parse_cache.parse_file(file_path, shader_ir.parse_shader_ir),
+        [file_path],
+    )
+
+
+def _load_shader_files(paths: List[str]) -> Dict[str, Dict[str, shader_ir.Shader]]:
+    """{path: compiled shader file}; files not in the cache are parsed in parallel."""
+    loaded: Dict[str, Dict[str, shader_ir.Shader]] = {}
+    missing = []
+    for path in paths:
+        parsed_defs = cache.get("shaders", path)
+        if parsed_defs is None:
+            missing.append(path)
+        else:
+            loaded[path] = parsed_defs
+    if missing:
+        stamps = {path: cache.stamps_for([path]) for path in missing}
+        parsed = corpus_loader.parse_files(
+            missing,
+            shader_ir.parse_shader_ir,
+            on_error=lambda path, e: print(f"Error reading shader file {path}: {e}"),
+        )
+        for path, parsed_defs in parsed.items():
+            cache.put("shaders", path, parsed_defs, stamps=stamps[path])
+            loaded[path] = parsed_defs
+    return {path: loaded[path] for path in paths if path in loaded}
 
 
 def get_shaders_data(basepath: str, filepath: str) -> List[Tuple[str, str, str]]:
     selected_shader = os.path.splitext(os.path.basename(filepath or ""))[0]
     shader_dir = os.path.join(basepath or "", "shaders")
     filename = f"{selected_shader}.shader"
-    file_path = os.path.join(shader_dir, filename)
+    # loose file or extracted from a .pk3
+    file_path = vfs.resolve(basepath or "", f"shaders/{filename}") or os.path.join(
+        shader_dir, filename
+    )
 
     items: List[Tuple[str, str, str]] = []
-    shader_data: Dict[str, Dict[str, Any]] = {}
+    # lowercase shader name -> shader_ir.Shader
+    shader_data: Dict[str, shader_ir.Shader] = {}
 
-    if os.path.isfile(file_path):
+    if vfs.isfile(file_path):
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                txt = f.read()
-            parsed_defs = parse_shader_file(txt)
+            parsed_defs = _load_shader_file(file_path)
             shader_data.update(parsed_defs)
-            for name in parsed_defs.keys():
+            for shader in parsed_defs.values():
+                name = shader.name
                 items.append((name, name, f"shader: {name} (from {filename})"))
         except Exception as e:
             print(f"Error parsing shader file {file_path}: {e}")
@@ -72,13 +131,6 @@ def get_shaders_data(basepath: str, filepath: str) -> List[Tuple[str, str, str]]
 
 
 def get_shaders_folder_data(basepath: str, filepath: str) -> List[Tuple[str, str, str]]:
-    """
-    global \
-        _cached_shader_query, \
-        _cached_shader_items, \
-        _cached_shader_data, \
-        _cached_model_name
-    """
     selected_shader: Optional[str] = None
     if _cached_model_name:
         selected_shader = _cached_model_name
@@ -90,48 +142,30 @@ def get_shaders_folder_data(basepath: str, filepath: str) -> List[Tuple[str, str
 
     selected_shader = selected_shader.strip()
 
-    # if _cached_shader_query == selected_shader and _cached_shader_items:
-    #    return _cached_shader_items
-
-    shader_dir = os.path.join(basepath or "", "shaders")
     items: List[Tuple[str, str, str]] = []
-    shader_data: Dict[str, Dict[str, Any]] = {}
 
-    if os.path.isdir(shader_dir):
-        for fn in os.listdir(shader_dir):
-            if not fn.lower().endswith(".shader"):
-                continue
-            path = os.path.join(shader_dir, fn)
-            try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    txt = f.read()
-                parsed_defs = parse_shader_file(txt)
-                for name, parsed in parsed_defs.items():
-                    shader_data[name] = parsed
-                    basename = name.split("/")[-1]
-                    if (
-                        (name == selected_shader)
-                        or name.endswith("/" + selected_shader)
-                        or (basename == selected_shader)
-                    ):
-                        items.append((name, name, f"shader: {name} (from {fn})"))
-            except Exception as e:
-                print(f"Error reading shader file {path}: {e}")
+    shader_files = _load_shader_files(vfs.folder_files(basepath or "", "shaders", ".shader"))
+    for path, parsed_defs in shader_files.items():
+        fn = os.path.basename(path)
+        for shader in parsed_defs.values():
+            name = shader.name
+            basename = name.split("/")[-1]
+            if (
+                (name == selected_shader)
+                or name.endswith("/" + selected_shader)
+                or (basename == selected_shader)
+            ):
+                items.append((name, name, f"shader: {name} (from {fn})"))
 
     if not items:
         items.append(("None", "None", "No shader found"))
 
-    _cached_shader_query = selected_shader
-    _cached_shader_items = items
-    _cached_shader_data = shader_data
-
     return items
 
 
 def _skin_contains_model(skin_path: str, model_name: str) -> bool:
     try:
-        with open(skin_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
+        lines = vfs.read_text(skin_path).splitlines()
         in_prefs = False
         in_models = False
         stack: List[str] = []
@@ -186,35 +220,45 @@ def _skin_contains_model(skin_path: str, model_name: str) -> bool:
 def get_skins(
     basepath: str, filepath: str
 ) -> Tuple[List[Tuple[str, str, str]], Dict[str, Dict[str, Any]]]:
+    global _cached_model_name
     model_name = os.path.splitext(os.path.basename(filepath or ""))[0]
+    skins_dir = os.path.join(basepath, "models", "characters", "skins")
+
+    items, skin_data = cache.get_or_load(
+        "skins",
+        (skins_dir, model_name),
+        lambda: _load_skins(basepath, model_name),
+        source_paths(basepath, SKINS_DIR, ".g2skin"),
+    )
+
+    _cached_model_name = model_name
+    print("Available .g2skin files:", len(items))
+    return items, skin_data
 
+
+def _load_skins(
+    basepath: str, model_name: str
+) -> Tuple[List[Tuple[str, str, str]], Dict[str, Dict[str, Any]]]:
     items: List[Tuple[str, str, str]] = []
     skin_data: Dict[str, Dict[str, Any]] = {}
-    skins_dir = os.path.join(basepath, "models", "characters", "skins")
-    if os.path.exists(skins_dir):
-        for filename in os.listdir(skins_dir):
-            if filename.lower().endswith(".g2skin"):
-                skin_path = os.path.join(skins_dir, filename)
-                try:
-                    if _skin_contains_model(skin_path, model_name):
-                        with open(
-                            skin_path, "r", encoding="utf-8", errors="ignore"
-                        ) as f:
-                            text = f.read()
-                        parsed_dict = parse_g2skin_to_json(text)
-                        desc = f"Skin: {filename}, materials={len(parsed_dict.get('materials', []))}"
-                        items.append((filename, filename, desc))
-                        skin_data[filename] = parsed_dict
-                except Exception as e:
-                    print(f"Error while checking skin {skin_path}: {e}")
+    matching = [
+        skin_path
+        for skin_path in vfs.folder_files(basepath, SKINS_DIR, ".g2skin")
+        if _skin_contains_model(skin_path, model_name)
+    ]
+    parsed = corpus_loader.parse_files(
+        matching,
+        parse_g2skin_to_json,
+        on_error=lambda path, e: print(f"Error while checking skin {path}: {e}"),
+    )
+    for skin_path, parsed_dict in parsed.items():
+        filename = os.path.basename(skin_path)
+        desc = f"Skin: {filename}, materials={len(parsed_dict.get('materials', []))}"
+        items.append((filename, filename, desc))
+        skin_data[filename] = parsed_dict
 
     if not items:
         items.append(("None", "None", "No skin found"))
-
-    _cached_model_name = model_name
-    _cached_items = items
-    _cached_skin_data = skin_data
-    print("Available .g2skin files:", len(items))
     return items, skin_data
 
 
@@ -222,86 +266,15 @@ def get_weapon_enum_items(basepath):
     """
     Gibt eine Liste von EnumItems für Waffen zurück: (identifier, name, description)
     NEU: Lädt zuerst die inview Datei als primäre Quelle, dann werden die wpn Daten zu den entsprechenden inview Einträgen hinzugefügt.
+    Die Daten kommen aus dem WeaponCatalog und werden nur neu geparst, wenn sich eine der Dateien ändert.
     """
-    items = []
-
-    # Load and parse inview file first (primary source)
-    inview_path = os.path.join(basepath, "inview", "SOF2.inview")
-    weapons = []
-
-    if os.path.isfile(inview_path):
-        try:
-            inview_text = open(
-                inview_path, "r", encoding="utf-8", errors="ignore"
-            ).read()
-            weapons = parse_inview_file(inview_text)
-            print(f"Loaded {len(weapons)} weapons from inview file")
-        except Exception as e:
-            print(f"Error reading/parsing SOF2.inview: {e}")
-    else:
-        print(f"Inview file not found: {inview_path}")
-
-    # Load and parse wpn file (secondary source for additional data)
-    wpn_path = os.path.join(basepath, "ext_data", "SOF2.wpn")
-    wpn_weapons = []
+    catalog = weapon_catalog.get_weapon_catalog(basepath)
+    return catalog.enum_items, catalog.weapons
 
-    if os.path.isfile(wpn_path):
-        try:
-            wpn_text = open(wpn_path, "r", encoding="utf-8", errors="ignore").read()
-            wpn_weapons = parse_wpn_file(wpn_text)
-            print(f"Loaded {len(wpn_weapons)} weapons from wpn file")
-        except Exception as e:
-            print(f"Error reading/parsing SOF2.wpn: {e}")
-
-    # Match wpn entries to inview weapons by name and assign wpn data
-    if weapons and wpn_weapons:
-        # Create a lookup dictionary for wpn weapons by name
-        wpn_lookup = {}
-        for wpn_weapon in wpn_weapons:
-            wpn_name = wpn_weapon.get("name", "")
-            if wpn_name:
-                wpn_lookup[wpn_name] = wpn_weapon
-
-        # Assign wpn data to matching inview weapons
-        for weapon in weapons:
-            weapon_name = weapon.get("name", "")
-            if weapon_name in wpn_lookup:
-                weapon["wpn"] = wpn_lookup[weapon_name]
-                if log_level == "DEBUG":
-                    print(f"Assigned wpn data to inview weapon: {weapon_name}")
-
-    # Extract weapon names from inview data for enum items
-    for weapon in weapons:
-        name = weapon.get("name", "")
-        if name:
-            # Try to get display name from wpn data if available
-            display_name = name
-            if "wpn" in weapon:
-                display_name = weapon["wpn"].get("displayName", name)
-
-            # Try to get model from wpn data if available
-            model = ""
-            if "wpn" in weapon:
-                model = weapon["wpn"].get("model", "")
-
-            # Build description
-            desc_parts = []
-            if display_name != name:
-                desc_parts.append(f"{display_name}")
-            if model:
-                desc_parts.append(f"{model}")
-
-            description = (
-                " | ".join(desc_parts) if desc_parts else f"Inview weapon: {name}"
-            )
-            items.append((name, name, description))
-
-    if not items:
-        items.append(("None", "None", "No weapons found"))
-
-    items.sort(key=lambda x: x[1])
 
-    return items, weapons
+def get_weapon_catalog(basepath: str) -> weapon_catalog.WeaponCatalog:
+    """WeaponCatalog (inview + wpn + item, joined by name and model) for a basepath."""
+    return weapon_catalog.get_weapon_catalog(basepath)
 
 
 def get_npc_enum_items(basepath):
@@ -310,8 +283,18 @@ def get_npc_enum_items(basepath):
     identifier = Name
     name = Name
     description = besser formatierter Kommentar
+    Die Liste ist nach identifier sortiert und wird pro geladenem NPC-Ordner nur einmal gebaut.
     """
+    return _npc_enum_entry(basepath)[0]
+
+
+def _npc_enum_entry(basepath: str) -> Tuple[List[Tuple[str, str, str]], search_index.SearchIndex]:
+    """(enum items, SearchIndex over them), built together once per loaded NPC folder."""
     _, npcs_data = get_npcs_folder_data_cached(basepath)
+    cached = cache.get("npc_enum_items", basepath)
+    # only valid for the npc data object it was built from
+    if cached is not None and cached[0] is npcs_data:
+        return cached[1], cached[2]
     items = []
 
     # TODO MAYBE better cache this instead files
@@ -355,20 +338,34 @@ def get_npc_enum_items(basepath):
     if not items:
         items.append(("None", "None", "No NPC files found"))
 
-    return items
+    items.sort(key=lambda x: x[0])
+    index = search_index.SearchIndex(items)
+    cache.put("npc_enum_items", basepath, (npcs_data, items, index))
+    return items, index
+
+
+def get_npc_search_index(basepath: str) -> search_index.SearchIndex:
+    """SearchIndex over get_npc_enum_items for the NPC browser panel, rebuilt with the items."""
+    return _npc_enum_entry(basepath)[1]
+
+
+def get_weapon_search_index(basepath: str) -> search_index.SearchIndex:
+    """SearchIndex over the WeaponCatalog enum items for the weapon browser panel."""
+    return weapon_catalog.get_weapon_catalog(basepath).search_index
 
 
 def get_npcs_folder_data_cached(basepath: str) -> List[Tuple[str, str, str]]:
     """Cached version of get_npcs_folder_data that returns EnumProperty format"""
-    global _cached_npc_basepath, _cached_npc_items, _cached_npc_data
-
-    if basepath == _cached_npc_basepath and _cached_npc_items:
+    cached = cache.get("npcs", basepath)
+    if cached is not None:
         if log_level == "DEBUG":
             print(
-                f"Using cached NPCs for basepath: {basepath}, count: {len(_cached_npc_items)}"
+                f"Using cached NPCs for basepath: {basepath}, count: {len(cached[0])}"
             )
-        return _cached_npc_items, _cached_npc_data
+        return cached
 
+    # stamps before parsing, so a file edited meanwhile makes the entry outdated
+    stamps = cache.stamps_for(source_paths(basepath, "npcs", ".npc"))
     # Use the existing get_npcs_folder_data function
     npc_data = get_npcs_folder_data(basepath)
 
@@ -388,13 +385,26 @@ def get_npcs_folder_data_cached(basepath: str) -> List[Tuple[str, str, str]]:
     if not items:
         items.append(("None", "None", "No NPC files found"))
 
-    _cached_npc_basepath = basepath
-    _cached_npc_items = items
-    _cached_npc_data = npc_data
+    cache.put("npcs", basepath, (items, npc_data), stamps=stamps)
     print("Available .npc files:", len(items))
     return items, npc_data
 
 
+def get_npc_index(basepath: str) -> npc_index.NpcIndex:
+    """
+    NpcIndex (name lookup, ParentTemplate chains, model/skin reverse maps) for a basepath,
+    built once per loaded NPC folder like the enum items.
+    """
+    _, npc_data = get_npcs_folder_data_cached(basepath)
+    cached = cache.get("npc_index", basepath)
+    # only valid for the npc data object it was built from
+    if cached is not None and cached[0] is npc_data:
+        return cached[1]
+    index = npc_index.NpcIndex(npc_data)
+    cache.put("npc_index", basepath, (npc_data, index))
+    return index
+
+
 def get_default_item_file(
     basepath: str, filename: str = "ext_data/SOF2.item"
 ) -> Tuple[List[Tuple[str, str, str]], Dict[str, Any]]:
@@ -403,15 +413,18 @@ def get_default_item_file(
     Returns (items, item_data) where items is list of (identifier, name, description) tuples
     and item_data is dict with 'weapons' and 'items' arrays containing parsed data.
     """
+    if os.path.normpath(filename) == weapon_catalog.ITEM_FILE:
+        catalog = weapon_catalog.get_weapon_catalog(basepath)
+        return catalog.item_enum_items, catalog.item_data
+
     items: List[Tuple[str, str, str]] = []
     item_data: Dict[str, Any] = {"weapons": [], "items": []}
 
-    item_path = os.path.join(basepath, filename)
+    item_path = vfs.resolve(basepath, filename.replace(os.sep, "/")) or os.path.join(basepath, filename)
 
-    if os.path.isfile(item_path):
+    if vfs.isfile(item_path):
         try:
-            with open(item_path, "r", encoding="utf-8", errors="ignore") as f:
-                text = f.read()
+            text = vfs.read_text(item_path)
             parsed_items = parse_item_file(text)
 
             for item in parsed_items:
@@ -454,6 +467,26 @@ def get_default_item_file(
     return items, item_data
 
 
+def write_json_atomic(path: str, data: Any) -> None:
+    """json.dump to a temp file next to path, then replace path - readers never see half a file."""
+    import json
+    import tempfile
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # own temp file per writer, concurrent exports must not write into each other's file
+    f = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False
+    )
+    try:
+        with f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(f.name, path)
+    finally:
+        if os.path.exists(f.name):
+            os.remove(f.name)
+
+
 def generate_json_results(
     weapons: List[Dict[str, Any]],
     loaded_default_items_data: Dict[str, Any],
@@ -471,9 +504,6 @@ def generate_json_results(
     Returns:
         Tuple of (success: bool, message: str)
     """
-    import json
-    
-
     try:
         # Create exported_json_data directory
         export_dir = os.path.join(basepath, "exported_json_data")
@@ -481,13 +511,11 @@ def generate_json_results(
 
         # Export weapons
         weapons_file = os.path.join(export_dir, "SoF2_Weapons.json")
-        with open(weapons_file, "w", encoding="utf-8") as f:
-            json.dump(weapons, f, indent=2, ensure_ascii=False)
+        write_json_atomic(weapons_file, weapons)
 
         # Export items
         items_file = os.path.join(export_dir, "SoF2_Items.json")
-        with open(items_file, "w", encoding="utf-8") as f:
-            json.dump(loaded_default_items_data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(items_file, loaded_default_items_data)
 
         weapons_count = len(weapons)
         items_count = len(loaded_default_items_data.get("items", []))
@@ -520,9 +548,6 @@ def generate_npc_json_results(
     Returns:
         Tuple of (success: bool, message: str)
     """
-    import json
-    
-
     try:
         # Create exported_json_data directory
         export_dir = os.path.join(basepath, "exported_json_data")
@@ -530,8 +555,7 @@ def generate_npc_json_results(
 
         # Export NPCs
         npcs_file = os.path.join(export_dir, "SoF2_NPCs.json")
-        with open(npcs_file, "w", encoding="utf-8") as f:
-            json.dump(npcs_data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(npcs_file, npcs_data)
 
         npcs_count = len(npcs_data)
         
@@ -547,6 +571,24 @@ def generate_npc_json_results(
         return False, error_msg
 
 
+def skl_json_filename(i: int, skl_data: Any) -> str:
+    """File name generate_individual_skl_files uses for the i-th entry of a skeleton list."""
+    filename = f"skeleton_{i:03d}.json"
+    if isinstance(skl_data, dict):
+        if "name" in skl_data:
+            filename = f"{skl_data['name']}.json"
+        elif "filename" in skl_data:
+            filename = f"{skl_data['filename']}.json"
+        elif "skeleton_name" in skl_data:
+            filename = f"{skl_data['skeleton_name']}.json"
+
+    filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
+    filename = filename.replace(' ', '_')
+    if not filename.endswith('.json'):
+        filename += '.json'
+    return filename
+
+
 def generate_individual_skl_files(all_skl_data: Any, basepath: str) -> Tuple[bool, str]:
     """
     Generate skeleton JSON exports under basepath/exported_json_data/skeletons/.
@@ -562,9 +604,6 @@ def generate_individual_skl_files(all_skl_data: Any, basepath: str) -> Tuple[boo
     Returns:
         Tuple of (success: bool, message: str)
     """
-    import json
-    
-    
     try:
         # Create skeletons subdirectory
         skeletons_dir = os.path.join(basepath, "exported_json_data", "skeletons")
@@ -580,8 +619,7 @@ def generate_individual_skl_files(all_skl_data: Any, basepath: str) -> Tuple[boo
                 if not filename.endswith('.json'):
                     filename += '.json'
                 out_path = os.path.join(skeletons_dir, filename)
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(value, f, indent=2, ensure_ascii=False)
+                write_json_atomic(out_path, value)
                 created_files.append(filename)
             message = f"Successfully created {len(created_files)} skeleton files in {skeletons_dir}:\n" + "\n".join(f"- {fn}" for fn in created_files)
             print(message)
@@ -590,23 +628,9 @@ def generate_individual_skl_files(all_skl_data: Any, basepath: str) -> Tuple[boo
         # Otherwise assume list-like and write one file per entry
         created_files = []
         for i, skl_data in enumerate(all_skl_data or []):
-            filename = f"skeleton_{i:03d}.json"
-            if isinstance(skl_data, dict):
-                if "name" in skl_data:
-                    filename = f"{skl_data['name']}.json"
-                elif "filename" in skl_data:
-                    filename = f"{skl_data['filename']}.json"
-                elif "skeleton_name" in skl_data:
-                    filename = f"{skl_data['skeleton_name']}.json"
-
-            filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.')).rstrip()
-            filename = filename.replace(' ', '_')
-            if not filename.endswith('.json'):
-                filename += '.json'
-
+            filename = skl_json_filename(i, skl_data)
             file_path = os.path.join(skeletons_dir, filename)
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(skl_data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(file_path, skl_data)
             created_files.append(filename)
 
         message = f"Successfully created {len(created_files)} individual skeleton files in {skeletons_dir}:\n" + "\n".join(f"- {fn}" for fn in created_files)
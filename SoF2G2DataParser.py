@@ -2,6 +2,12 @@ import os
 import re
 from typing import Tuple, List, Dict, Any, Optional
 
+from . import corpus_loader
+from . import vfs
+
+# cache version for all parsers of this module (npc, shader, skin), see parse_cache
+PARSER_VERSION = 1
+
 # ---------------- Tokenizer ----------------
 _token_re = re.compile(r'"[^"]*"|\{|\}|[^\s\{\}]+')
 
@@ -163,22 +169,12 @@ def get_npcs_folder_data(basepath: str) -> Dict[str, Dict[str, Any]]:
     Scan basepath/npcs and parse all .npc files.
     Returns mapping: filename -> parsed_dict
     """
-    npc_dir = os.path.join(basepath, "npcs")
     results: Dict[str, Dict[str, Any]] = {}
-    if not os.path.isdir(npc_dir):
-        return results
 
-    for fn in sorted(os.listdir(npc_dir)):
-        if not fn.lower().endswith(".npc"):
-            continue
-        path = os.path.join(npc_dir, fn)
-        try:
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                txt = f.read()
-            parsed = parse_npc_text(txt)
-            results[fn] = parsed
-        except Exception as e:
-            print(f"Error parsing {path}: {e}")
+    # loose and .pk3 files; parsed in parallel for a cold cache, merged in sorted file name order
+    parsed = corpus_loader.parse_files(vfs.folder_files(basepath, "npcs", ".npc"), parse_npc_text)
+    for path, parsed_dict in parsed.items():
+        results[os.path.basename(path)] = parsed_dict
     return results
 
 
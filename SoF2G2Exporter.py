@@ -1,172 +1,290 @@
+import hashlib
 import os
 import json
+import threading
 from typing import Tuple
 
 from . import SoF2G2DataCache as DataCache
 from . import skl_parser
+from . import npc_index
+from . import parse_cache
+from . import corpus_loader
+from . import vfs
+from . import weapon_catalog
 from .SoF2G2DataParser import parse_g2skin_to_json
 
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
 
 def _load_all_skl_data(basepath: str):
     """Parse all .skl files under basepath/skeletons and return a list of dicts."""
     all_skl_data = []
-    skeletons_dir = os.path.join(basepath, "skeletons")
-    if not os.path.isdir(skeletons_dir):
-        return all_skl_data
-    for skl_file in os.listdir(skeletons_dir):
-        if not skl_file.endswith(".skl"):
-            continue
-        try:
-            with open(
-                os.path.join(skeletons_dir, skl_file), "r", encoding="utf-8"
-            ) as f:
-                parsed = skl_parser.parse_skl(f.read())
-            if isinstance(parsed, dict):
-                parsed["filename"] = skl_file
-            all_skl_data.append(parsed)
-        except Exception as e:
-            print(f"Error parsing SKL file {skl_file}: {e}")
+    parsed_files = corpus_loader.parse_files(
+        vfs.folder_files(basepath, "skeletons", ".skl"),
+        skl_parser.parse_skl,
+        errors="strict",
+        on_error=lambda path, e: print(f"Error parsing SKL file {os.path.basename(path)}: {e}"),
+    )
+    for path, parsed in parsed_files.items():
+        if isinstance(parsed, dict):
+            parsed["filename"] = os.path.basename(path)
+        all_skl_data.append(parsed)
     return all_skl_data
 
-def _find_character_templates_using_skin(skin_name: str, npcs_data: dict) -> list:
-    """Find all CharacterTemplates that use the given skin_name."""
-    found_templates = []
-    for _npc_filename, npc_content in (npcs_data or {}).items():
-        char_templates = npc_content.get("CharacterTemplate", [])
-        if not isinstance(char_templates, list):
-            char_templates = [char_templates]
-        for ct in char_templates:
-            skin_field = ct.get("Skin", None)
-            if isinstance(skin_field, dict):
-                fv = skin_field.get("File")
+def _find_character_templates_using_skin(skin_name: str, index: npc_index.NpcIndex) -> list:
+    """Find all CharacterTemplates that use the given skin_name (reverse map of the NpcIndex)."""
+    return list(index.templates_using_skin(skin_name))
+
+def _find_skin_inventories(skin_name: str, index: npc_index.NpcIndex) -> dict:
+    """ct/skin Inventory of the first CharacterTemplate that uses skin_name."""
+    found_character_templates = _find_character_templates_using_skin(skin_name, index)
+    #das sind skin varianten (NPC_NOitems , NPC_withItems, NPC_Elite etc)
+    found_inventory = {
+        "ct_inventory": None,
+        "skin_inventory": None,
+    }
+    for ct in found_character_templates:
+        ct_inventory = ct.get("Inventory", None)
+        found_inventory["ct_inventory"] = ct_inventory
+        # for each skin in ct get the "Skin" Inventories
+        ct_skins = ct.get("Skin", [])
+        if isinstance(ct_skins, list):
+            #get the skin for this skin_name
+            for skin_entry in ct_skins:
+                fv = skin_entry.get("File")
                 if fv == skin_name:
-                    found_templates.append(ct)
-            elif isinstance(skin_field, list):
-                for skin_entry in skin_field:
-                    if isinstance(skin_entry, dict):
-                        fv = skin_entry.get("File")
-                        if fv == skin_name:
-                            found_templates.append(ct)
-    return found_templates
+                    found_inventory["skin_inventory"] = skin_entry.get("Inventory", None)
+        elif isinstance(ct_skins, dict):
+            fv = ct_skins.get("File")
+            if fv == skin_name:
+                found_inventory["skin_inventory"] = ct_skins.get("Inventory", None)
+        else:
+            print(f"ct_skins is neither list nor dict for skin {skin_name}: {ct_skins}")
+        break  # only need the first matching CharacterTemplate
+    if log_level == "DEBUG":
+        print(f"template length for skin {skin_name}: {len(found_character_templates)}")
+    return found_inventory
+
+
+def load_all_data(basepath: str) -> dict:
+    """
+    Weapons, items, NPCs (with their NpcIndex) and skeletons of basepath, in the format export_all_data returns.
+    Everything comes from the caches, nothing is written - this is what the loaders need.
+    """
+    _, weapons = DataCache.get_weapon_enum_items(basepath)
+    _, items_data = DataCache.get_default_item_file(basepath, "ext_data/SOF2.item")
+    _, npcs_data = DataCache.get_npcs_folder_data_cached(basepath)
+    npcs_index = DataCache.get_npc_index(basepath)
+    skl_data = DataCache.cache.get_or_load(
+        "skeletons",
+        basepath,
+        lambda: _load_all_skl_data(basepath),
+        DataCache.source_paths(basepath, "skeletons", ".skl"),
+    )
+    return {
+        "weapons": weapons,
+        "items": items_data,
+        "npcs": npcs_data,
+        "npc_index": npcs_index,
+        "skeletons": skl_data,
+    }
+
+
+# ===== incremental export =====
+
+MANIFEST_FILE = "_manifest.json"
+MANIFEST_VERSION = 2
+
+# job groups only written with generate_separate; their outputs stay when a run skips them
+_SEPARATE_JOBS = ("weapons", "npcs", "skeletons")
+
+# one export at a time: prefetch threads (a superseded job may still run) and execute can all export
+_export_lock = threading.Lock()
+
+
+def _stamps(paths) -> dict:
+    stamps = {}
+    for path in paths:
+        try:
+            st = vfs.stat(path)
+            stamps[path] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamps[path] = None
+    return stamps
+
+
+def _digest(data) -> str:
+    """Stamp of derived inputs (e.g. a skin's inventories from the .npc files) for the manifest."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _load_manifest(export_dir: str) -> dict:
+    try:
+        with open(os.path.join(export_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and isinstance(manifest.get("jobs"), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "jobs": {}}
+
+
+def _is_up_to_date(export_dir: str, job: dict, stamps: dict) -> bool:
+    if not job or job.get("sources") != stamps:
+        return False
+    return all(os.path.isfile(os.path.join(export_dir, out)) for out in job.get("outputs", []))
+
+
+def _remove_outputs(export_dir: str, outputs) -> None:
+    for out in outputs:
+        path = os.path.join(export_dir, out)
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Error clearing {path}: {e}")
+
 
 def export_all_data(
-    basepath: str, *, generate_separate: bool = True
+    basepath: str, *, generate_separate: bool = True, all_data: dict = None, force: bool = False
 ) -> Tuple[bool, str, dict]:
     """
-    Export a single combined JSON file containing weapons, items, NPCs, and skeletons.
-    Creates exported_json_data/SoF2_All.json in the given basepath.
+    Export weapons, items, NPCs, skins and skeletons as JSON into basepath/exported_json_data.
+
+    Incremental: exported_json_data/_manifest.json records the stamps (mtime_ns, size) of the
+    source files of every output. Outputs whose sources are unchanged are not rewritten, all
+    others are written atomically; the manifest itself only when something changed. Pass
+    all_data (from load_all_data) to reuse data already in memory; force=True rewrites everything.
+    Outputs of the legacy exports are kept when generate_separate=False skips them.
     """
+    with _export_lock:
+        return _export_all_data(basepath, generate_separate, all_data, force)
+
+
+def _export_all_data(
+    basepath: str, generate_separate: bool, all_data: dict, force: bool
+) -> Tuple[bool, str, dict]:
     try:
-        # Clear the exported_json_data folder before exporting again
         export_dir = os.path.join(basepath, "exported_json_data")
-        if os.path.isdir(export_dir):
-            for filename in os.listdir(export_dir):
-                file_path = os.path.join(export_dir, filename)
-                try:
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                    elif os.path.isdir(file_path):
-                        # Remove all files in subdirectory, then the subdirectory itself
-                        for subfile in os.listdir(file_path):
-                            subfile_path = os.path.join(file_path, subfile)
-                            if os.path.isfile(subfile_path):
-                                os.remove(subfile_path)
-                        os.rmdir(file_path)
-                except Exception as e:
-                    print(f"Error clearing {file_path}: {e}")
-
-        # Ensure export directory exists
         os.makedirs(export_dir, exist_ok=True)
 
-        # Weapons and items
-        _, weapons = DataCache.get_weapon_enum_items(basepath)
-        _, items_data = DataCache.get_default_item_file(basepath, "ext_data/SOF2.item")
+        if all_data is None:
+            all_data = load_all_data(basepath)
+        weapons = all_data["weapons"]
+        items_data = all_data["items"]
+        npcs_data = all_data["npcs"]
+        skl_data = all_data["skeletons"]
+        # skin -> templates reverse map, built once and not per skin
+        npcs_index = all_data.get("npc_index")
+        if npcs_index is None:
+            npcs_index = npc_index.NpcIndex(npcs_data)
 
-        # NPCs
-        _, npcs_data = DataCache.get_npcs_folder_data_cached(basepath)
+        manifest_jobs = _load_manifest(export_dir)["jobs"]
+        old_jobs = {} if force else manifest_jobs
+        jobs = {}
+        rebuilt = 0
+        skipped = 0
 
-        # Prepare skin_data export directory
-        skin_data_dir = os.path.join(export_dir, "skin_data")
-        os.makedirs(skin_data_dir, exist_ok=True)
+        def run_job(name, sources, build):
+            nonlocal rebuilt, skipped
+            stamps = sources if isinstance(sources, dict) else _stamps(sources)
+            old = old_jobs.get(name)
+            if _is_up_to_date(export_dir, old, stamps):
+                jobs[name] = old
+                skipped += 1
+                return
+            if old:
+                _remove_outputs(export_dir, old.get("outputs", []))
+            outputs = build()
+            if outputs is not None:
+                jobs[name] = {"sources": stamps, "outputs": outputs}
+            rebuilt += 1
 
-        # get all files from basepath/models/characters/skins
-        skin_source_dir = os.path.join(basepath, "models", "characters", "skins")
-        skin_data_files = os.listdir(skin_source_dir)
-        #for each file in skin_data_files, use parse_g2skin_to_json to parse and save as json inside skin_data_dir
-        for skin_file in skin_data_files:
-            if not skin_file.endswith(".g2skin"):
-                continue
+        # Skins: one output per .g2skin, depends on the skin file and on the inventories the
+        # .npc files give it (a digest, not the stamps of every .npc file)
+        skin_data_dir = os.path.join(export_dir, "skin_data")
+        # loose and .pk3 skins
+        for skin_file_path in vfs.folder_files(basepath, DataCache.SKINS_DIR, ".g2skin"):
+            skin_file = os.path.basename(skin_file_path)
             skin_name = os.path.splitext(skin_file)[0]
-            skin_file_path = os.path.join(skin_source_dir, skin_file)
-            try:
-                with open(skin_file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    parsed_skin = parse_g2skin_to_json(f.read())
-
-                    found_character_templates = _find_character_templates_using_skin(skin_name, npcs_data)
-                    #das sind skin varianten (NPC_NOitems , NPC_withItems, NPC_Elite etc)
-                    found_inventory = {
-                        "ct_inventory": None,
-                        "skin_inventory": None,
-                    }
-                    for ct in found_character_templates:
-                        ct_inventory = ct.get("Inventory", None)
-                        #print(f"Found ct-inventory for skin {skin_name}: {ct_inventory}")
-                        found_inventory["ct_inventory"] = ct_inventory
-                        # for each skin in ct get the "Skin" Inventories
-                        ct_skins = ct.get("Skin", [])
-                        if isinstance(ct_skins, list):
-                            #get the skin for this skin_name
-                            for skin_entry in ct_skins:
-                                fv = skin_entry.get("File")
-                                if fv == skin_name:
-                                    skin_inventory = skin_entry.get("Inventory", None)
-                                    #print(f"Found skin-inventory for skin {skin_name}: {skin_inventory}")
-                                    found_inventory["skin_inventory"] = skin_inventory
-                        elif isinstance(ct_skins, dict):
-                            fv = ct_skins.get("File")
-                            if fv == skin_name:
-                                skin_inventory = ct_skins.get("Inventory", None)
-                                #print(f"Found skin-inventory for skin {skin_name}: {skin_inventory}")
-                                found_inventory["skin_inventory"] = skin_inventory
-                        else:
-                            print(f"ct_skins is neither list nor dict for skin {skin_name}: {ct_skins}")
-                        break  # only need the first matching CharacterTemplate
-                    parsed_skin["found_inventories"] = found_inventory
-                    print(f"template length for skin {skin_name}: {len(found_character_templates)}")
-                out_path = os.path.join(skin_data_dir, f"{skin_name}.json")
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(parsed_skin, f, indent=2, ensure_ascii=False)
-            except Exception:
-                # fail-soft; do not stop processing other skins
-                pass
-
-        # Skeletons from parsing .skl files
-        skl_data = _load_all_skl_data(basepath)
+            out_rel = os.path.join("skin_data", f"{skin_name}.json")
+
+            found_inventories = _find_skin_inventories(skin_name, npcs_index)
+
+            def build_skin(skin_file_path=skin_file_path, out_rel=out_rel, found_inventories=found_inventories):
+                try:
+                    parsed_skin = parse_cache.parse_file(skin_file_path, parse_g2skin_to_json)
+                    parsed_skin["found_inventories"] = found_inventories
+                    DataCache.write_json_atomic(os.path.join(export_dir, out_rel), parsed_skin)
+                    return [out_rel]
+                except Exception:
+                    # fail-soft; do not stop processing other skins
+                    return None
+
+            stamps = _stamps([skin_file_path])
+            stamps["inventories"] = _digest(found_inventories)
+            run_job(f"skin:{skin_file}", stamps, build_skin)
+        os.makedirs(skin_data_dir, exist_ok=True)
 
         # Use existing generators for legacy exports only
         if generate_separate:
-            DataCache.generate_json_results(weapons, items_data, basepath)
-            DataCache.generate_npc_json_results(npcs_data, basepath)
-            if skl_data:
-                DataCache.generate_individual_skl_files(skl_data, basepath)
+            def build_weapons():
+                ok, _ = DataCache.generate_json_results(weapons, items_data, basepath)
+                return ["SoF2_Weapons.json", "SoF2_Items.json"] if ok else None
+
+            run_job(
+                "weapons",
+                [
+                    os.path.join(basepath, weapon_catalog.INVIEW_FILE),
+                    os.path.join(basepath, weapon_catalog.WPN_FILE),
+                    os.path.join(basepath, weapon_catalog.ITEM_FILE),
+                ],
+                build_weapons,
+            )
+
+            def build_npcs():
+                ok, _ = DataCache.generate_npc_json_results(npcs_data, basepath)
+                return ["SoF2_NPCs.json"] if ok else None
+
+            run_job("npcs", DataCache.source_paths(basepath, "npcs", ".npc"), build_npcs)
+
+            def build_skeletons():
+                if not skl_data:
+                    return []
+                ok, _ = DataCache.generate_individual_skl_files(skl_data, basepath)
+                if not ok:
+                    return None
+                return [
+                    os.path.join("skeletons", DataCache.skl_json_filename(i, d))
+                    for i, d in enumerate(skl_data)
+                ]
+
+            run_job("skeletons", DataCache.source_paths(basepath, "skeletons", ".skl"), build_skeletons)
+
+        for name, old in manifest_jobs.items():
+            if name in jobs:
+                continue
+            if not generate_separate and name in _SEPARATE_JOBS:
+                # not regenerated in this mode, keep them
+                jobs[name] = old
+            else:
+                # outputs of sources that no longer exist
+                _remove_outputs(export_dir, old.get("outputs", []))
+
+        if jobs != manifest_jobs:
+            DataCache.write_json_atomic(
+                os.path.join(export_dir, MANIFEST_FILE), {"version": MANIFEST_VERSION, "jobs": jobs}
+            )
 
         skl_count = len(skl_data or [])
 
         msg = (
             f"Successfully exported legacy JSONs: "
             f"weapons={len(weapons)}, items={len(items_data.get('items', []))}, "
-            f"npcs={len(npcs_data)}, skeletons={skl_count}"
-        )
-        return (
-            True,
-            msg,
-            {
-                "weapons": weapons,
-                "items": items_data,
-                "npcs": npcs_data,
-                "skeletons": skl_data,
-            },
+            f"npcs={len(npcs_data)}, skeletons={skl_count} "
+            f"({rebuilt} outputs rebuilt, {skipped} unchanged)"
         )
+        return True, msg, all_data
 
     except Exception as e:
         err = f"Error exporting combined JSON: {str(e)}"
@@ -3,13 +3,17 @@ from .mod_reload import reload_modules
 reload_modules(
     locals(),
     __package__,
-    ["", "SoF2G2Constants", "SoF2G2Math", "MrwProfiler"],
-    [".casts", ".error_types"],
+    ["", "SoF2G2Constants", "SoF2G2Math", "MrwProfiler", "g2_math", "gla_format"],
+    [".casts", ".error_types", ".frames_index"],
 )  # nopep8
 import os  # noqa: E402
 from . import SoF2G2Constants  # noqa: E402
 from . import SoF2G2Math  # noqa: E402
 from . import MrwProfiler  # noqa: E402
+from . import g2_math  # noqa: E402
+from . import gla_format  # noqa: E402
+from . import import_steps  # noqa: E402
+from . import import_pipeline  # noqa: E402
 from .casts import (  # noqa: E402
     optional_cast,
     downcast,
@@ -20,9 +24,17 @@ from .casts import (  # noqa: E402
 )
 from .error_types import ErrorMessage, NoError, ensureListIsGapless  # noqa: E402
 
-from typing import BinaryIO, Dict, List, Optional, Tuple  # noqa: E402
-from enum import Enum  # noqa: E402
-import struct  # noqa: E402
+# the file structures are bpy-free (gla_format); this module adds the Blender import/export
+from .gla_format import (  # noqa: E402
+    AnimationLoadMode,
+    MdxaBoneOffsets,
+    MdxaHeader,
+    decode,
+    readString,
+)
+
+from typing import Dict, Generator, List, Optional, Tuple  # noqa: E402
+import numpy as np  # noqa: E402
 import bpy  # noqa: E402  # pyright: ignore[reportMissingImports]
 import mathutils  # noqa: E402  # pyright: ignore[reportMissingImports]
 
@@ -32,128 +44,9 @@ PROFILE = False
 # show progress & remaining time every 30 seconds.
 PROGRESS_UPDATE_INTERVAL = 30
 
-def decode(bs: bytes) -> str:
-    end = bs.find(b"\0")  # find null termination
-    if end == -1:  # if none exists, there is no end.
-        return bs.decode()
-    return bs[:end].decode()  # otherwise cut it off at end
-
-
-def readString(file: BinaryIO) -> str:
-    return decode(struct.unpack("64s", file.read(SoF2G2Constants.MAX_QPATH))[0])
-
-
-class MdxaHeader:
-    def __init__(self):
-        self.name = ""
-        self.scale = 1  # does not seem to be used by Jedi Academy anyway - or is it? I need it in import!
-        self.numFrames = -1
-        self.ofsFrames = -1
-        self.numBones = -1
-        self.ofsCompBonePool = -1
-        # this is also MdxaSkelOffsets.baseOffset + MdxaSkelOffsets.boneOffsets[0] - probably a historic leftover
-        self.ofsSkel = -1
-        self.ofsEnd = -1
-
-    def loadFromFile(self, file: BinaryIO) -> Tuple[bool, ErrorMessage]:
-        # check ident
-        (ident,) = struct.unpack("4s", file.read(4))
-        if ident != SoF2G2Constants.GLA_IDENT:
-            print(
-                "File does not start with ",
-                SoF2G2Constants.GLA_IDENT,
-                " but ",
-                ident,
-                " - no GLA!",
-            )
-            return False, ErrorMessage("Is no GLA file, incorrect file identifier!")
-        (version,) = struct.unpack("i", file.read(4))
-        if version != SoF2G2Constants.GLA_VERSION:
-            return False, ErrorMessage(
-                f"Wrong gla file version! {version} should be {SoF2G2Constants.GLA_VERSION}"
-            )
-        self.name = readString(file)
-        (
-            self.scale,
-            self.numFrames,
-            self.ofsFrames,
-            self.numBones,
-            self.ofsCompBonePool,
-            self.ofsSkel,
-            self.ofsEnd,
-        ) = struct.unpack("f6i", file.read(7 * 4))
-        print("Scale: {:.3f}".format(self.scale))
-        return True, NoError
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        file.write(
-            struct.pack(
-                "4si64sf6i",
-                SoF2G2Constants.GLA_IDENT,
-                SoF2G2Constants.GLA_VERSION,
-                self.name.encode(),
-                self.scale,
-                self.numFrames,
-                self.ofsFrames,
-                self.numBones,
-                self.ofsCompBonePool,
-                self.ofsSkel,
-                self.ofsEnd,
-            )
-        )
-
-
-class MdxaBoneOffsets:
-    def __init__(self):
-        self.baseOffset: int = 2 * 4 + 64 + 4 * 7  # sizeof header
-        self.boneOffsets: List[int] = []
-
-    # fail-safe (except for exceptions)
-    def loadFromFile(self, file: BinaryIO, numBones: int):
-        assert self.baseOffset == file.tell()
-        for i in range(numBones):
-            self.boneOffsets.append(struct.unpack("i", file.read(4))[0])
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        assert file.tell() == self.baseOffset  # must be after header
-        for offset in self.boneOffsets:
-            file.write(struct.pack("i", offset))
-
 
 # originally called MdxaSkel_t, but I find that name misleading
-class MdxaBone:
-    def __init__(self):
-        self.name = ""
-        self.flags: int = 0
-        self.parent: int = -1
-        self.basePoseMat = SoF2G2Math.Matrix()
-        self.basePoseMatInv = SoF2G2Math.Matrix()
-        self.numChildren = 0
-        self.children: List[int] = []
-        # not saved, filled by loadBonesFromFile() and when loaded from blender
-        self.index: int = -1
-
-    def getSize(self) -> int:
-        return struct.calcsize("64sIi12f12fi{}i".format(self.numChildren))
-
-    def loadFromFile(self, file: BinaryIO) -> None:
-        self.name = readString(file)
-        self.flags, self.parent = struct.unpack("Ii", file.read(2 * 4))
-        self.basePoseMat.loadFromFile(file)
-        self.basePoseMatInv.loadFromFile(file)
-        (self.numChildren,) = struct.unpack("i", file.read(4))
-        for _ in range(self.numChildren):
-            self.children.append(struct.unpack("i", file.read(4))[0])
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        file.write(struct.pack("64sIi", self.name.encode(), self.flags, self.parent))
-        self.basePoseMat.saveToFile(file)
-        self.basePoseMatInv.saveToFile(file)
-        file.write(struct.pack("i", self.numChildren))
-        assert len(self.children) == self.numChildren
-        for child in self.children:
-            file.write(struct.pack("i", child))
-
+class MdxaBone(gla_format.MdxaBone):
     def loadFromBlender(
         self,
         editbone: bpy.types.EditBone,
@@ -179,8 +72,8 @@ class MdxaBone:
         # must not be used for blender-internal calculations anymore!
         SoF2G2Math.BlenderBoneRotToGLA(mat)
         matInv = mat.inverted()
-        self.basePoseMat.fromBlender(mat)
-        self.basePoseMatInv.fromBlender(matInv)
+        self.basePoseMat = SoF2G2Math.fromBlender(mat)
+        self.basePoseMatInv = SoF2G2Math.fromBlender(matInv)
 
     # blenderBonesSoFar is a dictionary of boneIndex -> BlenderBone
     # allBones is the list of all MdxaBones
@@ -196,7 +89,7 @@ class MdxaBone:
         bone = armature.edit_bones.new(self.name)
 
         # set position
-        mat = self.basePoseMat.toBlender()
+        mat = SoF2G2Math.toBlender(self.basePoseMat)
         pos = mathutils.Vector(mat.translation)
         bone.head = pos
         # head is offset a bit.
@@ -254,25 +147,14 @@ class MdxaBone:
         blenderBonesSoFar[self.index] = bone
 
 
-class MdxaSkel:
+class MdxaSkel(gla_format.MdxaSkel):
+    boneType = MdxaBone
+
     def __init__(self):
-        self.bones: List[MdxaBone] = []
+        super().__init__()
         self.armature = None
         self.armatureObject = None
 
-    def loadFromFile(self, file: BinaryIO, offsets: MdxaBoneOffsets):
-        for i, offset in enumerate(offsets.boneOffsets):
-            file.seek(offsets.baseOffset + offset)
-            bone = MdxaBone()
-            bone.loadFromFile(file)
-            bone.index = i
-            self.bones.append(bone)
-
-    def saveToFile(self, file: BinaryIO, header: MdxaHeader):
-        assert file.tell() == header.ofsSkel
-        for bone in self.bones:
-            bone.saveToFile(file)
-
     def fitsArmature(self, armature) -> Tuple[bool, ErrorMessage]:
         for bone in self.bones:
             if bone.name not in armature.bones:
@@ -286,9 +168,11 @@ class MdxaSkel:
     ) -> Tuple[bool, ErrorMessage]:
         #  Creation
         # create armature
-        self.armature = bpy.data.armatures.new("skeleton_root")
+        self.armature = import_steps.created("armatures", bpy.data.armatures.new("skeleton_root"))
         # create object
-        self.armature_object = bpy.data.objects.new("skeleton_root", self.armature)
+        self.armature_object = import_steps.created(
+            "objects", bpy.data.objects.new("skeleton_root", self.armature)
+        )
         # set parent
         self.armature_object.parent = scene_root
         # link object to scene
@@ -332,519 +216,179 @@ class MdxaSkel:
         return True, NoError
 
 
-class MdxaFrame:
-    def __init__(self):
-        self.boneIndices: List[int] = []
-
-    # returns the highest referenced index - not nice from a design standpoint but saves space, which is probably good.
-    def loadFromFile(self, file, numBones):
-        maxIndex = 0
-        for i in range(numBones):
-            # bone indices are only 3 bytes long - with 20k+ frames 25% less is quite a bit, reportedly.
-            (index,) = struct.unpack("I", file.read(3) + b"\0")
-            maxIndex = max(maxIndex, index)
-            self.boneIndices.append(index)
-        return maxIndex
-
-    def saveToFile(self, file):
-        for index in self.boneIndices:
-            # only write the first 3 bytes of the packed number
-            file.write(struct.pack("I", index)[:3])
-
-
-class MdxaBonePool:
-    def __init__(self):
-        # during import, this is a list of CompBone objects
-        # during exports, it's a list of 14-byte-objects (compressed bones)
-        self.bones: List[SoF2G2Math.CompBone] | List[bytes] = []
-
-    def loadFromFile(self, file, numCompBones):
-        for i in range(numCompBones):
-            compBone = SoF2G2Math.CompBone.loadFromFile(file)
-            downcast(List[SoF2G2Math.CompBone], self.bones).append(compBone)
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        for bone in downcast(List[bytes], self.bones):
-            file.write(bone)
-
-
-# Frames & Compressed Bone Pool
-class MdxaAnimation:
-    def __init__(self):
-        self.frames: List[MdxaFrame] = []
-        self.bonePool = MdxaBonePool()
-        self.animation_clips: List[Dict] = []  # List of animation clip info dictionaries
-
-    def loadFromFile(
-        self, file: BinaryIO, header: MdxaHeader, startFrame: int, numFrames: int, data_frames_file: dict
-    ) -> Tuple[bool, ErrorMessage]:
-        # **NEW: Filter animations based on data_frames_file clips AND range parameters**
-        animation_clips = []
-        if data_frames_file:
-            for xsi_path, frame_data in data_frames_file.items():
-                if isinstance(frame_data, dict) and "startframe" in frame_data and "duration" in frame_data:
-                    try:
-                        clip_start_frame = int(frame_data["startframe"])
-                        duration = int(frame_data["duration"])
-                        fps = int(frame_data.get("fps", 20))  # Default 20 FPS
-                        
-                        # Calculate end frame
-                        clip_end_frame = clip_start_frame + duration - 1
-                        
-                        # **NEW: Check if clip is within the specified range**
-                        # If range is specified (numFrames != -1), only include clips that overlap with the range
-                        if numFrames != -1:
-                            range_start = startFrame
-                            range_end = startFrame + numFrames - 1
-                            
-                            # Check if clip overlaps with the specified range
-                            # Clip overlaps if: clip_start <= range_end AND clip_end >= range_start
-                            if clip_start_frame > range_end or clip_end_frame < range_start:
-                                #print(f"Skipping clip {os.path.basename(xsi_path)} (frames {clip_start_frame}-{clip_end_frame}) - outside range {range_start}-{range_end}")
-                                continue
-                        
-                        # Create clip info
-                        clip_name = os.path.splitext(os.path.basename(xsi_path))[0]
-                        animation_clips.append({
-                            "name": clip_name,
-                            "start_frame": clip_start_frame,
-                            "end_frame": clip_end_frame,
-                            "duration": duration,
-                            "fps": fps,
-                            "xsi_path": xsi_path
-                        })
-                        #print(f"Found animation clip: {clip_name} (frames {clip_start_frame}-{clip_end_frame})")
-                    except (ValueError, KeyError) as e:
-                        print(f"Warning: Could not parse frame data for {xsi_path}: {e}")
-                        continue
-
-        # If no clips defined, use original behavior
-        if not animation_clips:
-            print("No animation clips defined, loading all frames")
-            return self._loadAllFrames(file, header, startFrame, numFrames)
-        
-        # **NEW: Load only the frames needed for the clips**
-        print(f"Loading {len(animation_clips)} animation clips...")
-        
-        # Calculate frame range needed
-        min_frame = min(clip["start_frame"] for clip in animation_clips)
-        max_frame = max(clip["end_frame"] for clip in animation_clips)
-        
-        # Ensure we don't exceed available frames
-        min_frame = max(0, min_frame)
-        max_frame = min(header.numFrames - 1, max_frame)
-        
-        print(f"Loading frames {min_frame} to {max_frame} (total: {max_frame - min_frame + 1} frames)")
-        
-        # Store clip info for later use
-        self.animation_clips = animation_clips
-        
-        # Load the filtered frame range
-        return self._loadFrameRange(file, header, min_frame, max_frame - min_frame + 1)
-    
-    def _loadAllFrames(self, file: BinaryIO, header: MdxaHeader, startFrame: int, numFrames: int) -> Tuple[bool, ErrorMessage]:
-        """Load all frames (original behavior)"""
-        # read frames
-        if file.tell() != header.ofsFrames:
-            print(
-                "Info: Frames in .gla not encountered when expected (at ",
-                file.tell(),
-                " instead of ",
-                header.ofsFrames,
-                "), seeking correct position. There could be a bug in the importer (bad) or the file could be unusual - but not necessarily wrong (no problem).",
-                sep="",
-            )
-            file.seek(header.ofsFrames)
 
-        # prepare frame start/end settings
-        if numFrames == -1:
-            assert startFrame == 0
-            numFrames = header.numFrames
+class MdxaAnimation(gla_format.MdxaAnimation):
+    def saveToBlender(
+        self,
+        skeleton: MdxaSkel,
+        armature: bpy.types.Object,
+        scale,
+        data_frames_file: dict,
+    ):
+        import_steps.run(self.saveToBlenderSteps(skeleton, armature, scale, data_frames_file))
+
+    def startBake(self, skeleton: MdxaSkel, armature: bpy.types.Object) -> import_pipeline.Channel:
+        """
+        Start the FK of all clips (or all frames) on a worker thread. The returned channel
+        delivers (clip index, frame within the clip, [pose per frame]) - (None, first frame, ...)
+        without clips - while the main thread builds meshes or inserts the keyframes of earlier clips.
+        """
+        fk = FKContext(skeleton, armature)
+        return import_pipeline.produce(self._bakePoses, fk)
+
+    def _bakePoses(self, emit, fk: "FKContext") -> None:
+        if self.animation_clips:
+            for clip_idx, clip in enumerate(self.animation_clips):
+                # clip frames are global, frames[0] is frame firstFrame (RANGE imports);
+                # frames outside the loaded ones are left out
+                first = clip["start_frame"] - self.firstFrame
+                start = min(max(first, 0), len(self.frames))
+                count = max(0, min(first + clip["duration"], len(self.frames)) - start)
+                emit((clip_idx, start - first, fk.framePoses(self, start, count)))
         else:
-            print("Reading {} frames, starting at {}".format(numFrames, startFrame))
-        if startFrame >= header.numFrames:
-            print("Warning: StartFrame beyond existing frames, using last one")
-            startFrame = header.numFrames - 1
-            numFrames = 1
-        if startFrame + numFrames > header.numFrames:
-            print("Warning: Trying to import more frames than there are, fixing")
-            numFrames = header.numFrames - startFrame
-        # skip first startFrame frames
-        # 1 = from current position
-        file.seek(startFrame * 3 * header.numBones, 1)
-
-        # read (remaining) frames
-        maxIndex = -1
-        for i in range(numFrames):
-            frame = MdxaFrame()
-            # loadFromFile returns highest read index
-            maxIndex = max(maxIndex, frame.loadFromFile(file, header.numBones))
-            self.frames.append(frame)
-
-        # read compressed bone pool
-        # see if we reached it yet
-        curPos = file.tell()
-        if curPos != header.ofsCompBonePool:
-            # we're not yet there. If we're off by 0-3 bytes, it's because 32-bit-alignment is forced. Silently seek correct position. Otherwise: warn (and seek correct position, too)
-            # if we're only importing some frames, we may or may not be there yet, of course, so don't warn.
-            if curPos > header.ofsCompBonePool or (
-                header.ofsCompBonePool > curPos + 3 and numFrames == header.numFrames
-            ):
-                print(
-                    "Info: Bone Pool in .gla not encountered when expected (at ",
-                    file.tell(),
-                    " instead of ",
-                    header.ofsCompBonePool,
-                    "), seeking correct position. There could be a bug in the importer (bad) or the file could be unusual - but not necessarily wrong (no problem).",
-                    sep="",
-                )
-            file.seek(header.ofsCompBonePool)
-        # there's one more object than the highest index since those start at 0
-        self.bonePool.loadFromFile(file, maxIndex + 1)
+            for first in range(0, len(self.frames), BAKE_FRAME_CHUNK):
+                count = min(BAKE_FRAME_CHUNK, len(self.frames) - first)
+                emit((None, first, fk.framePoses(self, first, count)))
 
-        # file should be over now, bone pool is usually the last thing. I'm not sure it has to be, but so far it has always been.
-        if file.tell() != header.ofsEnd and numFrames == header.numFrames:
-            print(
-                "Info: .gla Bone Pool read but file not over yet - this likely indicates a problem."
-            )
-        return True, NoError
-    
-    def _loadFrameRange(self, file: BinaryIO, header: MdxaHeader, startFrame: int, numFrames: int) -> Tuple[bool, ErrorMessage]:
-        """Load a specific range of frames"""
-        # read frames
-        if file.tell() != header.ofsFrames:
-            print(
-                "Info: Frames in .gla not encountered when expected (at ",
-                file.tell(),
-                " instead of ",
-                header.ofsFrames,
-                "), seeking correct position. There could be a bug in the importer (bad) or the file could be unusual - but not necessarily wrong (no problem).",
-                sep="",
-            )
-            file.seek(header.ofsFrames)
-
-        # prepare frame start/end settings
-        print("Reading {} frames, starting at {}".format(numFrames, startFrame))
-        if startFrame >= header.numFrames:
-            print("Warning: StartFrame beyond existing frames, using last one")
-            startFrame = header.numFrames - 1
-            numFrames = 1
-        if startFrame + numFrames > header.numFrames:
-            print("Warning: Trying to import more frames than there are, fixing")
-            numFrames = header.numFrames - startFrame
-        # skip first startFrame frames
-        # 1 = from current position
-        file.seek(startFrame * 3 * header.numBones, 1)
-
-        # read (remaining) frames
-        maxIndex = -1
-        for i in range(numFrames):
-            frame = MdxaFrame()
-            # loadFromFile returns highest read index
-            maxIndex = max(maxIndex, frame.loadFromFile(file, header.numBones))
-            self.frames.append(frame)
-
-        # read compressed bone pool
-        # see if we reached it yet
-        curPos = file.tell()
-        if curPos != header.ofsCompBonePool:
-            # we're not yet there. If we're off by 0-3 bytes, it's because 32-bit-alignment is forced. Silently seek correct position. Otherwise: warn (and seek correct position, too)
-            # if we're only importing some frames, we may or may not be there yet, of course, so don't warn.
-            if curPos > header.ofsCompBonePool or (
-                header.ofsCompBonePool > curPos + 3 and numFrames == header.numFrames
-            ):
-                print(
-                    "Info: Bone Pool in .gla not encountered when expected (at ",
-                    file.tell(),
-                    " instead of ",
-                    header.ofsCompBonePool,
-                    "), seeking correct position. There could be a bug in the importer (bad) or the file could be unusual - but not necessarily wrong (no problem).",
-                    sep="",
-                )
-            file.seek(header.ofsCompBonePool)
-        # there's one more object than the highest index since those start at 0
-        self.bonePool.loadFromFile(file, maxIndex + 1)
-
-        # file should be over now, bone pool is usually the last thing. I'm not sure it has to be, but so far it has always been.
-        if file.tell() != header.ofsEnd and numFrames == header.numFrames:
-            print(
-                "Info: .gla Bone Pool read but file not over yet - this likely indicates a problem."
-            )
-        return True, NoError
-
-    def saveToFile(self, file: BinaryIO, header: MdxaHeader):
-        assert file.tell() == header.ofsFrames
-        for frame in self.frames:
-            frame.saveToFile(file)
-        # add padding if not 32 bit aligned (due to 3-byte-indices)
-        if file.tell() % 4 != 0:
-            # from_what = 1 -> from current position
-            file.seek(4 - (file.tell() % 4), 1)
-        assert file.tell() == header.ofsCompBonePool
-        self.bonePool.saveToFile(file)
-
-    def saveToBlender(
+    def saveToBlenderSteps(
         self,
         skeleton: MdxaSkel,
         armature: bpy.types.Object,
         scale,
         data_frames_file: dict,
+        poses: Optional[import_pipeline.Channel] = None,
     ):
+        """
+        saveToBlender as import steps: yields (label, done, total) after every clip / frame chunk.
+        poses is the channel of startBake, if the FK was started earlier.
+        """
         import time
 
         startTime = time.time()
         print("Starting animation import...")
-        
-        #   Bone Position Set Order
-        # bones have to be set in hierarchical order - their position depends on their parent's absolute position, after all.
-        # so this is the order in which bones have to be processed.
-        hierarchyOrder: List[int] = []
-        while len(hierarchyOrder) < len(skeleton.bones):
-            # make sure we add something each frame (infinite loop otherwise)
-            addedSomething = False
-            # I could copy skeleton.bones for minor speed boost, imho not necessary.
-            for bone in skeleton.bones:
-                if bone.index in hierarchyOrder:
-                    continue  # we already have this one.
-                if bone.parent != -1 and bone.parent not in hierarchyOrder:
-                    # we don't have the parent yet, so this cannot come yet.
-                    continue
-                hierarchyOrder.append(bone.index)
-                addedSomething = True
-            assert addedSomething
-        # for going leaf to root
 
         #   Blender PoseBones list
         bones: List[bpy.types.PoseBone] = []
         for info in skeleton.bones:  # is ordered by index
             bones.append(armature.pose.bones[info.name])
 
-        basePoses: List[mathutils.Matrix] = []
-        for bone in skeleton.bones:
-            basePoses.append(bone.basePoseMat.toBlender())
-
         #   Prepare animation
         scene = bpy.context.scene
         scene.frame_start = 0
         numFrames = len(self.frames)
         scene.frame_end = numFrames - 1
 
-        if scale == 0:
-            # if True:
-            scale = 1
-        #else:
-        #    scale = 1 / scale
-        # scaleMatrix = mathutils.Matrix(
-        #     [[scale, 0, 0, 0], [0, scale, 0, 0], [0, 0, scale, 0], [0, 0, 0, 1]]
-        # )
-
         # **NEW: Show filtered animation info**
         if hasattr(self, 'animation_clips') and self.animation_clips:
             print(f"Using {len(self.animation_clips)} filtered animation clips:")
         else:
             print(f"No clips defined, using all {numFrames} frames")
 
-        # Pre-compute Blender bone rest matrices for direct matrix_basis computation.
-        # This lets us set bone local transforms without needing per-bone mode switches
-        # (which were ~90% of the total import time).
+        # The FK runs on a worker thread (startBake); here the bone local transforms are only set
+        # and keyed, without per-bone mode switches (which were ~90% of the total import time).
         bpy.ops.object.mode_set(mode="POSE", toggle=False)
-        bone_rest: Dict[int, mathutils.Matrix] = {}
-        bone_rest_inv: Dict[int, mathutils.Matrix] = {}
-        rest_relative_inv: Dict[int, mathutils.Matrix] = {}
-        for bone_info in skeleton.bones:
-            rest_mat = bones[bone_info.index].bone.matrix_local.copy()
-            bone_rest[bone_info.index] = rest_mat
-            bone_rest_inv[bone_info.index] = rest_mat.inverted()
-        for bone_info in skeleton.bones:
-            if bone_info.parent == -1:
-                rest_relative_inv[bone_info.index] = bone_rest_inv[bone_info.index]
-            else:
-                rest_relative_inv[bone_info.index] = bone_rest_inv[bone_info.index] @ bone_rest[bone_info.parent]
+        if poses is None:
+            poses = self.startBake(skeleton, armature)
 
-        if hasattr(self, 'animation_clips') and self.animation_clips:
-            print("Creating separate Blender actions for each clip...")
-            
-            # Create animation data
-            if not armature.animation_data:
-                armature.animation_data_create()
-            
-            # Process each clip separately
-            for clip_idx, clip in enumerate(self.animation_clips):
-                clip_name = clip["name"]
-                start_frame = clip["start_frame"]
-                duration = clip["duration"]
-                
-                # Show clip progress every 3 clips
-                if clip_idx % 3 == 0 and clip_idx > 0:
-                    total_elapsed = time.time() - startTime
-                    avg_clip_time = total_elapsed / clip_idx
-                    estimated_remaining = avg_clip_time * (len(self.animation_clips) - clip_idx)
-                    print(
-                        "Clip {}/{} - {:.2%} - remaining time: ca. {:.0f}m {:.0f}s".format(
-                            clip_idx,
-                            len(self.animation_clips),
-                            clip_idx / len(self.animation_clips),
-                            estimated_remaining // 60,
-                            estimated_remaining % 60,
+        try:
+            if hasattr(self, 'animation_clips') and self.animation_clips:
+                print("Creating separate Blender actions for each clip...")
+
+                # Create animation data
+                if not armature.animation_data:
+                    armature.animation_data_create()
+
+                # Process each clip separately, as its poses arrive
+                while True:
+                    item = yield from poses.receive()
+                    if item is import_pipeline.Channel.END:
+                        break
+                    clip_idx, clip_offset, clip_poses = item
+                    clip = self.animation_clips[clip_idx]
+                    clip_name = clip["name"]
+                    duration = clip["duration"]
+
+                    # Show clip progress every 3 clips
+                    if clip_idx % 3 == 0 and clip_idx > 0:
+                        total_elapsed = time.time() - startTime
+                        avg_clip_time = total_elapsed / clip_idx
+                        estimated_remaining = avg_clip_time * (len(self.animation_clips) - clip_idx)
+                        print(
+                            "Clip {}/{} - {:.2%} - remaining time: ca. {:.0f}m {:.0f}s".format(
+                                clip_idx,
+                                len(self.animation_clips),
+                                clip_idx / len(self.animation_clips),
+                                estimated_remaining // 60,
+                                estimated_remaining % 60,
+                            )
                         )
-                    )
-                
-                # Create action for this clip
-                action = bpy.data.actions.new(name=clip_name)
-                armature.animation_data.action = action
-                
-                # **Set action frame range directly (0 to duration) for Unity compatibility**
-                action.frame_range = (0, duration) # TODO anatoli still not sure if unity need -1 or not 0based keep this for now
-                
-                #TODO default FPS Anatoli wechselbar machen??
-                # **Set FPS for this specific clip**
-                clip_fps = clip.get("fps", 20)  # Get FPS from clip data
-                scene.render.fps = clip_fps
-                
-                # **Set scene frame range for this clip (0 to duration)**
-                scene.frame_start = 0
-                scene.frame_end = duration
-                
-                # Process frames for this clip
-                for local_frame_num in range(duration):
-                    global_frame_num = start_frame + local_frame_num
-                    
-                    if global_frame_num >= len(self.frames):
+
+                    # Create action for this clip
+                    action = import_steps.created("actions", bpy.data.actions.new(name=clip_name))
+                    armature.animation_data.action = action
+
+                    # **Set action frame range directly (0 to duration) for Unity compatibility**
+                    action.frame_range = (0, duration) # TODO anatoli still not sure if unity need -1 or not 0based keep this for now
+
+                    #TODO default FPS Anatoli wechselbar machen??
+                    # **Set FPS for this specific clip**
+                    clip_fps = clip.get("fps", 20)  # Get FPS from clip data
+                    scene.render.fps = clip_fps
+
+                    # **Set scene frame range for this clip (0 to duration)**
+                    scene.frame_start = 0
+                    scene.frame_end = duration
+
+                    # Process frames for this clip
+                    for local_frame_num, pose in enumerate(clip_poses, clip_offset):
+                        _keyPose(bones, pose, local_frame_num)
+
+                    yield "Clip", clip_idx + 1, len(self.animation_clips)
+
+                # **Restore original FPS and set scene back to first frame**
+                scene.render.fps = 20  # Restore default FPS #TODO default FPS Anatoli wechselbar machen??
+                scene.frame_current = 0
+
+            else:
+                # **FALLBACK: Original behavior for all frames**
+                print("Processing all frames as single animation. MAY TAKE VERY LONG TIME!!...")
+
+                nextProgressDisplayTime = time.time() + PROGRESS_UPDATE_INTERVAL
+                lastFrameNum = 0
+
+                while True:
+                    item = yield from poses.receive()
+                    if item is import_pipeline.Channel.END:
                         break
-                        
-                    frame = self.frames[global_frame_num]
-                    
-                    offsets: Dict[int, mathutils.Matrix] = {}
-                    animated_world: Dict[int, mathutils.Matrix] = {}
-                    animated_world_inv: Dict[int, mathutils.Matrix] = {}
-                    anim_root_delta = [0.0, 0.0, 0.0]
-                    for index in hierarchyOrder:
-                        mdxaBone = skeleton.bones[index]
-                        assert mdxaBone.index == index
-                        bonePoolIndex = frame.boneIndices[index]
-                        
-                        # get offset transformation matrix, relative to parent
-                        offset = downcast(List[SoF2G2Math.CompBone], self.bonePool.bones)[
-                            bonePoolIndex
-                        ].matrix
-                        # turn into absolute offset matrix (already is if this is top level bone)
-                        if mdxaBone.parent != -1:
-                            offset = matrix_overload_cast(offsets[mdxaBone.parent] @ offset)
-                        offsets[index] = offset
-                        # calculate the actual position
-                        transformation = matrix_overload_cast(offset @ basePoses[index])
-                        # flip axes as required for blender bone
-                        SoF2G2Math.GLABoneRotToBlender(transformation)
-                        # Pin root bone at rest position, shift all others by the same delta
-                        if mdxaBone.parent == -1:
-                            for ax in range(3):
-                                anim_root_delta[ax] = transformation[ax][3] - basePoses[index][ax][3]
-                        for ax in range(3):
-                            transformation[ax][3] -= anim_root_delta[ax]
-
-                        # Store animated world-space transform for child computations
-                        animated_world[index] = mathutils.Matrix(transformation)
-
-                        # Compute matrix_basis directly — no mode switch needed
-                        parent_idx = mdxaBone.parent
-                        if parent_idx == -1:
-                            matrix_basis = matrix_overload_cast(rest_relative_inv[index] @ transformation)
-                        else:
-                            if parent_idx not in animated_world_inv:
-                                animated_world_inv[parent_idx] = animated_world[parent_idx].inverted()
-                            matrix_basis = matrix_overload_cast(
-                                rest_relative_inv[index] @ animated_world_inv[parent_idx] @ transformation
+                    _, first, chunk_poses = item
+                    for frameNum, pose in enumerate(chunk_poses, first):
+                        # show progress bar / remaining time
+                        if time.time() >= nextProgressDisplayTime:
+                            numProcessedFrames = frameNum - lastFrameNum
+                            framesRemaining = numFrames - frameNum
+                            timeRemaining = (
+                                PROGRESS_UPDATE_INTERVAL * framesRemaining / numProcessedFrames
+                            )
+                            print(
+                                "Frame {}/{} - {:.2%} - remaining time: ca. {:.0f}m {:.0f}s".format(
+                                    frameNum,
+                                    numFrames,
+                                    frameNum / numFrames,
+                                    timeRemaining // 60,
+                                    timeRemaining % 60,
+                                )
                             )
+                            lastFrameNum = frameNum
+                            nextProgressDisplayTime = time.time() + PROGRESS_UPDATE_INTERVAL
 
-                        loc, rot, _ = matrix_basis.decompose()
-                        pose_bone = bones[index]
-                        pose_bone.location = loc
-                        pose_bone.rotation_quaternion = rot
-                        pose_bone.keyframe_insert("location", frame=local_frame_num)
-                        pose_bone.keyframe_insert("rotation_quaternion", frame=local_frame_num)
-                
-            # **Restore original FPS and set scene back to first frame**
-            scene.render.fps = 20  # Restore default FPS #TODO default FPS Anatoli wechselbar machen??
-            scene.frame_current = 0
-            
-        else:
-            # **FALLBACK: Original behavior for all frames**
-            print("Processing all frames as single animation. MAY TAKE VERY LONG TIME!!...")
-            
-            nextProgressDisplayTime = time.time() + PROGRESS_UPDATE_INTERVAL
-            lastFrameNum = 0
-
-            for frameNum, frame in enumerate(self.frames):
-                # show progress bar / remaining time
-                if time.time() >= nextProgressDisplayTime:
-                    numProcessedFrames = frameNum - lastFrameNum
-                    framesRemaining = numFrames - frameNum
-                    timeRemaining = (
-                        PROGRESS_UPDATE_INTERVAL * framesRemaining / numProcessedFrames
-                    )
-                    print(
-                        "Frame {}/{} - {:.2%} - remaining time: ca. {:.0f}m {:.0f}s".format(
-                            frameNum,
-                            numFrames,
-                            frameNum / numFrames,
-                            timeRemaining // 60,
-                            timeRemaining % 60,
-                        )
-                    )
-                    lastFrameNum = frameNum
-                    nextProgressDisplayTime = time.time() + PROGRESS_UPDATE_INTERVAL
-
-                # absolute offset matrices by bone index
-                offsets: Dict[int, mathutils.Matrix] = {}
-                animated_world: Dict[int, mathutils.Matrix] = {}
-                animated_world_inv: Dict[int, mathutils.Matrix] = {}
-                anim_root_delta = [0.0, 0.0, 0.0]
-                for index in hierarchyOrder:
-                    mdxaBone = skeleton.bones[index]
-                    assert mdxaBone.index == index
-                    bonePoolIndex = frame.boneIndices[index]
-                    
-                    # get offset transformation matrix, relative to parent
-                    offset = downcast(List[SoF2G2Math.CompBone], self.bonePool.bones)[
-                        bonePoolIndex
-                    ].matrix
-                    # turn into absolute offset matrix (already is if this is top level bone)
-                    if mdxaBone.parent != -1:
-                        offset = matrix_overload_cast(offsets[mdxaBone.parent] @ offset)
-                    offsets[index] = offset
-                    # calculate the actual position
-                    transformation = matrix_overload_cast(offset @ basePoses[index])
-                    # flip axes as required for blender bone
-                    SoF2G2Math.GLABoneRotToBlender(transformation)
-                    # Pin root bone at rest position, shift all others by the same delta
-                    if mdxaBone.parent == -1:
-                        for ax in range(3):
-                            anim_root_delta[ax] = transformation[ax][3] - basePoses[index][ax][3]
-                    for ax in range(3):
-                        transformation[ax][3] -= anim_root_delta[ax]
-
-                    # Store animated world-space transform for child computations
-                    animated_world[index] = mathutils.Matrix(transformation)
-
-                    # Compute matrix_basis directly — no mode switch needed
-                    parent_idx = mdxaBone.parent
-                    if parent_idx == -1:
-                        matrix_basis = matrix_overload_cast(rest_relative_inv[index] @ transformation)
-                    else:
-                        if parent_idx not in animated_world_inv:
-                            animated_world_inv[parent_idx] = animated_world[parent_idx].inverted()
-                        matrix_basis = matrix_overload_cast(
-                            rest_relative_inv[index] @ animated_world_inv[parent_idx] @ transformation
-                        )
+                        _keyPose(bones, pose, frameNum)
 
-                    loc, rot, _ = matrix_basis.decompose()
-                    pose_bone = bones[index]
-                    pose_bone.location = loc
-                    pose_bone.rotation_quaternion = rot
-                    pose_bone.keyframe_insert("location", frame=frameNum)
-                    pose_bone.keyframe_insert("rotation_quaternion", frame=frameNum)
+                    yield "Frame", first + len(chunk_poses), numFrames
 
-            scene.frame_current = 1
+                scene.frame_current = 1
+        finally:
+            # stops the FK thread if the import was cancelled
+            poses.close()
 
         bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
 
@@ -853,70 +397,92 @@ class MdxaAnimation:
         print(f"Processed {numFrames} frames with {len(bones)} bones")
 
 
-class AnimationLoadMode(Enum):
-    NONE = "NONE"
-    ALL = "ALL"
-    RANGE = "RANGE"
+# frames per item the FK thread hands over when there are no clips
+BAKE_FRAME_CHUNK = 20
+
+class FKContext:
+    """
+    What the FK of a frame needs from the skeleton and the armature's rest pose, read on the
+    main thread; framePoses only does NumPy math (g2_math), so it runs on the FK worker thread.
+    """
+
+    def __init__(self, skeleton: MdxaSkel, armature: bpy.types.Object):
+        self.skeleton = skeleton
+        #   Bone Position Set Order
+        # bones have to be set in hierarchical order - their position depends on their parent's absolute position, after all.
+        self.hierarchyOrder = skeleton.hierarchyOrder()
+        self.parents: List[int] = skeleton.parents
+        self.basePoses = skeleton.basePoses()
+
+        # Pre-compute Blender bone rest matrices for direct matrix_basis computation.
+        # This lets us set bone local transforms without needing per-bone mode switches.
+        bone_rest = np.stack(
+            [
+                SoF2G2Math.fromBlender(armature.pose.bones[bone_info.name].bone.matrix_local)
+                for bone_info in skeleton.bones
+            ]
+        )
+        bone_rest_inv = np.linalg.inv(bone_rest)
+        self.rest_relative_inv = bone_rest_inv.copy()
+        for bone_info in skeleton.bones:
+            if bone_info.parent != -1:
+                self.rest_relative_inv[bone_info.index] = bone_rest_inv[bone_info.index] @ bone_rest[bone_info.parent]
+
+    def framePoses(
+        self, animation: "MdxaAnimation", first: int, count: int
+    ) -> List[List[Tuple[int, List[float], List[float]]]]:
+        """Per frame the (bone index, location, rotation) of every bone, in hierarchy order."""
+        if count <= 0:
+            return []
+        # absolute offset matrices, (frames, bones, 4, 4)
+        offsets = animation.offsets(self.skeleton, first, count)
+        # calculate the actual position, axes flipped as required for blender bones
+        transformations = g2_math.gla_to_blender_rot(offsets @ self.basePoses)
+        matrix_basis = np.empty_like(transformations)
+        anim_root_delta = np.zeros((count, 3))
+        for index in self.hierarchyOrder:
+            parent_idx = self.parents[index]
+            # view: pinning it also changes the parent transform its children see
+            transformation = transformations[:, index]
+            # Pin root bone at rest position, shift all others by the same delta
+            if parent_idx == -1:
+                anim_root_delta = transformation[:, :3, 3] - self.basePoses[index, :3, 3]
+            transformation[:, :3, 3] -= anim_root_delta
+
+            # Compute matrix_basis directly — no mode switch needed
+            if parent_idx == -1:
+                matrix_basis[:, index] = self.rest_relative_inv[index] @ transformation
+            else:
+                matrix_basis[:, index] = (
+                    self.rest_relative_inv[index] @ np.linalg.inv(transformations[:, parent_idx]) @ transformation
+                )
+
+        locs, rots = g2_math.decompose(matrix_basis[:, self.hierarchyOrder])
+        return [
+            list(zip(self.hierarchyOrder, frame_locs, frame_rots))
+            for frame_locs, frame_rots in zip(locs.tolist(), rots.tolist())
+        ]
+
+
+def _keyPose(bones: List[bpy.types.PoseBone], pose, frame: int) -> None:
+    for index, loc, rot in pose:
+        pose_bone = bones[index]
+        pose_bone.location = loc
+        pose_bone.rotation_quaternion = rot
+        pose_bone.keyframe_insert("location", frame=frame)
+        pose_bone.keyframe_insert("rotation_quaternion", frame=frame)
+
 
 
-class GLA:
+class GLA(gla_format.GLA):
+    skeletonType = MdxaSkel
+    animationType = MdxaAnimation
+
     def __init__(self):
-        # whether this is the automatic default skeleton
-        self.isDefault = False  # TODO replace with `skeleton_object is None`
-        self.header = MdxaHeader()
-        self.boneOffsets = MdxaBoneOffsets()
-        self.skeleton = MdxaSkel()
-        self.boneIndexByName: Dict[str, int] = {}
-        # boneNameByIndex = {} #just use bones[index].name
+        super().__init__()
         # the Blender Armature / Object
         self.skeleton_armature: Optional[bpy.types.Armature] = None
         self.skeleton_object: Optional[bpy.types.Object] = None
-        self.animation = MdxaAnimation()
-
-    def loadFromFile(
-        self,
-        filepath_abs: str,
-        loadAnimation: AnimationLoadMode,
-        startFrame: int,
-        numFrames: int,
-        data_frames_file: dict,
-    ) -> Tuple[bool, ErrorMessage]:
-        if log_level == "DEBUG":
-            print("Loading {}...".format(filepath_abs))
-        try:
-            file: BinaryIO = open(filepath_abs, mode="rb")
-        except IOError:
-            print("Could not open file: {}".format(filepath_abs))
-            return False, ErrorMessage("Could not open file!")
-        profiler = MrwProfiler.SimpleProfiler(True)
-        # load header
-        profiler.start("reading header")
-        success, message = self.header.loadFromFile(file)
-        if not success:
-            return False, message
-        profiler.stop("reading header")
-        # load offsets (directly after header, always)
-        profiler.start("reading bone hierarchy")
-        self.boneOffsets.loadFromFile(file, self.header.numBones)
-        # load bones
-        self.skeleton.loadFromFile(file, self.boneOffsets)
-        # build lookup map
-        for bone in self.skeleton.bones:
-            self.boneIndexByName[bone.name] = bone.index
-        profiler.stop("reading bone hierarchy")
-        if loadAnimation != AnimationLoadMode.NONE:
-            profiler.start("reading animations")
-            if loadAnimation == AnimationLoadMode.ALL:
-                success, message = self.animation.loadFromFile(file, self.header, 0, -1, data_frames_file)
-            else:
-                assert loadAnimation == AnimationLoadMode.RANGE
-                success, message = self.animation.loadFromFile(
-                    file, self.header, startFrame, numFrames, data_frames_file
-                )
-            if not success:
-                return False, message
-            profiler.stop("reading animations")
-        return True, NoError
 
     def loadFromBlender(
         self, gla_filepath_rel: str, gla_reference_abs: str
@@ -1039,6 +605,9 @@ class GLA:
 
         # create a dictionary containing the indices of already added compressed bones - lookup should be faster than a linear search through the existing compressed bones (at the cost of more RAM usage - that's ok)
         compBoneIndices = {}
+        # bone pool index per frame and bone, and the pool of compressed bones
+        frames: List[List[int]] = []
+        compBones: List[bytes] = []
 
         # for each frame:
         for curFrame in range(
@@ -1048,7 +617,7 @@ class GLA:
             if curFrame % 10 == 0:
                 print("Compressing frame {}...".format(curFrame))
 
-            frame = MdxaFrame()
+            frame: List[int] = []
             bpy.context.scene.frame_set(curFrame)
             # bpy.context.scene.frame_current = curFrame
 
@@ -1134,56 +703,66 @@ class GLA:
             # then write precalculated offsets:
             for offset in gaplessRelativeBoneOffsets:
                 # compress that offset
-                compOffset = SoF2G2Math.CompBone.compress(offset)
+                compOffset = g2_math.compress_bone(SoF2G2Math.fromBlender(offset))
 
                 try:
                     # try to use existing compressed bone offset
                     index = compBoneIndices[compOffset]
-                    frame.boneIndices.append(index)
+                    frame.append(index)
                 except KeyError:
                     # if this offset is not yet part of the pool, add it
-                    index = len(self.animation.bonePool.bones)
-                    downcast(List[bytes], self.animation.bonePool.bones).append(
-                        compOffset
-                    )
-                    frame.boneIndices.append(index)
+                    index = len(compBones)
+                    compBones.append(compOffset)
+                    frame.append(index)
                     compBoneIndices[compOffset] = index
 
-            self.animation.frames.append(frame)
+            frames.append(frame)
 
         self.header.numFrames = (
             bpy.context.scene.frame_end - bpy.context.scene.frame_start + 1
         )
+        self.animation.setFrames(frames, compBones, self.header.numBones)
         # enforce 32 bit alignment after 3-byte-indices
         framesSize = 3 * self.header.numFrames * self.header.numBones
         if framesSize % 4 != 0:
             framesSize += 4 - (framesSize % 4)
         self.header.ofsCompBonePool = self.header.ofsFrames + framesSize
         self.header.ofsEnd = (
-            self.header.ofsCompBonePool + len(self.animation.bonePool.bones) * 14
+            self.header.ofsCompBonePool + len(compBones) * g2_math.COMP_BONE_SIZE
         )
 
         return True, NoError
 
-    def saveToFile(self, filepath_abs: str) -> Tuple[bool, ErrorMessage]:
-        try:
-            file = open(filepath_abs, mode="wb")
-        except IOError:
-            print("Could not open file: ", filepath_abs, sep="")
-            return False, ErrorMessage("Could not open file!")
-        self.header.saveToFile(file)
-        self.boneOffsets.saveToFile(file)
-        self.skeleton.saveToFile(file, self.header)
-        self.animation.saveToFile(file, self.header)
-        assert file.tell() == self.header.ofsEnd
-        return True, NoError
-
     def saveToBlender(
         self,
         scene_root: bpy.types.Object,
         useAnimation: bool,
         skeletonFixes: SoF2G2Constants.SkeletonFixes,
         data_frames_file: dict,
+    ) -> Tuple[bool, ErrorMessage]:
+        return import_steps.run(
+            self.saveToBlenderSteps(scene_root, useAnimation, skeletonFixes, data_frames_file)
+        )
+
+    def saveToBlenderSteps(
+        self,
+        scene_root: bpy.types.Object,
+        useAnimation: bool,
+        skeletonFixes: SoF2G2Constants.SkeletonFixes,
+        data_frames_file: dict,
+    ) -> Generator[import_steps.Step, None, Tuple[bool, ErrorMessage]]:
+        success, message = self.saveSkeletonToBlender(scene_root, skeletonFixes)
+        if not success:
+            return False, message
+        if useAnimation:
+            yield from self.saveAnimationToBlenderSteps(data_frames_file)
+        return True, NoError
+
+    # creates (or reuses) the armature; animations are added by saveAnimationToBlenderSteps
+    def saveSkeletonToBlender(
+        self,
+        scene_root: bpy.types.Object,
+        skeletonFixes: SoF2G2Constants.SkeletonFixes,
     ) -> Tuple[bool, ErrorMessage]:
         print("Applying skeleton/skeleton to Blender")
         profiler = MrwProfiler.SimpleProfiler(True)
@@ -1233,28 +812,6 @@ class GLA:
             # set its parent to the scene_root (not strictly speaking necessary but keeps output consistent)
             self.skeleton_object.parent = scene_root
 
-            # add animations, if any
-            if useAnimation:
-                profiler.start("applying animations")
-                # go to object mode
-                bpy.context.view_layer.objects.active = self.skeleton_object
-                bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
-                if PROFILE:
-                    import cProfile
-
-                    print("=== Profile start ===")
-                    cProfile.runctx(
-                        "self.animation.saveToBlender(self.skeleton, self.skeleton_object, self.header.scale, data_frames_file)",
-                        globals(),
-                        locals(),
-                    )
-                    print("=== Profile stop ===")
-                else:
-                    self.animation.saveToBlender(
-                        self.skeleton, self.skeleton_object, self.header.scale, data_frames_file
-                    )
-                profiler.stop("applying animations")
-
             # that's all
             return True, NoError
 
@@ -1270,28 +827,43 @@ class GLA:
         self.skeleton_object.g2_prop_scale = self.header.scale * 100  # pyright: ignore [reportAttributeAccessIssue]
         profiler.stop("creating armature")
 
-        # add animations, if any
-        if useAnimation:
-            profiler.start("applying animations")
-            # go to object mode
-            bpy.context.view_layer.objects.active = self.skeleton_object
-            bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
-            if PROFILE:
-                import cProfile
-
-                print("=== Profile start ===")
-                cProfile.runctx(
-                    "self.animation.saveToBlender(self.skeleton, self.skeleton_object, self.header.scale, data_frames_file)",
-                    globals(),
-                    locals(),
-                )
-                print("=== Profile stop ===")
-            else:
-                self.animation.saveToBlender(
-                    self.skeleton,
-                    self.skeleton_object,
-                    self.header.scale,
-                    data_frames_file,
-                )
-            profiler.stop("applying animations")
         return True, NoError
+
+    def startAnimationBake(self) -> Optional[import_pipeline.Channel]:
+        """Start the FK of the animation on a worker thread (see MdxaAnimation.startBake)."""
+        if self.isDefault or self.skeleton_object is None:
+            return None
+        return self.animation.startBake(self.skeleton, self.skeleton_object)
+
+    def saveAnimationToBlenderSteps(
+        self, data_frames_file: dict, poses: Optional[import_pipeline.Channel] = None
+    ):
+        """Keys the animation on the armature of saveSkeletonToBlender; poses from startAnimationBake."""
+        if self.isDefault or self.skeleton_object is None:
+            return
+        profiler = MrwProfiler.SimpleProfiler(True)
+        profiler.start("applying animations")
+        # go to object mode
+        bpy.context.view_layer.objects.active = self.skeleton_object
+        bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
+        if PROFILE:
+            import cProfile
+
+            if poses is not None:
+                poses.close()
+            print("=== Profile start ===")
+            cProfile.runctx(
+                "self.animation.saveToBlender(self.skeleton, self.skeleton_object, self.header.scale, data_frames_file)",
+                globals(),
+                locals(),
+            )
+            print("=== Profile stop ===")
+        else:
+            yield from self.animation.saveToBlenderSteps(
+                self.skeleton,
+                self.skeleton_object,
+                self.header.scale,
+                data_frames_file,
+                poses,
+            )
+        profiler.stop("applying animations")
@@ -5,9 +5,26 @@ from . import SoF2G2Constants
 from . import SoF2G2Scene
 from . import SoF2G2GLA
 from . import SoF2Filesystem
+from . import SoF2ModalImport
+from . import prefetch
+from .prefetch import check
 
 
-class GLAImport(bpy.types.Operator):
+def prepare_gla(basepath, filepath, loadAnimations, startFrame, numFrames, cancel=None):
+    """Decoded .gla of a GLA import as a prefetch.PreparedImport."""
+    prepared = prefetch.PreparedImport(filepath)
+    check(cancel)
+    scene = SoF2G2Scene.Scene(basepath)
+    success, message = scene.loadFromGLA(
+        filepath, SoF2G2GLA.AnimationLoadMode[loadAnimations], startFrame, numFrames
+    )
+    if not success:
+        return prepared.fail("ERROR", message, "FINISHED")
+    prepared.scene = scene
+    return prepared
+
+
+class GLAImport(SoF2ModalImport.ModalImport, bpy.types.Operator):
     """Import GLA Operator."""
 
     bl_idname = "import_scene.gla"
@@ -94,8 +111,17 @@ class GLAImport(bpy.types.Operator):
         default=False,
     )
 
+    modalImport: bpy.props.BoolProperty(  # pyright: ignore [reportInvalidTypeForm]
+        name="Import in Background",
+        description="Keep Blender responsive while importing: shows a progress bar, Esc cancels the import and removes what was already created",
+        default=True,
+    )
+
     def execute(self, context):
         print("\n== GLA Import ==\n")
+        return self.run_import(context)
+
+    def load_steps(self, context, background):
         # de-percentagionise scale
         scale = self.scale / 100
         if getattr(self, 'unityMode', False):
@@ -108,17 +134,24 @@ class GLAImport(bpy.types.Operator):
         ):
             self.report({"ERROR"}, "Invalid Base Path")
             return {"FINISHED"}
-        # load GLA
-        scene = SoF2G2Scene.Scene(basepath)
+        # load GLA (in the prefetcher thread for the modal import)
         loadAnimations = SoF2G2GLA.AnimationLoadMode[self.loadAnimations]
-        success, message = scene.loadFromGLA(
-            filepath, loadAnimations, self.startFrame, self.numFrames
+        prepared = yield from prefetch.prepare_steps(
+            "gla",
+            ("gla", basepath, filepath, self.loadAnimations, self.startFrame, self.numFrames),
+            prepare_gla,
+            basepath,
+            filepath,
+            self.loadAnimations,
+            self.startFrame,
+            self.numFrames,
+            background=background,
         )
-        if not success:
-            self.report({"ERROR"}, message)
-            return {"FINISHED"}
+        prepared.replay(self)
+        if not prepared.ok:
+            return {prepared.status}
         # output to blender
-        success, message = scene.saveToBlender(
+        success, message = yield from prepared.scene.saveToBlenderSteps(
             scale,
             {},
             {},
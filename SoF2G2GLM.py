@@ -10,68 +10,48 @@ reload_modules(
         "SoF2Materialmanager",
         "MrwProfiler",
         "SoF2G2Panels",
+        "glm_format",
     ],
     [".casts", ".error_types"],
 )  # nopep8
 
 from dataclasses import dataclass  # noqa: E402
-from typing import BinaryIO, Dict, List, Optional, Tuple  # noqa: E402
-import struct  # noqa: E402
+from typing import Dict, Generator, List, Optional, Tuple  # noqa: E402
 from . import SoF2Stringhelper  # noqa: E402
 from . import SoF2Filesystem  # noqa: E402
 from . import SoF2G2Constants  # noqa: E402
 from . import SoF2G2GLA  # noqa: E402
 from . import SoF2Materialmanager  # noqa: E402
 from . import MrwProfiler  # noqa: E402
+from . import texture_cache  # noqa: E402
+from . import import_steps  # noqa: E402
 from . import SoF2G2Panels  # noqa: E402
+from . import glm_format  # noqa: E402
 from .casts import (  # noqa: E402
     optional_cast,
     downcast,
     bpy_generic_cast,
-    unpack_cast,
     matrix_getter_cast,
     vector_getter_cast,
     vector_overload_cast,
 )
 from .error_types import ErrorMessage, NoError, ensureListIsGapless  # noqa: E402
 
+# the file structures are bpy-free (glm_format); this module adds the Blender import/export
+from .glm_format import (  # noqa: E402
+    BoneIndexMap,
+    MdxmHeader,
+    MdxmSurfaceDataOffsets,
+    buildBoneIndexLookupMap,
+)
+
+import numpy as np  # noqa: E402
 import bpy  # noqa: E402  # pyright: ignore[reportMissingImports]
 import mathutils  # noqa: E402  # pyright: ignore[reportMissingImports]
 import os  # noqa: E402
 
 log_level = os.getenv("LOG_LEVEL", "INFO")
 
-BoneIndexMap = Dict[str, int]
-
-
-def buildBoneIndexLookupMap(
-    gla_filepath_abs: str,
-) -> Tuple[Optional[BoneIndexMap], ErrorMessage]:
-    print("Loading gla file for bone name -> bone index lookup")
-    # open file
-    try:
-        file = open(gla_filepath_abs, mode="rb")
-    except IOError:
-        print("Could not open ", gla_filepath_abs, sep="")
-        return None, ErrorMessage("Could not open gla file for bone index lookup!")
-    # read header
-    header = SoF2G2GLA.MdxaHeader()
-    success, message = header.loadFromFile(file)
-    if not success:
-        return None, message
-    # read offsets
-    boneOffsets = SoF2G2GLA.MdxaBoneOffsets()
-    # cannot fail (except with exception)
-    boneOffsets.loadFromFile(file, header.numBones)
-    # read skeleton
-    skeleton = SoF2G2GLA.MdxaSkel()
-    skeleton.loadFromFile(file, boneOffsets)
-    # build lookup map
-    boneIndices: Dict[str, int] = {}
-    for bone in skeleton.bones:
-        boneIndices[bone.name] = bone.index
-    return boneIndices, NoError
-
 
 def getName(object: bpy.types.Object) -> str:
     if object.g2_prop_name != "":  # pyright: ignore [reportAttributeAccessIssue]
@@ -151,151 +131,8 @@ def getBoneWeights(
     return weights
 
 
-class MdxmHeader:
-    def __init__(self):
-        self.name = ""
-        self.animName = b""
-        self.numBones: int = -1
-        self.numLODs: int = -1
-        self.ofsLODs: int = -1
-        self.numSurfaces: int = -1
-        self.ofsSurfHierarchy: int = -1
-        self.ofsEnd: int = -1
-
-    def loadFromFile(self, file: BinaryIO) -> Tuple[bool, ErrorMessage]:
-        # ident check
-        (ident,) = unpack_cast(Tuple[bytes], struct.unpack("4s", file.read(4)))
-        if ident != SoF2G2Constants.GLM_IDENT:
-            print(
-                "File does not start with ",
-                SoF2G2Constants.GLM_IDENT,
-                " but ",
-                ident,
-                " - no GLM!",
-            )
-            return False, ErrorMessage("Is no GLM file!")
-        # version check
-        (version,) = unpack_cast(Tuple[int], struct.unpack("i", file.read(4)))
-        if version != SoF2G2Constants.GLM_VERSION:
-            return False, ErrorMessage(
-                f"Wrong glm file version! ({version} should be {SoF2G2Constants.GLM_VERSION})"
-            )
-        # read data
-        self.name, self.animName = unpack_cast(
-            Tuple[bytes, bytes],
-            struct.unpack("64s64s", file.read(SoF2G2Constants.MAX_QPATH * 2)),
-        )
-        # 4x is 4 ignored bytes - the animIndex which is only used ingame
-        (
-            self.numBones,
-            self.numLODs,
-            self.ofsLODs,
-            self.numSurfaces,
-            self.ofsSurfHierarchy,
-            self.ofsEnd,
-        ) = unpack_cast(
-            Tuple[int, int, int, int, int, int], struct.unpack("4x6i", file.read(4 * 7))
-        )
-        return True, NoError
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        # 0 is animIndex, only used ingame
-        file.write(
-            struct.pack(
-                "4si64s64s7i",
-                SoF2G2Constants.GLM_IDENT,
-                SoF2G2Constants.GLM_VERSION,
-                self.name,
-                self.animName,
-                0,
-                self.numBones,
-                self.numLODs,
-                self.ofsLODs,
-                self.numSurfaces,
-                self.ofsSurfHierarchy,
-                self.ofsEnd,
-            )
-        )
-
-    def print(self) -> None:
-        print(
-            "== GLM Header ==\nname: {self.name}\nanimName: {self.animName}\nnumBones: {self.numBones}\nnumLODs: {self.numLODs}\nnumSurfaces: {self.numSurfaces}".format(
-                self=self
-            )
-        )
-
-    @staticmethod
-    def getSize() -> int:
-        # 2 ints, 2 string, 7 ints
-        return 2 * 4 + 2 * 64 + 7 * 4
-
-
-# offsets of the surface data
-class MdxmSurfaceDataOffsets:
-    def __init__(self):
-        self.baseOffset = MdxmHeader.getSize()  # always directly after the header
-        self.offsets: List[int] = []
-
-    def loadFromFile(self, file: BinaryIO, numSurfaces: int) -> None:
-        assert self.baseOffset == file.tell()
-        for i in range(numSurfaces):
-            self.offsets.append(struct.unpack("i", file.read(4))[0])
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        for offset in self.offsets:
-            file.write(struct.pack("i", offset))
-
-    def calculateOffsets(
-        self, surfaceDataCollection: "MdxmSurfaceDataCollection"
-    ) -> None:
-        offset = 4 * len(surfaceDataCollection.surfaces)
-        for surfaceData in surfaceDataCollection.surfaces:
-            self.offsets.append(offset)
-            offset += surfaceData.getSize()
-
-    # returns the size of this in bytes (when written to file)
-    def getSize(self) -> int:
-        return 4 * len(self.offsets)
-
-
 # originally called mdxmSurfaceHierarchy_t, I think that name is misleading (but mine's not too good, either)
-class MdxmSurfaceData:
-    def __init__(self):
-        self.name = b""
-        self.flags = -1
-        self.shader = b""
-        self.parentIndex = -1
-        self.numChildren = -1
-        self.children: List[int] = []
-        self.index = -1  # filled by MdxmSurfaceHierarchy.loadFromFile, not saved
-
-    def loadFromFile(self, file: BinaryIO, g2skin_defintion: dict) -> None:
-        self.name, self.flags, self.shader = unpack_cast(
-            Tuple[bytes, int, bytes], struct.unpack("64sI64s", file.read(64 + 4 + 64))
-        )
-        # print("name: " + self.name.decode() + ", flags: " + str(self.flags) )
-
-        if g2skin_defintion is not None:
-            all_off_flag_surface_names = list(
-                g2skin_defintion.get("prefs", {}).get("surfaces_off", {}).values()
-            )
-            all_on_flag_surface_names = list(
-                g2skin_defintion.get("prefs", {}).get("surfaces_on", {}).values()
-            )
-            raw_name = self.name.decode()
-            clean_name = raw_name.split("\x00", 1)[0]
-            if clean_name is not None and clean_name in all_on_flag_surface_names:
-                self.flags = 0
-            elif clean_name is not None and clean_name in all_off_flag_surface_names:
-                self.flags |= SoF2G2Constants.SURFACEFLAG_OFF
-
-        # ignoring shaderIndex which is only used ingame
-        self.parentIndex, self.numChildren = unpack_cast(
-            Tuple[int, int], struct.unpack("4x2i", file.read(3 * 4))
-        )
-        for i in range(self.numChildren):
-            self.children.append(struct.unpack("i", file.read(4))[0])
-
+class MdxmSurfaceData(glm_format.MdxmSurfaceData):
     def loadFromBlender(
         self, object: bpy.types.Object, surfaceIndexMap: Dict[str, int]
     ) -> Tuple[bool, ErrorMessage]:
@@ -335,44 +172,10 @@ class MdxmSurfaceData:
                 self.numChildren += 1
         return True, NoError
 
-    def saveToFile(self, file: BinaryIO) -> None:
-        # 0 is the shader index, only used ingame
-        file.write(
-            struct.pack(
-                "64sI64s3i",
-                self.name,
-                self.flags,
-                self.shader,
-                0,
-                self.parentIndex,
-                self.numChildren,
-            )
-        )
-        for i in range(self.numChildren):
-            file.write(struct.pack("i", self.children[i]))
-
-    def getSize(self) -> int:
-        # string, int, string, 4 ints
-        return 64 + 4 + 64 + 3 * 4 + 4 * self.numChildren
-
 
 # all the surface hierarchy/shader/name/flag/... information entries (MdxmSurfaceInfo)
-class MdxmSurfaceDataCollection:
-    def __init__(self):
-        self.surfaces: List[MdxmSurfaceData] = []
-
-    def loadFromFile(
-        self,
-        file: BinaryIO,
-        surfaceInfoOffsets: MdxmSurfaceDataOffsets,
-        g2skin_defintion: dict,
-    ) -> None:
-        for i, offset in enumerate(surfaceInfoOffsets.offsets):
-            file.seek(surfaceInfoOffsets.baseOffset + offset)
-            surfaceInfo = MdxmSurfaceData()
-            surfaceInfo.loadFromFile(file, g2skin_defintion)
-            surfaceInfo.index = i
-            self.surfaces.append(surfaceInfo)
+class MdxmSurfaceDataCollection(glm_format.MdxmSurfaceDataCollection):
+    surfaceDataType = MdxmSurfaceData
 
     def loadFromBlender(
         self, rootObject: bpy.types.Object, surfaceIndexMap: Dict[str, int]
@@ -432,16 +235,6 @@ class MdxmSurfaceDataCollection:
         self.surfaces = gaplessSurfaces
         return True, NoError
 
-    def saveToFile(self, file: BinaryIO) -> None:
-        for surfaceInfo in self.surfaces:
-            surfaceInfo.saveToFile(file)
-
-    def getSize(self) -> int:
-        size = 0
-        for surface in self.surfaces:
-            size += surface.getSize()
-        return size
-
 
 @dataclass
 class ImportMetadata:
@@ -452,82 +245,7 @@ class ImportMetadata:
     boneNames: Dict[int, str]
 
 
-class MdxmVertex:
-    def __init__(self):
-        self.co: List[float] = []
-        self.normal: List[float] = []
-        self.uv: List[float] = []
-        self.numWeights = 1
-        self.weights: List[float] = []
-        self.boneIndices: List[int] = []
-
-    # doesn't load UV since that comes later
-    def loadFromFile(self, file):
-        self.normal.extend(struct.unpack("3f", file.read(3 * 4)))
-        self.co.extend(struct.unpack("3f", file.read(3 * 4)))
-        # this is a packed structure that contains all kinds of things...
-        (packedStuff,) = unpack_cast(Tuple[int], struct.unpack("I", file.read(4)))
-        # this is not the complete weights, parts of it are in the packed stuff
-        weights: List[int] = []
-        weights.extend(struct.unpack("4B", file.read(4)))
-        # packedStuff bits 31 & 30: weight count
-        self.numWeights = (packedStuff >> 30) + 1
-        # packedStuff bits 29 & 28: nothing
-        # packedStuff bits 20f, 22f, 24f, 26f: weight overflow
-        totalWeight = 0
-        for i in range(self.numWeights):
-            # add overflow bits to the weight (MSBs!)
-            recomposed_weight = weights[i] | (
-                ((packedStuff >> (20 + 2 * i)) & 0b11) << 8
-            )
-            # convert to float (0..1023 -> 0.0..1.0)
-            normalized_weight = recomposed_weight / 1023
-            if i + 1 < self.numWeights:
-                totalWeight += normalized_weight
-                self.weights.append(normalized_weight)
-            else:  # i+1 == self.numWeights:
-                self.weights.append(1 - totalWeight)
-        # packedStuff 0-19: bone indices, 5 bit each
-        for i in range(self.numWeights):
-            self.boneIndices.append((packedStuff >> (5 * i)) & 0b11111)
-
-    # index: this surface's index
-    # does not save UV (comes later)
-    def saveToFile(self, file: BinaryIO) -> None:
-        assert len(self.weights) == self.numWeights
-        #  pack the stuff that needs packing
-        # num weights
-        packedStuff = (self.numWeights - 1) << 30
-        weights = [0, 0, 0, 0]
-        for index, weight in enumerate(self.weights):
-            # convert weight to 10 bit integer
-            weight = round(weight * 1023)
-            # lower 8 bits
-            weights[index] = weight & 0xFF
-            # higher 2 bits
-            hiWeight = (weight & 0x300) >> 8
-            packedStuff |= hiWeight << (20 + 2 * index)
-            # bone index - 5 bits
-            boneIndex = (self.boneIndices[index]) & 0b11111
-            packedStuff |= boneIndex << (5 * index)
-        assert packedStuff < 1 << 32
-        file.write(
-            struct.pack(
-                "6fI4B",
-                self.normal[0],
-                self.normal[1],
-                self.normal[2],
-                self.co[0],
-                self.co[1],
-                self.co[2],
-                packedStuff,
-                weights[0],
-                weights[1],
-                weights[2],
-                weights[3],
-            )
-        )
-
+class MdxmVertex(glm_format.MdxmVertex):
     # vertex :: Blender MeshVertex
     # uv :: [int, int] (blender style, will be y-flipped)
     # boneIndices :: { string -> int } (bone name -> index, may be changed)
@@ -599,104 +317,7 @@ class MdxmVertex:
         return True, NoError
 
 
-class MdxmTriangle:
-    def __init__(self, indices: Optional[List[int]] = None):
-        # order gets reversed during load/save
-        self.indices = [] if indices is None else indices
-
-    def loadFromFile(self, file: BinaryIO) -> None:
-        self.indices.extend(struct.unpack("3i", file.read(3 * 4)))
-        # flip CW/CCW
-        self.indices[0], self.indices[2] = self.indices[2], self.indices[0]
-        # make sure last index is not 0, eeekadoodle or something...
-        if self.indices[2] == 0:
-            self.indices[0], self.indices[1], self.indices[2] = (
-                self.indices[2],
-                self.indices[0],
-                self.indices[1],
-            )
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        # triangles are flipped because otherwise they'd face the wrong way.
-        file.write(struct.pack("3i", self.indices[2], self.indices[1], self.indices[0]))
-
-    # "for x in triangle" support
-    def __getitem__(self, index: int) -> int:
-        return self.indices[index]
-
-
-class MdxmSurface:
-    def __init__(self):
-        self.index = -1
-        self.numVerts = -1
-        self.ofsVerts = -1
-        self.numTriangles = -1
-        self.ofsTriangles = -1
-        self.numBoneReferences = -1
-        self.ofsBoneReferences = -1
-        self.ofsEnd = -1  # = size
-        self.vertices: List[MdxmVertex] = []
-        self.triangles: List[MdxmTriangle] = []
-        # integers: bone indices. maximum of 32, thus can be stored in 5 bit in vertices, saves space.
-        self.boneReferences: List[int] = []
-
-    def loadFromFile(self, file) -> None:
-        startPos = file.tell()
-        #  load surface header
-        # in the beginning I ignore the ident, which is usually 0 and shouldn't matter
-        (
-            self.index,
-            ofsHeader,
-            self.numVerts,
-            self.ofsVerts,
-            self.numTriangles,
-            self.ofsTriangles,
-            self.numBoneReferences,
-            self.ofsBoneReferences,
-            self.ofsEnd,
-        ) = unpack_cast(
-            Tuple[int, int, int, int, int, int, int, int, int],
-            struct.unpack("4x9i", file.read(10 * 4)),
-        )
-        assert ofsHeader == -startPos
-
-        #  load vertices
-        file.seek(startPos + self.ofsVerts)
-        for i in range(self.numVerts):
-            vert = MdxmVertex()
-            vert.loadFromFile(file)
-            self.vertices.append(vert)
-
-        # uv textures come later
-        for vert in self.vertices:
-            vert.uv.extend(struct.unpack("2f", file.read(2 * 4)))
-
-        #  load triangles
-        file.seek(startPos + self.ofsTriangles)
-        for i in range(self.numTriangles):
-            t = MdxmTriangle()
-            t.loadFromFile(file)
-            self.triangles.append(t)
-
-        #  load bone references
-        file.seek(startPos + self.ofsBoneReferences)
-        assert len(self.boneReferences) == 0
-        self.boneReferences.extend(
-            struct.unpack(
-                str(self.numBoneReferences) + "i", file.read(4 * self.numBoneReferences)
-            )
-        )
-
-        # print(f"surface {self.index+1}: numBoneReferences: {self.numBoneReferences}")
-        # for i, boneRef in enumerate(self.boneReferences):
-        # print(f"bone ref {i}: {boneRef}")
-
-        if file.tell() != startPos + self.ofsEnd:
-            print(
-                "Warning: Surface structure unordered (bone references not last) or read error"
-            )
-            file.seek(startPos + self.ofsEnd)
-
+class MdxmSurface(glm_format.MdxmSurface):
     def loadFromBlender(
         self,
         object: bpy.types.Object,
@@ -712,6 +333,9 @@ class MdxmSurface:
         ).to_mesh()
 
         boneIndices: Dict[str, int] = {}
+        # collected one by one, packed into the vertex arrays at the end
+        vertices: List[MdxmVertex] = []
+        triangles: List[List[int]] = []
 
         # This is a tag, use a simpler export procedure
         if surfaceData.flags & SoF2G2Constants.SURFACEFLAG_TAG:
@@ -731,9 +355,9 @@ class MdxmSurface:
                     return False, ErrorMessage(
                         f"Mesh {mesh.name} has invalid vertex: {message}"
                     )
-                self.vertices.append(vert)
-            self.triangles = [
-                MdxmTriangle([face.vertices[0], face.vertices[1], face.vertices[2]])
+                vertices.append(vert)
+            triangles = [
+                [face.vertices[0], face.vertices[1], face.vertices[2]]
                 for face in mesh.polygons
             ]
 
@@ -793,9 +417,9 @@ class MdxmSurface:
                                 f"Surface has invalid vertex: {message}"
                             )
                         protoverts.append((v, u, n))
-                        self.vertices.append(vertex)
+                        vertices.append(vertex)
                         triangle.append(len(protoverts) - 1)
-                self.triangles.append(MdxmTriangle(triangle))
+                triangles.append(triangle)
 
             self.numVerts = len(protoverts)
             self.numTriangles = len(mesh.polygons)
@@ -805,8 +429,10 @@ class MdxmSurface:
                     f"Warning: {object.name} has over 1000 vertices ({self.numVerts})"
                 )
 
-        assert len(self.vertices) == self.numVerts
-        assert len(self.triangles) == self.numTriangles
+        assert len(vertices) == self.numVerts
+        assert len(triangles) == self.numTriangles
+        self.setVertices(vertices)
+        self.setTriangles(triangles)
 
         # fill bone references
         if boneIndexMap is None:  # default skeleton
@@ -823,56 +449,6 @@ class MdxmSurface:
         self._calculateOffsets()
         return True, NoError
 
-    # if a surface does not exist on a lower LOD, an empty one gets created
-    def makeEmpty(self):
-        self.numVerts = 0
-        self.numTriangles = 0
-        self.numBoneReferences = 0
-        self._calculateOffsets()
-
-    def saveToFile(self, file):
-        startPos = file.tell()
-        #  write header (= this)
-        # 0 = ident
-        file.write(
-            struct.pack(
-                "10i",
-                0,
-                self.index,
-                -startPos,
-                self.numVerts,
-                self.ofsVerts,
-                self.numTriangles,
-                self.ofsTriangles,
-                self.numBoneReferences,
-                self.ofsBoneReferences,
-                self.ofsEnd,
-            )
-        )
-
-        # I don't know if triangles *have* to come first, but when I export they do, hence the assertions.
-
-        #  write triangles
-        assert file.tell() == startPos + self.ofsTriangles
-        for tri in self.triangles:
-            tri.saveToFile(file)
-
-        #  write vertices
-        assert file.tell() == startPos + self.ofsVerts
-        # write packed part
-        for vert in self.vertices:
-            vert.saveToFile(file)
-        # write UVs
-        for vert in self.vertices:
-            file.write(struct.pack("2f", vert.uv[0], vert.uv[1]))
-
-        #  write bone indices
-        assert file.tell() == startPos + self.ofsBoneReferences
-        for ref in self.boneReferences:
-            file.write(struct.pack("i", ref))
-
-        assert file.tell() == startPos + self.ofsEnd
-
     # returns the created object
     def saveToBlender(
         self,
@@ -888,12 +464,8 @@ class MdxmSurface:
         blenderName = name + "_" + str(lodLevel)
 
         #  create mesh
-        mesh = bpy.data.meshes.new(blenderName)
-        mesh.from_pydata(
-            [v.co for v in self.vertices],
-            [],
-            [triangle.indices for triangle in self.triangles],
-        )
+        mesh = import_steps.created("meshes", bpy.data.meshes.new(blenderName))
+        mesh.from_pydata(self.co.tolist(), [], self.triangles.tolist())
 
         # Nur Material hinzufügen, wenn es kein Tag ist
         if (
@@ -904,8 +476,8 @@ class MdxmSurface:
                 name, surfaceData.shader, loaded_shader_data, selected_skin_data
             )
             if material is None:
-                material = bpy.data.materials.new(
-                    name=SoF2Stringhelper.decode(surfaceData.shader)
+                material = import_steps.created(
+                    "materials", bpy.data.materials.new(name=SoF2Stringhelper.decode(surfaceData.shader))
                 )
             mesh.materials.append(material)
 
@@ -920,23 +492,20 @@ class MdxmSurface:
 
         mesh.validate()
 
-        mesh.normals_split_custom_set_from_vertices([v.normal for v in self.vertices])
+        mesh.normals_split_custom_set_from_vertices(self.normals.tolist())
 
+        # per-loop UVs in one go: look up each loop's vertex, flip V back to Blender's
         uv_layer = mesh.uv_layers.new()
-        uv_loops = uv_layer.data
-        for poly in mesh.polygons:
-            indices = [mesh.loops[poly.loop_start + i].vertex_index for i in range(3)]
-            uvs = [
-                [self.vertices[index].uv[0], 1 - self.vertices[index].uv[1]]
-                for index in indices
-            ]
-            for i, uv in enumerate(uvs):
-                uv_loops[poly.loop_start + i].uv = uv
+        loopVertices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loopVertices)
+        uvs = self.uvs[loopVertices].astype(np.float32)
+        uvs[:, 1] = 1 - uvs[:, 1]
+        uv_layer.data.foreach_set("uv", uvs.ravel())
 
         mesh.update()
 
         #  create object
-        obj = bpy.data.objects.new(blenderName, mesh)
+        obj = import_steps.created("objects", bpy.data.objects.new(blenderName, mesh))
 
         # in the case of the default skeleton, no weighting is needed.
         if not data.gla.isDefault:
@@ -958,10 +527,16 @@ class MdxmSurface:
                 obj.vertex_groups.new(name=data.boneNames[index])
 
             # set weights
-            for vertIndex, vert in enumerate(self.vertices):
-                for weightIndex in range(vert.numWeights):
-                    obj.vertex_groups[vert.boneIndices[weightIndex]].add(
-                        [vertIndex], vert.weights[weightIndex], "ADD"
+            for vertIndex, (numWeights, boneIndices, weights) in enumerate(
+                zip(
+                    self.numWeights.tolist(),
+                    self.boneIndices.tolist(),
+                    self.weights.tolist(),
+                )
+            ):
+                for weightIndex in range(numWeights):
+                    obj.vertex_groups[boneIndices[weightIndex]].add(
+                        [vertIndex], weights[weightIndex], "ADD"
                     )
 
         # link object to scene
@@ -1024,82 +599,9 @@ class MdxmSurface:
         obj["m_shader_name"] = obj["g2_prop_shader"]
         obj["m_prop_name"] = obj["g2_prop_name"]
 
-    # fill offset and number variables
-    def _calculateOffsets(self):
-        offset = 10 * 4  # header: 4 ints
-        # triangles
-        self.ofsTriangles = offset
-        self.numTriangles = len(self.triangles)
-        offset += 3 * 4 * self.numTriangles  # 3 ints
-        # vertices
-        self.ofsVerts = offset
-        self.numVerts = len(self.vertices)
-        offset += (
-            10 * 4 * self.numVerts
-        )  # 6 floats co/normal, 8 bytes packed, 2 floats UV
-        # bone references
-        self.ofsBoneReferences = offset
-        self.numBoneReferences = len(self.boneReferences)
-        offset += 4 * self.numBoneReferences  # 1 int each
-        # that's all the content, so we've got total size now.
-        self.ofsEnd = offset
-
-
-class MdxmLOD:
-    def __init__(
-        self,
-        surfaceOffsets: List[int],
-        level: int,
-        surfaces: List[MdxmSurface],
-        ofsEnd: int,
-    ):
-        self.surfaceOffsets = surfaceOffsets
-        self.level = level
-        self.surfaces = surfaces
-        self.ofsEnd = ofsEnd  # = size
-
-    @staticmethod
-    def loadFromFile(file: BinaryIO, level: int, header: MdxmHeader) -> "MdxmLOD":
-        startPos = file.tell()
-        (ofsEnd,) = unpack_cast(Tuple[int], struct.unpack("i", file.read(4)))
-        # surface offsets - they're relative to a structure after the one containing ofsEnd, so I need to add sizeof(int) to them later.
-        surfaceOffsets = unpack_cast(
-            List[int],
-            list(
-                struct.unpack(
-                    f"{header.numSurfaces}i", file.read(4 * header.numSurfaces)
-                )
-            ),
-        )
-        surfaces: List[MdxmSurface] = []
-        for surfaceIndex, offset in enumerate(surfaceOffsets):
-            if file.tell() != startPos + 4 + offset:
-                print("Warning: Surface not completely read or unordered")
-                file.seek(startPos + offset + 4)
-            surface = MdxmSurface()
-            surface.loadFromFile(file)
-            assert surface.index == surfaceIndex
-            surfaces.append(surface)
-        assert file.tell() == startPos + ofsEnd
-        return MdxmLOD(
-            surfaceOffsets=surfaceOffsets,
-            level=level,
-            surfaces=surfaces,
-            ofsEnd=ofsEnd,
-        )
 
-    def saveToFile(self, file: BinaryIO) -> None:
-        startPos = file.tell()
-        # write ofsEnd
-        file.write(struct.pack("i", self.ofsEnd))
-        # write surface offsets
-        for offset in self.surfaceOffsets:
-            file.write(struct.pack("i", offset))
-        # write surfaces
-        for surface in self.surfaces:
-            surface.saveToFile(file)
-        # that's it, should've reached end.
-        assert file.tell() == startPos + self.ofsEnd
+class MdxmLOD(glm_format.MdxmLOD):
+    surfaceType = MdxmSurface
 
     @staticmethod
     def loadFromBlender(
@@ -1164,15 +666,25 @@ class MdxmLOD:
         root: bpy.types.Object,
         loaded_shader_data: dict,
         selected_skin_data: dict,
+    ):
+        import_steps.run(self.saveToBlenderSteps(data, root, loaded_shader_data, selected_skin_data))
+
+    def saveToBlenderSteps(
+        self,
+        data: ImportMetadata,
+        root: bpy.types.Object,
+        loaded_shader_data: dict,
+        selected_skin_data: dict,
     ):
         # 1st pass: create objects
         objects = []
-        for surface in self.surfaces:
+        for i, surface in enumerate(self.surfaces):
             if surface is not None:
                 obj = surface.saveToBlender(
                     data, self.level, loaded_shader_data, selected_skin_data
                 )
                 objects.append(obj)
+            yield "Surface", i + 1, len(self.surfaces)
         # 2nd pass: set parent relations
         for i, obj in enumerate(objects):
             parentIndex = data.surfaceDataCollection.surfaces[i].parentIndex
@@ -1181,39 +693,9 @@ class MdxmLOD:
                 parent = objects[parentIndex]
             obj.parent = parent
 
-    # fills self.surfaceOffsets and self.ofsEnd based on self.surfaces (must be initialized)
-    def calculateOffsets(self, myOffset):
-        self.surfaceOffsets = []
-        # ofsEnd is in front of offsets, but they are relative to their start
-        offset = 4 * len(self.surfaces)
-        for surface in self.surfaces:
-            self.surfaceOffsets.append(offset)
-            offset += surface.ofsEnd  # = size
-        # memory required for ofsEnd
-        self.ofsEnd = offset + 4
-
-    def getSize(self):
-        # ofsEnd + surface offsets
-        size = 4 + 4 * len(self.surfaces)
-        for surface in self.surfaces:
-            size += surface.ofsEnd
-        return size
-
-
-class MdxmLODCollection:
-    def __init__(self):
-        self.LODs: List[MdxmLOD] = []
-
-    def loadFromFile(self, file: BinaryIO, header: MdxmHeader) -> None:
-        for i in range(header.numLODs):
-            if i > 0:
-                break  # TODO: support multiple LODs later- ANATOLI
-            startPos = file.tell()
-            curLOD = MdxmLOD.loadFromFile(file, i, header)
-            if file.tell() != startPos + curLOD.ofsEnd:
-                print("Warning: Internal reading error or LODs not tightly packed!")
-                file.seek(startPos + curLOD.ofsEnd)
-            self.LODs.append(curLOD)
+
+class MdxmLODCollection(glm_format.MdxmLODCollection):
+    lodType = MdxmLOD
 
     def loadFromBlender(
         self,
@@ -1239,82 +721,24 @@ class MdxmLODCollection:
             self.LODs.append(lod)
         return True, NoError
 
-    def calculateOffsets(self, ofsLODs):
-        offset = ofsLODs
-        for lod in self.LODs:
-            lod.calculateOffsets(offset)
-            offset += lod.getSize()
-
-    def saveToFile(self, file: BinaryIO) -> None:
-        for LOD in self.LODs:
-            LOD.saveToFile(file)
-
     def saveToBlender(
         self, data: ImportMetadata, loaded_shader_data: dict, selected_skin_data: dict
+    ):
+        import_steps.run(self.saveToBlenderSteps(data, loaded_shader_data, selected_skin_data))
+
+    def saveToBlenderSteps(
+        self, data: ImportMetadata, loaded_shader_data: dict, selected_skin_data: dict
     ):
         for i, LOD in enumerate(self.LODs):
-            root = bpy.data.objects.new("model_root_" + str(i), None)
+            root = import_steps.created("objects", bpy.data.objects.new("model_root_" + str(i), None))
             root.parent = data.scene_root
             bpy.context.scene.collection.objects.link(root)
-            LOD.saveToBlender(data, root, loaded_shader_data, selected_skin_data)
+            yield from LOD.saveToBlenderSteps(data, root, loaded_shader_data, selected_skin_data)
 
-    def getSize(self):
-        size = 0
-        for LOD in self.LODs:
-            size += LOD.ofsEnd
-        return size
 
-
-class GLM:
-    def __init__(self):
-        self.header = MdxmHeader()
-        self.surfaceDataOffsets = MdxmSurfaceDataOffsets()
-        self.surfaceDataCollection = MdxmSurfaceDataCollection()
-        self.LODCollection = MdxmLODCollection()
-
-    def loadFromFile(
-        self, filepath_abs: str, g2skin_defintion: dict
-    ) -> Tuple[bool, ErrorMessage]:
-        print(f"Loading {filepath_abs}...")
-        profiler = MrwProfiler.SimpleProfiler(True)
-        # open file
-        try:
-            file = open(filepath_abs, mode="rb")
-        except IOError as e:
-            print(f"Could not open file: {filepath_abs}")
-            return False, ErrorMessage(f"Could not open file: {e}")
-        profiler.start("reading header")
-        success, message = self.header.loadFromFile(file)
-        if not success:
-            return False, message
-        profiler.stop("reading header")
-        if log_level == "DEBUG":
-            self.header.print()
-
-        # load surface hierarchy offsets
-        profiler.start("reading surface hierarchy")
-        self.surfaceDataOffsets.loadFromFile(file, self.header.numSurfaces)
-
-        # load surfaces' information - seeks positon using surfaceDataOffsets
-        self.surfaceDataCollection.loadFromFile(
-            file, self.surfaceDataOffsets, g2skin_defintion
-        )
-        print(f"Loaded {len(self.surfaceDataCollection.surfaces)} surfaces")
-        profiler.stop("reading surface hierarchy")
-
-        # load LODs
-        profiler.start("reading surfaces")
-        file.seek(self.header.ofsLODs)
-        print(f"Loading {self.header.numLODs} LODs...")
-        self.LODCollection.loadFromFile(file, self.header)
-        profiler.stop("reading surfaces")
-
-        # should be at the end now, if the structures are in the expected order.
-        if file.tell() != self.header.ofsEnd:
-            print(
-                "Warning: File not completely read or LODs not last structure in file. The former would be a problem, the latter wouldn't."
-            )
-        return True, NoError
+class GLM(glm_format.GLM):
+    surfaceDataCollectionType = MdxmSurfaceDataCollection
+    lodCollectionType = MdxmLODCollection
 
     def loadFromBlender(
         self, glm_filepath_rel: str, gla_filepath_rel: str, basepath: str
@@ -1340,12 +764,18 @@ class GLM:
                 return False, ErrorMessage("skeleton_root is no Armature!")
             skeleton_armature = downcast(bpy.types.Armature, obj.data)
 
-            boneIndexMap, message = buildBoneIndexLookupMap(
-                SoF2Filesystem.RemoveExtension(
-                    SoF2Filesystem.AbsPath(gla_filepath_rel, basepath)
-                )
-                + ".gla"
+            # FindFile also covers .gla files inside .pk3 archives
+            success, gla_filepath_abs = SoF2Filesystem.FindFile(
+                SoF2Filesystem.RemoveExtension(gla_filepath_rel), basepath, ["gla"]
             )
+            if not success:
+                gla_filepath_abs = (
+                    SoF2Filesystem.RemoveExtension(
+                        SoF2Filesystem.AbsPath(gla_filepath_rel, basepath)
+                    )
+                    + ".gla"
+                )
+            boneIndexMap, message = buildBoneIndexLookupMap(gla_filepath_abs)
             if boneIndexMap is None:
                 return False, message
 
@@ -1400,41 +830,6 @@ class GLM:
         self._calculateHeaderOffsets()
         return True, NoError
 
-    def saveToFile(self, filepath_abs: str) -> Tuple[bool, ErrorMessage]:
-        if SoF2Filesystem.FileExists(filepath_abs):
-            print("Warning: File exists! Overwriting.")
-        # open file
-        try:
-            file = open(filepath_abs, "wb")
-        except IOError:
-            print("Failed to open file for writing: ", filepath_abs, sep="")
-            return False, ErrorMessage("Could not open file!")
-        # save header
-        self.header.saveToFile(file)
-        # save surface data offsets
-        self.surfaceDataOffsets.saveToFile(file)
-        # save surface ("hierarchy") data
-        self.surfaceDataCollection.saveToFile(file)
-        # save LODs to file
-        self.LODCollection.saveToFile(file)
-        return True, NoError
-
-    # calculates the offsets & counts saved in the header based on the rest
-    def _calculateHeaderOffsets(self):
-        # offset of "after header"
-        baseOffset = MdxmHeader.getSize()
-        # offset of "after hierarchy offset list"
-        self.header.numSurfaces = len(self.surfaceDataOffsets.offsets)
-        baseOffset += 4 * self.header.numSurfaces
-        # first "hierarchy" entry comes here
-        self.header.ofsSurfHierarchy = baseOffset
-        baseOffset += self.surfaceDataCollection.getSize()
-        # first LOD comes here
-        self.header.ofsLODs = baseOffset
-        baseOffset += self.LODCollection.getSize()
-        # that's everything, we've reached the end.
-        self.header.ofsEnd = baseOffset
-
     # basepath: ../GameData/.../
     # gla: SoF2G2GLA.GLA object - the Skeleton (for weighting purposes)
     # scene_root: "scene_root" object in Blender
@@ -1447,6 +842,22 @@ class GLM:
         loaded_shader_data: dict,
         guessTextures: bool,
     ) -> Tuple[bool, ErrorMessage]:
+        return import_steps.run(
+            self.saveToBlenderSteps(
+                basepath, gla, scene_root, selected_skin_data, loaded_shader_data, guessTextures
+            )
+        )
+
+    def saveToBlenderSteps(
+        self,
+        basepath: str,
+        gla: SoF2G2GLA.GLA,
+        scene_root: bpy.types.Object,
+        selected_skin_data: dict,
+        loaded_shader_data: dict,
+        guessTextures: bool,
+    ) -> Generator[import_steps.Step, None, Tuple[bool, ErrorMessage]]:
+        """saveToBlender as import steps: yields (label, done, total) after every surface."""
         if gla.header.numBones != self.header.numBones:
             return False, ErrorMessage(
                 f"Bone number mismatch - gla has {gla.header.numBones} bones, model uses {self.header.numBones}. Maybe you're trying to load a jk2 model with the jk3 skeleton or vice-versa?"
@@ -1468,10 +879,14 @@ class GLM:
         if not success:
             return False, message
 
-        self.LODCollection.saveToBlender(data, loaded_shader_data, selected_skin_data)
+        if texture_cache.ENABLED:
+            profiler.start("converting textures")
+            data.materialManager.preprocess_textures(
+                [surface.shader for surface in self.surfaceDataCollection.surfaces],
+                loaded_shader_data,
+            )
+            profiler.stop("converting textures")
+
+        yield from self.LODCollection.saveToBlenderSteps(data, loaded_shader_data, selected_skin_data)
         profiler.stop("creating surfaces")
         return True, NoError
-
-    def getRequestedGLA(self) -> str:
-        # todo
-        return SoF2Stringhelper.decode(self.header.animName)
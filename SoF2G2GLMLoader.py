@@ -4,12 +4,77 @@ from . import SoF2G2Exporter
 from . import SoF2G2Scene
 from . import SoF2G2GLA
 from . import frames_parser
+from . import parse_cache
+from . import vfs
+from . import prefetch
+from . import import_steps
+from .prefetch import check
 from .SoF2G2Constants import SkeletonFixes
 from . import SoF2G2Constants
 from typing import cast
 
 
+def prepare_glm(base_path, glm_final_path, loadAnimations, startFrame, numFrames, cancel=None):
+    """Decoded GLM/GLA and .frames of a .glm import as a prefetch.PreparedImport."""
+    prepared = prefetch.PreparedImport(glm_final_path)
+    scene = SoF2G2Scene.Scene(base_path)
+    # the surfaces are decoded on a worker thread while the .frames and the GLA are loaded here
+    success, message, glm_job = scene.startLoadFromGLM(
+        glm_final_path,
+        {},
+    )
+    if not success:
+        return prepared.fail("ERROR", message, "FINISHED")
+    check(cancel)
+
+    glafile = scene.getRequestedGLA()
+
+    # loose files or extracted from a .pk3
+    data_frames_file_path = vfs.resolve(base_path, glafile + "_mp.frames") or vfs.resolve(
+        base_path, glafile + ".frames"
+    )
+
+    if data_frames_file_path:
+        print(f"Loading .frames file: {data_frames_file_path}")
+        data_frames_file = parse_cache.parse_file(
+            data_frames_file_path, frames_parser.parse_frames, errors="strict"
+        )
+    else:
+        print(".frames Datei nicht gefunden, data_frames_file wird auf None gesetzt.")
+        data_frames_file = None
+    check(cancel)
+
+    gla_with_mp = glafile + "_mp"
+    if vfs.resolve(base_path, gla_with_mp + ".gla"):
+        glafile = gla_with_mp
+    # sonst bleibt glafile wie es ist (ohne _mp)
+
+    print(f"Loading GLA file: {glafile} ")
+    loadAnimations = SoF2G2GLA.AnimationLoadMode[loadAnimations]
+    success, message = scene.loadFromGLA(
+        glafile,
+        loadAnimations,
+        cast(int, startFrame),
+        cast(int, numFrames),
+        data_frames_file,
+    )
+    if not success:
+        return prepared.fail("ERROR", message, "FINISHED")
+    success, message = glm_job.result()
+    if not success:
+        return prepared.fail("ERROR", message, "FINISHED")
+
+    prepared.scene = scene
+    prepared.frames_data = data_frames_file
+    return prepared
+
+
 def handle_load_glm_file(op):
+    return import_steps.run(load_glm_steps(op))
+
+
+def load_glm_steps(op, background=False):
+    """The .glm import as import steps; background decodes in the prefetcher thread (modal import)."""
     selected_glm_file = os.path.basename(os.path.normpath(op.filepath))
 
     norm_path = os.path.normpath(op.filepath)
@@ -69,69 +134,38 @@ def handle_load_glm_file(op):
 
         # selected_glm_file = selected_glm_file.removesuffix(".glm")
 
-        scale = op.scale / 100
-        if getattr(op, 'unityMode', False):
-            scale = SoF2G2Constants.UNITY_SCALE
-        scene = SoF2G2Scene.Scene(base_path)
         glm_final_path = "/".join(parts[base_index + 1:])
-        success, message = scene.loadFromGLM(
+        prepared = yield from prefetch.prepare_steps(
+            "glm",
+            ("glm", norm_path, op.loadAnimations, int(op.startFrame), int(op.numFrames)),
+            prepare_glm,
+            base_path,
             glm_final_path,
-            {},
+            op.loadAnimations,
+            op.startFrame,
+            op.numFrames,
+            background=background,
         )
-        if not success:
-            op.report({"ERROR"}, message)
-            return {"FINISHED"}
+        prepared.replay(op)
+        if not prepared.ok:
+            return {prepared.status}
 
-        glafile = scene.getRequestedGLA()
-
-        data_frames_file_path_mp = os.path.normpath(base_path + "/" + glafile + "_mp.frames")
-        data_frames_file_path = None
-        if os.path.exists(data_frames_file_path_mp):
-            data_frames_file_path = data_frames_file_path_mp
-        else:
-            data_frames_file_path_plain = os.path.normpath(base_path + "/" + glafile + ".frames")
-            if os.path.exists(data_frames_file_path_plain):
-                data_frames_file_path = data_frames_file_path_plain
-
-        if data_frames_file_path:
-            print(f"Loading .frames file: {data_frames_file_path}")
-            with open(data_frames_file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            data_frames_file = frames_parser.parse_frames(text)
-        else:
-            print(".frames Datei nicht gefunden, data_frames_file wird auf None gesetzt.")
-            data_frames_file = None
-        
-        gla_with_mp = glafile + "_mp"
-        gla_path_with_mp = os.path.normpath(base_path + "/" + gla_with_mp + ".gla")
-        if os.path.exists(gla_path_with_mp):
-            glafile = gla_with_mp
-        # sonst bleibt glafile wie es ist (ohne _mp)
-        
-        print(f"Loading GLA file: {glafile} ")
+        scale = op.scale / 100
+        if getattr(op, 'unityMode', False):
+            scale = SoF2G2Constants.UNITY_SCALE
         loadAnimations = SoF2G2GLA.AnimationLoadMode[op.loadAnimations]
-        success, message = scene.loadFromGLA(
-            glafile,
-            loadAnimations,
-            cast(int, op.startFrame),
-            cast(int, op.numFrames),
-            data_frames_file,
-        )
-        if not success:
-            op.report({"ERROR"}, message)
-            return {"FINISHED"}
 
         # Load shader file for NPC
 
         guessTextures = True
-        success, message = scene.saveToBlender(
+        success, message = yield from prepared.scene.saveToBlenderSteps(
             scale,
             {},
             {},
             guessTextures,
             loadAnimations != SoF2G2GLA.AnimationLoadMode.NONE,
             SkeletonFixes[op.skeletonFixes],
-            data_frames_file,
+            prepared.frames_data,
         )
         if not success:
             op.report({"ERROR"}, message)
@@ -9,6 +9,11 @@ from . import SoF2G2Exporter
 from . import SoF2G2Scene
 from . import SoF2G2GLA
 from . import frames_parser
+from . import parse_cache
+from . import vfs
+from . import prefetch
+from . import import_steps
+from .prefetch import check
 # skl parsing is handled within exporter now
 
 
@@ -23,62 +28,50 @@ def find_skin_data_by_file_value(skin_data: dict, file_name: str):
     return None
 
 
-def find_character_template_by_key(npcs_data, key):
+def find_character_template_by_key(index, key):
     """
     Find the character template for a specific NPC key.
 
     Args:
-        npcs_data: Dictionary containing all NPC data
+        index: npc_index.NpcIndex of the loaded NPC data (SoF2G2DataCache.get_npc_index)
         key: String name of the NPC to find
 
     Returns:
-        Dictionary containing the character template, or None if not found
+        (all extended character templates, dict with char_template/npc_filename/group_info or None)
+        The template list and group_info belong to the cached index and must not be modified;
+        char_template is a fresh copy.
     """
-    all_char_templates = []
-    for npc_filename, npc_content in npcs_data.items():
-        char_templates = npc_content.get("CharacterTemplate", [])
-        if not isinstance(char_templates, list):
-            char_templates = [char_templates]
-
-        # Extend each char_template with npc_filename and group_info
-        for char_template in char_templates:
-            extended_template = dict(char_template)  # Create a copy
-            extended_template["npc_filename"] = npc_filename
-            extended_template["group_info"] = npc_content.get("GroupInfo", {})
-            all_char_templates.append(extended_template)
-
-    found_char_template = None
-    for char_template in all_char_templates:
-        if char_template.get("Name") == key:
-            found_char_template = {
-                "char_template": char_template,
-                "npc_filename": char_template.get("npc_filename"),
-                "group_info": char_template.get("group_info", {}),
-            }
-    return all_char_templates, found_char_template
+    found = index.get(key)
+    if found is not None:
+        found = dict(found, char_template=dict(found["char_template"]))
+    return index.templates, found
 
 
-def handle_load_npc_file(op):
-    # Export everything in one go; no preloading here
-    success, message, all_data = SoF2G2Exporter.export_all_data(op.basepath)
-    if success:
-        op.report({"INFO"}, message)
-        print(message)
+def prepare_npc(basepath, npc_selected, loadAnimations, startFrame, numFrames, cancel=None):
+    """
+    Everything of an NPC import up to the Blender objects: template, skin, shaders, decoded GLM/GLA
+    and .frames, as a prefetch.PreparedImport. Runs in the prefetcher thread or in execute.
+    """
+    prepared = prefetch.PreparedImport(npc_selected)
+
+    # In-memory data for the load, from the caches; the JSON export is its own operator
+    all_data = SoF2G2Exporter.load_all_data(basepath)
+    check(cancel)
 
     # Now fetch data needed for loading the selected NPC
-    npcs_files_data = all_data["npcs"]
+    npcs_index = all_data["npc_index"]
 
     npcs_data, character_template = find_character_template_by_key(
-        npcs_files_data, op.npc_selected
+        npcs_index, npc_selected
     )
 
     if character_template:
-        print(f"Found character template for {op.npc_selected}:")
+        print(f"Found character template for {npc_selected}:")
         character_model_path = character_template.get("char_template", {}).get(
             "Model", None
         )
         _, all_g2skin_files_data = DataCache.get_skins(
-            getattr(op, "basepath", ""), character_model_path
+            basepath, character_model_path
         )
 
         g2_skin_file_name = None
@@ -92,14 +85,14 @@ def handle_load_npc_file(op):
                     f"NPC got a Parent NPC template #TODO load it later: {parent_template}"
                 )
                 _, parent_char_template_data = find_character_template_by_key(
-                    npcs_files_data, parent_template
+                    npcs_index, parent_template
                 )
                 if parent_char_template_data:
                     character_model_path = parent_char_template_data.get(
                         "char_template", {}
                     ).get("Model", None)
                     _, all_g2skin_files_data = DataCache.get_skins(
-                        getattr(op, "basepath", ""), character_model_path
+                        basepath, character_model_path
                     )
                     parent_char_template_skin_files = parent_char_template_data.get(
                         "char_template", {}
@@ -117,14 +110,10 @@ def handle_load_npc_file(op):
                             "In deiner Parent .npc Datei sind die Skin Einträge fehlerhaft (wrong type):",
                             type(parent_char_template_skin_files),
                         )
-                        return {"CANCELLED"}
+                        return prepared.fail("ERROR", "Skin entries of the parent .npc file are invalid")
 
             if not parent_char_template_skin_information:
-                op.report(
-                    {"ERROR"},
-                    "No g2skin file found! Check your loaded .npc file definition if you load one.",
-                )
-                return {"CANCELLED"}
+                return prepared.fail("ERROR", "No g2skin file found! Check your loaded .npc file definition if you load one.")
             else:
                 g2_skin_file_name = parent_char_template_skin_information.get("File")
 
@@ -145,17 +134,13 @@ def handle_load_npc_file(op):
                     "In deiner .npc Datei sind die Skin Einträge fehlerhaft (wrong type):",
                     type(character_template_skin_files),
                 )
-                return {"CANCELLED"}
+                return prepared.fail("ERROR", "Skin entries of the .npc file are invalid")
 
             if not character_template_skin_information:
                 # if no skin found we try first g2skin file in all_g2skin_files_data
                 g2_skin_file_name = next(iter(all_g2skin_files_data.keys()), None)
                 if not g2_skin_file_name:
-                    op.report(
-                        {"ERROR"},
-                        "No g2skin file found! Check your loaded .npc file definition if you load one.",
-                    )
-                    return {"CANCELLED"}
+                    return prepared.fail("ERROR", "No g2skin file found! Check your loaded .npc file definition if you load one.")
             else:
                 # if skin found we use the first file name from the character template
                 g2_skin_file_name = character_template_skin_information.get("File")
@@ -165,18 +150,14 @@ def handle_load_npc_file(op):
             all_g2skin_files_data, g2_skin_file_name
         )
         if not selected_g2skin_data:
-            op.report(
-                {"ERROR"},
-                "No g2skin file found! Check your loaded .npc file definition if you load one.",
-            )
-            return {"CANCELLED"}
+            return prepared.fail("ERROR", "No g2skin file found! Check your loaded .npc file definition if you load one.")
 
         loaded_model_from_g2 = os.path.splitext(os.path.basename(character_model_path))[
             0
         ]
         print(f"Loading .shader file: {loaded_model_from_g2}.shader")
         _, loaded_shader_data = DataCache.get_shaders_data(
-            op.basepath, loaded_model_from_g2
+            basepath, loaded_model_from_g2
         )
 
         skin_materials = selected_g2skin_data.get("materials", [])
@@ -185,82 +166,136 @@ def handle_load_npc_file(op):
             for group in mat.get("groups", []):
                 for key in ["texture1", "shader1"]:
                     if key in group:
-                        shader_key = group[key]
-                        if shader_key in loaded_shader_data:
-                            group[key] = loaded_shader_data[shader_key]["blocks"][0][
-                                "map"
-                            ]
+                        shader = loaded_shader_data.get(group[key].lower())
+                        if shader is not None and shader.base_map:
+                            group[key] = shader.base_map
 
         has_deathmatch_flag = character_template.get("char_template", {}).get(
             "Deathmatch", None
         )
 
-        scale = op.scale / 100
-        if getattr(op, 'unityMode', False):
-            scale = SoF2G2Constants.UNITY_SCALE
-
-        scene = SoF2G2Scene.Scene(op.basepath)
-        success, message = scene.loadFromGLM(character_model_path, selected_g2skin_data)
+        check(cancel)
+        scene = SoF2G2Scene.Scene(basepath)
+        # the surfaces are decoded on a worker thread while the .frames and the GLA are loaded here
+        success, message, glm_job = scene.startLoadFromGLM(character_model_path, selected_g2skin_data)
         if not success:
-            op.report({"ERROR"}, message)
-            return {"FINISHED"}
+            return prepared.fail("ERROR", message, "FINISHED")
 
         glafile = scene.getRequestedGLA()
-        data_frames_file_path = os.path.normpath(
-            op.basepath
-            + "/"
-            + glafile
-            + (".frames" if has_deathmatch_flag else "_mp.frames")
+        frames_rel = glafile + (".frames" if has_deathmatch_flag else "_mp.frames")
+        # loose file or extracted from a .pk3
+        data_frames_file_path = vfs.resolve(basepath, frames_rel) or os.path.normpath(
+            basepath + "/" + frames_rel
         )
         print(f"Loading .frames file: {data_frames_file_path}")
-        text = open(
-            data_frames_file_path,
-            "r",
-            encoding="utf-8",
-        ).read()
-        data_frames_file = frames_parser.parse_frames(text)
+        data_frames_file = parse_cache.parse_file(
+            data_frames_file_path, frames_parser.parse_frames, errors="strict"
+        )
+        check(cancel)
 
         if not has_deathmatch_flag:
             glafile = glafile + "_mp"
 
         print(f"Loading GLA file: {glafile} ")
-        loadAnimations = SoF2G2GLA.AnimationLoadMode[op.loadAnimations]
+        loadAnimations = SoF2G2GLA.AnimationLoadMode[loadAnimations]
         success, message = scene.loadFromGLA(
             glafile,
             loadAnimations,
-            cast(int, op.startFrame),
-            cast(int, op.numFrames),
+            cast(int, startFrame),
+            cast(int, numFrames),
             data_frames_file,
         )
         if not success:
-            op.report({"ERROR"}, message)
-            return {"FINISHED"}
-
-        # Load shader file for NPC
-
-        guessTextures = True
-        success, message = scene.saveToBlender(
-            scale,
-            selected_g2skin_data,
-            loaded_shader_data,
-            guessTextures,
-            loadAnimations != SoF2G2GLA.AnimationLoadMode.NONE,
-            SkeletonFixes[op.skeletonFixes],
-            data_frames_file,
-        )
+            return prepared.fail("ERROR", message, "FINISHED")
+        success, message = glm_job.result()
         if not success:
-            op.report({"ERROR"}, message)
-            return {"FINISHED"}
+            return prepared.fail("ERROR", message, "FINISHED")
+
+        prepared.scene = scene
+        prepared.skin_data = selected_g2skin_data
+        prepared.shader_data = loaded_shader_data
+        prepared.frames_data = data_frames_file
+        return prepared
+
+    else:
+        print(f"No character template found for key: {npc_selected}")
+        prepared.status = "CANCELLED"
+        return prepared
+
+
+def _npc_prefetch_key(op):
+    return (
+        "npc",
+        os.path.normpath(op.basepath),
+        op.npc_selected,
+        op.loadAnimations,
+        int(op.startFrame),
+        int(op.numFrames),
+    )
+
+
+def prefetch_npc(op):
+    """Start preparing the NPC selected in op in the background (glm.select_npc)."""
+    if not op.basepath or not op.npc_selected:
+        return
+    prefetch.prefetcher.submit(
+        "npc",
+        _npc_prefetch_key(op),
+        prepare_npc,
+        op.basepath,
+        op.npc_selected,
+        op.loadAnimations,
+        op.startFrame,
+        op.numFrames,
+    )
 
-        # Apply Unity corrections if enabled
-        if getattr(op, 'unityMode', False):
-            success, message = SoF2G2Scene.apply_unity_corrections()
-            if not success:
-                op.report({"WARNING"}, str(message))
 
-        op.report({"INFO"}, f"NPC loaded: {op.npc_selected}")
+def handle_load_npc_file(op):
+    return import_steps.run(load_npc_steps(op))
+
+
+def load_npc_steps(op, background=False):
+    """The NPC import as import steps; background prepares in the prefetcher thread (modal import)."""
+    # prefetched when the NPC was selected, otherwise prepared now
+    prepared = yield from prefetch.prepare_steps(
+        "npc",
+        _npc_prefetch_key(op),
+        prepare_npc,
+        op.basepath,
+        op.npc_selected,
+        op.loadAnimations,
+        op.startFrame,
+        op.numFrames,
+        background=background,
+    )
+    prepared.replay(op)
+    if not prepared.ok:
+        return {prepared.status}
+
+    scale = op.scale / 100
+    if getattr(op, 'unityMode', False):
+        scale = SoF2G2Constants.UNITY_SCALE
+
+    loadAnimations = SoF2G2GLA.AnimationLoadMode[op.loadAnimations]
+    guessTextures = True
+    success, message = yield from prepared.scene.saveToBlenderSteps(
+        scale,
+        prepared.skin_data,
+        prepared.shader_data,
+        guessTextures,
+        loadAnimations != SoF2G2GLA.AnimationLoadMode.NONE,
+        SkeletonFixes[op.skeletonFixes],
+        prepared.frames_data,
+    )
+    if not success:
+        op.report({"ERROR"}, message)
         return {"FINISHED"}
 
-    else:
-        print(f"No character template found for key: {op.npc_selected}")
-        return {"CANCELLED"}
+    # Apply Unity corrections if enabled
+    if getattr(op, 'unityMode', False):
+        success, message = SoF2G2Scene.apply_unity_corrections()
+        if not success:
+            op.report({"WARNING"}, str(message))
+
+    op.report({"INFO"}, f"NPC loaded: {op.npc_selected}")
+    return {"FINISHED"}
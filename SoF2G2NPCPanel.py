@@ -14,6 +14,8 @@ def draw_glm_import_panel(layout, operator):
         layout.prop(operator, "loadWeapons")
         box = layout.box()
         box.label(text="Basepath OK!", icon="CHECKMARK")
+        op = box.operator("glm.export_json_data", icon="EXPORT")
+        op.basepath = operator.basepath
 
         if operator.loadWeapons:
             SoF2G2WeaponPanel.draw_weapon_import_panel(layout, operator)
@@ -21,17 +23,15 @@ def draw_glm_import_panel(layout, operator):
             # --- Neuer NPC-Browser ---
             layout.prop(operator, "npc_search", text="", icon="VIEWZOOM")
 
-            items = DataCache.get_npc_enum_items(operator.basepath)
-            items.sort(
-                key=lambda x: x[0]
-            )  # Sort by first tuple element (identifier) ascending
-            search = operator.npc_search.strip().lower()
+            # sorted by identifier, built once per NPC folder; the last query result is cached
+            index = DataCache.get_npc_search_index(operator.basepath)
+            items = index.items
+            matches = index.search(operator.npc_search)
             shown = 0
             max_show = 30  # Limit, damit das Panel nicht explodiert
 
-            for ident, name, desc in items:
-                if search and search not in name.lower() and search not in desc.lower():
-                    continue
+            for pos in matches:
+                ident, name, desc = items[pos]
                 if shown >= max_show:
                     layout.label(
                         text=f"... {len(items) - shown} weitere NPCs ausgeblendet ..."
@@ -78,6 +78,7 @@ def draw_glm_import_panel(layout, operator):
                 if operator.loadAnimations == "RANGE":
                     layout.prop(operator, "startFrame")
                     layout.prop(operator, "numFrames")
+                layout.prop(operator, "modalImport")
                 #layout.prop(operator, "skeletonFixes")
 
                 layout.separator()
@@ -112,6 +113,7 @@ def draw_glm_import_panel(layout, operator):
         if operator.loadAnimations == "RANGE":
             layout.prop(operator, "startFrame")
             layout.prop(operator, "numFrames")
+        layout.prop(operator, "modalImport")
 
         layout.separator()
         box_unity = layout.box()
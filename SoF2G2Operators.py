@@ -31,10 +31,14 @@ from . import SoF2G2NPCLoader  # noqa: E402
 from . import SoF2G2WeaponLoader  # noqa: E402
 from . import SoF2G2NPCPanel  # noqa: E402
 from . import SoF2G2GLMLoader  # noqa: E402
+from . import SoF2G2Exporter  # noqa: E402
+from . import SoF2Materialmanager  # noqa: E402
+from . import prefetch  # noqa: E402
+from . import SoF2ModalImport  # noqa: E402
 from .SoF2G2GLAOperator import GLAImport  # noqa: E402
 
 
-class GLMImport(bpy.types.Operator):
+class GLMImport(SoF2ModalImport.ModalImport, bpy.types.Operator):
     """Import GLM Operator."""
 
     bl_idname = "import_scene.glm"
@@ -138,6 +142,12 @@ class GLMImport(bpy.types.Operator):
         default=False,
     )
 
+    modalImport: bpy.props.BoolProperty(  # pyright: ignore [reportInvalidTypeForm]
+        name="Import in Background",
+        description="Keep Blender responsive while importing: shows a progress bar, Esc cancels the import and removes what was already created",
+        default=True,
+    )
+
     def handle_load_glm_file(self):
         return SoF2G2GLMLoader.handle_load_glm_file(self)
 
@@ -147,6 +157,13 @@ class GLMImport(bpy.types.Operator):
     def handle_load_weapon_file(self):
         return SoF2G2WeaponLoader.handle_load_weapon_file(self)
 
+    def load_steps(self, context, background):
+        if self.loadWeapons:
+            return SoF2G2WeaponLoader.load_weapon_steps(self, background)
+        if not self.npc_selected:
+            return SoF2G2GLMLoader.load_glm_steps(self, background)
+        return SoF2G2NPCLoader.load_npc_steps(self, background)
+
     def draw(self, context):
         SoF2G2NPCPanel.draw_glm_import_panel(self.layout, self)
 
@@ -155,14 +172,7 @@ class GLMImport(bpy.types.Operator):
             self.report({"ERROR"}, "No Base Path selected!")
             return {"CANCELLED"}
 
-        if self.loadWeapons:
-            return self.handle_load_weapon_file()
-        else:
-            key = self.npc_selected
-            if not key:
-                return self.handle_load_glm_file()
-            else:
-                return self.handle_load_npc_file()
+        return self.run_import(context)
 
     def invoke(self, context, event):
         wm = context.window_manager
@@ -189,6 +199,8 @@ class GLM_OT_select_npc(bpy.types.Operator):
         if hasattr(op, "npc_selected"):
             op.npc_selected = self.npc_id
             self.report({"INFO"}, f"NPC gewählt: {self.npc_id}")
+            # load template/skin/shaders and decode GLM/GLA while the user is still in the dialog
+            SoF2G2NPCLoader.prefetch_npc(op)
         return {"FINISHED"}
 
 class GLM_OT_select_weapon(bpy.types.Operator):
@@ -203,8 +215,23 @@ class GLM_OT_select_weapon(bpy.types.Operator):
         if hasattr(op, "weapon_selected"):
             op.weapon_selected = self.weapon_id
             self.report({"INFO"}, f"Weapon gewählt: {self.weapon_id}")
+            SoF2G2WeaponLoader.prefetch_weapon(op)
         return {"FINISHED"}
 
+class GLM_OT_export_json_data(bpy.types.Operator):
+    bl_idname = "glm.export_json_data"
+    bl_label = "Export JSON Data"
+    bl_description = "Exportiert Waffen, Items, NPCs, Skins und Skelette als JSON nach <basepath>/exported_json_data (nur geänderte)"
+
+    basepath: bpy.props.StringProperty()
+
+    def execute(self, context):
+        # imports don't export any more, this writes only the outputs whose sources changed
+        success, message, _ = SoF2G2Exporter.export_all_data(self.basepath)
+        self.report({"INFO"} if success else {"ERROR"}, message)
+        return {"FINISHED"} if success else {"CANCELLED"}
+
+
 class ObjectAddG2Properties(bpy.types.Operator):
     bl_idname = "object.add_g2_properties"
     bl_label = "Add G2 properties"
@@ -273,7 +300,8 @@ def register():
     bpy.utils.register_class(GLMImport)
     bpy.utils.register_class(GLM_OT_select_npc)
     bpy.utils.register_class(GLM_OT_select_weapon)
-    
+    bpy.utils.register_class(GLM_OT_export_json_data)
+
     bpy.utils.register_class(GLAImport)
 
     bpy.utils.register_class(ObjectAddG2Properties)
@@ -281,11 +309,14 @@ def register():
 
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import_glm)
 
+    SoF2Materialmanager.register()
+
 
 def unregister():
     bpy.utils.unregister_class(GLMImport)
     bpy.utils.unregister_class(GLM_OT_select_npc)
     bpy.utils.unregister_class(GLM_OT_select_weapon)
+    bpy.utils.unregister_class(GLM_OT_export_json_data)
     
     bpy.utils.unregister_class(GLAImport)
 
@@ -293,3 +324,6 @@ def unregister():
     bpy.utils.unregister_class(ObjectRemoveG2Properties)
 
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import_glm)
+
+    SoF2Materialmanager.unregister()
+    prefetch.prefetcher.cancel_all()
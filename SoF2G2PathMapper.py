@@ -2,8 +2,139 @@
 SOF2 Path Mapper - Clean refactored approach for mapping SKL and Frames data
 """
 import os
-from typing import Dict, Any, Optional, List, Tuple
-from copy import deepcopy
+from typing import Dict, Any, Optional, List, Tuple, Union
+from bisect import bisect_right
+
+
+_MATCH_LABELS = {
+    "exact": "EXACT",
+    "contains": "CONTAINS",
+    "reverse": "REVERSE",
+    "endswith": "ENDS WITH",
+    "startswith": "STARTS WITH",
+    "basename": "BASENAME",
+    "fuzzy": "FUZZY",
+}
+
+# joins the normalized keys for substring search, cannot occur in a normalized path
+_SEPARATOR = "\0"
+
+
+class FramesPathIndex:
+    """
+    Frames keys normalized once, with lookup structures for every PathMapper match strategy.
+    Match priority (first hit wins, ties go to the earliest key):
+      1. exact            -> hash map
+      2. skl in frame     -> str.find over all normalized keys joined into one string
+      3. frame in skl     -> hash lookups of the query's substrings (only lengths that exist as keys)
+      4. endswith         -> implied by 2, can never be reached on its own
+      5. startswith       -> implied by 3, can never be reached on its own
+      6. basename         -> hash map
+      7. fuzzy (stem)     -> hash map
+    """
+    
+    def __init__(self, frames_keys: List[str], normalize):
+        self.keys: List[str] = []
+        self.normalized: List[str] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._basename: Dict[str, List[int]] = {}
+        self._stem: Dict[str, List[int]] = {}
+        for frame_key in frames_keys:
+            frame_normalized = normalize(frame_key)
+            if not frame_normalized:
+                continue
+            pos = len(self.keys)
+            self.keys.append(frame_key)
+            self.normalized.append(frame_normalized)
+            self._exact.setdefault(frame_normalized, []).append(pos)
+            basename = os.path.basename(frame_normalized)
+            self._basename.setdefault(basename, []).append(pos)
+            self._stem.setdefault(os.path.splitext(basename)[0], []).append(pos)
+        
+        # start offset of every key inside the joined string
+        self._offsets: List[int] = []
+        offset = 0
+        for n in self.normalized:
+            self._offsets.append(offset)
+            offset += len(n) + len(_SEPARATOR)
+        self._haystack = _SEPARATOR.join(self.normalized)
+        self._lengths = sorted({len(n) for n in self.normalized})
+        self._cache: Dict[Tuple[str, bool], Tuple[Optional[str], List[str]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def match(self, skl_normalized: str, collect_all: bool = False) -> Tuple[Optional[str], List[str]]:
+        """
+        Returns (match kind, matching original keys). The first key is the best match.
+        Unless collect_all is set, only the best match is returned.
+        """
+        cache_key = (skl_normalized, collect_all)
+        cached = self._cache.get(cache_key)
+        if cached is None:
+            cached = self._match(skl_normalized, collect_all)
+            self._cache[cache_key] = cached
+        return cached
+    
+    def _match(self, q: str, collect_all: bool) -> Tuple[Optional[str], List[str]]:
+        exact = self._exact.get(q)
+        if exact:
+            return "exact", [self.keys[exact[0]]]
+        
+        positions = self._contains(q, collect_all)
+        if positions:
+            return "contains", [self.keys[p] for p in positions]
+        
+        positions = self._contained_in(q, collect_all)
+        if positions:
+            return "reverse", [self.keys[p] for p in positions]
+        
+        basename = os.path.basename(q)
+        for kind, table, name in (
+            ("basename", self._basename, basename),
+            ("fuzzy", self._stem, os.path.splitext(basename)[0]),
+        ):
+            positions = table.get(name)
+            if positions:
+                if not collect_all:
+                    positions = positions[:1]
+                return kind, [self.keys[p] for p in positions]
+        
+        return None, []
+    
+    def _key_at(self, haystack_pos: int) -> int:
+        return bisect_right(self._offsets, haystack_pos) - 1
+    
+    def _contains(self, q: str, collect_all: bool) -> List[int]:
+        """Keys containing q, in key order."""
+        if _SEPARATOR in q:
+            return [p for p, n in enumerate(self.normalized) if q in n][: None if collect_all else 1]
+        found: List[int] = []
+        start = 0
+        while True:
+            hit = self._haystack.find(q, start)
+            if hit == -1:
+                break
+            pos = self._key_at(hit)
+            found.append(pos)
+            if not collect_all or pos + 1 >= len(self._offsets):
+                break
+            # continue with the next key
+            start = self._offsets[pos + 1]
+        return found
+    
+    def _contained_in(self, q: str, collect_all: bool) -> List[int]:
+        """Keys that are a substring of q, in key order."""
+        found = set()
+        for length in self._lengths:
+            if length > len(q):
+                break
+            for i in range(len(q) - length + 1):
+                positions = self._exact.get(q[i : i + length])
+                if positions:
+                    found.update(positions)
+        result = sorted(found)
+        return result if collect_all else result[:1]
 
 
 class PathMapper:
@@ -14,6 +145,8 @@ class PathMapper:
     
     def __init__(self):
         self.debug = True
+        # (frames_keys list, its length, FramesPathIndex) of the last plain list passed to find_best_match
+        self._path_index: Optional[Tuple[List[str], int, "FramesPathIndex"]] = None
     
     def normalize_path(self, path: str) -> str:
         """
@@ -60,10 +193,13 @@ class PathMapper:
         
         return normalized
     
-    def find_best_match(self, skl_path: str, frames_keys: List[str]) -> Optional[str]:
+    def find_best_match(
+        self, skl_path: str, frames_keys: Union[List[str], "FramesPathIndex"]
+    ) -> Optional[str]:
         """
         Find the best matching frame key for a given SKL path.
         Returns the original frame key (not normalized) if found.
+        frames_keys may be a plain key list or a prebuilt FramesPathIndex (much faster for many lookups).
         """
         if not skl_path or not frames_keys:
             return None
@@ -72,100 +208,36 @@ class PathMapper:
         if not skl_normalized:
             return None
         
-        # Create list of (original_key, normalized_key) tuples
-        frame_candidates = []
-        for frame_key in frames_keys:
-            frame_normalized = self.normalize_path(frame_key)
-            if frame_normalized:
-                frame_candidates.append((frame_key, frame_normalized))
+        if isinstance(frames_keys, FramesPathIndex):
+            index = frames_keys
+        else:
+            index = self._get_path_index(frames_keys)
         
-        if not frame_candidates:
+        if not index:
             return None
         
-        # 1. Exact match
-        for orig_key, norm_key in frame_candidates:
-            if norm_key == skl_normalized:
-                if self.debug:
-                    print(f"✓ EXACT MATCH: '{skl_path}' -> '{orig_key}'")
-                return orig_key
-        
-        # 2. SKL path is contained in frame path
-        contains_matches = [orig_key for orig_key, norm_key in frame_candidates 
-                          if skl_normalized in norm_key]
-        if len(contains_matches) == 1:
+        # only collect every candidate if we are going to print them
+        kind, matches = index.match(skl_normalized, collect_all=self.debug)
+        if not matches:
             if self.debug:
-                print(f"✓ CONTAINS MATCH: '{skl_path}' -> '{contains_matches[0]}'")
-            return contains_matches[0]
-        elif len(contains_matches) > 1:
-            if self.debug:
-                print(f"⚠ MULTIPLE CONTAINS MATCHES for '{skl_path}': {contains_matches}")
-            return contains_matches[0]  # Return first match
-        
-        # 3. Frame path is contained in SKL path
-        reverse_matches = [orig_key for orig_key, norm_key in frame_candidates 
-                          if norm_key in skl_normalized]
-        if len(reverse_matches) == 1:
-            if self.debug:
-                print(f"✓ REVERSE MATCH: '{skl_path}' -> '{reverse_matches[0]}'")
-            return reverse_matches[0]
-        elif len(reverse_matches) > 1:
-            if self.debug:
-                print(f"⚠ MULTIPLE REVERSE MATCHES for '{skl_path}': {reverse_matches}")
-            return reverse_matches[0]
-        
-        # 4. Ends with match
-        ends_matches = [orig_key for orig_key, norm_key in frame_candidates 
-                       if norm_key.endswith(skl_normalized)]
-        if len(ends_matches) == 1:
-            if self.debug:
-                print(f"✓ ENDS WITH MATCH: '{skl_path}' -> '{ends_matches[0]}'")
-            return ends_matches[0]
-        elif len(ends_matches) > 1:
-            if self.debug:
-                print(f"⚠ MULTIPLE ENDS WITH MATCHES for '{skl_path}': {ends_matches}")
-            return ends_matches[0]
-        
-        # 5. Starts with match
-        starts_matches = [orig_key for orig_key, norm_key in frame_candidates 
-                         if skl_normalized.startswith(norm_key)]
-        if len(starts_matches) == 1:
-            if self.debug:
-                print(f"✓ STARTS WITH MATCH: '{skl_path}' -> '{starts_matches[0]}'")
-            return starts_matches[0]
-        elif len(starts_matches) > 1:
-            if self.debug:
-                print(f"⚠ MULTIPLE STARTS WITH MATCHES for '{skl_path}': {starts_matches}")
-            return starts_matches[0]
-        
-        # 6. Basename match
-        skl_basename = os.path.basename(skl_normalized)
-        basename_matches = [orig_key for orig_key, norm_key in frame_candidates 
-                           if os.path.basename(norm_key) == skl_basename]
-        if len(basename_matches) == 1:
-            if self.debug:
-                print(f"✓ BASENAME MATCH: '{skl_path}' -> '{basename_matches[0]}'")
-            return basename_matches[0]
-        elif len(basename_matches) > 1:
-            if self.debug:
-                print(f"⚠ MULTIPLE BASENAME MATCHES for '{skl_path}': {basename_matches}")
-            return basename_matches[0]
-        
-        # 7. Fuzzy basename match (without extension)
-        skl_name_no_ext = os.path.splitext(skl_basename)[0]
-        fuzzy_matches = [orig_key for orig_key, norm_key in frame_candidates 
-                        if os.path.splitext(os.path.basename(norm_key))[0] == skl_name_no_ext]
-        if len(fuzzy_matches) == 1:
-            if self.debug:
-                print(f"✓ FUZZY MATCH: '{skl_path}' -> '{fuzzy_matches[0]}'")
-            return fuzzy_matches[0]
-        elif len(fuzzy_matches) > 1:
-            if self.debug:
-                print(f"⚠ MULTIPLE FUZZY MATCHES for '{skl_path}': {fuzzy_matches}")
-            return fuzzy_matches[0]
+                print(f"✗ NO MATCH FOUND for '{skl_path}'")
+            return None
         
         if self.debug:
-            print(f"✗ NO MATCH FOUND for '{skl_path}'")
-        return None
+            label = _MATCH_LABELS[kind]
+            if kind == "exact" or len(matches) == 1:
+                print(f"✓ {label} MATCH: '{skl_path}' -> '{matches[0]}'")
+            else:
+                print(f"⚠ MULTIPLE {label} MATCHES for '{skl_path}': {matches}")
+        return matches[0]
+    
+    def _get_path_index(self, frames_keys: List[str]) -> "FramesPathIndex":
+        """Build (or reuse) the index for a plain key list."""
+        cached = self._path_index
+        if cached is None or cached[0] is not frames_keys or cached[1] != len(frames_keys):
+            cached = (frames_keys, len(frames_keys), FramesPathIndex(frames_keys, self.normalize_path))
+            self._path_index = cached
+        return cached[2]
     
     def map_frames_into_skl(self, data_skl: Dict[str, Any], data_frames: Dict[str, Any], 
                            inplace: bool = False) -> Dict[str, Any]:
@@ -176,20 +248,26 @@ class PathMapper:
         Args:
             data_skl: Parsed SKL data (nested dicts/lists)
             data_frames: Parsed frames data (dict with .xsi paths as keys)
-            inplace: If True, modify data_skl in place; if False, work on a copy
+            inplace: If True, modify data_skl in place; if False, data_skl is left unchanged:
+                only the containers on the path to a mapped value are copied, everything
+                else (and the embedded frames blocks) is shared with the inputs
             
         Returns:
             Mapped SKL data with frame information
         """
-        if not inplace:
-            data_skl = deepcopy(data_skl)
         
-        # Extract all frame keys for matching
-        frames_keys = list(data_frames.keys())
+        # Extract all frame keys for matching and normalize them once,
+        # instead of once per .xsi string in the SKL tree
+        frames_paths = list(data_frames)
+        frames_keys = FramesPathIndex(frames_paths, self.normalize_path)
         
         if self.debug:
-            print(f"Mapping {len(frames_keys)} frame keys into SKL data...")
-            print(f"Sample frame keys: {frames_keys[:3]}")
+            print(f"Mapping {len(frames_paths)} frame keys into SKL data...")
+            print(f"Sample frame keys: {frames_paths[:3]}")
+        
+        if not inplace:
+            # path copying instead of a deepcopy of the whole SKL tree
+            return self._map_shared(data_skl, data_frames, frames_keys)
         
         # Walk through the SKL data and replace .xsi paths
         def walk_and_map(obj, path=""):
@@ -263,6 +341,55 @@ class PathMapper:
         walk_and_map(data_skl)
         return data_skl
     
+    def _map_shared(self, obj: Any, data_frames: Dict[str, Any], frames_keys: "FramesPathIndex",
+                    path: str = "") -> Any:
+        """
+        Copy-on-write variant of the mapping walk: returns obj itself if nothing below it
+        was mapped, otherwise a shallow copy of this container with the changed children.
+        """
+        result = None
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                current_path = f"{path}.{key}" if path else key
+                new_value = self._map_shared_value(value, data_frames, frames_keys, current_path)
+                if new_value is not value:
+                    if result is None:
+                        result = dict(obj)
+                    result[key] = new_value
+        elif isinstance(obj, list):
+            for idx, item in enumerate(obj):
+                current_path = f"{path}[{idx}]" if path else f"[{idx}]"
+                new_item = self._map_shared_value(item, data_frames, frames_keys, current_path)
+                if new_item is not item:
+                    if result is None:
+                        result = list(obj)
+                    result[idx] = new_item
+        return obj if result is None else result
+    
+    def _map_shared_value(self, value: Any, data_frames: Dict[str, Any],
+                          frames_keys: "FramesPathIndex", current_path: str) -> Any:
+        if self._is_xsi_string(value):
+            matched_key = self.find_best_match(value, frames_keys)
+            if matched_key:
+                if self.debug:
+                    print(f"Mapped at {current_path}: '{value}' -> frames data")
+                return {"file": value, "frames": data_frames[matched_key]}
+            if self.debug:
+                print(f"No match at {current_path}: '{value}'")
+        elif isinstance(value, (dict, list)):
+            return self._map_shared(value, data_frames, frames_keys, current_path)
+        elif isinstance(value, str) and ".xsi" in value.lower():
+            xsi_paths = self._extract_xsi_paths(value)
+            for xsi_path in xsi_paths:
+                matched_key = self.find_best_match(xsi_path, frames_keys)
+                if matched_key:
+                    if self.debug:
+                        print(f"Mapped embedded at {current_path}: '{xsi_path}' -> frames data")
+                    return {"file": value, "frames": data_frames[matched_key]}
+            if self.debug:
+                print(f"No match for embedded paths at {current_path}: {xsi_paths}")
+        return value
+    
     def _is_xsi_string(self, value: Any) -> bool:
         """Check if a value is a string ending with .xsi"""
         return isinstance(value, str) and value.lower().strip().endswith(".xsi")
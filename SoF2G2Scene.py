@@ -7,11 +7,14 @@ reload_modules(
     [".error_types", ".casts"],
 )  # nopep8
 
-from typing import Optional, Tuple  # noqa: E402
+from concurrent.futures import Future  # noqa: E402
+from typing import Generator, Optional, Tuple  # noqa: E402
 from . import SoF2Filesystem  # noqa: E402
 from . import SoF2G2Constants  # noqa: E402
 from . import SoF2G2GLM  # noqa: E402
 from . import SoF2G2GLA  # noqa: E402
+from . import import_steps  # noqa: E402
+from . import import_pipeline  # noqa: E402
 from .error_types import ErrorMessage, NoError  # noqa: E402
 from .casts import optional_cast  # noqa: E402
 
@@ -55,12 +58,32 @@ class Scene:
     def loadFromGLM(
         self, glm_filepath_rel: str, selected_skin_data: dict
     ) -> Tuple[bool, ErrorMessage]:
+        file, message = self._loadGLMHeader(glm_filepath_rel, selected_skin_data)
+        if file is None:
+            return False, message
+        return optional_cast(SoF2G2GLM.GLM, self.glm).loadSurfacesFromFile(file, selected_skin_data)
+
+    # Like loadFromGLM, but only the header is read here (so getRequestedGLA works); the surfaces
+    # are decoded on a worker thread while the caller loads the .frames and the GLA.
+    # The future's result is loadFromGLM's (success, message).
+    def startLoadFromGLM(
+        self, glm_filepath_rel: str, selected_skin_data: dict
+    ) -> Tuple[bool, ErrorMessage, Optional[Future]]:
+        file, message = self._loadGLMHeader(glm_filepath_rel, selected_skin_data)
+        if file is None:
+            return False, message, None
+        future = import_pipeline.run_async(
+            optional_cast(SoF2G2GLM.GLM, self.glm).loadSurfacesFromFile, file, selected_skin_data
+        )
+        return True, NoError, future
+
+    def _loadGLMHeader(self, glm_filepath_rel: str, selected_skin_data: dict):
         success, glm_filepath_abs = SoF2Filesystem.FindFile(
             glm_filepath_rel, self.basepath, ["glm"]
         )
         if not success:
             print("File not found: ", self.basepath + glm_filepath_rel + ".glm", sep="")
-            return False, ErrorMessage(
+            return None, ErrorMessage(
                 f".glm file {glm_filepath_rel} not found in basepath ({self.basepath})"
             )
 
@@ -78,11 +101,7 @@ class Scene:
             )
 
         self.glm = SoF2G2GLM.GLM()
-
-        success, message = self.glm.loadFromFile(glm_filepath_abs, selected_skin_data)
-        if not success:
-            return False, message
-        return True, NoError
+        return self.glm.loadHeaderFromFile(glm_filepath_abs)
 
     # Loads scene from on GLA file
     def loadFromGLA(
@@ -176,6 +195,29 @@ class Scene:
         skeletonFixes: SoF2G2Constants.SkeletonFixes,
         data_frames_file: dict,
     ) -> Tuple[bool, ErrorMessage]:
+        return import_steps.run(
+            self.saveToBlenderSteps(
+                scale,
+                selected_skin_data,
+                loaded_shader_data,
+                guessTextures,
+                useAnimation,
+                skeletonFixes,
+                data_frames_file,
+            )
+        )
+
+    # saveToBlender as import steps (see import_steps), for the modal import
+    def saveToBlenderSteps(
+        self,
+        scale,
+        selected_skin_data: dict,
+        loaded_shader_data: dict,
+        guessTextures: bool,
+        useAnimation: bool,
+        skeletonFixes: SoF2G2Constants.SkeletonFixes,
+        data_frames_file: dict,
+    ) -> Generator[import_steps.Step, None, Tuple[bool, ErrorMessage]]:
         # is there already a scene root in blender?
         scene_root = findSceneRootObject()
         if scene_root:
@@ -184,26 +226,34 @@ class Scene:
                 bpy.context.scene.collection.objects.link(scene_root)
         else:
             # create it otherwise
-            scene_root = bpy.data.objects.new("scene_root", None)
+            scene_root = import_steps.created("objects", bpy.data.objects.new("scene_root", None))
             scene_root.scale = (scale, scale, scale)
             bpy.context.scene.collection.objects.link(scene_root)
         # there's always a skeleton (even if it's *default)
-        success, message = optional_cast(SoF2G2GLA.GLA, self.gla).saveToBlender(
-            scene_root, useAnimation, skeletonFixes, data_frames_file
-        )
+        gla = optional_cast(SoF2G2GLA.GLA, self.gla)
+        success, message = gla.saveSkeletonToBlender(scene_root, skeletonFixes)
         if not success:
             return False, message
-        if self.glm:
-            success, message = self.glm.saveToBlender(
-                self.basepath,
-                optional_cast(SoF2G2GLA.GLA, self.gla),
-                scene_root,
-                selected_skin_data,
-                loaded_shader_data,
-                guessTextures,
-            )
-            if not success:
-                return False, message
+        # the FK of the animation runs on a worker thread while the meshes are built;
+        # its clips are keyed as they arrive
+        poses = gla.startAnimationBake() if useAnimation and not SoF2G2GLA.PROFILE else None
+        try:
+            if self.glm:
+                success, message = yield from self.glm.saveToBlenderSteps(
+                    self.basepath,
+                    gla,
+                    scene_root,
+                    selected_skin_data,
+                    loaded_shader_data,
+                    guessTextures,
+                )
+                if not success:
+                    return False, message
+            if useAnimation:
+                yield from gla.saveAnimationToBlenderSteps(data_frames_file, poses)
+        finally:
+            if poses is not None:
+                poses.close()
         return True, NoError
 
     # returns the relative path of the gla file referenced in the glm header
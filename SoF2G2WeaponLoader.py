@@ -3,63 +3,62 @@ from typing import cast
 
 from .SoF2G2Constants import SkeletonFixes
 from . import SoF2G2DataCache as DataCache
-from . import SoF2G2Exporter
 from . import SoF2G2Scene
 from . import SoF2G2GLA
 from . import frames_parser
+from . import parse_cache
+from . import vfs
+from . import prefetch
+from . import import_steps
+from .prefetch import check
 
 
-def handle_load_weapon_file(op):
-    basepath = os.path.normpath(op.basepath)
-
-    success, message, all_data = SoF2G2Exporter.export_all_data(basepath)
-    if success:
-        op.report({"INFO"}, message)
-        print(message)
+def prepare_weapon(basepath, weapon_selected, loadAnimations, startFrame, numFrames, cancel=None):
+    """
+    Everything of a weapon import up to the Blender objects (decoded GLM/GLA, .frames, shaders),
+    as a prefetch.PreparedImport. Runs in the prefetcher thread or in execute.
+    """
+    prepared = prefetch.PreparedImport(weapon_selected)
+    basepath = os.path.normpath(basepath)
 
-    # After export, get weapons to proceed with loading the selected one
-    _, weapons = DataCache.get_weapon_enum_items(basepath)
-    found_weapon_data = next(
-        (w for w in weapons if w.get("name") == op.weapon_selected), None
-    )
+    # the weapon data comes from the WeaponCatalog (no JSON export needed)
+    found_weapon_data = DataCache.get_weapon_catalog(basepath).get_weapon(weapon_selected)
     if not found_weapon_data:
-        op.report({"ERROR"}, "No weapon data found for the selected weapon.")
-        return {"CANCELLED"}
-
-    scale = op.scale / 100
-    if getattr(op, 'unityMode', False):
-        from . import SoF2G2Constants
-        scale = SoF2G2Constants.UNITY_SCALE
+        return prepared.fail("ERROR", "No weapon data found for the selected weapon.")
 
     scene = SoF2G2Scene.Scene(basepath)
-    success, message = scene.loadFromGLM(
+    # the surfaces are decoded on a worker thread while the .frames and the GLA are loaded here
+    success, message, glm_job = scene.startLoadFromGLM(
         found_weapon_data.get("wpn", {}).get("model"), {}
     )  # found_weapon_data.get("weaponmodel", {}).get("model")
     if not success:
-        op.report({"ERROR"}, message)
-        return {"FINISHED"}
+        return prepared.fail("ERROR", message, "FINISHED")
+    check(cancel)
 
     glafile = scene.getRequestedGLA()
-    data_frames_file_path = os.path.normpath(basepath + "/" + glafile + ".frames")
+    # loose file or extracted from a .pk3
+    data_frames_file_path = vfs.resolve(basepath, glafile + ".frames") or os.path.normpath(
+        basepath + "/" + glafile + ".frames"
+    )
     print(f"Loading .frames file: {data_frames_file_path}")
-    text = open(
-        data_frames_file_path,
-        "r",
-        encoding="utf-8",
-    ).read()
-    data_frames_file = frames_parser.parse_frames(text)
+    data_frames_file = parse_cache.parse_file(
+        data_frames_file_path, frames_parser.parse_frames, errors="strict"
+    )
+    check(cancel)
     print(f"Loading GLA file: {glafile}")
-    loadAnimations = SoF2G2GLA.AnimationLoadMode[op.loadAnimations]
+    loadAnimations = SoF2G2GLA.AnimationLoadMode[loadAnimations]
     success, message = scene.loadFromGLA(
         glafile,
         loadAnimations,
-        cast(int, op.startFrame),
-        cast(int, op.numFrames),
+        cast(int, startFrame),
+        cast(int, numFrames),
         data_frames_file,
     )
     if not success:
-        op.report({"ERROR"}, message)
-        return {"FINISHED"}
+        return prepared.fail("ERROR", message, "FINISHED")
+    success, message = glm_job.result()
+    if not success:
+        return prepared.fail("ERROR", message, "FINISHED")
 
     # Load shader file for weapon
     print("Loading .shader file: weapons.shader")
@@ -69,15 +68,76 @@ def handle_load_weapon_file(op):
     # TODO load righ/left hand for first person (SOF2.inview)
     # TODO .skl parsen & verarbeiten
 
+    prepared.scene = scene
+    prepared.shader_data = loaded_shader_data
+    prepared.frames_data = data_frames_file
+    return prepared
+
+
+def _weapon_prefetch_key(op):
+    return (
+        "weapon",
+        os.path.normpath(op.basepath),
+        op.weapon_selected,
+        op.loadAnimations,
+        int(op.startFrame),
+        int(op.numFrames),
+    )
+
+
+def prefetch_weapon(op):
+    """Start preparing the weapon selected in op in the background (glm.select_weapon)."""
+    if not op.basepath or not op.weapon_selected:
+        return
+    prefetch.prefetcher.submit(
+        "weapon",
+        _weapon_prefetch_key(op),
+        prepare_weapon,
+        op.basepath,
+        op.weapon_selected,
+        op.loadAnimations,
+        op.startFrame,
+        op.numFrames,
+    )
+
+
+def handle_load_weapon_file(op):
+    return import_steps.run(load_weapon_steps(op))
+
+
+def load_weapon_steps(op, background=False):
+    """The weapon import as import steps; background prepares in the prefetcher thread (modal import)."""
+    # prefetched when the weapon was selected, otherwise prepared now
+    prepared = yield from prefetch.prepare_steps(
+        "weapon",
+        _weapon_prefetch_key(op),
+        prepare_weapon,
+        op.basepath,
+        op.weapon_selected,
+        op.loadAnimations,
+        op.startFrame,
+        op.numFrames,
+        background=background,
+    )
+    prepared.replay(op)
+    if not prepared.ok:
+        return {prepared.status}
+
+    scale = op.scale / 100
+    if getattr(op, 'unityMode', False):
+        from . import SoF2G2Constants
+        scale = SoF2G2Constants.UNITY_SCALE
+
+    loadAnimations = SoF2G2GLA.AnimationLoadMode[op.loadAnimations]
     guessTextures = True
-    success, message = scene.saveToBlender(
+    success, message = yield from prepared.scene.saveToBlenderSteps(
         scale,
         {},
-        loaded_shader_data,
+        prepared.shader_data,
         guessTextures,
         loadAnimations != SoF2G2GLA.AnimationLoadMode.NONE,
         SkeletonFixes[op.skeletonFixes],
-        data_frames_file,
+        prepared.frames_data,
     )
     if not success:
         op.report({"ERROR"}, message)
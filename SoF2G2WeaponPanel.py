@@ -5,15 +5,15 @@ def draw_weapon_import_panel(layout, operator):
     """Draw the Weapon import panel UI"""
     layout.prop(operator, "weapon_search", text="", icon="VIEWZOOM")
 
-    items, _ = DataCache.get_weapon_enum_items(operator.basepath)
-    items.sort(key=lambda x: x[0])  # Sort by first tuple element (identifier) ascending
-    search = operator.weapon_search.strip().lower()
+    # prebuilt and already sorted (identifier == name), only re-parsed when the source files change
+    index = DataCache.get_weapon_search_index(operator.basepath)
+    items = index.items
+    matches = index.search(operator.weapon_search)
     shown = 0
     max_show = 10  # Limit, damit das Panel nicht explodiert
 
-    for ident, name, desc in items:
-        if search and search not in name.lower() and search not in desc.lower():
-            continue
+    for pos in matches:
+        ident, name, desc = items[pos]
         if shown >= max_show:
             layout.label(
                 text=f"... {len(items) - shown} weitere Waffen ausgeblendet ..."
@@ -45,6 +45,7 @@ def draw_weapon_import_panel(layout, operator):
         if operator.loadAnimations == "RANGE":
             layout.prop(operator, "startFrame")
             layout.prop(operator, "numFrames")
+        layout.prop(operator, "modalImport")
         # layout.prop(operator, "skeletonFixes")
 
     else:
@@ -0,0 +1,159 @@
+import os
+from typing import Dict
+
+import bpy  # pyright: ignore[reportMissingImports]
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# bump when a template's nodes change; groups of an older version are rebuilt in place
+TEMPLATE_VERSION = 1
+
+BASE = "SoF2 Base"
+BASE_NORMAL = "SoF2 Base+Normal"
+PBR = "SoF2 PBR"
+EMISSIVE = "SoF2 PBR Emissive"
+
+# group input -> (socket type, default value)
+_INPUTS = {
+    "Base Color": ("NodeSocketColor", (0.8, 0.8, 0.8, 1.0)),
+    "AO": ("NodeSocketColor", (1.0, 1.0, 1.0, 1.0)),
+    "Normal Color": ("NodeSocketColor", (0.5, 0.5, 1.0, 1.0)),
+    "Roughness": ("NodeSocketFloat", 0.5),
+    "Metallic": ("NodeSocketFloat", 0.0),
+    "Emission Color": ("NodeSocketColor", (0.0, 0.0, 0.0, 1.0)),
+}
+
+# template -> its group inputs. Two-sided is not a template: backface culling is a material setting.
+_TEMPLATE_INPUTS = {
+    BASE: ["Base Color"],
+    BASE_NORMAL: ["Base Color", "Normal Color"],
+    PBR: ["Base Color", "AO", "Normal Color", "Roughness", "Metallic"],
+    EMISSIVE: ["Base Color", "AO", "Normal Color", "Roughness", "Metallic", "Emission Color"],
+}
+
+
+def template_for(sidecars: Dict[str, str]) -> str:
+    """The smallest template that has inputs for all found sidecar maps."""
+    if sidecars.get("emission"):
+        return EMISSIVE
+    if sidecars.get("roughness") or sidecars.get("metallic") or sidecars.get("ao"):
+        return PBR
+    if sidecars.get("normal"):
+        return BASE_NORMAL
+    return BASE
+
+
+def _build(group, name: str) -> None:
+    nodes = group.nodes
+    links = group.links
+    for node in list(nodes):
+        nodes.remove(node)
+    group.interface.clear()
+
+    inputs = _TEMPLATE_INPUTS[name]
+    for input_name in inputs:
+        socket_type, default = _INPUTS[input_name]
+        socket = group.interface.new_socket(input_name, in_out="INPUT", socket_type=socket_type)
+        socket.default_value = default
+    group.interface.new_socket("Shader", in_out="OUTPUT", socket_type="NodeSocketShader")
+
+    group_in = nodes.new(type="NodeGroupInput")
+    group_in.location = (-700, 0)
+    group_out = nodes.new(type="NodeGroupOutput")
+    group_out.location = (500, 0)
+
+    principled = nodes.new(type="ShaderNodeBsdfPrincipled")
+    principled.location = (0, 0)
+    # **UNITY OPTIMIZATION: same defaults as the single materials had**
+    principled.inputs["Roughness"].default_value = 0.5
+    principled.inputs["Metallic"].default_value = 0.0
+    try:
+        principled.inputs["Specular"].default_value = 0.5  # Unity standard specular
+    except KeyError:
+        # Specular input not available in this Blender version
+        pass
+
+    # AO -> multiply with base color
+    if "AO" in inputs:
+        mix = nodes.new(type="ShaderNodeMixRGB")
+        mix.blend_type = "MULTIPLY"
+        mix.inputs["Fac"].default_value = 1.0
+        mix.location = (-300, 250)
+        links.new(group_in.outputs["Base Color"], mix.inputs["Color1"])
+        links.new(group_in.outputs["AO"], mix.inputs["Color2"])
+        links.new(mix.outputs["Color"], principled.inputs["Base Color"])
+    else:
+        links.new(group_in.outputs["Base Color"], principled.inputs["Base Color"])
+
+    if "Normal Color" in inputs:
+        normal_map = nodes.new(type="ShaderNodeNormalMap")
+        normal_map.location = (-300, 0)
+        links.new(group_in.outputs["Normal Color"], normal_map.inputs["Color"])
+        links.new(normal_map.outputs["Normal"], principled.inputs["Normal"])
+
+    if "Roughness" in inputs:
+        links.new(group_in.outputs["Roughness"], principled.inputs["Roughness"])
+    if "Metallic" in inputs:
+        links.new(group_in.outputs["Metallic"], principled.inputs["Metallic"])
+
+    if "Emission Color" in inputs:
+        emit_node = nodes.new(type="ShaderNodeEmission")
+        emit_node.location = (-300, -300)
+        links.new(group_in.outputs["Emission Color"], emit_node.inputs["Color"])
+        # combine emission and principled via Add Shader
+        add = nodes.new(type="ShaderNodeAddShader")
+        add.location = (250, 0)
+        links.new(principled.outputs["BSDF"], add.inputs[0])
+        links.new(emit_node.outputs["Emission"], add.inputs[1])
+        links.new(add.outputs["Shader"], group_out.inputs["Shader"])
+    else:
+        links.new(principled.outputs["BSDF"], group_out.inputs["Shader"])
+
+    group["sof2_template_version"] = TEMPLATE_VERSION
+
+
+def get_node_group(name: str):
+    """The shader node group of a template, built once per .blend file."""
+    group = bpy.data.node_groups.get(name)
+    if group is not None and group.get("sof2_template_version") == TEMPLATE_VERSION:
+        return group
+    if group is None:
+        group = bpy.data.node_groups.new(name, "ShaderNodeTree")
+        # keep the templates even while no material uses them
+        group.use_fake_user = True
+    _build(group, name)
+    if log_level == "DEBUG":
+        print(f"Built material template node group '{name}'")
+    return group
+
+
+def setup_material(mat, template: str, images: Dict[str, object]):
+    """
+    Replace mat's node tree with one group node of template and an image node per entry in
+    images ({group input name: bpy image}); returns the group node.
+    """
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+    for node in list(nodes):
+        nodes.remove(node)
+
+    output_node = nodes.new(type="ShaderNodeOutputMaterial")
+    output_node.location = (400, 0)
+
+    group_node = nodes.new(type="ShaderNodeGroup")
+    group_node.node_tree = get_node_group(template)
+    group_node.location = (0, 0)
+    links.new(group_node.outputs["Shader"], output_node.inputs["Surface"])
+
+    for i, (input_name, img) in enumerate(images.items()):
+        if img is None or input_name not in group_node.inputs:
+            continue
+        tex = nodes.new(type="ShaderNodeTexImage")
+        tex.image = img
+        tex.label = input_name
+        tex.location = (-400, 300 - i * 250)
+        # **UNITY OPTIMIZATION: Set interpolation for better quality**
+        tex.interpolation = "Linear"
+        links.new(tex.outputs["Color"], group_node.inputs[input_name])
+    return group_node
@@ -3,19 +3,185 @@ from .mod_reload import reload_modules
 reload_modules(
     locals(),
     __package__,
-    ["SoF2Materialmanager", "SoF2Filesystem", "SoF2Stringhelper"],
+    ["SoF2Materialmanager", "SoF2Filesystem", "SoF2Stringhelper", "SoF2MaterialTemplates"],
     [".casts", ".error_types"],
 )  # nopep8
 
 from . import SoF2Filesystem  # noqa: E402
 from . import SoF2Stringhelper  # noqa: E402
+from . import dir_index  # noqa: E402
+from . import SoF2MaterialTemplates  # noqa: E402
+from . import texture_cache  # noqa: E402
+from . import import_steps  # noqa: E402
+from . import vfs  # noqa: E402
 from .error_types import ErrorMessage, NoError  # noqa: E402
 
 import bpy  # noqa: E402  # pyright: ignore[reportMissingImports]
+from bpy.app.handlers import persistent  # noqa: E402  # pyright: ignore[reportMissingImports]
 import os  # noqa: E402
+from typing import Dict, Optional, Set  # noqa: E402
 
 log_level = os.getenv("LOG_LEVEL", "INFO")
 
+# SOF2_IMAGE_MODE: "PACK" packs the loaded images into the .blend in one pass when it is saved,
+# "LINK" keeps them as external files
+IMAGE_MODE = os.getenv("SOF2_IMAGE_MODE", "PACK").upper()
+
+# SOF2_MATERIAL_GROUPS=1 uses the shared template node groups (SoF2MaterialTemplates) instead of
+# building every material's full node tree. Off by default: Blender's FBX exporter does not find
+# image textures inside node groups, so the Unity FBX exports would lose their textures.
+USE_NODE_GROUPS = os.getenv("SOF2_MATERIAL_GROUPS", "0") in ("1", "true", "True", "on")
+
+# session-wide pools, shared by all imports: pool key -> material name, image path -> image name.
+# Names, not datablocks - references become invalid after undo or loading another file.
+_material_pool: Dict[tuple, str] = {}
+_image_pool: Dict[str, str] = {}
+_pending_pack: Set[str] = set()
+
+
+def _pooled_material(pool_key: tuple):
+    name = _material_pool.get(pool_key)
+    if name is None:
+        return None
+    mat = bpy.data.materials.get(name)
+    if mat is None:
+        # deleted by the user or gone with an undo step
+        del _material_pool[pool_key]
+    return mat
+
+
+def _remember_material(pool_key: tuple, mat) -> None:
+    _material_pool[pool_key] = mat.name
+
+
+def load_image(abs_path: str):
+    """bpy image for abs_path, loaded once per session; packing is left to pack_pending_images."""
+    key = os.path.normcase(os.path.abspath(abs_path))
+    name = _image_pool.get(key)
+    img = bpy.data.images.get(name) if name is not None else None
+    if img is None:
+        # preprocessed for Unity: reference the cached PNG instead of packing the original
+        converted = texture_cache.converted_path(abs_path)
+        count = len(bpy.data.images)
+        # Blender needs a real file: pk3 entries are extracted into the cache folder
+        img = bpy.data.images.load(converted or vfs.real_path(abs_path), check_existing=True)
+        if len(bpy.data.images) > count:
+            if converted is not None:
+                # the cached file is named after its content hash, keep the texture's name
+                img.name = os.path.splitext(os.path.basename(abs_path))[0]
+            import_steps.created("images", img)
+        _image_pool[key] = img.name
+        if IMAGE_MODE == "PACK" and converted is None and img.packed_file is None:
+            _pending_pack.add(img.name)
+    return img
+
+
+@persistent
+def pack_pending_images(*_args) -> int:
+    """save_pre handler: pack all images loaded since the last save (for Unity) in one pass."""
+    packed = 0
+    for name in sorted(_pending_pack):
+        img = bpy.data.images.get(name)
+        if img is None or img.packed_file is not None:
+            continue
+        try:
+            img.pack()
+            packed += 1
+        except Exception as e:
+            print(f"Could not pack image {name}: {e}")
+    _pending_pack.clear()
+    if packed and log_level == "DEBUG":
+        print(f"Packed {packed} images")
+    return packed
+
+
+@persistent
+def reset_pools(*_args) -> None:
+    """load_post handler: another .blend has other datablocks."""
+    _material_pool.clear()
+    _image_pool.clear()
+    _pending_pack.clear()
+
+
+def register():
+    if pack_pending_images not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(pack_pending_images)
+    if reset_pools not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(reset_pools)
+
+
+def unregister():
+    if pack_pending_images in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(pack_pending_images)
+    if reset_pools in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(reset_pools)
+
+
+def _load_texture_image(abs_path: str, colorspace: str):
+    """Pooled image with the import's settings, or None if it can't be loaded."""
+    try:
+        # shared with earlier imports; packed for Unity when the .blend is saved
+        img = load_image(abs_path)
+
+        # **UNITY OPTIMIZATION: Set texture settings for better Unity export**
+        img.use_fake_user = True  # Prevent texture deletion
+
+        # **UNITY OPTIMIZATION: Set texture compression settings**
+        if img.size[0] > 1024 or img.size[1] > 1024:
+            # Large textures - suggest compression
+            img.use_alpha = False  # Disable alpha if not needed
+    except Exception as e:
+        if log_level == "DEBUG":
+            print(f"Could not load image {abs_path}: {e}")
+        return None
+    try:
+        img.colorspace_settings.name = colorspace
+    except Exception:
+        pass
+    return img
+
+
+SIDECAR_EXTENSIONS = ["png", "tga", "jpg", "dds"]
+SIDECAR_SUFFIXES = {
+    "normal": ["_n", "_normal", "_norm", "_nrml", "_normalmap", "_bump"],
+    "roughness": ["_r", "_rough", "_roughness"],
+    "metallic": ["_m", "_metal", "_metallic"],
+    "ao": ["_ao", "_ambientocclusion"],
+    "emission": ["_emit", "_emiss", "_emission"],
+}
+
+
+def find_sidecar_images(base_path_abs: str):
+    """
+    Given an absolute path to the basecolor image, look for common sidecar texture files
+    in same directory sharing the basename + suffix.
+    Returns dict of possible maps: normal, roughness, metallic, ao, emission
+
+    The folder is scanned once and cached (dir_index), so every lookup here - found or not -
+    is a dictionary lookup instead of an isfile per suffix and extension.
+    """
+    res = {typ: None for typ in SIDECAR_SUFFIXES}
+    if not base_path_abs:
+        return res
+    folder, filename = os.path.split(base_path_abs)
+    stems = dir_index.folder_stems(folder)
+    base = os.path.splitext(filename)[0]
+    if base.lower() not in stems:
+        # base image does not exist (any more)
+        return res
+    for typ, suffs in SIDECAR_SUFFIXES.items():
+        for s in suffs:
+            by_ext = stems.get((base + s).lower())
+            if not by_ext:
+                continue
+            for ext in SIDECAR_EXTENSIONS:
+                if ext in by_ext:
+                    res[typ] = os.path.join(folder, dir_index.pick(by_ext[ext], f"{base}{s}.{ext}"))
+                    break
+            if res[typ]:
+                break
+    return res
+
 
 class MaterialManager:
     def __init__(self):
@@ -60,13 +226,37 @@ class MaterialManager:
         self.initialized = True
         return True, NoError
 
+    def preprocess_textures(self, shader_names, loaded_shader_data: dict) -> int:
+        """
+        Convert every texture the given surface shaders will use (skin mapping, shader stages,
+        sidecar maps) to cached PNGs in a process pool before the materials are built.
+        Returns the number of textures available as PNG.
+        """
+        paths = []
+        for bsShader in shader_names:
+            shader = SoF2Stringhelper.decode(bsShader)
+            if self.useSkin and shader in self.skin:
+                shader = self.skin[shader]
+            if not shader or shader.lower() in ["[nomaterial]", "*off"]:
+                continue
+            candidates = [shader]
+            shader_def = loaded_shader_data.get(shader.lower()) if loaded_shader_data else None
+            if shader_def is not None:
+                candidates.extend(stage.map for stage in shader_def.stages if stage.is_texture)
+            for candidate in candidates:
+                success, abs_path = self._find_texture(candidate)
+                if success:
+                    paths.append(abs_path)
+                    paths.extend(p for p in find_sidecar_images(abs_path).values() if p)
+        return len(texture_cache.preprocess_textures(paths))
+
     # shader_def wird derzeit nicht verwendet!
     def getMaterial(
         self, name, bsShader, loaded_shader_data: dict, selected_skin_data: dict = {}
     ):
         """
         Lädt ein Material basierend auf dem G2/G3 Shader.
-        loaded_shader_data: geparste Shader-Daten aus der .shader Datei - hilft, map-Einträge zu finden.
+        loaded_shader_data: kompilierte Shader (shader_ir.Shader, Key = Shader-Name lowercase) aus der .shader Datei - hilft, map-Einträge zu finden.
         selected_skin_data: optionale Skin-Daten für zusätzliche Material-Informationen.
         Versucht, BaseColor, Normal, Roughness, Metallic, AO, Emission automatisch zu finden.
         """
@@ -86,115 +276,87 @@ class MaterialManager:
         if key in self.materials:
             return self.materials[key]
 
-        # Check if we have loaded_shader_data for this shader key
-        if loaded_shader_data and key in loaded_shader_data:
-            shader_entry = loaded_shader_data[key]
-            if isinstance(shader_entry, dict) and "blocks" in shader_entry:
-                blocks = shader_entry["blocks"]
-                if isinstance(blocks, list):
-                    # Create materials for each block's map value
-                    for i, block in enumerate(blocks):
-                        if isinstance(block, dict) and "map" in block:
-                            map_value = block["map"]
-                            if map_value:
-                                # Create a unique material name for each block
-                                material_name = f"{shader}_{i}" if i > 0 else shader
-                                material_key = material_name.lower()
-                                
-                                if material_key not in self.materials:
-                                    mat = bpy.data.materials.new(material_name)
-                                    self.materials[material_key] = mat
-                                    print(f"Created material from shader data: {material_name} (map: {map_value})")
-                                    
-                                    # Configure the material with the map value
-                                    self._configure_material_with_map(mat, map_value)
-                                
-                                # Return the first material found (or could return all)
-                                if i == 0:
-                                    return self.materials[material_key]
-        
-        # If we reach here, no shader data was found, create default material
-
-        # Neues Material erstellen
-        mat = bpy.data.materials.new(shader)
-        self.materials[key] = mat
-
-        # Hilfsfunktionen
-        def _try_find_file(name_candidate: str):
-            # wrapper für SoF2Filesystem.FindFile: returns (success, abs_path) or (False, "")
-            if not name_candidate:
-                return False, ""
-            # if candidate contains extension already, FindFile should still work; try as-is
-            return SoF2Filesystem.FindFile(
-                name_candidate, self.basepath, ["jpg", "png", "tga", "dds"]
-            )
+        # compiled shader (shader_ir.Shader) for this shader key, if the .shader file has one
+        shader_def = loaded_shader_data.get(key) if loaded_shader_data else None
+        if shader_def is not None:
+            # Create materials for each stage's map value
+            for stage in shader_def.stages:
+                if not stage.is_texture:
+                    continue
+                map_value = stage.map
+                # Create a unique material name for each stage (its block index in the .shader file)
+                i = stage.index
+                material_name = f"{shader}_{i}" if i > 0 else shader
+                material_key = material_name.lower()
+
+                if material_key not in self.materials:
+                    # reuse the material of an earlier import with the same texture
+                    success, map_path = self._find_texture(map_value)
+                    pool_key = ("map", material_key, map_path if success else map_value)
+                    mat = _pooled_material(pool_key)
+                    if mat is None:
+                        mat = import_steps.created("materials", bpy.data.materials.new(material_name))
+                        print(f"Created material from shader data: {material_name} (map: {map_value})")
+
+                        # Configure the material with the map value
+                        self._configure_material_with_map(mat, map_value)
+                        _remember_material(pool_key, mat)
+                    self.materials[material_key] = mat
+
+                # Return the first material found (or could return all)
+                if i == 0:
+                    return self.materials[material_key]
 
-        def _find_sidecar_images(base_path_abs: str):
-            """
-            Given an absolute path to the basecolor image, look for common sidecar texture files
-            in same directory sharing the basename + suffix.
-            Returns dict of possible maps: normal, roughness, metallic, ao, emission
-            """
-            res = {
-                "normal": None,
-                "roughness": None,
-                "metallic": None,
-                "ao": None,
-                "emission": None,
-            }
-            if not base_path_abs or not os.path.isfile(base_path_abs):
-                return res
-            folder = os.path.dirname(base_path_abs)
-            base = os.path.splitext(os.path.basename(base_path_abs))[0]
-            exts = [".png", ".tga", ".jpg", ".dds"]
-            suffixes = {
-                "normal": ["_n", "_normal", "_norm", "_nrml", "_normalmap", "_bump"],
-                "roughness": ["_r", "_rough", "_roughness"],
-                "metallic": ["_m", "_metal", "_metallic"],
-                "ao": ["_ao", "_ambientocclusion"],
-                "emission": ["_emit", "_emiss", "_emission"],
-            }
-            for typ, suffs in suffixes.items():
-                for s in suffs:
-                    for ext in exts:
-                        cand = os.path.join(folder, base + s + ext)
-                        if os.path.isfile(cand):
-                            res[typ] = cand
-                            break
-                    if res[typ]:
-                        break
-            return res
+        # If we reach here, no shader data was found, create default material
 
         # 1) Versuche Shader-Daten zu verwenden und erste 'map' zu finden
         base_texture_path = None
-        if loaded_shader_data and key in loaded_shader_data:
-            shader_entry = loaded_shader_data[key]
-            if isinstance(shader_entry, dict) and "blocks" in shader_entry:
-                blocks = shader_entry["blocks"]
-                if isinstance(blocks, list) and len(blocks) > 0:
-                    first_block = blocks[0]
-                    if isinstance(first_block, dict) and "map" in first_block:
-                        candidate = first_block["map"]
-                        success, abs_path = _try_find_file(candidate)
-                        if success:
-                            base_texture_path = abs_path
+        if shader_def is not None and shader_def.base_map:
+            success, abs_path = self._find_texture(shader_def.base_map)
+            if success:
+                base_texture_path = abs_path
 
         # 2) Wenn kein shader-data-map, versuche shader direkt als texture-name zu finden (wie vorher)
         if not base_texture_path:
-            success, abs_path = _try_find_file(shader)
+            success, abs_path = self._find_texture(shader)
             if success:
                 base_texture_path = abs_path
 
+        # **SOF2 SHADER SUPPORT: cull disable/none/twosided -> two-sided material**
+        two_sided = shader_def is not None and shader_def.two_sided
+        sidecars = find_sidecar_images(base_texture_path) if base_texture_path else {}
+
+        # gleiches Shader + gleiche Texturen + gleiche Flags -> Material eines früheren Imports wiederverwenden
+        pool_key = (
+            key,
+            base_texture_path,
+            tuple(sorted((typ, path) for typ, path in sidecars.items() if path)),
+            two_sided,
+        )
+        mat = _pooled_material(pool_key)
+        if mat is not None:
+            if log_level == "DEBUG":
+                print(f"Reusing material '{mat.name}' for shader '{shader}'")
+            self.materials[key] = mat
+            return mat
+
+        # Neues Material erstellen
+        mat = import_steps.created("materials", bpy.data.materials.new(shader))
+        self.materials[key] = mat
+        _remember_material(pool_key, mat)
+
         # 3) Wenn immer noch nichts gefunden -> Fallback (no texture)
         if not base_texture_path:
             print(f"Texture not found: {shader}")
             ##mat.diffuse_color = (1, 0, 1, 1)  # Pink fallback
             return mat
 
-        # 4) Suche Sidecar maps (normal, roughness, metallic, ao, emission)
-        sidecars = _find_sidecar_images(base_texture_path)
+        # 5) Node-Setup: eine Template-Node-Group + Image-Nodes
+        if USE_NODE_GROUPS:
+            self._setup_from_template(mat, base_texture_path, sidecars)
+            return self._finish_material(mat, shader, two_sided)
 
-        # 5) Node-Setup: Principled BSDF (Unity-optimized)
+        # 5b) Node-Setup: Principled BSDF (Unity-optimized)
         mat.use_nodes = True
         nodes = mat.node_tree.nodes
         links = mat.node_tree.links
@@ -224,21 +386,8 @@ class MaterialManager:
         def _create_image_node(
             abs_path: str, label: str, colorspace: str = "Non-Color", location=(-600, 0)
         ):
-            try:
-                img = bpy.data.images.load(abs_path, check_existing=True)
-
-                # **UNITY OPTIMIZATION: Set texture settings for better Unity export**
-                img.use_fake_user = True  # Prevent texture deletion
-                img.pack()  # Pack texture into .blend file for Unity
-
-                # **UNITY OPTIMIZATION: Set texture compression settings**
-                if img.size[0] > 1024 or img.size[1] > 1024:
-                    # Large textures - suggest compression
-                    img.use_alpha = False  # Disable alpha if not needed
-
-            except Exception as e:
-                if log_level == "DEBUG":
-                    print(f"Could not load image {abs_path}: {e}")
+            img = _load_texture_image(abs_path, colorspace)
+            if img is None:
                 return None
             tex = nodes.new(type="ShaderNodeTexImage")
             tex.image = img
@@ -247,12 +396,6 @@ class MaterialManager:
 
             # **UNITY OPTIMIZATION: Set interpolation for better quality**
             tex.interpolation = "Linear"  # Better quality than "Closest"
-
-            # set colorspace
-            try:
-                tex.image.colorspace_settings.name = colorspace
-            except Exception:
-                pass
             return tex
 
         # BASE COLOR (sRGB)
@@ -332,18 +475,32 @@ class MaterialManager:
             # standard connection
             links.new(principled.outputs["BSDF"], output_node.inputs["Surface"])
 
+        return self._finish_material(mat, shader, two_sided)
+
+    def _setup_from_template(self, mat, base_texture_path: str, sidecars: dict):
+        images = {}
+        for input_name, path, colorspace in (
+            ("Base Color", base_texture_path, "sRGB"),
+            ("Normal Color", sidecars.get("normal"), "Non-Color"),
+            ("Roughness", sidecars.get("roughness"), "Non-Color"),
+            ("Metallic", sidecars.get("metallic"), "Non-Color"),
+            ("AO", sidecars.get("ao"), "Non-Color"),
+            ("Emission Color", sidecars.get("emission"), "sRGB"),
+        ):
+            if path:
+                img = _load_texture_image(path, colorspace)
+                if img is not None:
+                    images[input_name] = img
+        template = SoF2MaterialTemplates.template_for(sidecars)
+        SoF2MaterialTemplates.setup_material(mat, template, images)
+
+    def _finish_material(self, mat, shader: str, two_sided: bool):
         # **UNITY OPTIMIZATION: Set material properties for Unity export**
         mat.use_fake_user = True  # Prevent material deletion
         mat.blend_method = "OPAQUE"  # Unity standard blend method
 
         # **SOF2 SHADER SUPPORT: Handle cull disable (two-sided materials)**
-        if (
-            loaded_shader_data
-            and key in loaded_shader_data
-            and isinstance(loaded_shader_data[key], dict)
-            and "cull" in str(loaded_shader_data[key]).lower()
-            and "disable" in str(loaded_shader_data[key]).lower()
-        ):
+        if two_sided:
             mat.use_backface_culling = False
             mat["unity_two_sided"] = True
             if log_level == "DEBUG":
@@ -356,6 +513,15 @@ class MaterialManager:
         # done
         return mat
 
+    def _find_texture(self, name_candidate: str):
+        # wrapper für SoF2Filesystem.FindFile: returns (success, abs_path) or (False, "")
+        if not name_candidate:
+            return False, ""
+        # if candidate contains extension already, FindFile should still work; try as-is
+        return SoF2Filesystem.FindFile(
+            name_candidate, self.basepath, ["jpg", "png", "tga", "dds"]
+        )
+
     def _configure_material_with_map(self, mat, map_value):
         """
         Configure a material with the given map value (texture path).
@@ -365,19 +531,24 @@ class MaterialManager:
             return
         
         # Try to find the texture file
-        def _try_find_file(name_candidate: str):
-            if not name_candidate:
-                return False, ""
-            return SoF2Filesystem.FindFile(
-                name_candidate, self.basepath, ["jpg", "png", "tga", "dds"]
-            )
-        
-        success, abs_path = _try_find_file(map_value)
+        success, abs_path = self._find_texture(map_value)
         if not success:
             print(f"Texture not found: {map_value}")
             mat.diffuse_color = (1, 0, 1, 1)  # Pink fallback
             return
         
+        if USE_NODE_GROUPS:
+            img = _load_texture_image(abs_path, "sRGB")
+            if img is None:
+                print(f"Error loading texture {abs_path}")
+                mat.diffuse_color = (1, 0, 1, 1)  # Pink fallback
+                return
+            SoF2MaterialTemplates.setup_material(
+                mat, SoF2MaterialTemplates.BASE, {"Base Color": img}
+            )
+            print(f"Configured material with texture: {map_value}")
+            return
+
         # Basic material setup with the found texture
         mat.use_nodes = True
         nodes = mat.node_tree.nodes
@@ -400,7 +571,7 @@ class MaterialManager:
         
         # Load the texture
         try:
-            image = bpy.data.images.load(abs_path)
+            image = load_image(abs_path)
             image_node.image = image
         except Exception as e:
             print(f"Error loading texture {abs_path}: {e}")
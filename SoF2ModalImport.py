@@ -0,0 +1,127 @@
+import os
+import time
+import traceback
+from abc import abstractmethod
+
+import bpy  # pyright: ignore[reportMissingImports]
+
+from . import import_steps
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# Blender work per timer tick; the rest of the tick Blender redraws and handles input
+SLICE_SECONDS = float(os.getenv("SOF2_MODAL_SLICE_MS", "50")) / 1000
+TIMER_INTERVAL = 0.02
+
+# bpy.data collections import steps create data-blocks in, in removal order (users first)
+_CLEANUP_COLLECTIONS = ("objects", "actions", "meshes", "armatures", "materials", "images")
+
+
+def _remove_created(created: import_steps.Created) -> int:
+    """Remove the data-blocks the cancelled import created - only those, not the user's work meanwhile."""
+    pointers = {name: set() for name in _CLEANUP_COLLECTIONS}
+    for name, pointer in created:
+        pointers[name].add(pointer)
+    removed = 0
+    for name in _CLEANUP_COLLECTIONS:
+        if not pointers[name]:
+            continue
+        collection = getattr(bpy.data, name)
+        for item in [item for item in collection if item.as_pointer() in pointers[name]]:
+            collection.remove(item)
+            removed += 1
+    return removed
+
+
+class ModalImport:
+    """
+    Mixin for import operators: runs import steps (see import_steps) from a window timer, a
+    time slice per tick, with a progress bar and Esc to cancel. The operator implements
+    load_steps(context, background) - a generator returning the operator result - and calls
+    run_import(context) from execute.
+    """
+
+    _steps = None
+    _timer = None
+    _created = None
+    _progress = None
+
+    # not an abc.ABC: its metaclass would clash with bpy.types.Operator's
+    @abstractmethod
+    def load_steps(self, context, background):
+        """
+        Generator of import steps that returns the operator result ({"FINISHED"} / {"CANCELLED"});
+        background is True when it runs modally, a time slice per timer tick.
+        """
+
+    def run_import(self, context):
+        # no window to drive a timer (--background, scripts): run to the end
+        if not getattr(self, "modalImport", False) or bpy.app.background or context.window is None:
+            return import_steps.run(self.load_steps(context, False))
+
+        self._steps = self.load_steps(context, True)
+        self._created = []
+        self._progress = ("Loading files", 0, 0)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 1000)
+        self._show_progress(context)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if event.type == "ESC" and event.value == "PRESS":
+            return self._cancel(context)
+        if event.type != "TIMER" or event.timer is not self._timer:
+            return {"PASS_THROUGH"}
+
+        deadline = time.perf_counter() + SLICE_SECONDS
+        try:
+            # only what the steps create now is recorded, not what the user does between ticks
+            with import_steps.recording(self._created):
+                while time.perf_counter() < deadline:
+                    step = next(self._steps)
+                    if step is None:
+                        # waiting for a worker thread, give the time back to Blender
+                        break
+                    self._progress = step
+        except StopIteration as e:
+            self._finish(context)
+            return e.value or {"FINISHED"}
+        except Exception as e:
+            traceback.print_exc()
+            self.report({"ERROR"}, f"Import failed: {e}")
+            return self._cancel(context, close=False)
+        self._show_progress(context)
+        return {"RUNNING_MODAL"}
+
+    def _show_progress(self, context):
+        label, done, total = self._progress
+        if total:
+            context.window_manager.progress_update(int(1000 * done / total))
+            text = f"{self.bl_label}: {label} {done}/{total} - Esc to cancel"
+        else:
+            text = f"{self.bl_label}: {label}... - Esc to cancel"
+        context.workspace.status_text_set(text)
+
+    def _finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        self._steps = self._timer = self._created = None
+
+    def _cancel(self, context, close=True):
+        if close:
+            with import_steps.recording(self._created):
+                self._steps.close()
+        # a cancelled animation import stops in pose mode
+        if context.mode != "OBJECT" and context.active_object is not None:
+            bpy.ops.object.mode_set(mode="OBJECT", toggle=False)
+        removed = _remove_created(self._created)
+        if log_level == "DEBUG":
+            print(f"Import cancelled, removed {removed} partially imported data-blocks")
+        self._finish(context)
+        if close:
+            self.report({"WARNING"}, "Import cancelled")
+        return {"CANCELLED"}
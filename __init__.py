@@ -2,15 +2,22 @@ from .mod_reload import reload_modules
 reload_modules(locals(), __package__, ["SoFG2Panels", "SoFG2Operators"], [])  # nopep8
 
 #  Blender
-import bpy
+try:
+    import bpy
+except ImportError:
+    # plain Python (batch tools, worker processes): only the bpy-free core modules
+    # (glm_format, gla_format, g2_math, the parsers) are imported from this package
+    bpy = None
 
 #  Local
 import os
-from dotenv import load_dotenv
 
-# Ghoul 2
-from . import SoF2G2Panels
-from . import SoF2G2Operators
+if bpy is not None:
+    from dotenv import load_dotenv
+
+    # Ghoul 2
+    from . import SoF2G2Panels
+    from . import SoF2G2Operators
 
 bl_info = {
     "name": "SoF2 Import/Export Tools",
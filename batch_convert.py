@@ -0,0 +1,266 @@
+# batch_convert.py
+"""
+Batch conversion of NPCs, weapons and GLM files to FBX (Unity) with Blender background workers.
+
+    python batch_convert.py --base C:/SoF2/base --out D:/fbx --npc "Snow*" Tourist --weapon "*" --glm "models/weapons2/**/*.glm"
+
+Each of --workers Blender processes ("blender --background", see batch_worker.py) takes the next job
+from a local queue until all are done; a worker that crashes or exceeds --timeout is replaced. Every
+job ends up as one line in the JSONL report (status, errors, seconds, output path). Runs with plain
+Python, no bpy needed.
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Listener
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "batch_worker.py")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert SoF2 NPCs, weapons and GLM files to FBX.")
+    parser.add_argument("--base", required=True, help="SoF2 base folder")
+    parser.add_argument("--out", required=True, help="output folder for the .fbx files, logs and report")
+    parser.add_argument("--npc", nargs="*", default=[], help="NPC names or patterns (fnmatch, case-insensitive)")
+    parser.add_argument("--weapon", nargs="*", default=[], help="weapon names or patterns")
+    parser.add_argument("--glm", nargs="*", default=[], help=".glm paths or globs, relative to --base")
+    parser.add_argument("--blender", default=os.getenv("BLENDER", "blender"), help="Blender executable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--animations", choices=["NONE", "ALL"], default="ALL")
+    parser.add_argument("--no-unity", dest="unity", action="store_false", help="skip the Unity corrections")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds per job before its worker is killed")
+    parser.add_argument("--report", help="JSONL report (default: <out>/report.jsonl)")
+    return parser.parse_args(argv)
+
+
+def _blender_command(args, *worker_args):
+    return [
+        args.blender,
+        "--background",
+        "--factory-startup",
+        "--python-exit-code",
+        "1",
+        "--python",
+        WORKER_SCRIPT,
+        "--",
+        "--base",
+        args.base,
+        *worker_args,
+    ]
+
+
+def list_names(args):
+    """NPC and weapon names of the base folder, from one Blender run of the worker."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run(
+            _blender_command(args, "--list", path),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            timeout=args.timeout,
+        )
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+
+def _match(patterns, names):
+    matched = []
+    for pattern in patterns:
+        regex = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+        found = [name for name in names if regex.match(name)]
+        if not found:
+            print(f"Warning: nothing matches '{pattern}'")
+        matched.extend(found)
+    # keep the order, drop duplicates
+    return list(dict.fromkeys(matched))
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "unnamed"
+
+
+def build_jobs(args):
+    jobs = []
+
+    def add(kind, name, label):
+        output = os.path.join(os.path.abspath(args.out), kind, _safe_name(label) + ".fbx")
+        jobs.append(
+            {
+                "id": len(jobs),
+                "kind": kind,
+                "name": name,
+                "output": output,
+                "animations": args.animations,
+                "unity": args.unity,
+            }
+        )
+
+    if args.npc or args.weapon:
+        names = list_names(args)
+        for name in _match(args.npc, names["npcs"]):
+            add("npc", name, name)
+        for name in _match(args.weapon, names["weapons"]):
+            add("weapon", name, name)
+    for pattern in args.glm:
+        paths = sorted(glob.glob(os.path.join(args.base, pattern), recursive=True))
+        if not paths:
+            print(f"Warning: no .glm file matches '{pattern}'")
+        for path in paths:
+            rel = os.path.relpath(path, args.base)
+            add("glm", os.path.abspath(path), os.path.splitext(rel)[0])
+    return jobs
+
+
+class BatchRun:
+    """Hands the jobs to the workers over local connections and writes the report."""
+
+    def __init__(self, args, jobs):
+        self.args = args
+        self.jobs = jobs
+        self.pending: "queue.Queue[dict]" = queue.Queue()
+        for job in jobs:
+            self.pending.put(job)
+        self.authkey = os.urandom(16)
+        self.listener = Listener(("127.0.0.1", 0), authkey=self.authkey)
+        self.processes = {}
+        self.logs = {}
+        self.done = 0
+        self.failed = 0
+        self.restarts = 0
+        self.threads = []
+        self.lock = threading.Lock()
+        self.report_path = args.report or os.path.join(args.out, "report.jsonl")
+        self.log_dir = os.path.join(args.out, "logs")
+
+    def start_worker(self, worker_id):
+        host, port = self.listener.address
+        log = open(os.path.join(self.log_dir, f"worker_{worker_id}.log"), "a", encoding="utf-8")
+        env = dict(os.environ, SOF2_BATCH_AUTHKEY=self.authkey.hex())
+        self.processes[worker_id] = subprocess.Popen(
+            _blender_command(self.args, "--connect", f"{host}:{port}", "--worker", str(worker_id)),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+        self.logs[worker_id] = log
+
+    def record(self, result):
+        with self.lock:
+            self.done += 1
+            if result.get("status") != "ok":
+                self.failed += 1
+            with open(self.report_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+            print(
+                f"[{self.done}/{len(self.jobs)}] {result.get('status', 'failed'):7} {result['kind']} "
+                f"{result['name']} ({result.get('seconds', 0):.1f}s)"
+            )
+
+    def _serve(self, conn):
+        try:
+            _, worker_id, _pid = conn.recv()
+        except (EOFError, OSError):
+            return
+        while True:
+            try:
+                job = self.pending.get_nowait()
+            except queue.Empty:
+                conn.send(None)
+                break
+            start = time.perf_counter()
+            conn.send(job)
+            if not conn.poll(self.args.timeout):
+                process = self.processes.get(worker_id)
+                if process is not None:
+                    process.kill()
+                self.record(dict(job, status="timeout", errors=["job timed out"], worker=worker_id,
+                                 seconds=round(time.perf_counter() - start, 3)))
+                break
+            try:
+                _, result = conn.recv()
+            except (EOFError, OSError):
+                # Blender crashed on this job
+                self.record(dict(job, status="crashed", errors=["worker exited"], worker=worker_id,
+                                 seconds=round(time.perf_counter() - start, 3)))
+                break
+            self.record(result)
+        conn.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                return
+            thread = threading.Thread(target=self._serve, args=(conn,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def run(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        open(self.report_path, "w").close()
+        workers = max(1, min(self.args.workers, len(self.jobs)))
+        print(f"Converting {len(self.jobs)} jobs with {workers} Blender workers...")
+        for worker_id in range(workers):
+            self.start_worker(worker_id)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+        next_worker_id = workers
+        while self.done < len(self.jobs):
+            time.sleep(0.5)
+            for worker_id, process in list(self.processes.items()):
+                if process.poll() is None:
+                    continue
+                del self.processes[worker_id]
+                self.logs.pop(worker_id).close()
+                # replace crashed / killed workers while there is work left
+                if not self.pending.empty() and self.restarts < 2 * workers:
+                    self.restarts += 1
+                    self.start_worker(next_worker_id)
+                    next_worker_id += 1
+            if not self.processes:
+                break
+
+        # results of the last jobs of crashed workers
+        for thread in self.threads:
+            thread.join(timeout=5)
+        # jobs no worker could take (every worker failed to start)
+        while not self.pending.empty():
+            self.record(dict(self.pending.get_nowait(), status="skipped", errors=["no worker available"], seconds=0.0))
+        self.listener.close()
+        for process in self.processes.values():
+            process.wait()
+        for log in self.logs.values():
+            log.close()
+        return self.failed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    jobs = build_jobs(args)
+    if not jobs:
+        print("Nothing to convert.")
+        return 0
+    failed = BatchRun(args, jobs).run()
+    print(
+        f"Done: {len(jobs) - failed} converted, {failed} failed in {time.perf_counter() - start:.0f}s "
+        f"(report: {args.report or os.path.join(args.out, 'report.jsonl')})"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+# batch_worker.py
+"""
+Worker of batch_convert.py, runs inside Blender:
+
+    blender --background --factory-startup --python batch_worker.py -- --connect 127.0.0.1:PORT --worker 0 --base ...
+
+Loads the addon from this folder, then takes jobs (NPC / weapon / GLM) from the controller one at a
+time: import with the loaders, Unity corrections, FBX export, result back to the controller.
+With --list PATH it only writes the NPC and weapon names of --base to PATH (for name patterns).
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from multiprocessing.connection import Client
+
+import bpy  # pyright: ignore[reportMissingImports]
+
+# bpy.data collections emptied between two jobs
+_RESET_COLLECTIONS = ("objects", "meshes", "armatures", "actions", "materials", "images")
+
+
+def _parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="batch_worker.py")
+    parser.add_argument("--base", required=True)
+    parser.add_argument("--connect", help="host:port of the batch_convert.py controller")
+    parser.add_argument("--worker", type=int, default=0)
+    parser.add_argument("--list", help="write the NPC and weapon names to this JSON file and exit")
+    return parser.parse_args(argv)
+
+
+def load_addon():
+    """Import and register the addon this file belongs to (workers run with --factory-startup)."""
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(addon_dir))
+    addon = importlib.import_module(os.path.basename(addon_dir))
+    try:
+        addon.register()
+    except ValueError:
+        # already enabled in this Blender's preferences
+        pass
+    return addon.__name__
+
+
+class JobOperator:
+    """Stands in for GLMImport: the loaders read these properties and report to it."""
+
+    def __init__(self, job, basepath):
+        self.basepath = basepath
+        self.filepath = job["name"] if job["kind"] == "glm" else ""
+        self.npc_selected = job["name"] if job["kind"] == "npc" else ""
+        self.weapon_selected = job["name"] if job["kind"] == "weapon" else ""
+        self.loadWeapons = job["kind"] == "weapon"
+        self.scale = 10
+        self.skeletonFixes = "NONE"
+        self.loadAnimations = job.get("animations", "ALL")
+        self.startFrame = 0
+        self.numFrames = 1
+        self.unityMode = job.get("unity", True)
+        self.modalImport = False
+        self.reports = []
+
+    def report(self, level, message):
+        level = next(iter(level))
+        self.reports.append((level, str(message)))
+        print(f"[{level}] {message}")
+
+    @property
+    def errors(self):
+        return [message for level, message in self.reports if level == "ERROR"]
+
+
+def reset_scene(package):
+    for name in _RESET_COLLECTIONS:
+        collection = getattr(bpy.data, name)
+        for item in list(collection):
+            collection.remove(item)
+    importlib.import_module(package + ".SoF2Materialmanager").reset_pools()
+
+
+def run_job(package, job, basepath):
+    loaders = {
+        "npc": ("SoF2G2NPCLoader", "handle_load_npc_file"),
+        "weapon": ("SoF2G2WeaponLoader", "handle_load_weapon_file"),
+        "glm": ("SoF2G2GLMLoader", "handle_load_glm_file"),
+    }
+    result = dict(job, status="failed", errors=[], seconds=0.0)
+    start = time.perf_counter()
+    try:
+        reset_scene(package)
+        op = JobOperator(job, basepath)
+        module, handler = loaders[job["kind"]]
+        status = getattr(importlib.import_module(f"{package}.{module}"), handler)(op)
+        result["errors"] = op.errors
+        if "CANCELLED" in status or op.errors:
+            return result
+        result["import_seconds"] = round(time.perf_counter() - start, 3)
+
+        optimizer = importlib.import_module(package + ".sof2_unity_optimizer")
+        optimizer.SoF2UnityOptimizer().export_to_fbx(job["output"])
+        result["status"] = "ok"
+    except Exception as e:
+        traceback.print_exc()
+        result["errors"].append(f"{type(e).__name__}: {e}")
+    finally:
+        result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def write_names(package, basepath, path):
+    data_cache = importlib.import_module(package + ".SoF2G2DataCache")
+    npcs = [item[0] for item in data_cache.get_npc_enum_items(basepath) if item[0] != "None"]
+    weapons = [item[0] for item in data_cache.get_weapon_catalog(basepath).enum_items]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"npcs": npcs, "weapons": weapons}, f)
+
+
+def serve(package, args):
+    host, port = args.connect.rsplit(":", 1)
+    authkey = bytes.fromhex(os.environ["SOF2_BATCH_AUTHKEY"])
+    conn = Client((host, int(port)), authkey=authkey)
+    conn.send(("hello", args.worker, os.getpid()))
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        print(f"== Worker {args.worker}: {job['kind']} {job['name']} ==")
+        result = run_job(package, job, args.base)
+        result["worker"] = args.worker
+        conn.send(("result", result))
+    conn.close()
+
+
+def main():
+    args = _parse_args()
+    package = load_addon()
+    if args.list:
+        write_names(package, args.base, args.list)
+    else:
+        serve(package, args)
+
+
+if __name__ == "__main__":
+    main()
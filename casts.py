@@ -1,7 +1,10 @@
-from typing import List, Optional, Union, cast
-import mathutils  # pyright: ignore[reportMissingImports]
+from typing import TYPE_CHECKING, List, Optional, Union, cast
 from typing import Any, TypeVar, Type
 
+if TYPE_CHECKING:
+    # annotations only, so the bpy-free core modules can use the casts outside Blender
+    import mathutils  # pyright: ignore[reportMissingImports]
+
 T = TypeVar("T")
 U = TypeVar("U")
 
@@ -39,14 +42,14 @@ def union_cast(t: Type[T], v: Union[T, U]) -> T:
 getter_cast = union_cast
 
 
-def matrix_getter_cast(x: Any) -> mathutils.Matrix:
+def matrix_getter_cast(x: Any) -> "mathutils.Matrix":
     """Shorthand for getter_cast(mathutils.Matrix, x)"""
-    return getter_cast(mathutils.Matrix, x)
+    return getter_cast("mathutils.Matrix", x)
 
 
-def vector_getter_cast(x: Any) -> mathutils.Vector:
+def vector_getter_cast(x: Any) -> "mathutils.Vector":
     """Shorthand for getter_cast(mathutils.Vector, x)"""
-    return getter_cast(mathutils.Vector, x)
+    return getter_cast("mathutils.Vector", x)
 
 
 # A cast used to turn a type into one of its sub-types.
@@ -57,20 +60,20 @@ downcast = cast
 overload_cast = union_cast
 
 
-def vector_overload_cast(x: Any) -> mathutils.Vector:
+def vector_overload_cast(x: Any) -> "mathutils.Vector":
     """
     Shorthand for overload_cast(mathutils.Vector, x).
     Matrix and Quaternion multiplication currently lacks overloads to distinguish vector returns.
     """
-    return overload_cast(mathutils.Vector, x)
+    return overload_cast("mathutils.Vector", x)
 
 
-def matrix_overload_cast(x: mathutils.Matrix | mathutils.Vector) -> mathutils.Matrix:
+def matrix_overload_cast(x: "mathutils.Matrix | mathutils.Vector") -> "mathutils.Matrix":
     """
     Shorthand for overload_cast(mathutils.Matrix, x).
     Matrix and Quaternion multiplication currently lacks overloads to distinguish matrix returns.
     """
-    return overload_cast(mathutils.Matrix, x)
+    return overload_cast("mathutils.Matrix", x)
 
 
 # A cast for elements of bpy collections.
@@ -0,0 +1,140 @@
+# conftest.py
+"""Small synthetic GLA / GLM models for the tests of the bpy-free modules."""
+import importlib.util
+import math
+
+import numpy as np
+import pytest
+
+from . import SoF2G2Constants
+from . import g2_math
+from . import gla_format
+from . import glm_format
+
+# Blender scripts, only runnable inside Blender
+collect_ignore = [] if importlib.util.find_spec("bpy") else ["test_character_fix.py"]
+
+NUM_FRAMES = 6
+
+
+def makeMatrix(angle: float, location) -> np.ndarray:
+    """Rotation about Z by angle (radians) and a translation."""
+    mat = np.identity(4)
+    mat[:2, :2] = [[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]]
+    mat[:3, 3] = location
+    return mat
+
+
+def layoutGLA(gla: gla_format.GLA) -> None:
+    """Fill the header counts and offsets of gla like SoF2G2GLA does on export."""
+    offset = 4 * len(gla.skeleton.bones)
+    gla.header.ofsSkel = offset + gla.boneOffsets.baseOffset
+    gla.boneOffsets.boneOffsets = []
+    for bone in gla.skeleton.bones:
+        bone.numChildren = len(bone.children)
+        gla.boneOffsets.boneOffsets.append(offset)
+        offset += bone.getSize()
+    gla.header.ofsFrames = gla.boneOffsets.baseOffset + offset
+    gla.header.numBones = len(gla.skeleton.bones)
+    gla.header.numFrames = len(gla.animation.frames)
+    # enforce 32 bit alignment after 3-byte-indices
+    framesSize = 3 * gla.header.numFrames * gla.header.numBones
+    if framesSize % 4 != 0:
+        framesSize += 4 - (framesSize % 4)
+    gla.header.ofsCompBonePool = gla.header.ofsFrames + framesSize
+    gla.header.ofsEnd = gla.header.ofsCompBonePool + len(gla.animation.compBones) * g2_math.COMP_BONE_SIZE
+
+
+def layoutGLM(glm: glm_format.GLM) -> None:
+    """Fill the header counts and offsets of glm like SoF2G2GLM does on export."""
+    glm.surfaceDataOffsets.offsets = []
+    glm.surfaceDataOffsets.calculateOffsets(glm.surfaceDataCollection)
+    glm.header.numSurfaces = len(glm.surfaceDataCollection.surfaces)
+    glm.header.numLODs = len(glm.LODCollection.LODs)
+    for lod in glm.LODCollection.LODs:
+        for surface in lod.surfaces:
+            surface._calculateOffsets()
+    glm.LODCollection.calculateOffsets(glm.header.ofsLODs)
+    glm._calculateHeaderOffsets()
+
+
+@pytest.fixture
+def gla() -> gla_format.GLA:
+    """Two bones (root, arm); the root turns and moves along X over NUM_FRAMES frames."""
+    gla = gla_format.GLA()
+    gla.header.name = "models/test/_test"
+    for index, (name, parent, children, location) in enumerate(
+        [("root", -1, [1], (0, 0, 0)), ("arm", 0, [], (0, 0, 10))]
+    ):
+        bone = gla_format.MdxaBone()
+        bone.name = name
+        bone.parent = parent
+        bone.children = children
+        bone.index = index
+        bone.basePoseMat = makeMatrix(0, location)
+        bone.basePoseMatInv = np.linalg.inv(bone.basePoseMat)
+        gla.skeleton.bones.append(bone)
+        gla.boneIndexByName[name] = index
+
+    compBones = []
+    compBoneIndices = {}
+    frames = []
+    for frame in range(NUM_FRAMES):
+        indices = []
+        for mat in (makeMatrix(0.1 * frame, (frame, 0, 0)), np.identity(4)):
+            compBone = g2_math.compress_bone(mat)
+            if compBone not in compBoneIndices:
+                compBoneIndices[compBone] = len(compBones)
+                compBones.append(compBone)
+            indices.append(compBoneIndices[compBone])
+        frames.append(indices)
+    gla.animation.setFrames(frames, compBones, len(gla.skeleton.bones))
+    layoutGLA(gla)
+    return gla
+
+
+@pytest.fixture
+def glm() -> glm_format.GLM:
+    """One quad surface weighted to both bones of the gla fixture, plus a tag surface."""
+    glm = glm_format.GLM()
+    glm.header.name = b"models/test/test"
+    glm.header.animName = b"models/test/_test"
+    glm.header.numBones = 2
+
+    surfaces = []
+    for index, (name, flags) in enumerate([(b"body", 0), (b"*tag", SoF2G2Constants.SURFACEFLAG_TAG)]):
+        data = glm_format.MdxmSurfaceData()
+        data.name = name
+        data.flags = flags
+        data.shader = b"[nomaterial]"
+        data.parentIndex = -1 if index == 0 else 0
+        data.numChildren = 0
+        data.index = index
+        glm.surfaceDataCollection.surfaces.append(data)
+
+        surface = glm_format.MdxmSurface()
+        surface.index = index
+        surface.boneReferences = [0, 1]
+        surfaces.append(surface)
+
+    body = surfaces[0]
+    body.co = np.array([[0, 0, 0], [4, 0, 0], [4, 0, 12], [0, 0, 12]], dtype=np.float32)
+    body.normals = np.tile(np.array([0, -1, 0], dtype=np.float32), (4, 1))
+    body.uvs = np.array([[0, 1], [1, 1], [1, 0], [0, 0]], dtype=np.float32)
+    body.numWeights = np.array([1, 1, 2, 2], dtype=np.uint8)
+    body.boneIndices = np.array([[0, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.uint8)
+    body.weights = np.array([[1, 0, 0, 0], [1, 0, 0, 0], [0.75, 0.25, 0, 0], [0.5, 0.5, 0, 0]], dtype=np.float32)
+    body.setTriangles([[0, 1, 2], [0, 2, 3]])
+
+    tag = surfaces[1]
+    tag.co = np.array([[0, 0, 10], [1, 0, 10], [0, 1, 10]], dtype=np.float32)
+    tag.normals = np.tile(np.array([0, 0, 1], dtype=np.float32), (3, 1))
+    tag.uvs = np.zeros((3, 2), dtype=np.float32)
+    tag.numWeights = np.ones(3, dtype=np.uint8)
+    tag.boneIndices = np.tile(np.array([1, 0, 0, 0], dtype=np.uint8), (3, 1))
+    tag.weights = np.tile(np.array([1, 0, 0, 0], dtype=np.float32), (3, 1))
+    tag.setTriangles([[0, 1, 2]])
+
+    glm.LODCollection.LODs.append(glm_format.MdxmLOD([], 0, surfaces, -1))
+    layoutGLM(glm)
+    return glm
@@ -0,0 +1,148 @@
+# corpus_loader.py
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import parse_cache
+from . import vfs
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# below these sizes starting worker processes costs more than it saves
+MIN_PARALLEL_FILES = 8
+MIN_PARALLEL_BYTES = 1024 * 1024
+
+# set once a pool could not be used (e.g. worker processes can't import the addon), then stay serial
+_pool_unusable = False
+
+
+def worker_count() -> int:
+    env = os.getenv("SOF2_PARSE_WORKERS")
+    if env:
+        try:
+            return max(1, int(env))
+        except ValueError:
+            pass
+    return max(1, min((os.cpu_count() or 2) - 1, 8))
+
+
+def mp_context():
+    # never fork: Blender, the prefetch threads and the decode/FK pipeline threads may hold locks
+    # that a forked child would inherit. forkserver children come from a fresh interpreter and
+    # import the (bpy-free) parser modules by name; elsewhere the default is spawn anyway.
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def _parse_one(path: str, parser: Callable[..., Any], errors: str, options: dict) -> Tuple[bool, Any]:
+    try:
+        return True, parser(vfs.read_text(path, errors), **options)
+    except Exception as e:
+        # exceptions don't always pickle, the message is all the callers print anyway
+        return False, str(e)
+
+
+def _parse_chunk(
+    paths: List[str], parser: Callable[..., Any], errors: str, options: dict
+) -> List[Tuple[str, bool, Any]]:
+    return [(path,) + _parse_one(path, parser, errors, options) for path in paths]
+
+
+def _chunks_by_size(paths: List[str], sizes: Dict[str, int], count: int) -> List[List[str]]:
+    """Greedy balancing: biggest files first, each into the chunk with the fewest bytes so far."""
+    chunks: List[List[str]] = [[] for _ in range(count)]
+    totals = [0] * count
+    for path in sorted(paths, key=lambda p: sizes[p], reverse=True):
+        i = totals.index(min(totals))
+        chunks[i].append(path)
+        totals[i] += sizes[path]
+    return [c for c in chunks if c]
+
+
+def _default_on_error(path: str, error: str) -> None:
+    print(f"Error parsing {path}: {error}")
+
+
+def parse_files(
+    paths: Iterable[str],
+    parser: Callable[..., Any],
+    *,
+    errors: str = "ignore",
+    on_error: Optional[Callable[[str, str], None]] = None,
+    max_workers: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Parse many files with parser(text, **options) and return {path: result} in the order of paths.
+
+    Results come from the parse cache where possible; the misses are parsed in a process pool,
+    split into chunks of similar total file size, when there are enough of them to be worth it.
+    parser must be a module level function. Files that fail are left out of the result and
+    reported through on_error(path, message) (default: print "Error parsing <path>: <message>"),
+    in the order of paths, after all files are parsed.
+    """
+    global _pool_unusable
+    if on_error is None:
+        on_error = _default_on_error
+    # the merge order is the caller's (e.g. sorted file names), independent of the pool
+    paths = list(dict.fromkeys(paths))
+
+    results: Dict[str, Tuple[bool, Any]] = {}
+    tokens: Dict[str, Any] = {}
+    sizes: Dict[str, int] = {}
+    for path in paths:
+        try:
+            hit, value, token = parse_cache.lookup(path, parser, errors, **options)
+            sizes[path] = vfs.stat(path).st_size
+        except OSError as e:
+            results[path] = (False, str(e))
+            continue
+        if hit:
+            results[path] = (True, value)
+        else:
+            tokens[path] = token
+
+    misses = [p for p in paths if p in tokens]
+    workers = max_workers if max_workers is not None else worker_count()
+    total_bytes = sum(sizes[p] for p in misses)
+    parallel = (
+        not _pool_unusable
+        and workers > 1
+        and len(misses) >= MIN_PARALLEL_FILES
+        and total_bytes >= MIN_PARALLEL_BYTES
+    )
+
+    if parallel:
+        try:
+            chunks = _chunks_by_size(misses, sizes, workers * 4)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context()) as pool:
+                futures = [pool.submit(_parse_chunk, chunk, parser, errors, options) for chunk in chunks]
+                for future in futures:
+                    for path, ok, value in future.result():
+                        results[path] = (ok, value)
+            if log_level == "DEBUG":
+                print(f"Parsed {len(misses)} files ({total_bytes} bytes) with {workers} processes")
+        except Exception as e:
+            # BrokenProcessPool, pickling errors, ... - parse the rest in this process
+            print(f"Parallel parsing not available, parsing serially: {e}")
+            _pool_unusable = True
+
+    for path in misses:
+        if path not in results:
+            results[path] = _parse_one(path, parser, errors, options)
+
+    merged: Dict[str, Any] = {}
+    for path in paths:
+        ok, value = results[path]
+        if not ok:
+            on_error(path, value)
+            continue
+        if path in tokens:
+            parse_cache.store(path, tokens[path], value)
+        merged[path] = value
+    if not tokens:
+        parse_cache.flush()
+    return merged
@@ -0,0 +1,230 @@
+# data_cache.py
+import copy
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from . import vfs
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# (path, (mtime_ns, size)) - stamp None means the path did not exist
+FileStamp = Tuple[str, Optional[Tuple[int, int]]]
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        # pk3 entries (virtual paths) have their archive's mtime
+        st = vfs.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _norm(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Rough deep size in bytes of parsed data (dicts, lists, tuples, strings, numbers)."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += estimate_size(k, _seen) + estimate_size(v, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            size += estimate_size(v, _seen)
+    elif hasattr(obj, "__slots__"):
+        # compiled data like shader_ir.Shader
+        for name in obj.__slots__:
+            size += estimate_size(getattr(obj, name, None), _seen)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "stamps", "size", "checked_at")
+
+    def __init__(self, value: Any, stamps: Tuple[FileStamp, ...], size: int):
+        self.value = value
+        self.stamps = stamps
+        self.size = size
+        self.checked_at = time.monotonic()
+
+
+class DataCache:
+    """
+    Thread-safe in-memory cache for parsed game data, split into namespaces ("npcs", "skins", ...).
+
+    - every entry remembers the (mtime_ns, size) stamps of the files/folders it was built from
+      and is dropped on access once one of them changed (checked at most every validate_interval s)
+    - one LRU order over all entries with a memory budget (max_bytes, estimated deep size) and
+      optional per-namespace entry limits
+    - namespaces registered with copy_on_read=True hand out deep copies, for callers that modify
+      the returned data
+    - hit/miss/eviction counters per namespace, invalidate(path) for explicit invalidation
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, validate_interval: float = 1.0):
+        self.max_bytes = max_bytes
+        self.validate_interval = validate_interval
+        self._entries: "OrderedDict[Tuple[str, Hashable], _Entry]" = OrderedDict()
+        self._total_bytes = 0
+        self._limits: Dict[str, Optional[int]] = {}
+        self._copy_on_read: Dict[str, bool] = {}
+        self._counts: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+    def register_namespace(self, namespace: str, max_entries: Optional[int] = None, copy_on_read: bool = False) -> None:
+        with self._lock:
+            self._limits[namespace] = max_entries
+            self._copy_on_read[namespace] = copy_on_read
+            self._counts.setdefault(namespace, 0)
+            self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "evictions": 0})
+
+    def _ns_stats(self, namespace: str) -> Dict[str, int]:
+        stats = self._stats.get(namespace)
+        if stats is None:
+            self.register_namespace(namespace)
+            stats = self._stats[namespace]
+        return stats
+
+    @staticmethod
+    def stamps_for(paths: Iterable[str]) -> Tuple[FileStamp, ...]:
+        return tuple((_norm(p), _stamp(p)) for p in paths)
+
+    def _is_valid(self, entry: _Entry) -> bool:
+        now = time.monotonic()
+        if now - entry.checked_at < self.validate_interval:
+            return True
+        for path, stamp in entry.stamps:
+            if _stamp(path) != stamp:
+                return False
+        entry.checked_at = now
+        return True
+
+    def _remove(self, full_key: Tuple[str, Hashable]) -> None:
+        entry = self._entries.pop(full_key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+            self._counts[full_key[0]] -= 1
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        full_key = (namespace, key)
+        with self._lock:
+            stats = self._ns_stats(namespace)
+            entry = self._entries.get(full_key)
+            if entry is not None and not self._is_valid(entry):
+                if log_level == "DEBUG":
+                    print(f"DataCache: {namespace} entry {key} is outdated")
+                self._remove(full_key)
+                entry = None
+            if entry is None:
+                stats["misses"] += 1
+                return default
+            self._entries.move_to_end(full_key)
+            stats["hits"] += 1
+            value = entry.value
+            copy_value = self._copy_on_read.get(namespace, False)
+        return copy.deepcopy(value) if copy_value else value
+
+    def put(
+        self,
+        namespace: str,
+        key: Hashable,
+        value: Any,
+        paths: Iterable[str] = (),
+        stamps: Optional[Tuple[FileStamp, ...]] = None,
+    ) -> None:
+        """
+        Store value. Pass the source files/folders as paths, or stamps taken *before* reading them
+        (stamps_for), so a file changed while loading makes the entry outdated right away.
+        """
+        if stamps is None:
+            stamps = self.stamps_for(paths)
+        size = estimate_size(value)
+        full_key = (namespace, key)
+        with self._lock:
+            self._ns_stats(namespace)
+            self._remove(full_key)
+            self._entries[full_key] = _Entry(value, stamps, size)
+            self._total_bytes += size
+            self._counts[namespace] += 1
+            self._evict(namespace)
+
+    def _evict(self, namespace: str) -> None:
+        limit = self._limits.get(namespace)
+        if limit is not None:
+            while self._counts[namespace] > limit:
+                oldest = next(k for k in self._entries if k[0] == namespace)
+                self._remove(oldest)
+                self._stats[namespace]["evictions"] += 1
+        # keep at least the newest entry, even if it alone is over budget
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats[oldest[0]]["evictions"] += 1
+
+    def get_or_load(
+        self, namespace: str, key: Hashable, loader: Callable[[], Any], paths: Iterable[str] = ()
+    ) -> Any:
+        """Cached value, or loader() stored with the stamps of paths taken before loading."""
+        missing = object()
+        value = self.get(namespace, key, missing)
+        if value is not missing:
+            return value
+        paths = list(paths)
+        stamps = self.stamps_for(paths)
+        value = loader()
+        self.put(namespace, key, value, stamps=stamps)
+        if self._copy_on_read.get(namespace, False):
+            return copy.deepcopy(value)
+        return value
+
+    def invalidate(self, path: str) -> int:
+        """Drop every entry built from path (or from something inside the folder path)."""
+        target = _norm(path)
+        prefix = target.rstrip(os.sep) + os.sep
+        removed = 0
+        with self._lock:
+            for full_key in list(self._entries):
+                for p, _ in self._entries[full_key].stamps:
+                    if p == target or p.startswith(prefix):
+                        self._remove(full_key)
+                        removed += 1
+                        break
+        return removed
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        with self._lock:
+            for full_key in [k for k in self._entries if k[0] == namespace]:
+                self._remove(full_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            for namespace in self._counts:
+                self._counts[namespace] = 0
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """{namespace: {"hits", "misses", "evictions", "entries"}} plus "_total": {"bytes", "entries"}."""
+        with self._lock:
+            result = {
+                ns: dict(values, entries=self._counts.get(ns, 0))
+                for ns, values in self._stats.items()
+            }
+            result["_total"] = {"bytes": self._total_bytes, "entries": len(self._entries)}
+        return result
+
+    def keys(self, namespace: str) -> List[Hashable]:
+        with self._lock:
+            return [k[1] for k in self._entries if k[0] == namespace]
@@ -0,0 +1,222 @@
+# dir_index.py
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# a directory's mtime is re-checked at most every REFRESH_INTERVAL seconds
+REFRESH_INTERVAL = 1.0
+
+
+def pick(names: List[str], wanted: str) -> str:
+    """The name of names spelled exactly like wanted, else the first (names differing only in case)."""
+    if len(names) > 1 and wanted in names:
+        return wanted
+    return names[0]
+
+
+class _Listing:
+    """
+    One scanned directory: lowercase names -> real names, lowercase stem -> {lowercase ext: real names}.
+    On a case-sensitive filesystem "Textures" and "textures" may both exist, so every lowercase
+    name maps to all its spellings; lookups pick the exact one if it is there (see pick).
+    """
+
+    __slots__ = ("mtime_ns", "checked_at", "files", "dirs", "stems")
+
+    def __init__(self, path: str, mtime_ns: int):
+        self.mtime_ns = mtime_ns
+        self.checked_at = time.monotonic()
+        self.files: Dict[str, List[str]] = {}
+        self.dirs: Dict[str, List[str]] = {}
+        self.stems: Dict[str, Dict[str, List[str]]] = {}
+        with os.scandir(path) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                lower = entry.name.lower()
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    self.dirs.setdefault(lower, []).append(entry.name)
+                    continue
+                self.files.setdefault(lower, []).append(entry.name)
+                stem, ext = os.path.splitext(lower)
+                self.stems.setdefault(stem, {}).setdefault(ext[1:], []).append(entry.name)
+
+
+class DirectoryIndex:
+    """
+    Case-insensitive view of a base folder, for game paths written on Windows ("Models/Characters/...",
+    "SOF2.inview") that don't match the real case on Linux.
+
+    Directories are scanned once (os.scandir) on first use and kept as lowercase name -> real name
+    and stem -> {extension} maps, so resolving a name and the extension fallback of FindFile are
+    dictionary lookups. A directory is scanned again only when its mtime changed.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.normpath(root)
+        self._listings: Dict[str, _Listing] = {}
+        self._lock = threading.Lock()
+
+    def _listing(self, path: str) -> Optional[_Listing]:
+        now = time.monotonic()
+        listing = self._listings.get(path)
+        if listing is not None and now - listing.checked_at < REFRESH_INTERVAL:
+            return listing
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self._listings.pop(path, None)
+            return None
+        if listing is not None and listing.mtime_ns == mtime_ns:
+            listing.checked_at = now
+            return listing
+        try:
+            listing = _Listing(path, mtime_ns)
+        except OSError:
+            self._listings.pop(path, None)
+            return None
+        if log_level == "DEBUG":
+            print(f"Indexed directory {path} ({len(listing.files)} files)")
+        self._listings[path] = listing
+        return listing
+
+    @staticmethod
+    def _parts(relpath: str) -> List[str]:
+        # ".." is resolved by os.path.normpath first; what is left above root is not indexed
+        parts = os.path.normpath(relpath.replace("\\", "/")).replace("\\", "/").split("/")
+        return [p for p in parts if p and p != "."]
+
+    def _resolve_dir(self, parts: List[str]) -> Optional[Tuple[str, _Listing]]:
+        if ".." in parts:
+            return None
+        path = self.root
+        listing = self._listing(path)
+        for part in parts:
+            if listing is None:
+                return None
+            names = listing.dirs.get(part.lower())
+            if names is None:
+                return None
+            path = os.path.join(path, pick(names, part))
+            listing = self._listing(path)
+        if listing is None:
+            return None
+        return path, listing
+
+    def resolve_dir(self, reldir: str) -> Optional[str]:
+        """Real path of a folder below root, matched case-insensitively."""
+        with self._lock:
+            found = self._resolve_dir(self._parts(reldir))
+        return found[0] if found else None
+
+    def find(self, relpath: str, extensions: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Real path of relpath below root, matched case-insensitively; if it does not exist, its
+        stem with the first of extensions that exists (like SoF2Filesystem.FindFile).
+        """
+        parts = self._parts(relpath)
+        if not parts:
+            return None
+        with self._lock:
+            found = self._resolve_dir(parts[:-1])
+        if found is None:
+            return None
+        path, listing = found
+        name = parts[-1]
+        names = listing.files.get(name.lower())
+        if names is not None:
+            return os.path.join(path, pick(names, name))
+        if extensions:
+            stem = os.path.splitext(name)[0]
+            by_ext = listing.stems.get(stem.lower())
+            if by_ext:
+                for extension in extensions:
+                    names = by_ext.get(extension.lower())
+                    if names is not None:
+                        return os.path.join(path, pick(names, f"{stem}.{extension}"))
+        return None
+
+    def listdir(self, reldir: str, extension: str = "") -> List[str]:
+        """Real paths of the files directly in reldir ending with extension (case-insensitive)."""
+        with self._lock:
+            found = self._resolve_dir(self._parts(reldir))
+        if found is None:
+            return []
+        path, listing = found
+        extension = extension.lower()
+        return [
+            os.path.join(path, real)
+            for lower, names in listing.files.items()
+            if lower.endswith(extension)
+            for real in names
+        ]
+
+    def extensions(self, relpath: str) -> Set[str]:
+        """Lowercase extensions that exist for the stem of relpath."""
+        parts = self._parts(relpath)
+        if not parts:
+            return set()
+        with self._lock:
+            found = self._resolve_dir(parts[:-1])
+        if found is None:
+            return set()
+        return set(found[1].stems.get(os.path.splitext(parts[-1].lower())[0], {}))
+
+    def stems(self, folder: str) -> Dict[str, Dict[str, List[str]]]:
+        """
+        {lowercase stem: {lowercase extension: real file names}} of the files directly in folder,
+        a real (not case-resolved) path; empty if it does not exist.
+        """
+        with self._lock:
+            listing = self._listing(os.path.normpath(folder))
+        return listing.stems if listing is not None else {}
+
+
+# listings of arbitrary absolute folders (texture folders, extracted pk3 files), keyed by path
+_folders = DirectoryIndex("")
+
+
+def folder_stems(folder: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    {lowercase stem: {lowercase extension: real file names}} of the files in folder, from one cached
+    scandir; empty if the folder does not exist. Answers "does <stem>.<ext> exist" without a stat.
+    """
+    return _folders.stems(folder)
+
+
+# one index per base folder
+_indexes: Dict[str, DirectoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str) -> Optional[DirectoryIndex]:
+    """DirectoryIndex of root, or None if root is empty or not a folder."""
+    if not root:
+        return None
+    key = os.path.normcase(os.path.abspath(root))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            if not os.path.isdir(root):
+                return None
+            index = DirectoryIndex(root)
+            _indexes[key] = index
+        return index
+
+
+def resolve(root: str, relpath: str, extensions: Optional[List[str]] = None) -> Optional[str]:
+    """Real path of a game file below root (case-insensitive, with extension fallback), or None."""
+    index = get_index(root)
+    if index is None:
+        return None
+    return index.find(relpath, extensions)
+
+
+def reset() -> None:
+    with _indexes_lock:
+        _indexes.clear()
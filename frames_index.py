@@ -0,0 +1,85 @@
+# frames_index.py
+import os
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+
+class FramesIndex:
+    """
+    Index over the clips of one parsed .frames file (see frames_parser.parse_frames).
+
+    Clips are kept in a sorted array by start frame, together with the running maximum of the
+    end frames. Overlap queries use two binary searches and then only touch the candidate slice,
+    i.e. O(log n + k) for the usual non-nested clip layout.
+
+    Every clip is a dict in the format MdxaAnimation.animation_clips already uses:
+    {"name", "start_frame", "end_frame", "duration", "fps", "xsi_path"}; clips_for_range hands out
+    copies, so callers may change them.
+    """
+
+    def __init__(self, data_frames: Optional[Dict[str, Any]]):
+        # clips in .frames file order
+        self.clips: List[Dict[str, Any]] = []
+
+        for xsi_path, frame_data in (data_frames or {}).items():
+            if not (isinstance(frame_data, dict) and "startframe" in frame_data and "duration" in frame_data):
+                continue
+            try:
+                clip_start_frame = int(frame_data["startframe"])
+                duration = int(frame_data["duration"])
+                fps = int(frame_data.get("fps", 20))  # Default 20 FPS
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Warning: Could not parse frame data for {xsi_path}: {e}")
+                continue
+            clip = {
+                "name": os.path.splitext(os.path.basename(xsi_path))[0],
+                "start_frame": clip_start_frame,
+                "end_frame": clip_start_frame + duration - 1,
+                "duration": duration,
+                "fps": fps,
+                "xsi_path": xsi_path,
+            }
+            self.clips.append(clip)
+
+        # sorted-array interval index: clip positions (in file order) sorted by start frame
+        self._order = sorted(range(len(self.clips)), key=lambda i: self.clips[i]["start_frame"])
+        self._starts = [self.clips[i]["start_frame"] for i in self._order]
+        self._max_ends: List[int] = []
+        running = None
+        for i in self._order:
+            end = self.clips[i]["end_frame"]
+            running = end if running is None else max(running, end)
+            self._max_ends.append(running)
+
+    def __len__(self) -> int:
+        return len(self.clips)
+
+    def __bool__(self) -> bool:
+        return len(self.clips) > 0
+
+    def _overlapping(self, range_start: int, range_end: int) -> List[int]:
+        """
+        Positions of all clips with clip_start <= range_end and clip_end >= range_start, in .frames
+        file order.
+        """
+        if range_end < range_start or not self._starts:
+            return []
+        # clips starting after range_end can't overlap
+        hi = bisect_right(self._starts, range_end)
+        # _max_ends is monotonic: everything before lo ends before range_start
+        lo = bisect_left(self._max_ends, range_start, 0, hi)
+        found = [
+            self._order[k]
+            for k in range(lo, hi)
+            if self.clips[self._order[k]]["end_frame"] >= range_start
+        ]
+        found.sort()
+        return found
+
+    def clips_for_range(self, startFrame: int, numFrames: int) -> List[Dict[str, Any]]:
+        """Same semantics as the GLA import: numFrames == -1 selects all clips."""
+        if numFrames == -1:
+            positions = range(len(self.clips))
+        else:
+            positions = self._overlapping(startFrame, startFrame + numFrames - 1)
+        return [dict(self.clips[i]) for i in positions]
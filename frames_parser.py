@@ -1,9 +1,15 @@
 # frames_parser.py
 import re
 import os
-from pathlib import Path
 from typing import Dict, Any
 
+from . import value_converter as _value_converter
+from . import corpus_loader as _corpus_loader
+from . import vfs as _vfs
+
+# part of the parse cache key, bump when parse_frames returns something different
+PARSER_VERSION = 1
+
 # --- Tokenizer (ähnlich wie beim skl_parser) ---
 token_re = re.compile(r'"([^"]*)"|(\{)|(\})|([^\s\{\}]+)', re.MULTILINE)
 
@@ -21,20 +27,10 @@ def tokenize(text: str):
     return tokens
 
 # --- Value conversion (numbers, vectors) ---
-def convert_value(s: str):
-    if s == "":
-        return s
-    # vector like "0.000 -5.152 0.000"
-    if re.match(r'^-?\d+(\.\d+)?(\s+-?\d+(\.\d+)?)+$', s):
-        parts = [float(x) for x in s.split()]
-        if all(float(x).is_integer() for x in parts):
-            parts = [int(x) for x in parts]
-        return parts
-    if re.match(r'^-?\d+\.\d+$', s):
-        return float(s)
-    if re.match(r'^-?\d+$', s):
-        return int(s)
-    return s
+# shared with skl_parser, see value_converter.py
+convert_value = _value_converter.convert_value
+
+_delta_key_re = re.compile(r'delta(\d+)', re.IGNORECASE)
 
 # --- recursive block parser ---
 def parse_block(tokens, i):
@@ -86,7 +82,10 @@ def parse_block(tokens, i):
     raise ValueError("Unexpected end of tokens while parsing block")
 
 # --- Helper: normalize parsed block for frames ---
-def normalize_frames_block(block: Dict[str, Any]) -> Dict[str, Any]:
+def normalize_frames_block(block: Dict[str, Any], as_numpy: bool = False) -> Dict[str, Any]:
+    """
+    as_numpy: emit averagevec/deltavecs as float64 NumPy arrays instead of lists
+    """
     b = dict(block)  # shallow copy
     # Convert startframe/duration/fps -> ints (convert_value already did, but ensure)
     for k in ("startframe", "duration", "fps"):
@@ -115,7 +114,7 @@ def normalize_frames_block(block: Dict[str, Any]) -> Dict[str, Any]:
         # extract deltaN keys and build ordered list
         delta_items = []
         for kname, v in merged.items():
-            m = re.match(r'delta(\d+)', kname, re.IGNORECASE)
+            m = _delta_key_re.match(kname)
             if m:
                 idx = int(m.group(1))
                 delta_items.append((idx, convert_value(v) if isinstance(v, str) else v))
@@ -127,6 +126,12 @@ def normalize_frames_block(block: Dict[str, Any]) -> Dict[str, Any]:
             # fallback: keep merged dict
             b["deltavecs"] = merged
 
+    if as_numpy:
+        if "averagevec" in b:
+            b["averagevec"] = _value_converter.to_numpy_vector(b["averagevec"])
+        if isinstance(b.get("deltavecs"), list):
+            b["deltavecs"] = _value_converter.to_numpy_vectors(b["deltavecs"])
+
     # Handle notetrack: may be single dict or list of dicts
     if "notetrack" in b:
         raw = b["notetrack"]
@@ -147,9 +152,10 @@ def normalize_frames_block(block: Dict[str, Any]) -> Dict[str, Any]:
     return b
 
 # --- Top-level frames parser ---
-def parse_frames(text: str) -> Dict[str, Dict[str, Any]]:
+def parse_frames(text: str, as_numpy: bool = False) -> Dict[str, Dict[str, Any]]:
     """
     Parse a .frames-like text and return mapping: filepath -> parsed block dict.
+    as_numpy: store averagevec/deltavecs as compact NumPy arrays (needs numpy).
     """
     tokens = tokenize(text)
     i = 0
@@ -163,7 +169,7 @@ def parse_frames(text: str) -> Dict[str, Dict[str, Any]]:
         if i + 1 < len(tokens) and tokens[i+1] == '{':
             path = tokens[i]
             block, ni = parse_block(tokens, i+1)
-            out[path] = normalize_frames_block(block)
+            out[path] = normalize_frames_block(block, as_numpy)
             i = ni
         else:
             # stray token (blank line etc.)
@@ -176,20 +182,13 @@ def get_frames_folder_data(basepath: str) -> Dict[str, Dict[str, Any]]:
     Scan <basepath>/skeletons and parse all files that end with ".frames".
     Returns mapping: filename -> parsed_dict (where parsed_dict maps filepath->block)
     """
-    skeletons_dir = Path(basepath) / "skeletons"
     results = {}
-    if not skeletons_dir.is_dir():
-        return results
-
-    for p in sorted(skeletons_dir.iterdir()):
-        if not p.is_file():
-            continue
-        if not p.name.lower().endswith(".frames"):
-            continue
-        try:
-            text = p.read_text(encoding="utf-8", errors="ignore")
-            parsed = parse_frames(text)
-            results[p.name] = parsed
-        except Exception as e:
-            print(f"Error parsing frames file {p}: {e}")
+    # loose files and .pk3 contents
+    parsed = _corpus_loader.parse_files(
+        _vfs.folder_files(basepath, "skeletons", ".frames"),
+        parse_frames,
+        on_error=lambda path, e: print(f"Error parsing frames file {path}: {e}"),
+    )
+    for path, parsed_dict in parsed.items():
+        results[os.path.basename(path)] = parsed_dict
     return results
\ No newline at end of file
@@ -0,0 +1,159 @@
+# g2_math.py
+"""
+Ghoul 2 math on NumPy arrays, without Blender: quaternions (w, x, y, z), the compressed bones of
+the GLA bone pool, the GLA <-> Blender bone axis change and the forward kinematics of GLA frames.
+Matrices are 4x4 (translation in the last column); everything works on stacks (..., 4, 4).
+"""
+import struct
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# 14 bytes per compressed bone: 4 shorts quaternion (w, x, y, z), 3 shorts location
+COMP_BONE_SIZE = 14
+
+
+def quat_to_matrix(q: np.ndarray) -> np.ndarray:
+    """(..., 4) quaternions -> (..., 3, 3) rotation matrices; like mathutils, q is not normalized."""
+    q = np.asarray(q, dtype=np.float64)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    m = np.empty(q.shape[:-1] + (3, 3))
+    m[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    m[..., 0, 1] = 2 * (x * y - w * z)
+    m[..., 0, 2] = 2 * (x * z + w * y)
+    m[..., 1, 0] = 2 * (x * y + w * z)
+    m[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    m[..., 1, 2] = 2 * (y * z - w * x)
+    m[..., 2, 0] = 2 * (x * z - w * y)
+    m[..., 2, 1] = 2 * (y * z + w * x)
+    m[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return m
+
+
+def matrix_to_quat(m: np.ndarray) -> np.ndarray:
+    """(..., 3, 3) (or 4x4) rotation matrices -> (..., 4) unit quaternions with w >= 0."""
+    m = np.asarray(m, dtype=np.float64)[..., :3, :3]
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+    # one candidate per largest component, numerically stable where that component is big
+    candidates = np.stack(
+        [
+            np.stack([1 + m00 + m11 + m22, m21 - m12, m02 - m20, m10 - m01], axis=-1),
+            np.stack([m21 - m12, 1 + m00 - m11 - m22, m01 + m10, m02 + m20], axis=-1),
+            np.stack([m02 - m20, m01 + m10, 1 - m00 + m11 - m22, m12 + m21], axis=-1),
+            np.stack([m10 - m01, m02 + m20, m12 + m21, 1 - m00 - m11 + m22], axis=-1),
+        ],
+        axis=-2,
+    )
+    trace = m00 + m11 + m22
+    choice = np.argmax(
+        np.stack([trace, 2 * m00 - trace, 2 * m11 - trace, 2 * m22 - trace], axis=-1), axis=-1
+    )
+    q = np.take_along_axis(candidates, choice[..., None, None], axis=-2)[..., 0, :]
+    q /= np.linalg.norm(q, axis=-1, keepdims=True)
+    return np.where(q[..., :1] < 0, -q, q)
+
+
+def decompose(m: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(..., 4, 4) -> location (..., 3) and rotation (..., 4), scale removed like Matrix.decompose."""
+    m = np.asarray(m, dtype=np.float64)
+    rot = m[..., :3, :3] / np.linalg.norm(m[..., :3, :3], axis=-2, keepdims=True)
+    return m[..., :3, 3].copy(), matrix_to_quat(rot)
+
+
+def comp_bones_from_bytes(data: bytes) -> np.ndarray:
+    """Raw bone pool -> (N, 7) uint16 (quaternion w, x, y, z, location x, y, z)."""
+    return np.frombuffer(data, dtype="<u2").reshape(-1, 7)
+
+
+def decompress_bones(comp: np.ndarray) -> np.ndarray:
+    """(N, 7) compressed bones -> (N, 4, 4) offset matrices (relative to the parent bone)."""
+    comp = np.asarray(comp, dtype=np.float64)
+    mats = np.zeros(comp.shape[:-1] + (4, 4))
+    # map quaternion values from 0..65535 to -2..2
+    mats[..., :3, :3] = quat_to_matrix(comp[..., :4] / 16383 - 2)
+    # map location from 0..65535 to -512..512 (511.984375)
+    mats[..., :3, 3] = comp[..., 4:] / 64 - 512
+    mats[..., 3, 3] = 1
+    return mats
+
+
+def compress_bone(mat: np.ndarray) -> bytes:
+    """The 14 byte compressed representation of a 4x4 matrix (no scale) as saved in the bone pool."""
+    mat = np.asarray(mat, dtype=np.float64)
+    w, x, y, z = matrix_to_quat(mat).tolist()
+    lx, ly, lz = mat[:3, 3].tolist()
+    return struct.pack(
+        "7H",
+        round((w + 2) * 16383),
+        round((x + 2) * 16383),
+        round((y + 2) * 16383),
+        round((z + 2) * 16383),
+        round((lx + 512) * 64),
+        round((ly + 512) * 64),
+        round((lz + 512) * 64),
+    )
+
+
+def gla_to_blender_rot(m: np.ndarray) -> np.ndarray:
+    """GLA bone rotations (X+ = front) -> Blender style (Y+ = front), on a copy of (..., 4, 4)."""
+    m = np.array(m, dtype=np.float64)
+    col0 = m[..., :, 0].copy()
+    m[..., :, 0] = -m[..., :, 1]
+    m[..., :, 1] = col0
+    # undo change in translation
+    m[..., 3, 0], m[..., 3, 1] = m[..., 3, 1].copy(), -m[..., 3, 0]
+    # also, roll 90 degrees
+    col0 = m[..., :3, 0].copy()
+    m[..., :3, 0] = -m[..., :3, 2]
+    m[..., :3, 2] = col0
+    return m
+
+
+def blender_to_gla_rot(m: np.ndarray) -> np.ndarray:
+    """Inverse of gla_to_blender_rot."""
+    m = np.array(m, dtype=np.float64)
+    # undo roll 90 degrees
+    col0 = m[..., :3, 0].copy()
+    m[..., :3, 0] = m[..., :3, 2]
+    m[..., :3, 2] = -col0
+    col0 = m[..., :, 0].copy()
+    m[..., :, 0] = m[..., :, 1]
+    m[..., :, 1] = -col0
+    # undo change in translation
+    m[..., 3, 0], m[..., 3, 1] = m[..., 3, 1].copy(), -m[..., 3, 0]
+    return m
+
+
+def hierarchy_order(parents: Sequence[int]) -> List[int]:
+    """Bone indices so that every parent comes before its children."""
+    order: List[int] = []
+    done = set()
+    while len(order) < len(parents):
+        added = False
+        for index, parent in enumerate(parents):
+            if index in done or (parent != -1 and parent not in done):
+                continue
+            order.append(index)
+            done.add(index)
+            added = True
+        if not added:
+            raise ValueError("bone hierarchy has a cycle")
+    return order
+
+
+def fk_offsets(
+    pool: np.ndarray, frames: np.ndarray, parents: Sequence[int], order: Sequence[int]
+) -> np.ndarray:
+    """
+    Absolute offset matrices (F, B, 4, 4) of frames (F, B) of bone pool indices; pool is the
+    decompressed bone pool. offset @ basePoseMat is the animated bone, and the offset alone is the
+    skinning matrix of a GLM vertex. Memory grows with F * B, so long animations go in chunks.
+    """
+    offsets = pool[np.asarray(frames)]
+    for index in order:
+        parent = parents[index]
+        if parent != -1:
+            offsets[:, index] = offsets[:, parent] @ offsets[:, index]
+    return offsets
@@ -0,0 +1,428 @@
+# gla_format.py
+"""
+GLA (Ghoul 2 skeleton and animation) reader and writer without Blender. Frames are a (frames,
+bones) array of bone pool indices and the bone pool stays compressed ((N, 7) uint16) until
+poolMatrices() decodes it in one go; g2_math does the rest. SoF2G2GLA extends these classes with
+the Blender import/export.
+"""
+import os
+import struct
+from enum import Enum
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import SoF2G2Constants
+from . import MrwProfiler
+from . import frames_index
+from . import g2_math
+from . import vfs
+from .error_types import ErrorMessage, NoError
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+
+def decode(bs: bytes) -> str:
+    end = bs.find(b"\0")  # find null termination
+    if end == -1:  # if none exists, there is no end.
+        return bs.decode()
+    return bs[:end].decode()  # otherwise cut it off at end
+
+
+def readString(file: BinaryIO) -> str:
+    return decode(struct.unpack("64s", file.read(SoF2G2Constants.MAX_QPATH))[0])
+
+
+class AnimationLoadMode(Enum):
+    NONE = "NONE"
+    ALL = "ALL"
+    RANGE = "RANGE"
+
+
+class MdxaHeader:
+    def __init__(self):
+        self.name = ""
+        self.scale = 1  # does not seem to be used by Jedi Academy anyway - or is it? I need it in import!
+        self.numFrames = -1
+        self.ofsFrames = -1
+        self.numBones = -1
+        self.ofsCompBonePool = -1
+        # this is also MdxaSkelOffsets.baseOffset + MdxaSkelOffsets.boneOffsets[0] - probably a historic leftover
+        self.ofsSkel = -1
+        self.ofsEnd = -1
+
+    def loadFromFile(self, file: BinaryIO) -> Tuple[bool, ErrorMessage]:
+        # check ident
+        (ident,) = struct.unpack("4s", file.read(4))
+        if ident != SoF2G2Constants.GLA_IDENT:
+            print(
+                "File does not start with ",
+                SoF2G2Constants.GLA_IDENT,
+                " but ",
+                ident,
+                " - no GLA!",
+            )
+            return False, ErrorMessage("Is no GLA file, incorrect file identifier!")
+        (version,) = struct.unpack("i", file.read(4))
+        if version != SoF2G2Constants.GLA_VERSION:
+            return False, ErrorMessage(
+                f"Wrong gla file version! {version} should be {SoF2G2Constants.GLA_VERSION}"
+            )
+        self.name = readString(file)
+        (
+            self.scale,
+            self.numFrames,
+            self.ofsFrames,
+            self.numBones,
+            self.ofsCompBonePool,
+            self.ofsSkel,
+            self.ofsEnd,
+        ) = struct.unpack("f6i", file.read(7 * 4))
+        print("Scale: {:.3f}".format(self.scale))
+        return True, NoError
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        file.write(
+            struct.pack(
+                "4si64sf6i",
+                SoF2G2Constants.GLA_IDENT,
+                SoF2G2Constants.GLA_VERSION,
+                self.name.encode(),
+                self.scale,
+                self.numFrames,
+                self.ofsFrames,
+                self.numBones,
+                self.ofsCompBonePool,
+                self.ofsSkel,
+                self.ofsEnd,
+            )
+        )
+
+
+class MdxaBoneOffsets:
+    def __init__(self):
+        self.baseOffset: int = 2 * 4 + 64 + 4 * 7  # sizeof header
+        self.boneOffsets: List[int] = []
+
+    # fail-safe (except for exceptions)
+    def loadFromFile(self, file: BinaryIO, numBones: int):
+        assert self.baseOffset == file.tell()
+        self.boneOffsets.extend(struct.unpack(f"{numBones}i", file.read(4 * numBones)))
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        assert file.tell() == self.baseOffset  # must be after header
+        for offset in self.boneOffsets:
+            file.write(struct.pack("i", offset))
+
+
+def _loadMatrix(file: BinaryIO) -> np.ndarray:
+    # 3 * 4 in the file: shear not used.
+    mat = np.identity(4)
+    mat[:3] = np.frombuffer(file.read(12 * 4), dtype="<f4").reshape(3, 4)
+    return mat
+
+
+def _saveMatrix(file: BinaryIO, mat: np.ndarray) -> None:
+    file.write(np.asarray(mat, dtype="<f4")[:3].tobytes())
+
+
+# originally called MdxaSkel_t, but I find that name misleading
+class MdxaBone:
+    def __init__(self):
+        self.name = ""
+        self.flags: int = 0
+        self.parent: int = -1
+        # 4x4, GLA axes (X+ = front)
+        self.basePoseMat = np.identity(4)
+        self.basePoseMatInv = np.identity(4)
+        self.numChildren = 0
+        self.children: List[int] = []
+        # not saved, filled by loadBonesFromFile() and when loaded from blender
+        self.index: int = -1
+
+    def getSize(self) -> int:
+        return struct.calcsize("64sIi12f12fi{}i".format(self.numChildren))
+
+    def loadFromFile(self, file: BinaryIO) -> None:
+        self.name = readString(file)
+        self.flags, self.parent = struct.unpack("Ii", file.read(2 * 4))
+        self.basePoseMat = _loadMatrix(file)
+        self.basePoseMatInv = _loadMatrix(file)
+        (self.numChildren,) = struct.unpack("i", file.read(4))
+        self.children.extend(struct.unpack(f"{self.numChildren}i", file.read(4 * self.numChildren)))
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        file.write(struct.pack("64sIi", self.name.encode(), self.flags, self.parent))
+        _saveMatrix(file, self.basePoseMat)
+        _saveMatrix(file, self.basePoseMatInv)
+        file.write(struct.pack("i", self.numChildren))
+        assert len(self.children) == self.numChildren
+        for child in self.children:
+            file.write(struct.pack("i", child))
+
+
+class MdxaSkel:
+    # the Blender layer (SoF2G2GLA) substitutes its subclass
+    boneType = MdxaBone
+
+    def __init__(self):
+        self.bones: List[MdxaBone] = []
+
+    def loadFromFile(self, file: BinaryIO, offsets: MdxaBoneOffsets):
+        for i, offset in enumerate(offsets.boneOffsets):
+            file.seek(offsets.baseOffset + offset)
+            bone = self.boneType()
+            bone.loadFromFile(file)
+            bone.index = i
+            self.bones.append(bone)
+
+    def saveToFile(self, file: BinaryIO, header: MdxaHeader):
+        assert file.tell() == header.ofsSkel
+        for bone in self.bones:
+            bone.saveToFile(file)
+
+    @property
+    def parents(self) -> List[int]:
+        return [bone.parent for bone in self.bones]
+
+    def hierarchyOrder(self) -> List[int]:
+        # bones have to be set in hierarchical order - their position depends on their parent's absolute position, after all.
+        return g2_math.hierarchy_order(self.parents)
+
+    def basePoses(self) -> np.ndarray:
+        """(bones, 4, 4) base pose matrices by bone index."""
+        if not self.bones:
+            return np.zeros((0, 4, 4))
+        return np.stack([bone.basePoseMat for bone in self.bones])
+
+
+# Frames & Compressed Bone Pool
+class MdxaAnimation:
+    def __init__(self):
+        # bone pool index per frame and bone, (frames, bones) uint32
+        self.frames = np.zeros((0, 0), dtype=np.uint32)
+        # compressed bone pool, (N, 7) uint16
+        self.compBones = np.zeros((0, 7), dtype=np.uint16)
+        # global frame number of frames[0] (> 0 if only some clips / a range were loaded)
+        self.firstFrame = 0
+        self.animation_clips: List[Dict] = []  # List of animation clip info dictionaries
+        self._poolMatrices: Optional[np.ndarray] = None
+
+    def loadFromFile(
+        self, file: BinaryIO, header: MdxaHeader, startFrame: int, numFrames: int, data_frames_file: dict
+    ) -> Tuple[bool, ErrorMessage]:
+        # **NEW: Filter animations based on data_frames_file clips AND range parameters**
+        # If range is specified (numFrames != -1), only include clips that overlap with the range
+        animation_clips = frames_index.FramesIndex(data_frames_file).clips_for_range(
+            startFrame, numFrames
+        )
+
+        # If no clips defined, use original behavior
+        if not animation_clips:
+            print("No animation clips defined, loading all frames")
+            return self._loadFrames(file, header, startFrame, numFrames)
+
+        # **NEW: Load only the frames needed for the clips**
+        print(f"Loading {len(animation_clips)} animation clips...")
+
+        # Calculate frame range needed
+        min_frame = min(clip["start_frame"] for clip in animation_clips)
+        max_frame = max(clip["end_frame"] for clip in animation_clips)
+
+        # Ensure we don't exceed available frames
+        min_frame = max(0, min_frame)
+        max_frame = min(header.numFrames - 1, max_frame)
+
+        print(f"Loading frames {min_frame} to {max_frame} (total: {max_frame - min_frame + 1} frames)")
+
+        # Store clip info for later use
+        self.animation_clips = animation_clips
+
+        # Load the filtered frame range
+        return self._loadFrames(file, header, min_frame, max_frame - min_frame + 1)
+
+    def _loadFrames(self, file: BinaryIO, header: MdxaHeader, startFrame: int, numFrames: int) -> Tuple[bool, ErrorMessage]:
+        """Load numFrames frames from startFrame (-1: all frames) and the bone pool they use."""
+        # read frames
+        if file.tell() != header.ofsFrames:
+            print(
+                "Info: Frames in .gla not encountered when expected (at ",
+                file.tell(),
+                " instead of ",
+                header.ofsFrames,
+                "), seeking correct position. There could be a bug in the importer (bad) or the file could be unusual - but not necessarily wrong (no problem).",
+                sep="",
+            )
+            file.seek(header.ofsFrames)
+
+        # prepare frame start/end settings
+        if numFrames == -1:
+            assert startFrame == 0
+            numFrames = header.numFrames
+        else:
+            print("Reading {} frames, starting at {}".format(numFrames, startFrame))
+        if startFrame >= header.numFrames:
+            print("Warning: StartFrame beyond existing frames, using last one")
+            startFrame = header.numFrames - 1
+            numFrames = 1
+        if startFrame + numFrames > header.numFrames:
+            print("Warning: Trying to import more frames than there are, fixing")
+            numFrames = header.numFrames - startFrame
+        # skip first startFrame frames
+        # 1 = from current position
+        file.seek(startFrame * 3 * header.numBones, 1)
+
+        # read (remaining) frames
+        # bone indices are only 3 bytes long - with 20k+ frames 25% less is quite a bit, reportedly.
+        raw = np.frombuffer(file.read(numFrames * header.numBones * 3), dtype=np.uint8)
+        raw = raw.reshape(numFrames, header.numBones, 3).astype(np.uint32)
+        self.frames = raw[..., 0] | (raw[..., 1] << 8) | (raw[..., 2] << 16)
+        self.firstFrame = startFrame
+        maxIndex = int(self.frames.max()) if self.frames.size else -1
+
+        # read compressed bone pool
+        # see if we reached it yet
+        curPos = file.tell()
+        if curPos != header.ofsCompBonePool:
+            # we're not yet there. If we're off by 0-3 bytes, it's because 32-bit-alignment is forced. Silently seek correct position. Otherwise: warn (and seek correct position, too)
+            # if we're only importing some frames, we may or may not be there yet, of course, so don't warn.
+            if curPos > header.ofsCompBonePool or (
+                header.ofsCompBonePool > curPos + 3 and numFrames == header.numFrames
+            ):
+                print(
+                    "Info: Bone Pool in .gla not encountered when expected (at ",
+                    file.tell(),
+                    " instead of ",
+                    header.ofsCompBonePool,
+                    "), seeking correct position. There could be a bug in the importer (bad) or the file could be unusual - but not necessarily wrong (no problem).",
+                    sep="",
+                )
+            file.seek(header.ofsCompBonePool)
+        # there's one more object than the highest index since those start at 0
+        self.compBones = g2_math.comp_bones_from_bytes(file.read((maxIndex + 1) * g2_math.COMP_BONE_SIZE))
+        self._poolMatrices = None
+
+        # file should be over now, bone pool is usually the last thing. I'm not sure it has to be, but so far it has always been.
+        if file.tell() != header.ofsEnd and numFrames == header.numFrames:
+            print(
+                "Info: .gla Bone Pool read but file not over yet - this likely indicates a problem."
+            )
+        return True, NoError
+
+    def setFrames(self, frames: List[List[int]], compBones: List[bytes], numBones: int) -> None:
+        """Frames (bone pool indices) and the 14 byte compressed bones, as collected by an export."""
+        self.frames = np.array(frames, dtype=np.uint32).reshape(-1, numBones)
+        self.firstFrame = 0
+        self.compBones = g2_math.comp_bones_from_bytes(b"".join(compBones))
+        self._poolMatrices = None
+
+    def poolMatrices(self) -> np.ndarray:
+        """The decompressed bone pool, (N, 4, 4) offsets relative to the parent bone."""
+        if self._poolMatrices is None:
+            self._poolMatrices = g2_math.decompress_bones(self.compBones)
+        return self._poolMatrices
+
+    def offsets(self, skeleton: MdxaSkel, first: int = 0, count: int = -1) -> np.ndarray:
+        """Absolute bone offsets (count, bones, 4, 4) of the frames first .. first + count - 1."""
+        frames = self.frames[first:] if count == -1 else self.frames[first:first + count]
+        return g2_math.fk_offsets(
+            self.poolMatrices(), frames, skeleton.parents, skeleton.hierarchyOrder()
+        )
+
+    def saveToFile(self, file: BinaryIO, header: MdxaHeader):
+        assert file.tell() == header.ofsFrames
+        # only the first 3 bytes of each packed index
+        packed = self.frames.astype("<u4").view(np.uint8).reshape(self.frames.shape + (4,))
+        file.write(packed[..., :3].tobytes())
+        # add padding if not 32 bit aligned (due to 3-byte-indices)
+        if file.tell() % 4 != 0:
+            file.write(b"\0" * (4 - (file.tell() % 4)))
+        assert file.tell() == header.ofsCompBonePool
+        file.write(self.compBones.astype("<u2").tobytes())
+
+
+class GLA:
+    # the Blender layer (SoF2G2GLA) substitutes its subclasses
+    skeletonType = MdxaSkel
+    animationType = MdxaAnimation
+
+    def __init__(self):
+        # whether this is the automatic default skeleton
+        self.isDefault = False  # TODO replace with `skeleton_object is None`
+        self.header = MdxaHeader()
+        self.boneOffsets = MdxaBoneOffsets()
+        self.skeleton = self.skeletonType()
+        self.boneIndexByName: Dict[str, int] = {}
+        # boneNameByIndex = {} #just use bones[index].name
+        self.animation = self.animationType()
+
+    def loadFromFile(
+        self,
+        filepath_abs: str,
+        loadAnimation: AnimationLoadMode,
+        startFrame: int,
+        numFrames: int,
+        data_frames_file: dict,
+    ) -> Tuple[bool, ErrorMessage]:
+        if log_level == "DEBUG":
+            print("Loading {}...".format(filepath_abs))
+        try:
+            # loose file or pk3 entry (virtual path)
+            file: BinaryIO = vfs.open_file(filepath_abs)
+        except IOError:
+            print("Could not open file: {}".format(filepath_abs))
+            return False, ErrorMessage("Could not open file!")
+        with file:
+            return self._loadFromFile(file, loadAnimation, startFrame, numFrames, data_frames_file)
+
+    def _loadFromFile(
+        self,
+        file: BinaryIO,
+        loadAnimation: AnimationLoadMode,
+        startFrame: int,
+        numFrames: int,
+        data_frames_file: dict,
+    ) -> Tuple[bool, ErrorMessage]:
+        profiler = MrwProfiler.SimpleProfiler(True)
+        # load header
+        profiler.start("reading header")
+        success, message = self.header.loadFromFile(file)
+        if not success:
+            return False, message
+        profiler.stop("reading header")
+        # load offsets (directly after header, always)
+        profiler.start("reading bone hierarchy")
+        self.boneOffsets.loadFromFile(file, self.header.numBones)
+        # load bones
+        self.skeleton.loadFromFile(file, self.boneOffsets)
+        # build lookup map
+        for bone in self.skeleton.bones:
+            self.boneIndexByName[bone.name] = bone.index
+        profiler.stop("reading bone hierarchy")
+        if loadAnimation != AnimationLoadMode.NONE:
+            profiler.start("reading animations")
+            if loadAnimation == AnimationLoadMode.ALL:
+                success, message = self.animation.loadFromFile(file, self.header, 0, -1, data_frames_file)
+            else:
+                assert loadAnimation == AnimationLoadMode.RANGE
+                success, message = self.animation.loadFromFile(
+                    file, self.header, startFrame, numFrames, data_frames_file
+                )
+            if not success:
+                return False, message
+            profiler.stop("reading animations")
+        return True, NoError
+
+    def saveToFile(self, filepath_abs: str) -> Tuple[bool, ErrorMessage]:
+        try:
+            file = open(filepath_abs, mode="wb")
+        except IOError:
+            print("Could not open file: ", filepath_abs, sep="")
+            return False, ErrorMessage("Could not open file!")
+        with file:
+            self.header.saveToFile(file)
+            self.boneOffsets.saveToFile(file)
+            self.skeleton.saveToFile(file, self.header)
+            self.animation.saveToFile(file, self.header)
+            assert file.tell() == self.header.ofsEnd
+        return True, NoError
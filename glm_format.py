@@ -0,0 +1,704 @@
+# glm_format.py
+"""
+GLM (Ghoul 2 mesh) reader and writer without Blender. A surface's vertices are NumPy arrays
+(co, normals, uvs, per-vertex bone slots and weights), decoded from and packed to the file in one
+go. SoF2G2GLM extends these classes with the Blender import/export.
+"""
+import os
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import SoF2Stringhelper
+from . import SoF2Filesystem
+from . import SoF2G2Constants
+from . import MrwProfiler
+from . import gla_format
+from . import vfs
+from .casts import unpack_cast
+from .error_types import ErrorMessage, NoError
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+BoneIndexMap = Dict[str, int]
+
+# vertex as stored in a surface; the UVs follow in a separate block
+VERTEX_DTYPE = np.dtype(
+    [("normal", "<f4", 3), ("co", "<f4", 3), ("packed", "<u4"), ("weights", "u1", 4)]
+)
+
+
+def buildBoneIndexLookupMap(
+    gla_filepath_abs: str,
+) -> Tuple[Optional[BoneIndexMap], ErrorMessage]:
+    print("Loading gla file for bone name -> bone index lookup")
+    # open file
+    try:
+        file = vfs.open_file(gla_filepath_abs)
+    except IOError:
+        print("Could not open ", gla_filepath_abs, sep="")
+        return None, ErrorMessage("Could not open gla file for bone index lookup!")
+    with file:
+        # read header
+        header = gla_format.MdxaHeader()
+        success, message = header.loadFromFile(file)
+        if not success:
+            return None, message
+        # read offsets
+        boneOffsets = gla_format.MdxaBoneOffsets()
+        # cannot fail (except with exception)
+        boneOffsets.loadFromFile(file, header.numBones)
+        # read skeleton
+        skeleton = gla_format.MdxaSkel()
+        skeleton.loadFromFile(file, boneOffsets)
+    # build lookup map
+    boneIndices: Dict[str, int] = {}
+    for bone in skeleton.bones:
+        boneIndices[bone.name] = bone.index
+    return boneIndices, NoError
+
+
+class MdxmHeader:
+    def __init__(self):
+        self.name = ""
+        self.animName = b""
+        self.numBones: int = -1
+        self.numLODs: int = -1
+        self.ofsLODs: int = -1
+        self.numSurfaces: int = -1
+        self.ofsSurfHierarchy: int = -1
+        self.ofsEnd: int = -1
+
+    def loadFromFile(self, file: BinaryIO) -> Tuple[bool, ErrorMessage]:
+        # ident check
+        (ident,) = unpack_cast(Tuple[bytes], struct.unpack("4s", file.read(4)))
+        if ident != SoF2G2Constants.GLM_IDENT:
+            print(
+                "File does not start with ",
+                SoF2G2Constants.GLM_IDENT,
+                " but ",
+                ident,
+                " - no GLM!",
+            )
+            return False, ErrorMessage("Is no GLM file!")
+        # version check
+        (version,) = unpack_cast(Tuple[int], struct.unpack("i", file.read(4)))
+        if version != SoF2G2Constants.GLM_VERSION:
+            return False, ErrorMessage(
+                f"Wrong glm file version! ({version} should be {SoF2G2Constants.GLM_VERSION})"
+            )
+        # read data
+        self.name, self.animName = unpack_cast(
+            Tuple[bytes, bytes],
+            struct.unpack("64s64s", file.read(SoF2G2Constants.MAX_QPATH * 2)),
+        )
+        # 4x is 4 ignored bytes - the animIndex which is only used ingame
+        (
+            self.numBones,
+            self.numLODs,
+            self.ofsLODs,
+            self.numSurfaces,
+            self.ofsSurfHierarchy,
+            self.ofsEnd,
+        ) = unpack_cast(
+            Tuple[int, int, int, int, int, int], struct.unpack("4x6i", file.read(4 * 7))
+        )
+        return True, NoError
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        # 0 is animIndex, only used ingame
+        file.write(
+            struct.pack(
+                "4si64s64s7i",
+                SoF2G2Constants.GLM_IDENT,
+                SoF2G2Constants.GLM_VERSION,
+                self.name,
+                self.animName,
+                0,
+                self.numBones,
+                self.numLODs,
+                self.ofsLODs,
+                self.numSurfaces,
+                self.ofsSurfHierarchy,
+                self.ofsEnd,
+            )
+        )
+
+    def print(self) -> None:
+        print(
+            "== GLM Header ==\nname: {self.name}\nanimName: {self.animName}\nnumBones: {self.numBones}\nnumLODs: {self.numLODs}\nnumSurfaces: {self.numSurfaces}".format(
+                self=self
+            )
+        )
+
+    @staticmethod
+    def getSize() -> int:
+        # 2 ints, 2 string, 7 ints
+        return 2 * 4 + 2 * 64 + 7 * 4
+
+
+# offsets of the surface data
+class MdxmSurfaceDataOffsets:
+    def __init__(self):
+        self.baseOffset = MdxmHeader.getSize()  # always directly after the header
+        self.offsets: List[int] = []
+
+    def loadFromFile(self, file: BinaryIO, numSurfaces: int) -> None:
+        assert self.baseOffset == file.tell()
+        self.offsets.extend(struct.unpack(f"{numSurfaces}i", file.read(4 * numSurfaces)))
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        for offset in self.offsets:
+            file.write(struct.pack("i", offset))
+
+    def calculateOffsets(
+        self, surfaceDataCollection: "MdxmSurfaceDataCollection"
+    ) -> None:
+        offset = 4 * len(surfaceDataCollection.surfaces)
+        for surfaceData in surfaceDataCollection.surfaces:
+            self.offsets.append(offset)
+            offset += surfaceData.getSize()
+
+    # returns the size of this in bytes (when written to file)
+    def getSize(self) -> int:
+        return 4 * len(self.offsets)
+
+
+# originally called mdxmSurfaceHierarchy_t, I think that name is misleading (but mine's not too good, either)
+class MdxmSurfaceData:
+    def __init__(self):
+        self.name = b""
+        self.flags = -1
+        self.shader = b""
+        self.parentIndex = -1
+        self.numChildren = -1
+        self.children: List[int] = []
+        self.index = -1  # filled by MdxmSurfaceHierarchy.loadFromFile, not saved
+
+    def loadFromFile(self, file: BinaryIO, g2skin_defintion: dict) -> None:
+        self.name, self.flags, self.shader = unpack_cast(
+            Tuple[bytes, int, bytes], struct.unpack("64sI64s", file.read(64 + 4 + 64))
+        )
+        # print("name: " + self.name.decode() + ", flags: " + str(self.flags) )
+
+        if g2skin_defintion is not None:
+            all_off_flag_surface_names = list(
+                g2skin_defintion.get("prefs", {}).get("surfaces_off", {}).values()
+            )
+            all_on_flag_surface_names = list(
+                g2skin_defintion.get("prefs", {}).get("surfaces_on", {}).values()
+            )
+            raw_name = self.name.decode()
+            clean_name = raw_name.split("\x00", 1)[0]
+            if clean_name is not None and clean_name in all_on_flag_surface_names:
+                self.flags = 0
+            elif clean_name is not None and clean_name in all_off_flag_surface_names:
+                self.flags |= SoF2G2Constants.SURFACEFLAG_OFF
+
+        # ignoring shaderIndex which is only used ingame
+        self.parentIndex, self.numChildren = unpack_cast(
+            Tuple[int, int], struct.unpack("4x2i", file.read(3 * 4))
+        )
+        self.children.extend(struct.unpack(f"{self.numChildren}i", file.read(4 * self.numChildren)))
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        # 0 is the shader index, only used ingame
+        file.write(
+            struct.pack(
+                "64sI64s3i",
+                self.name,
+                self.flags,
+                self.shader,
+                0,
+                self.parentIndex,
+                self.numChildren,
+            )
+        )
+        for i in range(self.numChildren):
+            file.write(struct.pack("i", self.children[i]))
+
+    def getSize(self) -> int:
+        # string, int, string, 4 ints
+        return 64 + 4 + 64 + 3 * 4 + 4 * self.numChildren
+
+
+# all the surface hierarchy/shader/name/flag/... information entries (MdxmSurfaceInfo)
+class MdxmSurfaceDataCollection:
+    # the Blender layer (SoF2G2GLM) substitutes its subclass
+    surfaceDataType = MdxmSurfaceData
+
+    def __init__(self):
+        self.surfaces: List[MdxmSurfaceData] = []
+
+    def loadFromFile(
+        self,
+        file: BinaryIO,
+        surfaceInfoOffsets: MdxmSurfaceDataOffsets,
+        g2skin_defintion: dict,
+    ) -> None:
+        for i, offset in enumerate(surfaceInfoOffsets.offsets):
+            file.seek(surfaceInfoOffsets.baseOffset + offset)
+            surfaceInfo = self.surfaceDataType()
+            surfaceInfo.loadFromFile(file, g2skin_defintion)
+            surfaceInfo.index = i
+            self.surfaces.append(surfaceInfo)
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        for surfaceInfo in self.surfaces:
+            surfaceInfo.saveToFile(file)
+
+    def getSize(self) -> int:
+        size = 0
+        for surface in self.surfaces:
+            size += surface.getSize()
+        return size
+
+
+# one vertex while a surface is built vertex by vertex (export); MdxmSurface.setVertices packs them
+class MdxmVertex:
+    def __init__(self):
+        self.co: List[float] = []
+        self.normal: List[float] = []
+        self.uv: List[float] = []
+        self.numWeights = 1
+        self.weights: List[float] = []
+        self.boneIndices: List[int] = []
+
+
+def unpackWeights(packed: np.ndarray, lowBytes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (numWeights (N,), boneIndices (N, 4), weights (N, 4)) of the packed vertex fields; slots past
+    numWeights have bone 0 and weight 0, the last used weight is 1 - the others.
+    """
+    packed = packed.astype(np.uint32)
+    slots = np.arange(4, dtype=np.uint32)
+    # packedStuff bits 31 & 30: weight count
+    numWeights = (packed >> 30) + 1
+    used = slots < numWeights[:, None]
+    # packedStuff 0-19: bone indices, 5 bit each
+    boneIndices = ((packed[:, None] >> (5 * slots)) & 0b11111).astype(np.uint8)
+    boneIndices[~used] = 0
+    # packedStuff bits 20f, 22f, 24f, 26f: weight overflow (MSBs!)
+    recomposed = lowBytes.astype(np.uint32) | (((packed[:, None] >> (20 + 2 * slots)) & 0b11) << 8)
+    # convert to float (0..1023 -> 0.0..1.0)
+    weights = recomposed / 1023
+    last = slots == (numWeights[:, None] - 1)
+    weights[~used | last] = 0
+    # exactly one last slot per vertex
+    weights[last] = 1 - weights.sum(axis=1)
+    return numWeights.astype(np.uint8), boneIndices, weights.astype(np.float32)
+
+
+def packWeights(numWeights: np.ndarray, boneIndices: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of unpackWeights: (packed (N,) uint32, low weight bytes (N, 4) uint8)."""
+    slots = np.arange(4, dtype=np.uint32)
+    used = slots < numWeights.astype(np.uint32)[:, None]
+    # convert weight to 10 bit integer
+    intWeights = np.where(used, np.round(weights.astype(np.float64) * 1023), 0).astype(np.uint32)
+    packed = (numWeights.astype(np.uint32) - 1) << 30
+    # higher 2 bits of the weights, bone index - 5 bits
+    packed |= np.bitwise_or.reduce(((intWeights & 0x300) >> 8) << (20 + 2 * slots), axis=1)
+    packed |= np.bitwise_or.reduce(
+        np.where(used, boneIndices.astype(np.uint32) & 0b11111, 0) << (5 * slots), axis=1
+    )
+    # lower 8 bits
+    return packed, (intWeights & 0xFF).astype(np.uint8)
+
+
+class MdxmSurface:
+    def __init__(self):
+        self.index = -1
+        self.numVerts = -1
+        self.ofsVerts = -1
+        self.numTriangles = -1
+        self.ofsTriangles = -1
+        self.numBoneReferences = -1
+        self.ofsBoneReferences = -1
+        self.ofsEnd = -1  # = size
+        self.co = np.zeros((0, 3), dtype=np.float32)
+        self.normals = np.zeros((0, 3), dtype=np.float32)
+        # as in the file, V pointing down
+        self.uvs = np.zeros((0, 2), dtype=np.float32)
+        self.numWeights = np.zeros(0, dtype=np.uint8)
+        # per vertex up to 4 indices into boneReferences, and their weights (0 for unused slots)
+        self.boneIndices = np.zeros((0, 4), dtype=np.uint8)
+        self.weights = np.zeros((0, 4), dtype=np.float32)
+        # counter-clockwise, order gets reversed during load/save
+        self.triangles = np.zeros((0, 3), dtype=np.int32)
+        # integers: bone indices. maximum of 32, thus can be stored in 5 bit in vertices, saves space.
+        self.boneReferences: List[int] = []
+
+    def loadFromFile(self, file) -> None:
+        startPos = file.tell()
+        #  load surface header
+        # in the beginning I ignore the ident, which is usually 0 and shouldn't matter
+        (
+            self.index,
+            ofsHeader,
+            self.numVerts,
+            self.ofsVerts,
+            self.numTriangles,
+            self.ofsTriangles,
+            self.numBoneReferences,
+            self.ofsBoneReferences,
+            self.ofsEnd,
+        ) = unpack_cast(
+            Tuple[int, int, int, int, int, int, int, int, int],
+            struct.unpack("4x9i", file.read(10 * 4)),
+        )
+        assert ofsHeader == -startPos
+
+        #  load vertices
+        file.seek(startPos + self.ofsVerts)
+        verts = np.frombuffer(file.read(VERTEX_DTYPE.itemsize * self.numVerts), dtype=VERTEX_DTYPE)
+        self.co = verts["co"].astype(np.float32)
+        self.normals = verts["normal"].astype(np.float32)
+        self.numWeights, self.boneIndices, self.weights = unpackWeights(verts["packed"], verts["weights"])
+        # uv textures come later
+        self.uvs = np.frombuffer(file.read(2 * 4 * self.numVerts), dtype="<f4").reshape(-1, 2).astype(np.float32)
+
+        #  load triangles
+        file.seek(startPos + self.ofsTriangles)
+        triangles = np.frombuffer(file.read(3 * 4 * self.numTriangles), dtype="<i4").reshape(-1, 3)
+        # flip CW/CCW
+        triangles = triangles[:, ::-1].astype(np.int32)
+        # make sure last index is not 0, eeekadoodle or something...
+        eek = triangles[:, 2] == 0
+        triangles[eek] = triangles[eek][:, [2, 0, 1]]
+        self.triangles = triangles
+
+        #  load bone references
+        file.seek(startPos + self.ofsBoneReferences)
+        assert len(self.boneReferences) == 0
+        self.boneReferences.extend(
+            struct.unpack(
+                str(self.numBoneReferences) + "i", file.read(4 * self.numBoneReferences)
+            )
+        )
+
+        if file.tell() != startPos + self.ofsEnd:
+            print(
+                "Warning: Surface structure unordered (bone references not last) or read error"
+            )
+            file.seek(startPos + self.ofsEnd)
+
+    def setVertices(self, vertices: List[MdxmVertex]) -> None:
+        """Fill the vertex arrays from vertices built one by one (e.g. from a Blender mesh)."""
+        count = len(vertices)
+        self.co = np.array([v.co for v in vertices], dtype=np.float32).reshape(count, 3)
+        self.normals = np.array([v.normal for v in vertices], dtype=np.float32).reshape(count, 3)
+        self.uvs = np.array([v.uv for v in vertices], dtype=np.float32).reshape(count, 2)
+        self.numWeights = np.array([v.numWeights for v in vertices], dtype=np.uint8)
+        self.boneIndices = np.zeros((count, 4), dtype=np.uint8)
+        self.weights = np.zeros((count, 4), dtype=np.float32)
+        for i, v in enumerate(vertices):
+            assert len(v.weights) == v.numWeights
+            self.boneIndices[i, : v.numWeights] = v.boneIndices
+            self.weights[i, : v.numWeights] = v.weights
+
+    def setTriangles(self, triangles: List[List[int]]) -> None:
+        self.triangles = np.array(triangles, dtype=np.int32).reshape(-1, 3)
+
+    def skeletonBoneIndices(self) -> np.ndarray:
+        """boneIndices mapped through boneReferences: GLA bone index per vertex and slot."""
+        if not self.boneReferences:
+            return np.zeros_like(self.boneIndices, dtype=np.int32)
+        return np.asarray(self.boneReferences, dtype=np.int32)[self.boneIndices]
+
+    # if a surface does not exist on a lower LOD, an empty one gets created
+    def makeEmpty(self):
+        self.numVerts = 0
+        self.numTriangles = 0
+        self.numBoneReferences = 0
+        self._calculateOffsets()
+
+    def saveToFile(self, file):
+        startPos = file.tell()
+        #  write header (= this)
+        # 0 = ident
+        file.write(
+            struct.pack(
+                "10i",
+                0,
+                self.index,
+                -startPos,
+                self.numVerts,
+                self.ofsVerts,
+                self.numTriangles,
+                self.ofsTriangles,
+                self.numBoneReferences,
+                self.ofsBoneReferences,
+                self.ofsEnd,
+            )
+        )
+
+        # I don't know if triangles *have* to come first, but when I export they do, hence the assertions.
+
+        #  write triangles
+        assert file.tell() == startPos + self.ofsTriangles
+        # triangles are flipped because otherwise they'd face the wrong way.
+        file.write(self.triangles[:, ::-1].astype("<i4").tobytes())
+
+        #  write vertices
+        assert file.tell() == startPos + self.ofsVerts
+        # write packed part
+        verts = np.zeros(len(self.co), dtype=VERTEX_DTYPE)
+        verts["normal"] = self.normals
+        verts["co"] = self.co
+        verts["packed"], verts["weights"] = packWeights(self.numWeights, self.boneIndices, self.weights)
+        file.write(verts.tobytes())
+        # write UVs
+        file.write(self.uvs.astype("<f4").tobytes())
+
+        #  write bone indices
+        assert file.tell() == startPos + self.ofsBoneReferences
+        for ref in self.boneReferences:
+            file.write(struct.pack("i", ref))
+
+        assert file.tell() == startPos + self.ofsEnd
+
+    # fill offset and number variables
+    def _calculateOffsets(self):
+        offset = 10 * 4  # header: 4 ints
+        # triangles
+        self.ofsTriangles = offset
+        self.numTriangles = len(self.triangles)
+        offset += 3 * 4 * self.numTriangles  # 3 ints
+        # vertices
+        self.ofsVerts = offset
+        self.numVerts = len(self.co)
+        offset += (
+            10 * 4 * self.numVerts
+        )  # 6 floats co/normal, 8 bytes packed, 2 floats UV
+        # bone references
+        self.ofsBoneReferences = offset
+        self.numBoneReferences = len(self.boneReferences)
+        offset += 4 * self.numBoneReferences  # 1 int each
+        # that's all the content, so we've got total size now.
+        self.ofsEnd = offset
+
+
+class MdxmLOD:
+    # the Blender layer (SoF2G2GLM) substitutes its subclass
+    surfaceType = MdxmSurface
+
+    def __init__(
+        self,
+        surfaceOffsets: List[int],
+        level: int,
+        surfaces: List[MdxmSurface],
+        ofsEnd: int,
+    ):
+        self.surfaceOffsets = surfaceOffsets
+        self.level = level
+        self.surfaces = surfaces
+        self.ofsEnd = ofsEnd  # = size
+
+    @classmethod
+    def loadFromFile(cls, file: BinaryIO, level: int, header: MdxmHeader) -> "MdxmLOD":
+        startPos = file.tell()
+        (ofsEnd,) = unpack_cast(Tuple[int], struct.unpack("i", file.read(4)))
+        # surface offsets - they're relative to a structure after the one containing ofsEnd, so I need to add sizeof(int) to them later.
+        surfaceOffsets = unpack_cast(
+            List[int],
+            list(
+                struct.unpack(
+                    f"{header.numSurfaces}i", file.read(4 * header.numSurfaces)
+                )
+            ),
+        )
+        surfaces: List[MdxmSurface] = []
+        for surfaceIndex, offset in enumerate(surfaceOffsets):
+            if file.tell() != startPos + 4 + offset:
+                print("Warning: Surface not completely read or unordered")
+                file.seek(startPos + offset + 4)
+            surface = cls.surfaceType()
+            surface.loadFromFile(file)
+            assert surface.index == surfaceIndex
+            surfaces.append(surface)
+        assert file.tell() == startPos + ofsEnd
+        return cls(
+            surfaceOffsets=surfaceOffsets,
+            level=level,
+            surfaces=surfaces,
+            ofsEnd=ofsEnd,
+        )
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        startPos = file.tell()
+        # write ofsEnd
+        file.write(struct.pack("i", self.ofsEnd))
+        # write surface offsets
+        for offset in self.surfaceOffsets:
+            file.write(struct.pack("i", offset))
+        # write surfaces
+        for surface in self.surfaces:
+            surface.saveToFile(file)
+        # that's it, should've reached end.
+        assert file.tell() == startPos + self.ofsEnd
+
+    # fills self.surfaceOffsets and self.ofsEnd based on self.surfaces (must be initialized)
+    def calculateOffsets(self, myOffset):
+        self.surfaceOffsets = []
+        # ofsEnd is in front of offsets, but they are relative to their start
+        offset = 4 * len(self.surfaces)
+        for surface in self.surfaces:
+            self.surfaceOffsets.append(offset)
+            offset += surface.ofsEnd  # = size
+        # memory required for ofsEnd
+        self.ofsEnd = offset + 4
+
+    def getSize(self):
+        # ofsEnd + surface offsets
+        size = 4 + 4 * len(self.surfaces)
+        for surface in self.surfaces:
+            size += surface.ofsEnd
+        return size
+
+
+class MdxmLODCollection:
+    # the Blender layer (SoF2G2GLM) substitutes its subclass
+    lodType = MdxmLOD
+
+    def __init__(self):
+        self.LODs: List[MdxmLOD] = []
+
+    def loadFromFile(self, file: BinaryIO, header: MdxmHeader) -> None:
+        for i in range(header.numLODs):
+            if i > 0:
+                break  # TODO: support multiple LODs later- ANATOLI
+            startPos = file.tell()
+            curLOD = self.lodType.loadFromFile(file, i, header)
+            if file.tell() != startPos + curLOD.ofsEnd:
+                print("Warning: Internal reading error or LODs not tightly packed!")
+                file.seek(startPos + curLOD.ofsEnd)
+            self.LODs.append(curLOD)
+
+    def calculateOffsets(self, ofsLODs):
+        offset = ofsLODs
+        for lod in self.LODs:
+            lod.calculateOffsets(offset)
+            offset += lod.getSize()
+
+    def saveToFile(self, file: BinaryIO) -> None:
+        for LOD in self.LODs:
+            LOD.saveToFile(file)
+
+    def getSize(self):
+        size = 0
+        for LOD in self.LODs:
+            size += LOD.ofsEnd
+        return size
+
+
+class GLM:
+    # the Blender layer (SoF2G2GLM) substitutes its subclasses
+    surfaceDataCollectionType = MdxmSurfaceDataCollection
+    lodCollectionType = MdxmLODCollection
+
+    def __init__(self):
+        self.header = MdxmHeader()
+        self.surfaceDataOffsets = MdxmSurfaceDataOffsets()
+        self.surfaceDataCollection = self.surfaceDataCollectionType()
+        self.LODCollection = self.lodCollectionType()
+
+    def loadFromFile(
+        self, filepath_abs: str, g2skin_defintion: dict
+    ) -> Tuple[bool, ErrorMessage]:
+        file, message = self.loadHeaderFromFile(filepath_abs)
+        if file is None:
+            return False, message
+        return self.loadSurfacesFromFile(file, g2skin_defintion)
+
+    # opens the file and reads only the header - enough for getRequestedGLA; the rest is read by
+    # loadSurfacesFromFile (possibly on another thread, see Scene.startLoadFromGLM)
+    def loadHeaderFromFile(self, filepath_abs: str) -> Tuple[Optional[BinaryIO], ErrorMessage]:
+        print(f"Loading {filepath_abs}...")
+        profiler = MrwProfiler.SimpleProfiler(True)
+        # open file
+        try:
+            # loose file or pk3 entry (virtual path)
+            file = vfs.open_file(filepath_abs)
+        except IOError as e:
+            print(f"Could not open file: {filepath_abs}")
+            return None, ErrorMessage(f"Could not open file: {e}")
+        profiler.start("reading header")
+        success, message = self.header.loadFromFile(file)
+        if not success:
+            file.close()
+            return None, message
+        profiler.stop("reading header")
+        if log_level == "DEBUG":
+            self.header.print()
+        return file, NoError
+
+    def loadSurfacesFromFile(
+        self, file: BinaryIO, g2skin_defintion: dict
+    ) -> Tuple[bool, ErrorMessage]:
+        profiler = MrwProfiler.SimpleProfiler(True)
+        with file:
+            # load surface hierarchy offsets
+            profiler.start("reading surface hierarchy")
+            self.surfaceDataOffsets.loadFromFile(file, self.header.numSurfaces)
+
+            # load surfaces' information - seeks positon using surfaceDataOffsets
+            self.surfaceDataCollection.loadFromFile(
+                file, self.surfaceDataOffsets, g2skin_defintion
+            )
+            print(f"Loaded {len(self.surfaceDataCollection.surfaces)} surfaces")
+            profiler.stop("reading surface hierarchy")
+
+            # load LODs
+            profiler.start("reading surfaces")
+            file.seek(self.header.ofsLODs)
+            print(f"Loading {self.header.numLODs} LODs...")
+            self.LODCollection.loadFromFile(file, self.header)
+            profiler.stop("reading surfaces")
+
+            # should be at the end now, if the structures are in the expected order.
+            if file.tell() != self.header.ofsEnd:
+                print(
+                    "Warning: File not completely read or LODs not last structure in file. The former would be a problem, the latter wouldn't."
+                )
+        return True, NoError
+
+    def saveToFile(self, filepath_abs: str) -> Tuple[bool, ErrorMessage]:
+        if SoF2Filesystem.FileExists(filepath_abs):
+            print("Warning: File exists! Overwriting.")
+        # open file
+        try:
+            file = open(filepath_abs, "wb")
+        except IOError:
+            print("Failed to open file for writing: ", filepath_abs, sep="")
+            return False, ErrorMessage("Could not open file!")
+        with file:
+            # save header
+            self.header.saveToFile(file)
+            # save surface data offsets
+            self.surfaceDataOffsets.saveToFile(file)
+            # save surface ("hierarchy") data
+            self.surfaceDataCollection.saveToFile(file)
+            # save LODs to file
+            self.LODCollection.saveToFile(file)
+        return True, NoError
+
+    # calculates the offsets & counts saved in the header based on the rest
+    def _calculateHeaderOffsets(self):
+        # offset of "after header"
+        baseOffset = MdxmHeader.getSize()
+        # offset of "after hierarchy offset list"
+        self.header.numSurfaces = len(self.surfaceDataOffsets.offsets)
+        baseOffset += 4 * self.header.numSurfaces
+        # first "hierarchy" entry comes here
+        self.header.ofsSurfHierarchy = baseOffset
+        baseOffset += self.surfaceDataCollection.getSize()
+        # first LOD comes here
+        self.header.ofsLODs = baseOffset
+        baseOffset += self.LODCollection.getSize()
+        # that's everything, we've reached the end.
+        self.header.ofsEnd = baseOffset
+
+    def getRequestedGLA(self) -> str:
+        # todo
+        return SoF2Stringhelper.decode(self.header.animName)
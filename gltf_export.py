@@ -0,0 +1,533 @@
+# gltf_export.py
+"""
+GLM + GLA -> glTF 2.0 binary (.glb) without Blender, for Unity.
+
+    python -m <addon folder>.gltf_export --base C:/SoF2/base --glm models/characters/snow/snow.glm --skin snow1 --out D:/glb/snow.glb
+
+Writes the decoded GLM surfaces (LOD 0) as skinned meshes (JOINTS_0 / WEIGHTS_0), the GLA skeleton
+as joint nodes and every .frames clip as one animation with sampled translation / rotation per
+bone. Materials come from the skin / shader textures. All buffers are built from the NumPy arrays
+of glm_format / gla_format; scale (default UNITY_SCALE) and the Z up -> Y up change are baked into
+the data, so the file needs no root transform.
+
+Like the Blender import, bones get Blender's bone axes (g2_math.gla_to_blender_rot) and the root bone
+is pinned to its rest position (in-place clips). Tags and surfaces switched off by the skin are left out.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import SoF2Filesystem
+from . import SoF2G2Constants
+from . import SoF2G2DataCache
+from . import SoF2Stringhelper
+from . import frames_parser
+from . import g2_math
+from . import gla_format
+from . import glm_format
+from . import parse_cache
+from . import texture_cache
+from . import vfs
+from .error_types import ErrorMessage, NoError
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+_GLB_MAGIC = b"glTF"
+_GLB_VERSION = 2
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+
+# accessor component types / buffer view targets
+_COMPONENT_TYPES = {
+    np.dtype(np.float32): 5126,
+    np.dtype(np.uint8): 5121,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+}
+_ACCESSOR_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4", 16: "MAT4"}
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+
+# SoF2 is Z up, glTF Y up: (x, y, z) -> (x, z, -y), like Blender's glTF exporter
+Z_UP_TO_Y_UP = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, -1.0, 0.0]])
+
+# clips of a GLA without .frames file
+DEFAULT_FPS = 20
+
+_MIME_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+_TEXTURE_EXTENSIONS = ["jpg", "png", "tga", "dds"]
+
+
+class GlbBuilder:
+    """The JSON document and the binary chunk of a .glb; every array gets its own buffer view."""
+
+    def __init__(self):
+        self.gltf: Dict[str, Any] = {
+            "asset": {"version": "2.0", "generator": "SoF2 gltf_export"},
+            "scene": 0,
+            "scenes": [],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "textures": [],
+            "images": [],
+            "samplers": [],
+            "skins": [],
+            "animations": [],
+            "accessors": [],
+            "bufferViews": [],
+        }
+        self.chunks: List[bytes] = []
+        self.length = 0
+
+    def add(self, kind: str, item: Dict[str, Any]) -> int:
+        self.gltf[kind].append(item)
+        return len(self.gltf[kind]) - 1
+
+    def addBufferView(self, data: bytes, target: Optional[int] = None) -> int:
+        # accessors need their data aligned to the component size, 4 covers all of them
+        padding = (-self.length) % 4
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.length += padding
+        view: Dict[str, Any] = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.chunks.append(data)
+        self.length += len(data)
+        return self.add("bufferViews", view)
+
+    def addAccessor(self, array: np.ndarray, target: Optional[int] = None, bounds: bool = False) -> int:
+        """array is (count,) or (count, n); MAT4 as (count, 4, 4) in glTF's column-major order."""
+        count = array.shape[0]
+        width = int(np.prod(array.shape[1:], dtype=np.int64)) if array.ndim > 1 else 1
+        flat = np.ascontiguousarray(array).reshape(count, width)
+        accessor: Dict[str, Any] = {
+            "bufferView": self.addBufferView(flat.astype(flat.dtype.newbyteorder("<")).tobytes(), target),
+            "componentType": _COMPONENT_TYPES[array.dtype],
+            "count": count,
+            "type": _ACCESSOR_TYPES[width],
+        }
+        if bounds:
+            accessor["min"] = flat.min(axis=0).tolist()
+            accessor["max"] = flat.max(axis=0).tolist()
+        return self.add("accessors", accessor)
+
+    def save(self, filepath_abs: str) -> None:
+        # glTF validators reject empty top-level arrays
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        if self.length:
+            gltf["buffers"] = [{"byteLength": self.length + (-self.length) % 4}]
+        document = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        document += b" " * ((-len(document)) % 4)
+        binary = b"".join(self.chunks)
+        binary += b"\0" * ((-len(binary)) % 4)
+        total = 12 + 8 + len(document) + (8 + len(binary) if binary else 0)
+        os.makedirs(os.path.dirname(os.path.abspath(filepath_abs)), exist_ok=True)
+        with open(filepath_abs, "wb") as file:
+            file.write(struct.pack("<4sII", _GLB_MAGIC, _GLB_VERSION, total))
+            file.write(struct.pack("<II", len(document), _CHUNK_JSON))
+            file.write(document)
+            if binary:
+                file.write(struct.pack("<II", len(binary), _CHUNK_BIN))
+                file.write(binary)
+
+
+def _localMatrices(worlds: np.ndarray, parents: List[int]) -> np.ndarray:
+    """(..., bones, 4, 4) absolute matrices -> relative to the parent bone."""
+    local = worlds.copy()
+    children = [index for index, parent in enumerate(parents) if parent != -1]
+    if children:
+        parentIndices = [parents[index] for index in children]
+        local[..., children, :, :] = np.linalg.inv(worlds[..., parentIndices, :, :]) @ worlds[..., children, :, :]
+    return local
+
+
+def _continuousQuats(quats: np.ndarray) -> np.ndarray:
+    """(frames, ..., 4): flip signs so neighbouring keys interpolate the short way."""
+    if len(quats) < 2:
+        return quats
+    dots = np.sum(quats[1:] * quats[:-1], axis=-1)
+    signs = np.cumprod(np.where(dots < 0, -1.0, 1.0), axis=0)
+    quats = quats.copy()
+    quats[1:] *= signs[..., None]
+    return quats
+
+
+def _skinMapping(skin_data: Optional[dict]) -> Dict[str, str]:
+    """Surface shader -> texture/shader of the skin (first texture1 / shader1, like MaterialManager.init)."""
+    mapping: Dict[str, str] = {}
+    for mat in (skin_data or {}).get("materials", []):
+        mat_name = mat.get("name")
+        if not mat_name:
+            continue
+        for grp in mat.get("groups", []):
+            if "texture1" in grp:
+                mapping[mat_name] = grp["texture1"].strip('"')
+                break
+            elif "shader1" in grp:
+                mapping[mat_name] = grp["shader1"].strip('"')
+                break
+    return mapping
+
+
+class _Materials:
+    """glTF materials of the surface shaders, with the base texture embedded as PNG/JPEG."""
+
+    def __init__(self, builder: GlbBuilder, basepath: str, skin_data: Optional[dict], shader_data: Optional[dict]):
+        self.builder = builder
+        self.basepath = basepath
+        self.skin = _skinMapping(skin_data)
+        self.shader_data = shader_data or {}
+        # shader (lowercase) -> material index, None for no material
+        self.materials: Dict[str, Optional[int]] = {}
+        # texture path -> texture index, None if it can't be embedded
+        self.textures: Dict[str, Optional[int]] = {}
+        self.converted: Dict[str, str] = {}
+
+    def _shader(self, bsShader: bytes) -> str:
+        shader = SoF2Stringhelper.decode(bsShader)
+        return self.skin.get(shader, shader)
+
+    def _texturePath(self, shader: str) -> Optional[str]:
+        shader_def = self.shader_data.get(shader.lower())
+        candidates = [shader_def.base_map] if shader_def is not None and shader_def.base_map else []
+        candidates.append(shader)
+        for candidate in candidates:
+            success, abs_path = SoF2Filesystem.FindFile(candidate, self.basepath, _TEXTURE_EXTENSIONS)
+            if success:
+                return abs_path
+        return None
+
+    def prepare(self, shaders: List[bytes]) -> None:
+        """Convert the TGA/DDS textures of all shaders in one go (texture_cache, process pool)."""
+        paths = []
+        for bsShader in shaders:
+            shader = self._shader(bsShader)
+            if not shader or shader.lower() in ["[nomaterial]", "*off"]:
+                continue
+            path = self._texturePath(shader)
+            if path is not None and os.path.splitext(path)[1].lower() not in _MIME_TYPES:
+                paths.append(path)
+        if paths:
+            self.converted = texture_cache.preprocess_textures(paths)
+
+    def _texture(self, abs_path: str) -> Optional[int]:
+        if abs_path in self.textures:
+            return self.textures[abs_path]
+        source = self.converted.get(abs_path, abs_path)
+        mimeType = _MIME_TYPES.get(os.path.splitext(source)[1].lower())
+        index = None
+        if mimeType is None:
+            print(f"Warning: texture {abs_path} could not be converted to PNG, left out")
+        else:
+            image = self.builder.add(
+                "images", {"bufferView": self.builder.addBufferView(vfs.read_bytes(source)), "mimeType": mimeType}
+            )
+            if not self.builder.gltf["samplers"]:
+                # linear, mipmapped, repeat
+                self.builder.add("samplers", {"magFilter": 9729, "minFilter": 9987})
+            index = self.builder.add("textures", {"sampler": 0, "source": image})
+        self.textures[abs_path] = index
+        return index
+
+    def get(self, bsShader: bytes) -> Optional[int]:
+        shader = self._shader(bsShader)
+        if not shader or shader.lower() in ["[nomaterial]", "*off"]:
+            return None
+        key = shader.lower()
+        if key in self.materials:
+            return self.materials[key]
+
+        pbr: Dict[str, Any] = {"metallicFactor": 0.0, "roughnessFactor": 1.0}
+        material: Dict[str, Any] = {"name": shader, "pbrMetallicRoughness": pbr}
+        path = self._texturePath(shader)
+        texture = self._texture(path) if path is not None else None
+        if texture is not None:
+            pbr["baseColorTexture"] = {"index": texture}
+        else:
+            print(f"Texture not found: {shader}")
+            pbr["baseColorFactor"] = [1.0, 0.0, 1.0, 1.0]  # pink fallback, like the Blender import
+
+        shader_def = self.shader_data.get(key)
+        if shader_def is not None:
+            if shader_def.two_sided:
+                material["doubleSided"] = True
+            stage = next((stage for stage in shader_def.stages if stage.is_texture), None)
+            if stage is not None and stage.alpha_func:
+                material["alphaMode"] = "MASK"
+                material["alphaCutoff"] = 0.5
+            elif stage is not None and stage.blend_func == ("GL_SRC_ALPHA", "GL_ONE_MINUS_SRC_ALPHA"):
+                material["alphaMode"] = "BLEND"
+
+        index = self.builder.add("materials", material)
+        self.materials[key] = index
+        return index
+
+
+class GltfExporter:
+    """Builds the .glb of one decoded GLM and its GLA (None or *default: static meshes)."""
+
+    def __init__(self, scale: float = SoF2G2Constants.UNITY_SCALE, pinRoot: bool = True):
+        # model space -> glTF space, (scale * rotation) with its inverse
+        self.axes = Z_UP_TO_Y_UP
+        self.convert = np.eye(4)
+        self.convert[:3, :3] = scale * Z_UP_TO_Y_UP
+        self.convertInv = np.linalg.inv(self.convert)
+        self.scale = scale
+        self.pinRoot = pinRoot
+        self.builder = GlbBuilder()
+        # bone index -> node index
+        self.jointNodes: List[int] = []
+        self.skin: Optional[int] = None
+
+    def _toGltf(self, matrices: np.ndarray) -> np.ndarray:
+        return self.convert @ matrices @ self.convertInv
+
+    def _boneWorlds(self, gla: gla_format.GLA, offsets: np.ndarray) -> np.ndarray:
+        """Absolute (frames, bones, 4, 4) bone matrices in glTF space, with Blender's bone axes."""
+        basePoses = gla.skeleton.basePoses()
+        worlds = g2_math.gla_to_blender_rot(offsets @ basePoses)
+        if self.pinRoot:
+            # pin the root bone at its rest position and shift all others by the same delta, as
+            # the Blender import does (FKContext.framePoses)
+            rootDelta = np.zeros(worlds.shape[:-3] + (3,))
+            for index in gla.skeleton.hierarchyOrder():
+                if gla.skeleton.bones[index].parent == -1:
+                    rootDelta = worlds[..., index, :3, 3] - basePoses[index, :3, 3]
+                worlds[..., index, :3, 3] -= rootDelta
+        return self._toGltf(worlds)
+
+    def addSkeleton(self, gla: gla_format.GLA) -> List[int]:
+        """Joint nodes in bone index order and the skin; returns the root joint nodes."""
+        bones = gla.skeleton.bones
+        parents = gla.skeleton.parents
+        # the rest pose is the bind pose: offsets are identity
+        rest = self._boneWorlds(gla, np.broadcast_to(np.eye(4), (len(bones), 4, 4)))
+        locs, rots = g2_math.decompose(_localMatrices(rest, parents))
+        first = len(self.builder.gltf["nodes"])
+        self.jointNodes = [first + bone.index for bone in bones]
+        for bone in bones:
+            node: Dict[str, Any] = {
+                "name": bone.name,
+                "translation": locs[bone.index].tolist(),
+                # glTF quaternions are x, y, z, w
+                "rotation": rots[bone.index][[1, 2, 3, 0]].tolist(),
+            }
+            children = [first + child for child in range(len(bones)) if parents[child] == bone.index]
+            if children:
+                node["children"] = children
+            self.builder.add("nodes", node)
+        inverseBind = np.linalg.inv(rest).transpose(0, 2, 1).astype(np.float32)
+        roots = [first + bone.index for bone in bones if bone.parent == -1]
+        self.skin = self.builder.add(
+            "skins",
+            {
+                "joints": self.jointNodes,
+                "inverseBindMatrices": self.builder.addAccessor(inverseBind),
+                "skeleton": roots[0],
+            },
+        )
+        return roots
+
+    def addSurface(self, surface: glm_format.MdxmSurface, name: str, material: Optional[int]) -> int:
+        """One mesh (single primitive) and its node; returns the node index."""
+        co = surface.co.astype(np.float64) @ self.convert[:3, :3].T
+        normals = surface.normals.astype(np.float64) @ self.axes.T
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        attributes = {
+            "POSITION": self.builder.addAccessor(co.astype(np.float32), _ARRAY_BUFFER, bounds=True),
+            "NORMAL": self.builder.addAccessor(normals.astype(np.float32), _ARRAY_BUFFER),
+            # the GLM's V already points down, like glTF's
+            "TEXCOORD_0": self.builder.addAccessor(surface.uvs.astype(np.float32), _ARRAY_BUFFER),
+        }
+        if self.skin is not None:
+            joints = surface.skeletonBoneIndices()
+            jointType = np.uint8 if len(self.jointNodes) <= 256 else np.uint16
+            weights = surface.weights.astype(np.float32)
+            # 10 bit weights don't add up to exactly 1
+            weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-8)
+            attributes["JOINTS_0"] = self.builder.addAccessor(joints.astype(jointType), _ARRAY_BUFFER)
+            attributes["WEIGHTS_0"] = self.builder.addAccessor(weights, _ARRAY_BUFFER)
+        indexType = np.uint16 if len(surface.co) < 65536 else np.uint32
+        primitive: Dict[str, Any] = {
+            "attributes": attributes,
+            "indices": self.builder.addAccessor(surface.triangles.ravel().astype(indexType), _ELEMENT_ARRAY_BUFFER),
+        }
+        if material is not None:
+            primitive["material"] = material
+        mesh = self.builder.add("meshes", {"name": name, "primitives": [primitive]})
+        node: Dict[str, Any] = {"name": name, "mesh": mesh}
+        if self.skin is not None:
+            node["skin"] = self.skin
+        return self.builder.add("nodes", node)
+
+    def addAnimations(self, gla: gla_format.GLA) -> int:
+        """One animation per clip (all loaded frames if there are none); returns the count."""
+        animation = gla.animation
+        clips = animation.animation_clips or [
+            {
+                "name": os.path.basename(gla.header.name) or "animation",
+                "start_frame": animation.firstFrame,
+                "duration": len(animation.frames),
+                "fps": DEFAULT_FPS,
+            }
+        ]
+        parents = gla.skeleton.parents
+        count = 0
+        for clip in clips:
+            # frames past the loaded ones are left out
+            first = clip["start_frame"] - animation.firstFrame
+            numFrames = min(clip["duration"], len(animation.frames) - first)
+            if first < 0 or numFrames <= 0:
+                continue
+            worlds = self._boneWorlds(gla, animation.offsets(gla.skeleton, first, numFrames))
+            locs, rots = g2_math.decompose(_localMatrices(worlds, parents))
+            rots = _continuousQuats(rots[..., [1, 2, 3, 0]])
+            times = (np.arange(numFrames) / (clip.get("fps") or DEFAULT_FPS)).astype(np.float32)
+            timesAccessor = self.builder.addAccessor(times, bounds=True)
+
+            samplers: List[Dict[str, Any]] = []
+            channels: List[Dict[str, Any]] = []
+            for bone in gla.skeleton.bones:
+                for path, values in (("translation", locs), ("rotation", rots)):
+                    output = self.builder.addAccessor(values[:, bone.index].astype(np.float32))
+                    channels.append({"sampler": len(samplers), "target": {"node": self.jointNodes[bone.index], "path": path}})
+                    samplers.append({"input": timesAccessor, "output": output, "interpolation": "LINEAR"})
+            self.builder.add("animations", {"name": clip["name"], "samplers": samplers, "channels": channels})
+            count += 1
+        return count
+
+
+def exportGLB(
+    glm: glm_format.GLM,
+    gla: Optional[gla_format.GLA],
+    filepath_abs: str,
+    basepath: str = "",
+    skin_data: Optional[dict] = None,
+    shader_data: Optional[dict] = None,
+    scale: float = SoF2G2Constants.UNITY_SCALE,
+    pinRoot: bool = True,
+) -> Tuple[bool, ErrorMessage]:
+    """Write decoded GLM (+ GLA) data as .glb; skin_data / shader_data as the NPC import uses them."""
+    startTime = time.time()
+    hasSkeleton = gla is not None and not gla.isDefault and len(gla.skeleton.bones) > 0
+    if hasSkeleton and gla.header.numBones != glm.header.numBones:
+        return False, ErrorMessage(
+            f"Bone number mismatch - gla has {gla.header.numBones} bones, model uses {glm.header.numBones}."
+        )
+    if not glm.LODCollection.LODs:
+        return False, ErrorMessage("GLM has no LODs")
+
+    exporter = GltfExporter(scale, pinRoot)
+    rootChildren = exporter.addSkeleton(gla) if hasSkeleton else []
+
+    surfaces = glm.LODCollection.LODs[0].surfaces
+    surfaceData = glm.surfaceDataCollection.surfaces
+    materials = _Materials(exporter.builder, basepath, skin_data, shader_data)
+    exported = [
+        surface
+        for surface in surfaces
+        if not surfaceData[surface.index].flags & (SoF2G2Constants.SURFACEFLAG_TAG | SoF2G2Constants.SURFACEFLAG_OFF)
+        and len(surface.triangles) > 0
+    ]
+    materials.prepare([surfaceData[surface.index].shader for surface in exported])
+    for surface in exported:
+        data = surfaceData[surface.index]
+        name = SoF2Stringhelper.decode(data.name)
+        material = materials.get(data.shader) if "stupidtriangle" not in name else None
+        rootChildren.append(exporter.addSurface(surface, name, material))
+
+    numClips = 0
+    if hasSkeleton and len(gla.animation.frames) > 0:
+        numClips = exporter.addAnimations(gla)
+
+    modelName = os.path.basename(SoF2Stringhelper.decode(glm.header.name)) or "model"
+    root = exporter.builder.add("nodes", {"name": modelName, "children": rootChildren})
+    exporter.builder.add("scenes", {"name": modelName, "nodes": [root]})
+    try:
+        exporter.builder.save(filepath_abs)
+    except IOError as e:
+        print(f"Failed to write {filepath_abs}")
+        return False, ErrorMessage(f"Could not write file: {e}")
+    print(
+        f"Wrote {filepath_abs}: {len(exported)} surfaces, {numClips} clips in {time.time() - startTime:.1f}s"
+    )
+    return True, NoError
+
+
+def convert(
+    basepath: str,
+    glm_filepath_rel: str,
+    filepath_abs: str,
+    skin: str = "",
+    loadAnimations: bool = True,
+    scale: float = SoF2G2Constants.UNITY_SCALE,
+) -> Tuple[bool, ErrorMessage]:
+    """Load a .glm of the base folder with its GLA, .frames, skin and shaders and write it as .glb."""
+    glm_filepath_rel = glm_filepath_rel.replace("\\", "/")
+    success, glm_filepath_abs = SoF2Filesystem.FindFile(glm_filepath_rel, basepath, ["glm"])
+    if not success:
+        return False, ErrorMessage(f".glm file {glm_filepath_rel} not found in basepath ({basepath})")
+
+    # skin (by .g2skin file name) and the model's .shader file
+    skin_data: dict = {}
+    if skin:
+        _, all_skins = SoF2G2DataCache.get_skins(basepath, glm_filepath_rel)
+        skin_data = next((value for name, value in all_skins.items() if skin in name), None) or {}
+        if not skin_data:
+            print(f"Warning: no .g2skin file matches '{skin}'")
+    _, shader_data = SoF2G2DataCache.get_shaders_data(basepath, glm_filepath_rel)
+
+    glm = glm_format.GLM()
+    success, message = glm.loadFromFile(glm_filepath_abs, skin_data)
+    if not success:
+        return False, message
+
+    gla: Optional[gla_format.GLA] = None
+    glafile = glm.getRequestedGLA()
+    if glafile and glafile != "*default":
+        # loose files or extracted from a .pk3, same lookup as the .glm import
+        data_frames_file = None
+        frames_path = vfs.resolve(basepath, glafile + "_mp.frames") or vfs.resolve(basepath, glafile + ".frames")
+        if loadAnimations and frames_path:
+            data_frames_file = parse_cache.parse_file(frames_path, frames_parser.parse_frames, errors="strict")
+        if vfs.resolve(basepath, glafile + "_mp.gla"):
+            glafile = glafile + "_mp"
+        success, gla_filepath_abs = SoF2Filesystem.FindFile(glafile, basepath, ["gla"])
+        if not success:
+            return False, ErrorMessage(f".gla file {glafile} not found in basepath ({basepath})")
+        gla = gla_format.GLA()
+        mode = gla_format.AnimationLoadMode.ALL if loadAnimations else gla_format.AnimationLoadMode.NONE
+        success, message = gla.loadFromFile(gla_filepath_abs, mode, 0, -1, data_frames_file)
+        if not success:
+            return False, message
+
+    return exportGLB(glm, gla, filepath_abs, basepath, skin_data, shader_data, scale)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a SoF2 .glm (with its .gla animations) to .glb.")
+    parser.add_argument("--base", required=True, help="SoF2 base folder")
+    parser.add_argument("--glm", required=True, help=".glm path relative to --base")
+    parser.add_argument("--out", required=True, help="output .glb")
+    parser.add_argument("--skin", default="", help=".g2skin file name (or part of it)")
+    parser.add_argument("--animations", choices=["NONE", "ALL"], default="ALL")
+    parser.add_argument("--scale", type=float, default=SoF2G2Constants.UNITY_SCALE)
+    args = parser.parse_args(argv)
+    success, message = convert(args.base, args.glm, args.out, args.skin, args.animations == "ALL", args.scale)
+    if not success:
+        print(f"Error: {message}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# import_pipeline.py
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# worker threads for the decode and FK stages of imports
+DECODE_THREADS = max(1, int(os.getenv("SOF2_DECODE_THREADS", "4")))
+# items (clips, frame chunks) a producer may run ahead of the Blender side
+QUEUE_SIZE = max(1, int(os.getenv("SOF2_PIPELINE_QUEUE", "4")))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=DECODE_THREADS, thread_name_prefix="sof2_decode")
+        return _pool
+
+
+def run_async(fn: Callable[..., Any], *args: Any) -> Future:
+    """fn(*args) on a decode thread, e.g. the GLM surfaces while the GLA is decoded."""
+    return _get_pool().submit(fn, *args)
+
+
+class ChannelClosed(Exception):
+    """Raised in a producer when the consumer gave up (import cancelled)."""
+
+
+class Channel:
+    """
+    Bounded queue from one producer thread to the import steps on the main thread. The producer
+    blocks when it is QUEUE_SIZE items ahead; the consumer waits with receive() as an import step,
+    so the modal import keeps Blender responsive while the producer is behind.
+    """
+
+    END = object()
+
+    def __init__(self, maxsize: int = QUEUE_SIZE):
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        self._closed = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def put(self, item: Any) -> None:
+        while True:
+            if self._closed.is_set():
+                raise ChannelClosed()
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self) -> None:
+        """Consumer side: stop the producer at its next put and drop what is queued."""
+        self._closed.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def receive(self):
+        """Import step (yield from): the next item, or Channel.END after the last one."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                yield None
+                continue
+            if item is Channel.END:
+                if self._error is not None:
+                    raise self._error
+                return Channel.END
+            return item
+
+    def _run(self, fn: Callable[..., Any], args: tuple) -> None:
+        try:
+            fn(self.put, *args)
+        except ChannelClosed:
+            return
+        except BaseException as e:
+            self._error = e
+        try:
+            self.put(Channel.END)
+        except ChannelClosed:
+            pass
+
+
+def produce(fn: Callable[..., Any], *args: Any, maxsize: int = QUEUE_SIZE) -> Channel:
+    """Run fn(emit, *args) on a decode thread; everything it emits arrives in the returned channel."""
+    channel = Channel(maxsize)
+    _get_pool().submit(channel._run, fn, args)
+    return channel
@@ -0,0 +1,48 @@
+# import_steps.py
+import time
+from contextlib import contextmanager
+from typing import Any, Generator, Iterator, List, Optional, Tuple
+
+# An import step yields its progress as (label, done, total) - e.g. ("Clip", 12, 300) - after each
+# bounded piece of Blender work, or None while it waits for a worker thread. The modal import
+# operator (SoF2ModalImport) runs steps until its time slice is used up and then returns to
+# Blender; a synchronous import just runs them to the end.
+Step = Optional[Tuple[str, int, int]]
+Steps = Generator[Step, None, Any]
+
+
+def run(steps: Steps) -> Any:
+    """Run steps to the end and return their return value (the synchronous import)."""
+    while True:
+        try:
+            step = next(steps)
+        except StopIteration as e:
+            return e.value
+        if step is None:
+            # a worker thread is behind
+            time.sleep(0.001)
+
+
+# (bpy.data collection name, as_pointer()) of everything the running steps created, see recording()
+Created = List[Tuple[str, int]]
+_created: Optional[Created] = None
+
+
+@contextmanager
+def recording(created: Created) -> Iterator[None]:
+    """While active, the steps' created() calls append to created (the modal import's cleanup list)."""
+    global _created
+    previous = _created
+    _created = created
+    try:
+        yield
+    finally:
+        _created = previous
+
+
+def created(collection: str, datablock: Any) -> Any:
+    """Report a data-block an import step just created in bpy.data.<collection>; returns it."""
+    if _created is not None:
+        # pointers, not data-blocks: those become invalid if the user undoes meanwhile
+        _created.append((collection, datablock.as_pointer()))
+    return datablock
@@ -1,6 +1,9 @@
 import re
 from typing import Dict, List, Any, Union
 
+# bump with changes to the parsed item dicts (parse cache)
+PARSER_VERSION = 1
+
 
 def _strip_inline_comment(s: str) -> str:
     """Remove inline comments from a line."""
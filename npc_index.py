@@ -0,0 +1,137 @@
+# npc_index.py
+from typing import Any, Dict, List, Optional
+
+# fields that a CharacterTemplate inherits from its ParentTemplate if it doesn't set them itself
+INHERITED_FIELDS = ("Model", "Skin", "Inventory")
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _group_info(npc_content: Dict[str, Any]) -> Dict[str, Any]:
+    group_info = npc_content.get("GroupInfo", {})
+    if isinstance(group_info, list):
+        # more than one GroupInfo block - the first one counts
+        group_info = next((g for g in group_info if isinstance(g, dict)), {})
+    return group_info if isinstance(group_info, dict) else {}
+
+
+def skin_files(char_template: Dict[str, Any]) -> List[str]:
+    """The Skin { File ... } values of a CharacterTemplate, one per Skin entry, in file order."""
+    files = []
+    for skin_entry in _as_list(char_template.get("Skin")):
+        if isinstance(skin_entry, dict):
+            files.append(skin_entry.get("File"))
+    return files
+
+
+class NpcIndex:
+    """
+    Lookup structures over all parsed .npc files of a base folder (get_npcs_folder_data output).
+
+    - templates: every CharacterTemplate, extended with npc_filename and group_info
+    - by_name: Name -> {"char_template", "npc_filename", "group_info"}
+      (same format find_character_template_by_key returns; the last template with a name wins)
+    - chain(): the GroupInfo.ParentTemplate inheritance chain
+    - effective(): Model/Skin/Inventory resolved along that chain
+    - by_model / by_skin: reverse maps to the original CharacterTemplate dicts
+    """
+
+    def __init__(self, npcs_data: Optional[Dict[str, Any]]):
+        self.templates: List[Dict[str, Any]] = []
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_skin: Dict[str, List[Dict[str, Any]]] = {}
+        self._chains: Dict[str, List[Dict[str, Any]]] = {}
+        self._effective: Dict[str, Dict[str, Any]] = {}
+
+        for npc_filename, npc_content in (npcs_data or {}).items():
+            if not isinstance(npc_content, dict):
+                continue
+            group_info = npc_content.get("GroupInfo", {})
+            for char_template in _as_list(npc_content.get("CharacterTemplate", [])):
+                if not isinstance(char_template, dict):
+                    continue
+                extended_template = dict(char_template)
+                extended_template["npc_filename"] = npc_filename
+                extended_template["group_info"] = group_info
+                self.templates.append(extended_template)
+
+                name = char_template.get("Name")
+                if name:
+                    self.by_name[name] = {
+                        "char_template": extended_template,
+                        "npc_filename": npc_filename,
+                        "group_info": group_info,
+                    }
+
+                model = char_template.get("Model")
+                if isinstance(model, str) and model:
+                    self.by_model.setdefault(model, []).append(char_template)
+
+                # a template is listed once per matching Skin entry, like the old linear scan did
+                for skin_file in skin_files(char_template):
+                    if skin_file:
+                        self.by_skin.setdefault(skin_file, []).append(char_template)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(name)
+
+    def parent_name(self, name: str) -> Optional[str]:
+        found = self.by_name.get(name)
+        if not found:
+            return None
+        parent = _group_info({"GroupInfo": found["group_info"]}).get("ParentTemplate")
+        return parent if isinstance(parent, str) and parent else None
+
+    def chain(self, name: str) -> List[Dict[str, Any]]:
+        """[template, parent, grandparent, ...] - stops at unknown names and cycles."""
+        cached = self._chains.get(name)
+        if cached is not None:
+            return cached
+        result: List[Dict[str, Any]] = []
+        seen = set()
+        current: Optional[str] = name
+        while current and current not in seen:
+            found = self.by_name.get(current)
+            if not found:
+                break
+            seen.add(current)
+            result.append(found)
+            current = self.parent_name(current)
+        self._chains[name] = result
+        return result
+
+    def effective(self, name: str) -> Dict[str, Any]:
+        """
+        Model/Skin/Inventory of a template, taken from the nearest template in its chain that sets
+        them. Also contains "<field>_from": the Name of the template that provided the value.
+        """
+        cached = self._effective.get(name)
+        if cached is not None:
+            return cached
+        resolved: Dict[str, Any] = {}
+        for field in INHERITED_FIELDS:
+            resolved[field] = None
+            resolved[field + "_from"] = None
+            for found in self.chain(name):
+                value = found["char_template"].get(field)
+                if value:
+                    resolved[field] = value
+                    resolved[field + "_from"] = found["char_template"].get("Name")
+                    break
+        self._effective[name] = resolved
+        return resolved
+
+    def templates_using_skin(self, skin_name: str) -> List[Dict[str, Any]]:
+        return self.by_skin.get(skin_name, [])
+
+    def templates_using_model(self, model: str) -> List[Dict[str, Any]]:
+        return self.by_model.get(model, [])
+
@@ -0,0 +1,298 @@
+# parse_cache.py
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import vfs
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# bump when the stored format changes; a parser module bumps its own PARSER_VERSION
+# when its output changes, that version is part of every entry key
+CACHE_FORMAT_VERSION = 1
+
+# hits only note their access time in memory, written in one batch at most every 30 s
+_TOUCH_INTERVAL = 30.0
+
+# SOF2_PARSE_CACHE=0 disables the cache, SOF2_PARSE_CACHE_DIR / SOF2_PARSE_CACHE_MB configure it
+_enabled = os.getenv("SOF2_PARSE_CACHE", "1") not in ("0", "false", "False", "off")
+_max_bytes = int(float(os.getenv("SOF2_PARSE_CACHE_MB", "256")) * 1024 * 1024)
+
+
+def _default_cache_dir() -> str:
+    env_dir = os.getenv("SOF2_PARSE_CACHE_DIR")
+    if env_dir:
+        return env_dir
+    if sys.platform == "win32":
+        root = os.getenv("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        root = os.path.expanduser("~/Library/Caches")
+    else:
+        root = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(root, "sof2_glm_import")
+
+
+class ParseCache:
+    """
+    Disk cache for parser results in a single SQLite file.
+
+    Entries are keyed by (absolute path, size, mtime_ns, parser name, parser version, decode
+    errors mode, options),
+    so an edited file or a changed parser simply misses and old entries age out. Values are
+    pickled parser results; every hit returns a fresh copy, so callers may modify them.
+    When the file grows over max_bytes the least recently used entries are deleted; access
+    times of hits are kept in memory and written with the next put or every _TOUCH_INTERVAL.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, f"parse_cache_v{CACHE_FORMAT_VERSION}.sqlite")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._total_bytes: Optional[int] = None
+        self._touched: Dict[str, float] = {}
+        self._last_flush = time.time()
+        self._broken = False
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._broken:
+            return None
+        # a forked worker process must not share the parent's connection
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+            conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Parse cache disabled, could not open {self.db_path}: {e}")
+            self._broken = True
+            return None
+        self._conn = conn
+        self._conn_pid = os.getpid()
+        self._total_bytes = None
+        self._touched = {}
+        return conn
+
+    @staticmethod
+    def make_key(path: str, st: Any, parser_name: str, version: int, errors: str, options: str) -> str:
+        raw = "\0".join(
+            (os.path.normcase(os.path.abspath(path)), str(st.st_size), str(st.st_mtime_ns),
+             parser_name, str(version), errors, options)
+        )
+        return hashlib.sha1(raw.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Return the unpickled value or raise KeyError."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                raise KeyError(key)
+            try:
+                row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    raise KeyError(key)
+                now = time.time()
+                self._touched[key] = now
+                if now - self._last_flush >= _TOUCH_INTERVAL:
+                    self._flush_touched(conn)
+                    conn.commit()
+            except sqlite3.Error as e:
+                print(f"Parse cache read failed: {e}")
+                raise KeyError(key)
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            if log_level == "DEBUG":
+                print(f"Parse cache: value not picklable, not stored: {e}")
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                self._flush_touched(conn)
+                # a replaced entry (e.g. another process parsed the same miss) frees its old size
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(blob), len(blob), time.time()),
+                )
+                conn.commit()
+                if self._total_bytes is None:
+                    self._total_bytes = conn.execute(
+                        "SELECT COALESCE(SUM(size), 0) FROM entries"
+                    ).fetchone()[0]
+                else:
+                    self._total_bytes += len(blob) - (old[0] if old else 0)
+                if self._total_bytes > self.max_bytes:
+                    self._evict(conn)
+            except sqlite3.Error as e:
+                print(f"Parse cache write failed: {e}")
+
+    def _flush_touched(self, conn: sqlite3.Connection) -> None:
+        # caller holds the lock and commits
+        if self._touched:
+            conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched = {}
+        self._last_flush = time.time()
+
+    def flush(self) -> None:
+        """Write the access times of recent hits."""
+        with self._lock:
+            if not self._touched or self._conn is None or self._conn_pid != os.getpid():
+                return
+            try:
+                self._flush_touched(self._conn)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Parse cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # drop least recently used entries down to 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        removed = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        conn.commit()
+        self._total_bytes = total
+        if log_level == "DEBUG":
+            print(f"Parse cache: evicted {removed} entries, {total} bytes left")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                self._touched = {}
+                conn.execute("DELETE FROM entries")
+                conn.commit()
+                conn.execute("VACUUM")
+                self._total_bytes = 0
+            except sqlite3.Error as e:
+                print(f"Parse cache clear failed: {e}")
+
+
+_cache: Optional[ParseCache] = None
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        _cache = ParseCache(_default_cache_dir(), _max_bytes)
+    return _cache
+
+
+def flush() -> None:
+    """Write the access times noted by recent hits, e.g. after a batch of lookups."""
+    if _cache is not None:
+        _cache.flush()
+
+
+def parser_version(parser: Callable[..., Any]) -> int:
+    """PARSER_VERSION of the module that defines parser (0 if it has none)."""
+    module = sys.modules.get(parser.__module__)
+    return getattr(module, "PARSER_VERSION", 0)
+
+
+def _entry_key(path: str, st: Any, parser: Callable[..., Any], errors: str, options: dict) -> str:
+    parser_name = f"{parser.__module__.rsplit('.', 1)[-1]}.{parser.__qualname__}"
+    return ParseCache.make_key(
+        path, st, parser_name, parser_version(parser), errors, repr(sorted(options.items()))
+    )
+
+
+def lookup(
+    path: str, parser: Callable[..., Any], errors: str = "ignore", **options: Any
+) -> Tuple[bool, Any, Any]:
+    """
+    (hit, value, token) for a cached parse of path. Pass token to store() after parsing a miss
+    yourself; it remembers the file stamp from before the parse. token is None if caching is off.
+    errors is the decode mode the text is read with: a lenient parse is never served to a strict caller.
+    """
+    cache = get_parse_cache()
+    if cache is None:
+        return False, None, None
+    st = vfs.stat(path)
+    key = _entry_key(path, st, parser, errors, options)
+    try:
+        return True, cache.get(key), (key, st)
+    except KeyError:
+        pass
+    except Exception as e:
+        print(f"Parse cache entry for {path} unreadable, parsing again: {e}")
+    return False, None, (key, st)
+
+
+def store(path: str, token: Any, result: Any) -> None:
+    """Store a parse result for a lookup() miss."""
+    cache = get_parse_cache()
+    if cache is None or token is None:
+        return
+    key, st = token
+    # don't store a result under a stamp the file no longer has
+    try:
+        st_after = vfs.stat(path)
+    except OSError:
+        return
+    if (st_after.st_size, st_after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+        cache.put(key, result)
+
+
+def parse_file(
+    path: str,
+    parser: Callable[..., Any],
+    errors: str = "ignore",
+    **options: Any,
+) -> Any:
+    """
+    Read path as UTF-8 text and return parser(text, **options), served from the disk cache
+    when the file (path, size, mtime), the decode mode (errors) and the parser (name, options,
+    its module's PARSER_VERSION) are unchanged.
+    Read and parse errors propagate exactly like calling the parser directly.
+    """
+    hit, value, token = lookup(path, parser, errors, **options)
+    if hit:
+        return value
+
+    # loose file or pk3 entry (virtual path)
+    text = vfs.read_text(path, errors)
+    result = parser(text, **options)
+
+    store(path, token, result)
+    return result
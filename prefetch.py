@@ -0,0 +1,164 @@
+# prefetch.py
+import os
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+
+class PrefetchCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """Set when a newer selection supersedes a prefetch; the job stops at its next check()."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise PrefetchCancelled()
+
+
+def check(cancel: Optional[CancelToken]) -> None:
+    """check() for callers that also run without a token (synchronous import)."""
+    if cancel is not None:
+        cancel.check()
+
+
+class PreparedImport:
+    """
+    Everything an import needs before Blender objects are created: the decoded scene (GLM + GLA),
+    skin, shaders and .frames data. Reports are recorded and replayed on the operator, because
+    a prefetch runs before there is an operator call to report to.
+    """
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.status: Optional[str] = None  # "CANCELLED" / "FINISHED" if the import stops early
+        self.reports: List[Tuple[str, Any]] = []
+        self.scene = None
+        self.skin_data: Dict[str, Any] = {}
+        self.shader_data: Dict[str, Any] = {}
+        self.frames_data: Any = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status is None
+
+    def report(self, level: str, message: Any) -> None:
+        self.reports.append((level, message))
+
+    def fail(self, level: str, message: Any, status: str = "CANCELLED") -> "PreparedImport":
+        self.report(level, message)
+        self.status = status
+        return self
+
+    def replay(self, op) -> None:
+        for level, message in self.reports:
+            op.report({level}, message)
+
+
+class Prefetcher:
+    """
+    Runs one prefetch job per kind ("npc", "weapon") in a small thread pool. Submitting a new key
+    for a kind cancels the previous job (not started: dropped, running: stops at its next check).
+    take() hands a finished - or still running - job to the import exactly once.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sof2_prefetch")
+        self._jobs: Dict[str, Tuple[Hashable, Any, CancelToken]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, key: Hashable, fn: Callable[..., Any], *args: Any) -> None:
+        """Start fn(*args, cancel=token) unless the same key is already prefetched."""
+        with self._lock:
+            job = self._jobs.get(kind)
+            if job is not None:
+                old_key, future, token = job
+                if old_key == key and not token.cancelled:
+                    return
+                token.cancel()
+                future.cancel()
+            token = CancelToken()
+            future = self._pool.submit(self._run, fn, args, token)
+            self._jobs[kind] = (key, future, token)
+        if log_level == "DEBUG":
+            print(f"Prefetching {kind}: {key}")
+
+    @staticmethod
+    def _run(fn: Callable[..., Any], args: tuple, token: CancelToken) -> Any:
+        try:
+            return fn(*args, cancel=token)
+        except PrefetchCancelled:
+            return None
+
+    def take(self, kind: str, key: Hashable) -> Optional[Any]:
+        """The prefetched result for key (waits if it is still running), or None."""
+        with self._lock:
+            job = self._jobs.get(kind)
+            if job is None or job[0] != key:
+                return None
+            del self._jobs[kind]
+        _, future, token = job
+        if token.cancelled:
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+        except Exception as e:
+            # the import runs synchronously instead and reports the error itself
+            print(f"Prefetch of {kind} {key} failed: {e}")
+            return None
+
+    def ready(self, kind: str, key: Hashable) -> bool:
+        """True unless a job for key is still running (take() would wait)."""
+        with self._lock:
+            job = self._jobs.get(kind)
+        return job is None or job[0] != key or job[1].done()
+
+    def cancel(self, kind: str) -> None:
+        with self._lock:
+            job = self._jobs.pop(kind, None)
+        if job is not None:
+            job[2].cancel()
+            job[1].cancel()
+
+    def cancel_all(self) -> None:
+        for kind in list(self._jobs):
+            self.cancel(kind)
+
+
+prefetcher = Prefetcher()
+
+
+def prepare_steps(kind: str, key: Hashable, fn: Callable[..., Any], *args: Any, background: bool = False):
+    """
+    Import step (see import_steps) that returns the PreparedImport of fn(*args): the prefetched
+    one if there is one, else fn runs now - in the prefetcher thread if background is set, while
+    the step yields None so the modal import keeps Blender responsive.
+    """
+    if background:
+        prefetcher.submit(kind, key, fn, *args)
+        try:
+            while not prefetcher.ready(kind, key):
+                yield None
+        except GeneratorExit:
+            # import cancelled (Esc) while still preparing
+            prefetcher.cancel(kind)
+            raise
+    prepared = prefetcher.take(kind, key)
+    if prepared is None:
+        prepared = fn(*args)
+    return prepared
@@ -0,0 +1,87 @@
+# search_index.py
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# separates name and description in a haystack, can't be typed into a search field
+_SEPARATOR = "\0"
+
+
+class SearchIndex:
+    """
+    Substring search over (identifier, name, description) enum items for the browser panels.
+
+    A match is the old panel semantics: the lowercase query is contained in the lowercase name
+    or in the lowercase description. Per item the index keeps one precomputed lowercase haystack
+    "name\\0description" and a trigram -> item positions map (built on the first query of three or
+    more characters). Queries only verify the candidates of their rarest trigram, and a query that
+    extends the previous one (typing) only filters the previous result. Results are positions into
+    items in item order; the last query and its result are cached, so a plain redraw costs nothing.
+    """
+
+    def __init__(self, items: Sequence[Tuple[str, str, str]], haystacks: Optional[List[str]] = None):
+        self.items = items
+        if haystacks is None:
+            haystacks = [f"{name.lower()}{_SEPARATOR}{desc.lower()}" for _, name, desc in items]
+        self.haystacks = haystacks
+        self._trigrams: Optional[Dict[str, Set[int]]] = None
+        self._last_query: Optional[str] = None
+        self._last_result: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _build_trigrams(self) -> Dict[str, Set[int]]:
+        trigrams: Dict[str, Set[int]] = {}
+        for pos, hay in enumerate(self.haystacks):
+            for i in range(len(hay) - 2):
+                tri = hay[i:i + 3]
+                if _SEPARATOR in tri:
+                    continue
+                posting = trigrams.get(tri)
+                if posting is None:
+                    trigrams[tri] = {pos}
+                else:
+                    posting.add(pos)
+        return trigrams
+
+    def _candidates(self, query: str) -> Sequence[int]:
+        if len(query) < 3:
+            return range(len(self.haystacks))
+        if self._trigrams is None:
+            self._trigrams = self._build_trigrams()
+        postings = []
+        for i in range(len(query) - 2):
+            posting = self._trigrams.get(query[i:i + 3])
+            if not posting:
+                return []
+            postings.append(posting)
+        # intersect starting from the rarest trigram, the final substring check does the rest
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:4]:
+            candidates &= posting
+            if not candidates:
+                return []
+        return sorted(candidates)
+
+    def search(self, query: str) -> List[int]:
+        """Positions of all matching items in item order. An empty query matches everything."""
+        query = query.strip().lower()
+        if query == self._last_query:
+            return self._last_result
+
+        if not query:
+            result = list(range(len(self.items)))
+        else:
+            last = self._last_query
+            if last and last in query:
+                # every match of the longer query also matched the previous one
+                candidates: Sequence[int] = self._last_result
+            else:
+                candidates = self._candidates(query)
+            haystacks = self.haystacks
+            result = [pos for pos in candidates if query in haystacks[pos]]
+
+        self._last_query = query
+        self._last_result = result
+        return result
+
@@ -0,0 +1,161 @@
+# shader_ir.py
+from typing import Any, Dict, Optional, Tuple
+
+from .SoF2G2DataParser import parse_shader_file
+
+# bump when Shader/Stage or the parsing change, the parse cache keeps compiled shaders
+PARSER_VERSION = 2
+
+# blendFunc shorthands -> (src, dst)
+_BLEND_SHORTHANDS = {
+    "add": ("GL_ONE", "GL_ONE"),
+    "filter": ("GL_DST_COLOR", "GL_ZERO"),
+    "blend": ("GL_SRC_ALPHA", "GL_ONE_MINUS_SRC_ALPHA"),
+}
+
+# cull values -> "front" (default), "back" or "none" (two-sided)
+_CULL_MODES = {
+    "front": "front",
+    "back": "back",
+    "backside": "back",
+    "backsided": "back",
+    "none": "none",
+    "disable": "none",
+    "twosided": "none",
+}
+
+
+def _first(value: Any) -> Optional[str]:
+    # a prop that occurs more than once is a list, the first one counts
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or value is True:
+        return None
+    return str(value).strip()
+
+
+def _all(value: Any) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    values = value if isinstance(value, list) else [value]
+    return tuple(str(v).strip() for v in values if v is not True)
+
+
+class Stage:
+    """One stage ({ ... } block) of a shader."""
+
+    __slots__ = (
+        "index",
+        "map",
+        "clamp",
+        "anim_freq",
+        "anim_maps",
+        "blend_func",
+        "rgb_gen",
+        "alpha_gen",
+        "alpha_func",
+        "tc_gen",
+        "tc_mods",
+        "depth_write",
+    )
+
+    def __init__(self, block: Dict[str, Any], index: int = 0):
+        # position of the block in the parsed shader, material names of stages use it
+        self.index = index
+        # keywords are case-insensitive in shader files
+        props = {str(k).lower(): v for k, v in block.items()}
+
+        clampmap = _first(props.get("clampmap"))
+        self.map: Optional[str] = _first(props.get("map")) or clampmap
+        self.clamp = clampmap is not None and self.map == clampmap
+
+        self.anim_freq = 0.0
+        self.anim_maps: Tuple[str, ...] = ()
+        anim = _first(props.get("animmap"))
+        if anim:
+            parts = anim.split()
+            try:
+                self.anim_freq = float(parts[0])
+                self.anim_maps = tuple(parts[1:])
+            except ValueError:
+                self.anim_maps = tuple(parts)
+            if self.map is None and self.anim_maps:
+                self.map = self.anim_maps[0]
+
+        self.blend_func: Optional[Tuple[str, str]] = None
+        blend = _first(props.get("blendfunc"))
+        if blend:
+            parts = blend.split()
+            if len(parts) == 1:
+                self.blend_func = _BLEND_SHORTHANDS.get(parts[0].lower())
+            else:
+                self.blend_func = (parts[0].upper(), parts[1].upper())
+
+        self.rgb_gen = _first(props.get("rgbgen"))
+        self.alpha_gen = _first(props.get("alphagen"))
+        self.alpha_func = _first(props.get("alphafunc"))
+        self.tc_gen = _first(props.get("tcgen"))
+        self.tc_mods = _all(props.get("tcmod"))
+        self.depth_write = "depthwrite" in props
+
+    @property
+    def is_texture(self) -> bool:
+        """A stage with an image map ($lightmap / $whiteimage are not files)."""
+        return bool(self.map) and not self.map.startswith("$")
+
+    def __repr__(self) -> str:
+        return f"Stage(map={self.map!r}, blend_func={self.blend_func!r})"
+
+
+class Shader:
+    """
+    A compiled shader: the few shader-level keywords the importer uses plus its stages.
+
+    Compiled once per shader file (and cached in the parse cache), so material construction reads
+    attributes instead of walking the parsed dicts.
+    """
+
+    __slots__ = ("name", "cull", "sort", "surfaceparms", "stages")
+
+    def __init__(self, name: str, parsed: Dict[str, Any]):
+        props = {str(k).lower(): v for k, v in parsed.get("props", {}).items()}
+        tags = [str(t).lower() for t in parsed.get("tags", [])]
+
+        self.name = name
+        cull = (_first(props.get("cull")) or "").lower()
+        if not cull and "cull" in tags:
+            # a bare "cull" line
+            cull = "front"
+        self.cull = _CULL_MODES.get(cull, "front")
+        self.sort = _first(props.get("sort"))
+        self.surfaceparms = tuple(s.lower() for s in _all(props.get("surfaceparm")))
+        self.stages = tuple(
+            Stage(block, i)
+            for i, block in enumerate(parsed.get("blocks", []))
+            if isinstance(block, dict) and "key" not in block
+        )
+
+    @property
+    def two_sided(self) -> bool:
+        return self.cull == "none"
+
+    @property
+    def base_map(self) -> Optional[str]:
+        """Image of the first stage that has one."""
+        for stage in self.stages:
+            if stage.is_texture:
+                return stage.map
+        return None
+
+    def __repr__(self) -> str:
+        return f"Shader({self.name!r}, cull={self.cull!r}, stages={len(self.stages)})"
+
+
+def compile_shaders(parsed_defs: Dict[str, Dict[str, Any]]) -> Dict[str, Shader]:
+    """{lowercase shader name: Shader} for parse_shader_file output (names are case-insensitive in the game)."""
+    return {name.lower(): Shader(name, parsed) for name, parsed in parsed_defs.items()}
+
+
+def parse_shader_ir(text: str) -> Dict[str, Shader]:
+    """parse_shader_file + compile_shaders, for the parse cache and corpus_loader."""
+    return compile_shaders(parse_shader_file(text))
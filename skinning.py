@@ -0,0 +1,190 @@
+# skinning.py
+"""
+Linear blend skinning of GLM surfaces by GLA frames on the CPU, without Blender objects: skinned
+positions and normals of any frames, e.g. for per-frame bounding boxes, baking vertex animations
+or checking a model against its GLA.
+
+    skinner = skinning.Skinner(glm, gla)
+    success, message = skinner.validate()
+    for first, surfaces in skinner.skinFrames():
+        for surface, (positions, normals) in zip(skinner.surfaces, surfaces): ...
+
+Works in GLA model space (like the GLM vertices): no root pinning, no Unity scale. The skinning
+matrix of a vertex slot is the bone's absolute offset (g2_math.fk_offsets), frames are skinned in
+chunks of chunkSize to keep the (frames, vertices, 3, 4) arrays small.
+"""
+import os
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from . import SoF2G2Constants
+from . import SoF2Stringhelper
+from . import gla_format
+from . import glm_format
+from .error_types import ErrorMessage, NoError
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# frames per batch; memory per surface ~ chunkSize * vertices * 96 bytes
+DEFAULT_CHUNK_SIZE = 64
+
+# (positions (frames, vertices, 3), normals (frames, vertices, 3))
+SkinnedVertices = Tuple[np.ndarray, np.ndarray]
+
+
+def blendMatrices(offsets: np.ndarray, joints: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    (F, V, 3, 4) weighted sum of the skinning matrices of each vertex; offsets are (F, B, 4, 4),
+    joints (V, S) bone indices and weights (V, S).
+    """
+    blended = np.zeros((offsets.shape[0], joints.shape[0], 3, 4))
+    # one gather per slot instead of (F, V, S, 3, 4) at once
+    for slot in range(joints.shape[1]):
+        blended += weights[:, slot, None, None] * offsets[:, joints[:, slot], :3, :]
+    return blended
+
+
+def skinVertices(blended: np.ndarray, co: np.ndarray, normals: np.ndarray) -> SkinnedVertices:
+    """Apply blended matrices (F, V, 3, 4) to co / normals (V, 3); normals are renormalized."""
+    positions = np.einsum("fvab,vb->fva", blended[..., :3], co) + blended[..., 3]
+    skinnedNormals = np.einsum("fvab,vb->fva", blended[..., :3], normals)
+    lengths = np.linalg.norm(skinnedNormals, axis=-1, keepdims=True)
+    skinnedNormals = np.divide(
+        skinnedNormals, lengths, out=np.zeros_like(skinnedNormals), where=lengths > 0
+    )
+    return positions, skinnedNormals
+
+
+class SkinnedSurface:
+    """The arrays of one MdxmSurface prepared for skinning: GLA bone per used slot, normalized weights."""
+
+    def __init__(self, surface: glm_format.MdxmSurface, name: str = ""):
+        self.surface = surface
+        self.name = name
+        self.co = surface.co.astype(np.float64)
+        self.normals = surface.normals.astype(np.float64)
+        # slots past the highest weight count of the surface only have weight 0
+        slots = int(surface.numWeights.max()) if len(surface.numWeights) else 0
+        self.used = np.arange(slots) < surface.numWeights[:, None]
+        # boneIndices mapped through boneReferences (see skeletonBoneIndices), -1 past its end
+        lookup = np.append(np.asarray(surface.boneReferences, dtype=np.int32), -1)
+        local = surface.boneIndices[:, :slots].astype(np.int32)
+        self.joints = lookup[np.minimum(local, len(surface.boneReferences))]
+        # 10 bit weights don't add up to exactly 1
+        weights = surface.weights[:, :slots].astype(np.float64)
+        self.weights = weights / np.maximum(weights.sum(axis=1, keepdims=True), 1e-8)
+
+    def validate(self, numBones: int) -> Tuple[bool, ErrorMessage]:
+        """Check that every used slot has a skeleton bone and a usable weight before skinning."""
+        joints = self.joints[self.used]
+        if np.any(joints < 0):
+            return False, ErrorMessage(
+                f"Surface {self.name}: {np.count_nonzero(joints < 0)} bone weights point past its {len(self.surface.boneReferences)} bone references"
+            )
+        if np.any(joints >= numBones):
+            return False, ErrorMessage(
+                f"Surface {self.name}: {np.count_nonzero(joints >= numBones)} bone weights use bones outside the {numBones} bone skeleton"
+            )
+        weights = self.surface.weights[:, : self.weights.shape[1]]
+        if not np.all(np.isfinite(weights)) or np.any(weights < 0):
+            return False, ErrorMessage(f"Surface {self.name}: negative or invalid bone weights")
+        if len(weights) and np.any(weights.sum(axis=1) <= 0):
+            return False, ErrorMessage(f"Surface {self.name}: vertices without bone weight")
+        if not (np.all(np.isfinite(self.co)) and np.all(np.isfinite(self.normals))):
+            return False, ErrorMessage(f"Surface {self.name}: invalid vertex positions or normals")
+        triangles = self.surface.triangles
+        if triangles.size and (triangles.min() < 0 or triangles.max() >= len(self.co)):
+            return False, ErrorMessage(f"Surface {self.name}: triangles use missing vertices")
+        return True, NoError
+
+    def skin(self, offsets: np.ndarray) -> SkinnedVertices:
+        """Positions and normals (F, V, 3) for absolute bone offsets (F, B, 4, 4)."""
+        return skinVertices(blendMatrices(offsets, self.joints, self.weights), self.co, self.normals)
+
+
+class Skinner:
+    """Skins the surfaces of one GLM LOD with the frames of a GLA."""
+
+    def __init__(
+        self,
+        glm: glm_format.GLM,
+        gla: gla_format.GLA,
+        lod: int = 0,
+        includeHidden: bool = False,
+    ):
+        self.glm = glm
+        self.gla = gla
+        self.lod = lod
+        self.surfaces: List[SkinnedSurface] = []
+        if lod >= len(glm.LODCollection.LODs):
+            return
+        surfaceData = glm.surfaceDataCollection.surfaces
+        hidden = SoF2G2Constants.SURFACEFLAG_TAG | SoF2G2Constants.SURFACEFLAG_OFF
+        for surface in glm.LODCollection.LODs[lod].surfaces:
+            data = surfaceData[surface.index]
+            # tags and surfaces switched off by the skin are no render geometry
+            if len(surface.co) == 0 or (data.flags & hidden and not includeHidden):
+                continue
+            self.surfaces.append(SkinnedSurface(surface, SoF2Stringhelper.decode(data.name)))
+
+    @property
+    def numFrames(self) -> int:
+        return len(self.gla.animation.frames)
+
+    def validate(self) -> Tuple[bool, ErrorMessage]:
+        if self.lod >= len(self.glm.LODCollection.LODs):
+            return False, ErrorMessage(f"GLM has no LOD {self.lod}")
+        numBones = len(self.gla.skeleton.bones)
+        if self.gla.isDefault or numBones == 0:
+            return False, ErrorMessage("GLA has no skeleton")
+        if numBones != self.glm.header.numBones:
+            return False, ErrorMessage(
+                f"Bone number mismatch - gla has {numBones} bones, model uses {self.glm.header.numBones}."
+            )
+        for surface in self.surfaces:
+            success, message = surface.validate(numBones)
+            if not success:
+                return False, message
+        return True, NoError
+
+    def bindPose(self) -> List[SkinnedVertices]:
+        """Every surface with identity offsets, as one frame: the GLM vertices themselves."""
+        offsets = np.broadcast_to(np.eye(4), (1, len(self.gla.skeleton.bones), 4, 4))
+        return [surface.skin(offsets) for surface in self.surfaces]
+
+    def skinFrames(
+        self, first: int = 0, count: int = -1, chunkSize: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[Tuple[int, List[SkinnedVertices]]]:
+        """
+        Yields (first frame of the chunk, skinned vertices per surface) for the loaded frames
+        first .. first + count - 1 (count -1: to the end); frame numbers are indices into
+        gla.animation.frames, add gla.animation.firstFrame for the GLA's numbering.
+        """
+        end = self.numFrames if count == -1 else min(first + count, self.numFrames)
+        for start in range(first, end, chunkSize):
+            offsets = self.gla.animation.offsets(self.gla.skeleton, start, min(chunkSize, end - start))
+            yield start, [surface.skin(offsets) for surface in self.surfaces]
+
+    def bounds(
+        self, first: int = 0, count: int = -1, chunkSize: int = DEFAULT_CHUNK_SIZE
+    ) -> np.ndarray:
+        """(frames, 2, 3) min / max corner of all skinned surfaces per frame."""
+        chunks: List[np.ndarray] = []
+        for _, skinned in self.skinFrames(first, count, chunkSize):
+            if not skinned:
+                continue
+            lower = np.min([positions.min(axis=1) for positions, _ in skinned], axis=0)
+            upper = np.max([positions.max(axis=1) for positions, _ in skinned], axis=0)
+            chunks.append(np.stack([lower, upper], axis=1))
+        if not chunks:
+            return np.zeros((0, 2, 3))
+        return np.concatenate(chunks)
+
+    def clipFrames(self, clip: dict) -> Optional[Tuple[int, int]]:
+        """(first, count) of a .frames clip within the loaded frames, None if none of it is loaded."""
+        first = clip["start_frame"] - self.gla.animation.firstFrame
+        count = min(clip["duration"], self.numFrames - first)
+        if first < 0 or count <= 0:
+            return None
+        return first, count
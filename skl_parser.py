@@ -1,6 +1,11 @@
 # skl_parser.py
 import re
 
+from . import value_converter as _value_converter
+
+# parse cache version of parse_skl
+PARSER_VERSION = 1
+
 token_re = re.compile(r'"([^"]*)"|(\{)|(\})|([^\s\{\}]+)', re.MULTILINE)
 
 
@@ -18,24 +23,8 @@ def tokenize(text):
     return tokens
 
 
-def convert_value(s):
-    # leere Strings behalten
-    if s == "":
-        return s
-    # Vektor in einem String: "1 2 3" -> [1.0, 2.0, 3.0] (oder ints falls passend)
-    if re.match(r"^-?\d+(\.\d+)?(\s+-?\d+(\.\d+)?)+$", s):
-        parts = [float(x) for x in s.split()]
-        if all(float(x).is_integer() for x in parts):
-            parts = [int(x) for x in parts]
-        return parts
-    # float
-    if re.match(r"^-?\d+\.\d+$", s):
-        return float(s)
-    # int
-    if re.match(r"^-?\d+$", s):
-        return int(s)
-    # sonst String belassen
-    return s
+# Vektor/float/int Erkennung, gemeinsam mit frames_parser
+convert_value = _value_converter.convert_value
 
 
 def parse_block(tokens, i):
@@ -0,0 +1,51 @@
+# test_g2_math.py
+import numpy as np
+
+from . import g2_math
+from .conftest import makeMatrix
+
+
+def _randomMatrices(count: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    quats = rng.normal(size=(count, 4))
+    quats /= np.linalg.norm(quats, axis=1, keepdims=True)
+    mats = np.zeros((count, 4, 4))
+    mats[:, :3, :3] = g2_math.quat_to_matrix(quats)
+    mats[:, :3, 3] = rng.uniform(-100, 100, size=(count, 3))
+    mats[:, 3, 3] = 1
+    return mats
+
+
+def test_compress_bone():
+    mats = _randomMatrices(32)
+    compressed = b"".join(g2_math.compress_bone(mat) for mat in mats)
+    assert len(compressed) == 32 * g2_math.COMP_BONE_SIZE
+
+    decompressed = g2_math.decompress_bones(g2_math.comp_bones_from_bytes(compressed))
+    assert decompressed.shape == (32, 4, 4)
+    # 16 bit quaternion components / 1/64 units location
+    np.testing.assert_allclose(decompressed[:, :3, :3], mats[:, :3, :3], atol=1e-3)
+    np.testing.assert_allclose(decompressed[:, :3, 3], mats[:, :3, 3], atol=1 / 64)
+    np.testing.assert_array_equal(decompressed[:, 3], [[0, 0, 0, 1]] * 32)
+
+
+def test_identity_bone():
+    decompressed = g2_math.decompress_bones(g2_math.comp_bones_from_bytes(g2_math.compress_bone(np.identity(4))))
+    np.testing.assert_allclose(decompressed[0], np.identity(4), atol=1e-4)
+
+
+def test_quaternion_round_trip():
+    mats = _randomMatrices(16)
+    np.testing.assert_allclose(g2_math.quat_to_matrix(g2_math.matrix_to_quat(mats[:, :3, :3])), mats[:, :3, :3], atol=1e-9)
+
+
+def test_blender_rot_round_trip():
+    mats = _randomMatrices(16)
+    blender = g2_math.gla_to_blender_rot(mats)
+    assert not np.allclose(blender, mats)
+    np.testing.assert_allclose(g2_math.blender_to_gla_rot(blender), mats, atol=1e-12)
+    np.testing.assert_allclose(g2_math.gla_to_blender_rot(g2_math.blender_to_gla_rot(mats)), mats, atol=1e-12)
+    # works on single matrices and leaves the input alone
+    single = makeMatrix(0.5, (1, 2, 3))
+    np.testing.assert_allclose(g2_math.blender_to_gla_rot(g2_math.gla_to_blender_rot(single)), single, atol=1e-12)
+    np.testing.assert_array_equal(single, makeMatrix(0.5, (1, 2, 3)))
@@ -0,0 +1,71 @@
+# test_gla_format.py
+import numpy as np
+
+from . import gla_format
+from .conftest import NUM_FRAMES
+
+FRAMES = {
+    "anims/idle.xsi": {"startframe": 0, "duration": 2},
+    "anims/run.xsi": {"startframe": 3, "duration": 2, "fps": 15},
+}
+
+
+def _saveAndLoad(gla, tmp_path, mode, startFrame=0, numFrames=-1, data_frames=None):
+    path = str(tmp_path / "test.gla")
+    success, message = gla.saveToFile(path)
+    assert success, message
+    loaded = gla_format.GLA()
+    success, message = loaded.loadFromFile(path, mode, startFrame, numFrames, data_frames)
+    assert success, message
+    return loaded
+
+
+def test_round_trip(gla, tmp_path):
+    loaded = _saveAndLoad(gla, tmp_path, gla_format.AnimationLoadMode.ALL)
+
+    assert loaded.header.name == gla.header.name
+    assert loaded.header.numBones == 2
+    assert loaded.header.numFrames == NUM_FRAMES
+    assert loaded.boneIndexByName == {"root": 0, "arm": 1}
+    for bone, expected in zip(loaded.skeleton.bones, gla.skeleton.bones):
+        assert (bone.name, bone.parent, bone.children) == (expected.name, expected.parent, expected.children)
+        np.testing.assert_allclose(bone.basePoseMat, expected.basePoseMat, atol=1e-6)
+        np.testing.assert_allclose(bone.basePoseMatInv, expected.basePoseMatInv, atol=1e-6)
+    assert loaded.animation.firstFrame == 0
+    np.testing.assert_array_equal(loaded.animation.frames, gla.animation.frames)
+    np.testing.assert_array_equal(loaded.animation.compBones, gla.animation.compBones)
+
+
+def test_skeleton_only(gla, tmp_path):
+    loaded = _saveAndLoad(gla, tmp_path, gla_format.AnimationLoadMode.NONE)
+    assert len(loaded.skeleton.bones) == 2
+    assert loaded.animation.frames.size == 0
+
+
+def test_range(gla, tmp_path):
+    loaded = _saveAndLoad(gla, tmp_path, gla_format.AnimationLoadMode.RANGE, 2, 3)
+
+    assert loaded.animation.firstFrame == 2
+    np.testing.assert_array_equal(loaded.animation.frames, gla.animation.frames[2:5])
+    np.testing.assert_allclose(
+        loaded.animation.offsets(loaded.skeleton), gla.animation.offsets(gla.skeleton, 2, 3), atol=1e-9
+    )
+
+
+def test_range_clips(gla, tmp_path):
+    # only the run clip overlaps frames 3 .. 5
+    loaded = _saveAndLoad(gla, tmp_path, gla_format.AnimationLoadMode.RANGE, 3, 3, FRAMES)
+
+    assert [clip["name"] for clip in loaded.animation.animation_clips] == ["run"]
+    assert loaded.animation.animation_clips[0]["fps"] == 15
+    assert loaded.animation.firstFrame == 3
+    np.testing.assert_array_equal(loaded.animation.frames, gla.animation.frames[3:5])
+
+
+def test_all_clips(gla, tmp_path):
+    # frames from the first clip start to the last clip end
+    loaded = _saveAndLoad(gla, tmp_path, gla_format.AnimationLoadMode.ALL, data_frames=FRAMES)
+
+    assert [clip["name"] for clip in loaded.animation.animation_clips] == ["idle", "run"]
+    assert loaded.animation.firstFrame == 0
+    np.testing.assert_array_equal(loaded.animation.frames, gla.animation.frames[:5])
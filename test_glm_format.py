@@ -0,0 +1,51 @@
+# test_glm_format.py
+import numpy as np
+
+from . import glm_format
+
+
+def test_pack_weights():
+    numWeights = np.array([1, 2, 3, 4], dtype=np.uint8)
+    boneIndices = np.array([[5, 0, 0, 0], [31, 1, 0, 0], [2, 7, 9, 0], [3, 4, 30, 12]], dtype=np.uint8)
+    weights = np.array(
+        [[1, 0, 0, 0], [0.25, 0.75, 0, 0], [0.5, 0.3, 0.2, 0], [0.4, 0.3, 0.2, 0.1]], dtype=np.float32
+    )
+
+    packed, lowBytes = glm_format.packWeights(numWeights, boneIndices, weights)
+    assert packed.dtype == np.uint32 and lowBytes.shape == (4, 4)
+    unpackedCount, unpackedIndices, unpackedWeights = glm_format.unpackWeights(packed, lowBytes)
+
+    np.testing.assert_array_equal(unpackedCount, numWeights)
+    np.testing.assert_array_equal(unpackedIndices, boneIndices)
+    # 10 bit weights; the last used one is 1 - the others
+    np.testing.assert_allclose(unpackedWeights, weights, atol=2 / 1023)
+    np.testing.assert_allclose(unpackedWeights.sum(axis=1), 1, atol=1e-6)
+
+
+def test_round_trip(glm, tmp_path):
+    path = str(tmp_path / "test.glm")
+    success, message = glm.saveToFile(path)
+    assert success, message
+    loaded = glm_format.GLM()
+    success, message = loaded.loadFromFile(path, None)
+    assert success, message
+
+    assert loaded.header.name.rstrip(b"\0") == glm.header.name
+    assert loaded.getRequestedGLA() == "models/test/_test"
+    assert (loaded.header.numBones, loaded.header.numLODs, loaded.header.numSurfaces) == (2, 1, 2)
+    assert loaded.header.ofsEnd == glm.header.ofsEnd
+    for data, expected in zip(loaded.surfaceDataCollection.surfaces, glm.surfaceDataCollection.surfaces):
+        assert data.name.rstrip(b"\0") == expected.name
+        assert (data.flags, data.parentIndex) == (expected.flags, expected.parentIndex)
+
+    assert len(loaded.LODCollection.LODs) == 1
+    for surface, expected in zip(loaded.LODCollection.LODs[0].surfaces, glm.LODCollection.LODs[0].surfaces):
+        assert surface.index == expected.index
+        np.testing.assert_array_equal(surface.co, expected.co)
+        np.testing.assert_array_equal(surface.normals, expected.normals)
+        np.testing.assert_array_equal(surface.uvs, expected.uvs)
+        np.testing.assert_array_equal(surface.triangles, expected.triangles)
+        np.testing.assert_array_equal(surface.numWeights, expected.numWeights)
+        np.testing.assert_array_equal(surface.boneIndices, expected.boneIndices)
+        np.testing.assert_allclose(surface.weights, expected.weights, atol=1 / 1023)
+        assert surface.boneReferences == expected.boneReferences
@@ -0,0 +1,42 @@
+# test_gltf_export.py
+import json
+import struct
+
+from . import gltf_export
+
+
+def _readGLB(path: str):
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, total = struct.unpack_from("<4sII", data, 0)
+    length, chunkType = struct.unpack_from("<II", data, 12)
+    assert (magic, version, total) == (b"glTF", 2, len(data))
+    assert chunkType == 0x4E4F534A  # JSON
+    return json.loads(data[20:20 + length]), data
+
+
+def test_export(glm, gla, tmp_path):
+    path = str(tmp_path / "test.glb")
+    success, message = gltf_export.exportGLB(glm, gla, path)
+    assert success, message
+
+    gltf, data = _readGLB(path)
+    assert gltf["asset"]["version"] == "2.0"
+    # the tag surface is left out
+    assert [mesh["name"] for mesh in gltf["meshes"]] == ["body"]
+    assert len(gltf["skins"]) == 1 and len(gltf["skins"][0]["joints"]) == 2
+    assert len(gltf["animations"]) == 1
+    assert gltf["scenes"][0]["name"] == "test"
+    # every buffer view lies in the binary chunk
+    assert sum(view["byteLength"] for view in gltf["bufferViews"]) <= gltf["buffers"][0]["byteLength"]
+    assert gltf["buffers"][0]["byteLength"] <= len(data) - 20
+
+
+def test_export_without_gla(glm, tmp_path):
+    path = str(tmp_path / "static.glb")
+    success, message = gltf_export.exportGLB(glm, None, path)
+    assert success, message
+
+    gltf, _ = _readGLB(path)
+    assert "skins" not in gltf or not gltf["skins"]
+    assert [mesh["name"] for mesh in gltf["meshes"]] == ["body"]
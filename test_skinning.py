@@ -0,0 +1,36 @@
+# test_skinning.py
+import numpy as np
+
+from . import skinning
+from .conftest import NUM_FRAMES
+
+
+def test_bind_pose(glm, gla):
+    skinner = skinning.Skinner(glm, gla)
+    success, message = skinner.validate()
+    assert success, message
+    # the tag surface is no render geometry
+    assert [surface.name for surface in skinner.surfaces] == ["body"]
+
+    (positions, normals), = skinner.bindPose()
+    body = glm.LODCollection.LODs[0].surfaces[0]
+    assert positions.shape == (1, len(body.co), 3)
+    np.testing.assert_allclose(positions[0], body.co, atol=1e-6)
+    np.testing.assert_allclose(normals[0], body.normals, atol=1e-6)
+
+
+def test_skin_frames(glm, gla):
+    skinner = skinning.Skinner(glm, gla)
+    chunks = list(skinner.skinFrames(chunkSize=4))
+    assert [first for first, _ in chunks] == [0, 4]
+    positions = np.concatenate([skinned[0][0] for _, skinned in chunks])
+    assert positions.shape == (NUM_FRAMES, 4, 3)
+    # frame 0 only has identity offsets
+    np.testing.assert_allclose(positions[0], glm.LODCollection.LODs[0].surfaces[0].co, atol=1e-3)
+    assert skinner.bounds().shape == (NUM_FRAMES, 2, 3)
+
+
+def test_bone_count_mismatch(glm, gla):
+    glm.header.numBones = 3
+    success, _ = skinning.Skinner(glm, gla).validate()
+    assert not success
@@ -0,0 +1,245 @@
+# texture_cache.py
+import hashlib
+import io
+import os
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import corpus_loader
+from . import parse_cache
+from . import vfs
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# bump when the conversion changes, older cached files are not used any more
+TEXTURE_CACHE_VERSION = 1
+
+# SOF2_UNITY_TEXTURES=1 converts the textures of an import to PNG up front (see MaterialManager);
+# SOF2_TEXTURE_MAX_SIZE caps the longer side (0 = no cap, only power-of-two rounding)
+ENABLED = os.getenv("SOF2_UNITY_TEXTURES", "0") in ("1", "true", "True", "on")
+
+
+def _max_size_from_env() -> int:
+    # read at import (addon registration): a bad value must not stop the addon from loading
+    value = os.getenv("SOF2_TEXTURE_MAX_SIZE", "0")
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"Warning: SOF2_TEXTURE_MAX_SIZE={value!r} is not a number, textures are not capped")
+        return 0
+
+
+MAX_SIZE = _max_size_from_env()
+
+try:
+    # optional: decodes JPG/DDS/... and resizes with a proper filter; without it only TGA is converted
+    from PIL import Image  # pyright: ignore[reportMissingImports]
+except ImportError:
+    Image = None
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# source path (normcase) -> converted png, for the textures preprocessed in this session
+_converted: Dict[str, str] = {}
+# (source path, mtime_ns, size, max_size) -> content key, so unchanged files are hashed once
+_keys: Dict[Tuple[str, int, int, int], str] = {}
+
+
+def cache_dir() -> str:
+    return os.path.join(parse_cache._default_cache_dir(), "textures")
+
+
+def _pow2(n: int) -> int:
+    """Nearest power of two (ties round down)."""
+    if n <= 1:
+        return 1
+    lower = 1 << (n.bit_length() - 1)
+    upper = lower * 2
+    return upper if upper - n < n - lower else lower
+
+
+def target_size(width: int, height: int, max_size: int = 0) -> Tuple[int, int]:
+    """Power-of-two size for mipmapping; with max_size both sides are scaled down to fit."""
+    tw, th = _pow2(width), _pow2(height)
+    if max_size > 0:
+        cap = 1 << (max_size.bit_length() - 1)
+        while tw > cap or th > cap:
+            tw, th = max(1, tw // 2), max(1, th // 2)
+    return tw, th
+
+
+# --- TGA (uncompressed and RLE; true color and grayscale) ---
+
+
+def _read_tga(data: bytes) -> Tuple[int, int, bytes]:
+    """(width, height, RGBA bytes top row first)"""
+    (id_len, cmap_type, img_type, _, _, _, _, _, width, height, bpp, desc) = struct.unpack_from(
+        "<BBBHHBHHHHBB", data, 0
+    )
+    if cmap_type != 0 or img_type not in (2, 3, 10, 11):
+        raise ValueError(f"Unsupported TGA type {img_type} (color map {cmap_type})")
+    if bpp not in (8, 24, 32) or (img_type in (3, 11)) != (bpp == 8):
+        raise ValueError(f"Unsupported TGA pixel depth {bpp}")
+    pixel_size = bpp // 8
+    count = width * height
+    offset = 18 + id_len
+
+    if img_type in (2, 3):
+        src = data[offset:offset + count * pixel_size]
+    else:
+        out = bytearray()
+        need = count * pixel_size
+        while len(out) < need:
+            header = data[offset]
+            offset += 1
+            n = (header & 0x7F) + 1
+            if header & 0x80:
+                out += data[offset:offset + pixel_size] * n
+                offset += pixel_size
+            else:
+                out += data[offset:offset + n * pixel_size]
+                offset += n * pixel_size
+        src = bytes(out[:need])
+    if len(src) < count * pixel_size:
+        raise ValueError("Truncated TGA file")
+
+    rgba = bytearray(count * 4)
+    if pixel_size == 4:
+        rgba[0::4], rgba[1::4], rgba[2::4], rgba[3::4] = src[2::4], src[1::4], src[0::4], src[3::4]
+    elif pixel_size == 3:
+        rgba[0::4], rgba[1::4], rgba[2::4] = src[2::3], src[1::3], src[0::3]
+        rgba[3::4] = b"\xff" * count
+    else:
+        rgba[0::4] = rgba[1::4] = rgba[2::4] = src
+        rgba[3::4] = b"\xff" * count
+
+    if not desc & 0x20:
+        # bottom-up rows
+        stride = width * 4
+        rgba = b"".join(rgba[y * stride:(y + 1) * stride] for y in range(height - 1, -1, -1))
+    return width, height, bytes(rgba)
+
+
+def _resize_nearest(width: int, height: int, rgba: bytes, tw: int, th: int) -> bytes:
+    if (tw, th) == (width, height):
+        return rgba
+    stride = width * 4
+    xs = [(x * width // tw) * 4 for x in range(tw)]
+    rows = []
+    for y in range(th):
+        row = rgba[(y * height // th) * stride:(y * height // th + 1) * stride]
+        rows.append(b"".join(row[x:x + 4] for x in xs))
+    return b"".join(rows)
+
+
+def _write_png(path: str, width: int, height: int, rgba: bytes) -> None:
+    def chunk(tag: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    with open(path, "wb") as f:
+        f.write(_PNG_SIGNATURE)
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def convert_texture(src: str, target: str, max_size: int = 0) -> None:
+    """Write src as PNG with power-of-two size to target (atomically)."""
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if Image is not None:
+        # src may be a pk3 entry (virtual path)
+        with Image.open(io.BytesIO(vfs.read_bytes(src))) as img:
+            img = img.convert("RGBA")
+            size = target_size(img.width, img.height, max_size)
+            if size != img.size:
+                img = img.resize(size, Image.LANCZOS)
+            img.save(tmp_path, format="PNG")
+    elif src.lower().endswith(".tga"):
+        width, height, rgba = _read_tga(vfs.read_bytes(src))
+        tw, th = target_size(width, height, max_size)
+        _write_png(tmp_path, tw, th, _resize_nearest(width, height, rgba, tw, th))
+    else:
+        raise ValueError("no decoder for this format (install Pillow)")
+    os.replace(tmp_path, target)
+
+
+def _convert_one(src: str, target: str, max_size: int) -> Tuple[str, bool, str]:
+    try:
+        convert_texture(src, target, max_size)
+        return src, True, ""
+    except Exception as e:
+        return src, False, str(e)
+
+
+def _content_key(path: str, max_size: int) -> str:
+    st = vfs.stat(path)
+    memo_key = (os.path.normcase(os.path.abspath(path)), st.st_mtime_ns, st.st_size, max_size)
+    key = _keys.get(memo_key)
+    if key is None:
+        h = hashlib.sha1(vfs.read_bytes(path))
+        h.update(f"\0{TEXTURE_CACHE_VERSION}\0{max_size}\0{Image is not None}".encode("utf-8"))
+        key = h.hexdigest()
+        _keys[memo_key] = key
+    return key
+
+
+def preprocess_textures(
+    paths: Iterable[str], max_size: int = MAX_SIZE, max_workers: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    Convert textures to PNG in the content-hashed cache folder, in a process pool.
+    Returns {source path: cached png} for every texture that is (now) converted; files that can't
+    be converted are left out and keep being loaded from their original path.
+    """
+    root = cache_dir()
+    result: Dict[str, str] = {}
+    missing: List[Tuple[str, str]] = []
+    for path in dict.fromkeys(paths):
+        try:
+            key = _content_key(path, max_size)
+        except OSError as e:
+            print(f"Error reading texture {path}: {e}")
+            continue
+        target = os.path.join(root, key[:2], key + ".png")
+        if os.path.isfile(target):
+            result[path] = target
+        else:
+            missing.append((path, target))
+
+    workers = max_workers if max_workers is not None else corpus_loader.worker_count()
+    done: List[Tuple[str, bool, str]] = []
+    if workers > 1 and len(missing) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=corpus_loader.mp_context()) as pool:
+                futures = [pool.submit(_convert_one, src, target, max_size) for src, target in missing]
+                done = [future.result() for future in futures]
+        except Exception as e:
+            print(f"Parallel texture conversion not available, converting serially: {e}")
+            done = []
+    if not done:
+        done = [_convert_one(src, target, max_size) for src, target in missing]
+
+    targets = dict(missing)
+    for src, ok, error in done:
+        if ok:
+            result[src] = targets[src]
+        elif log_level == "DEBUG":
+            print(f"Texture {src} not converted: {error}")
+    for src, target in result.items():
+        _converted[os.path.normcase(os.path.abspath(src))] = target
+    if missing:
+        print(f"Converted {sum(1 for _, ok, _ in done if ok)} of {len(missing)} textures ({len(result)} cached)")
+    return result
+
+
+def converted_path(path: str) -> Optional[str]:
+    """The cached png of a texture preprocessed in this session, or None."""
+    target = _converted.get(os.path.normcase(os.path.abspath(path)))
+    if target is not None and os.path.isfile(target):
+        return target
+    return None
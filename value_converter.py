@@ -0,0 +1,70 @@
+# value_converter.py
+import re
+from typing import Any, List, Union
+
+# precompiled versions of the patterns frames_parser/skl_parser used to match per token
+_int_re = re.compile(r"^-?\d+$")
+_float_re = re.compile(r"^-?\d+\.\d+$")
+_vector_re = re.compile(r"^-?\d+(\.\d+)?(\s+-?\d+(\.\d+)?)+$")
+
+
+def convert_value(s: str) -> Union[str, int, float, List[int], List[float]]:
+    """
+    Convert a scalar token of a .frames/.skl file:
+      "12" -> 12, "-0.5" -> -0.5, "0.000 -5.152 0.000" -> [0.0, -5.152, 0.0]
+    Vectors whose components are all integral become int lists. Everything else stays a string.
+    """
+    # leere Strings behalten
+    if s == "":
+        return s
+    # fast path: every number/vector starts with '-' or a digit (\d == str.isdecimal)
+    c = s[0]
+    if c != "-" and not c.isdecimal():
+        return s
+    # the three patterns are mutually exclusive, so check the most common one first
+    if _int_re.match(s):
+        return int(s)
+    if _float_re.match(s):
+        return float(s)
+    if _vector_re.match(s):
+        parts = [float(x) for x in s.split()]
+        if all(p.is_integer() for p in parts):
+            return [int(p) for p in parts]
+        return parts
+    # sonst String belassen
+    return s
+
+
+def to_numpy_vector(value: Any) -> Any:
+    """
+    Convert a converted vector (list of numbers) into a float64 NumPy array.
+    float64 keeps the values identical to the list representation. Non-vectors are returned unchanged.
+    """
+    if not isinstance(value, list) or not value:
+        return value
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+        return value
+    import numpy as np  # ships with Blender, only needed when numpy output is requested
+
+    return np.asarray(value, dtype=np.float64)
+
+
+def to_numpy_vectors(values: List[Any]) -> Any:
+    """
+    Convert a list of converted vectors into one (n, k) float64 NumPy array.
+    Returns the list unchanged if the entries are no vectors or differ in length.
+    """
+    if not values:
+        return values
+    first = values[0]
+    if not isinstance(first, list):
+        return values
+    width = len(first)
+    for v in values:
+        if not isinstance(v, list) or len(v) != width:
+            return values
+        if not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in v):
+            return values
+    import numpy as np
+
+    return np.asarray(values, dtype=np.float64)
@@ -0,0 +1,416 @@
+# vfs.py
+import hashlib
+import io
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+from . import dir_index
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+# local file header: signature, version, flags, method, time, date, crc, sizes, name/extra length
+_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+
+# budget for decompressed entries kept in memory
+ENTRY_CACHE_BYTES = 64 * 1024 * 1024
+
+# a virtual path is the pk3 file's path followed by the entry name: C:/SoF2/base/assets0.pk3/npcs/x.npc
+_VIRTUAL_PATH = re.compile(r"\.pk3[\\/]", re.IGNORECASE)
+
+
+def normalize(relpath: str) -> str:
+    """Game path key: forward slashes, lowercase, no leading "./" or "/"."""
+    key = relpath.replace("\\", "/").lower()
+    while key.startswith("./"):
+        key = key[2:]
+    return key.lstrip("/")
+
+
+class Pk3Entry:
+    __slots__ = ("archive", "name", "method", "header_offset", "compress_size", "file_size")
+
+    def __init__(self, archive: "Pk3Archive", info: zipfile.ZipInfo):
+        self.archive = archive
+        self.name = info.filename
+        self.method = info.compress_type
+        self.header_offset = info.header_offset
+        self.compress_size = info.compress_size
+        self.file_size = info.file_size
+
+
+class Pk3Archive:
+    """One .pk3 (zip) file: its central directory is read once, the file is mmapped on first read."""
+
+    def __init__(self, path: str):
+        self.path = path
+        st = os.stat(path)
+        self.stamp = (st.st_mtime_ns, st.st_size)
+        self.entries: List[Pk3Entry] = []
+        # normalized name -> entry of this archive (virtual paths address one archive, not the winner)
+        self.by_key: Dict[str, Pk3Entry] = {}
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    entry = Pk3Entry(self, info)
+                    self.entries.append(entry)
+                    self.by_key[normalize(entry.name)] = entry
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def raw_data(self, entry: Pk3Entry) -> bytes:
+        """The (possibly compressed) bytes of entry, copied out of the mapping."""
+        # mapped, sliced and copied under the lock: close() never runs while a view is alive
+        with self._lock:
+            if self._map is None:
+                self._file = open(self.path, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            header = _LOCAL_HEADER.unpack_from(self._map, entry.header_offset)
+            if header[0] != _LOCAL_SIGNATURE:
+                raise zipfile.BadZipFile(f"Bad local header for {entry.name} in {self.path}")
+            start = entry.header_offset + _LOCAL_HEADER.size + header[9] + header[10]
+            return self._map[start:start + entry.compress_size]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class VirtualFileSystem:
+    """
+    Read-only view of a SoF2 base folder: loose files plus the contents of all base/*.pk3.
+
+    Override order is the game's: pk3 files are loaded in alphabetical order and a later pk3
+    replaces entries of an earlier one; loose files replace everything. Lookups are
+    case-insensitive for pk3 entries.
+
+    Entries are addressed by virtual paths (virtual_path(), read with read_bytes() / open_file() of
+    this module), read() returns the bytes of an entry (deflated ones kept in a small LRU). Only
+    consumers that need a real file - bpy.data.images.load, Pillow - get one from materialize(),
+    which extracts just that entry into the cache folder.
+    """
+
+    def __init__(self, basepath: str, cache_dir: Optional[str] = None):
+        self.basepath = os.path.normpath(basepath)
+        self.cache_dir = cache_dir
+        self.archives: List[Pk3Archive] = []
+        # normalized relpath -> entry of the archive that wins
+        self.entries: Dict[str, Pk3Entry] = {}
+        # normalized folder -> normalized relpaths of the entries directly in it
+        self.folders: Dict[str, List[str]] = {}
+        self.stamp = self.current_stamp()
+        self._decompressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._decompressed_bytes = 0
+        self._lock = threading.Lock()
+        self._build()
+
+    def pk3_files(self) -> List[str]:
+        try:
+            names = [fn for fn in os.listdir(self.basepath) if fn.lower().endswith(".pk3")]
+        except OSError:
+            return []
+        return [os.path.join(self.basepath, fn) for fn in sorted(names, key=str.lower)]
+
+    def current_stamp(self) -> Tuple:
+        stamps = []
+        for path in self.pk3_files():
+            try:
+                st = os.stat(path)
+                stamps.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                pass
+        return tuple(stamps)
+
+    def _build(self) -> None:
+        for path in self.pk3_files():
+            try:
+                archive = Pk3Archive(path)
+            except (OSError, zipfile.BadZipFile) as e:
+                print(f"Error reading pk3 file {path}: {e}")
+                continue
+            self.archives.append(archive)
+            for entry in archive.entries:
+                self.entries[normalize(entry.name)] = entry
+        for key in self.entries:
+            self.folders.setdefault(key.rpartition("/")[0], []).append(key)
+        if self.archives:
+            print(f"Indexed {len(self.entries)} files in {len(self.archives)} pk3 files")
+
+    def close(self) -> None:
+        for archive in self.archives:
+            archive.close()
+
+    # --- lookups ---
+
+    def _loose_path(self, relpath: str) -> Optional[str]:
+        # case-insensitive like the game on Windows: a loose "B.NPC" replaces a pk3's "b.npc"
+        return dir_index.resolve(self.basepath, relpath)
+
+    def archive(self, path: str) -> Optional[Pk3Archive]:
+        key = os.path.normcase(os.path.abspath(path))
+        for archive in self.archives:
+            if os.path.normcase(os.path.abspath(archive.path)) == key:
+                return archive
+        return None
+
+    def get_entry(self, relpath: str) -> Optional[Pk3Entry]:
+        return self.entries.get(normalize(relpath))
+
+    def exists(self, relpath: str) -> bool:
+        return self._loose_path(relpath) is not None or normalize(relpath) in self.entries
+
+    def find(self, relpath: str, extensions: List[str]) -> Optional[str]:
+        """Normalized key of the pk3 entry for relpath, or relpath with one of the extensions."""
+        key = normalize(relpath)
+        if key in self.entries:
+            return key
+        stem = os.path.splitext(key)[0]
+        for extension in extensions:
+            candidate = f"{stem}.{extension.lower()}"
+            if candidate in self.entries:
+                return candidate
+        return None
+
+    def listdir(self, reldir: str, extension: str = "") -> List[str]:
+        """Sorted relpaths of the pk3 files directly in reldir (lowercase) ending with extension."""
+        extension = extension.lower()
+        return sorted(
+            key for key in self.folders.get(normalize(reldir).rstrip("/"), []) if key.endswith(extension)
+        )
+
+    def virtual_path(self, key: str) -> str:
+        """Virtual path of the winning pk3 entry of a normalized relpath."""
+        entry = self.entries[normalize(key)]
+        return os.path.join(entry.archive.path, *entry.name.split("/"))
+
+    # --- reading ---
+
+    def read(self, relpath: str) -> bytes:
+        """Contents of a file; a loose file wins over pk3 entries."""
+        loose = self._loose_path(relpath)
+        if loose is not None:
+            with open(loose, "rb") as f:
+                return f.read()
+        entry = self.get_entry(relpath)
+        if entry is None:
+            raise FileNotFoundError(relpath)
+        return self.read_entry(entry)
+
+    def read_entry(self, entry: Pk3Entry) -> bytes:
+        cache_key = (entry.archive.path, entry.name)
+        with self._lock:
+            data = self._decompressed.get(cache_key)
+            if data is not None:
+                self._decompressed.move_to_end(cache_key)
+                return data
+        raw = entry.archive.raw_data(entry)
+        if entry.method == zipfile.ZIP_STORED:
+            return raw
+        if entry.method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompressobj(-zlib.MAX_WBITS).decompress(raw)
+        else:
+            with zipfile.ZipFile(entry.archive.path) as zf:
+                data = zf.read(entry.name)
+        if len(data) <= ENTRY_CACHE_BYTES // 4:
+            with self._lock:
+                self._decompressed[cache_key] = data
+                self._decompressed_bytes += len(data)
+                while self._decompressed_bytes > ENTRY_CACHE_BYTES:
+                    _, old = self._decompressed.popitem(last=False)
+                    self._decompressed_bytes -= len(old)
+        return data
+
+    def open(self, relpath: str) -> io.BytesIO:
+        """Binary file object for struct based readers."""
+        return io.BytesIO(self.read(relpath))
+
+    def read_text(self, relpath: str, errors: str = "ignore") -> str:
+        return self.read(relpath).decode("utf-8", errors=errors)
+
+    def materialize(self, entry: Pk3Entry) -> str:
+        """
+        Real file path for a pk3 entry: extracted once into the cache folder, keyed by archive and
+        its mtime/size, so a changed pk3 gets fresh files.
+        """
+        archive = entry.archive
+        digest = hashlib.sha1(
+            f"{os.path.abspath(archive.path)}\0{archive.stamp[0]}\0{archive.stamp[1]}".encode("utf-8")
+        ).hexdigest()[:16]
+        cache_dir = self.cache_dir or _default_cache_dir()
+        target = os.path.join(
+            cache_dir, f"{os.path.splitext(os.path.basename(archive.path))[0]}_{digest}",
+            *entry.name.split("/"),
+        )
+        if os.path.isfile(target) and os.path.getsize(target) == entry.file_size:
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(target), suffix=".tmp", delete=False) as f:
+            f.write(self.read_entry(entry))
+        os.replace(f.name, target)
+        if log_level == "DEBUG":
+            print(f"Extracted {entry.name} from {archive.path}")
+        return target
+
+
+def _default_cache_dir() -> str:
+    from . import parse_cache
+
+    return os.path.join(parse_cache._default_cache_dir(), "pk3")
+
+
+# one VFS per base folder; the pk3 list is re-checked at most every REFRESH_INTERVAL seconds
+REFRESH_INTERVAL = 2.0
+_vfs_by_base: Dict[str, Tuple[VirtualFileSystem, float]] = {}
+_vfs_lock = threading.Lock()
+
+
+def get_vfs(basepath: str) -> Optional[VirtualFileSystem]:
+    """The VFS of basepath, or None when it has no .pk3 files (loose files only)."""
+    if not basepath:
+        return None
+    key = os.path.normcase(os.path.abspath(basepath))
+    now = time.monotonic()
+    with _vfs_lock:
+        cached = _vfs_by_base.get(key)
+        if cached is not None:
+            fs, checked_at = cached
+            if now - checked_at < REFRESH_INTERVAL:
+                return fs if fs.archives else None
+            if fs.current_stamp() == fs.stamp:
+                _vfs_by_base[key] = (fs, now)
+                return fs if fs.archives else None
+            fs.close()
+        fs = VirtualFileSystem(basepath)
+        _vfs_by_base[key] = (fs, now)
+        return fs if fs.archives else None
+
+
+def pk3_files(basepath: str) -> List[str]:
+    """The .pk3 archives of basepath in load order (empty without archives)."""
+    fs = get_vfs(basepath)
+    return [archive.path for archive in fs.archives] if fs is not None else []
+
+
+def resolve(basepath: str, relpath: str, extensions: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Path of a game file: the loose file if it exists (case-insensitive), else the virtual path of
+    the pk3 entry. With extensions, the extension of relpath may be replaced like
+    SoF2Filesystem.FindFile does. Read it with read_bytes() / open_file(), not open().
+    """
+    loose = dir_index.resolve(basepath, relpath, extensions)
+    if loose is not None:
+        return loose
+    fs = get_vfs(basepath)
+    if fs is None:
+        return None
+    key = fs.find(relpath, extensions or [])
+    return fs.virtual_path(key) if key is not None else None
+
+
+def folder_files(basepath: str, reldir: str, extension: str) -> List[str]:
+    """
+    Paths of all files with extension in a game folder, loose files and pk3 contents merged
+    (loose wins), sorted by file name. pk3 entries are virtual paths, nothing is extracted.
+    """
+    by_name: Dict[str, str] = {}
+    fs = get_vfs(basepath)
+    if fs is not None:
+        for key in fs.listdir(reldir, extension):
+            by_name[os.path.basename(key)] = fs.virtual_path(key)
+    index = dir_index.get_index(basepath)
+    if index is not None:
+        for path in index.listdir(reldir, extension):
+            fn = os.path.basename(path)
+            # loose files replace pk3 entries with the same (case-insensitive) name
+            by_name.pop(fn.lower(), None)
+            by_name[fn] = path
+    return [by_name[name] for name in sorted(by_name)]
+
+
+# --- paths that may be virtual ---
+
+
+class Stamp(NamedTuple):
+    """The part of os.stat_result the caches use; a pk3 entry has its archive's mtime."""
+
+    st_size: int
+    st_mtime_ns: int
+
+
+def _virtual_entry(path: str) -> Optional[Tuple[VirtualFileSystem, Pk3Entry]]:
+    """(VFS, entry) of a virtual path; None for real paths. Raises FileNotFoundError for a missing entry."""
+    match = _VIRTUAL_PATH.search(path)
+    if match is None:
+        return None
+    archive_path = path[: match.start() + 4]
+    if not os.path.isfile(archive_path):
+        return None
+    fs = get_vfs(os.path.dirname(archive_path))
+    archive = fs.archive(archive_path) if fs is not None else None
+    entry = archive.by_key.get(normalize(path[match.end():])) if archive is not None else None
+    if entry is None:
+        raise FileNotFoundError(path)
+    return fs, entry
+
+
+def stat(path: str):
+    """os.stat of a real path, a Stamp for a virtual one; OSError if it does not exist."""
+    found = _virtual_entry(path)
+    if found is None:
+        return os.stat(path)
+    entry = found[1]
+    return Stamp(entry.file_size, entry.archive.stamp[0])
+
+
+def isfile(path: str) -> bool:
+    try:
+        found = _virtual_entry(path)
+    except FileNotFoundError:
+        return False
+    return os.path.isfile(path) if found is None else True
+
+
+def read_bytes(path: str) -> bytes:
+    found = _virtual_entry(path)
+    if found is None:
+        with open(path, "rb") as f:
+            return f.read()
+    fs, entry = found
+    return fs.read_entry(entry)
+
+
+def read_text(path: str, errors: str = "ignore") -> str:
+    return read_bytes(path).decode("utf-8", errors=errors)
+
+
+def open_file(path: str) -> BinaryIO:
+    """Binary file object of a real or virtual path, for the struct based GLM/GLA readers."""
+    found = _virtual_entry(path)
+    if found is None:
+        return open(path, "rb")
+    fs, entry = found
+    return io.BytesIO(fs.read_entry(entry))
+
+
+def real_path(path: str) -> str:
+    """A real file for path: virtual paths are extracted into the cache folder (images, Pillow)."""
+    found = _virtual_entry(path)
+    if found is None:
+        return path
+    fs, entry = found
+    return fs.materialize(entry)
@@ -0,0 +1,226 @@
+# weapon_catalog.py
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .wpn_parser import parse_wpn_file, parse_inview_file
+from .item_parser import parse_item_file
+from . import parse_cache
+from . import search_index
+from . import vfs
+
+log_level = os.getenv("LOG_LEVEL", "INFO")
+
+INVIEW_FILE = os.path.join("inview", "SOF2.inview")
+WPN_FILE = os.path.join("ext_data", "SOF2.wpn")
+ITEM_FILE = os.path.join("ext_data", "SOF2.item")
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = vfs.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class WeaponCatalog:
+    """
+    inview/SOF2.inview, ext_data/SOF2.wpn and ext_data/SOF2.item of one base folder, parsed once.
+
+    - weapons: inview weapons (primary source), with the matching wpn entry under "wpn"
+    - enum_items: (identifier, name, description) tuples sorted by name, as get_weapon_enum_items returns
+    - search_index: SearchIndex over enum_items for the weapon browser panel
+    - item_data / item_enum_items: the get_default_item_file result for SOF2.item
+    - by_name / by_model / item_by_name / items_by_model: joins between the three files
+
+    The catalog remembers the mtime/size of the three files; get_weapon_catalog() rebuilds it
+    as soon as one of them changes.
+    """
+
+    def __init__(self, basepath: str):
+        self.basepath = basepath
+        self.stamps = self.current_stamps()
+
+        self.weapons: List[Dict[str, Any]] = []
+        self.wpn_weapons: List[Dict[str, Any]] = []
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, List[Dict[str, Any]]] = {}
+        self.enum_items: List[Tuple[str, str, str]] = []
+        self.search_index = search_index.SearchIndex(self.enum_items)
+
+        self.item_data: Dict[str, Any] = {"weapons": [], "items": []}
+        self.item_enum_items: List[Tuple[str, str, str]] = []
+        self.item_by_name: Dict[str, Dict[str, Any]] = {}
+        self.items_by_model: Dict[str, List[Dict[str, Any]]] = {}
+
+        self._load_weapons()
+        self._load_items()
+
+    def _source_path(self, rel: str) -> str:
+        # the loose file (any case, e.g. "inview/sof2.inview"), else the .pk3 entry (virtual path)
+        return vfs.resolve(self.basepath, rel.replace(os.sep, "/")) or os.path.join(self.basepath, rel)
+
+    def current_stamps(self) -> Tuple[Optional[Tuple[int, int]], ...]:
+        stamps = [_file_stamp(self._source_path(rel)) for rel in (INVIEW_FILE, WPN_FILE, ITEM_FILE)]
+        # a changed .pk3 may change files without a loose copy
+        stamps.extend(_file_stamp(path) for path in vfs.pk3_files(self.basepath))
+        return tuple(stamps)
+
+    def is_current(self) -> bool:
+        return self.stamps == self.current_stamps()
+
+    def _load_weapons(self) -> None:
+        # Load and parse inview file first (primary source)
+        inview_path = self._source_path(INVIEW_FILE)
+        if vfs.isfile(inview_path):
+            try:
+                self.weapons = parse_cache.parse_file(inview_path, parse_inview_file)
+                print(f"Loaded {len(self.weapons)} weapons from inview file")
+            except Exception as e:
+                print(f"Error reading/parsing SOF2.inview: {e}")
+        else:
+            print(f"Inview file not found: {inview_path}")
+
+        # Load and parse wpn file (secondary source for additional data)
+        wpn_path = self._source_path(WPN_FILE)
+        if vfs.isfile(wpn_path):
+            try:
+                self.wpn_weapons = parse_cache.parse_file(wpn_path, parse_wpn_file)
+                print(f"Loaded {len(self.wpn_weapons)} weapons from wpn file")
+            except Exception as e:
+                print(f"Error reading/parsing SOF2.wpn: {e}")
+
+        # Match wpn entries to inview weapons by name (the last wpn entry with a name wins)
+        wpn_lookup = {}
+        for wpn_weapon in self.wpn_weapons:
+            wpn_name = wpn_weapon.get("name", "")
+            if wpn_name:
+                wpn_lookup[wpn_name] = wpn_weapon
+
+        for weapon in self.weapons:
+            weapon_name = weapon.get("name", "")
+            if weapon_name in wpn_lookup:
+                weapon["wpn"] = wpn_lookup[weapon_name]
+                if log_level == "DEBUG":
+                    print(f"Assigned wpn data to inview weapon: {weapon_name}")
+
+        items = []
+        for weapon in self.weapons:
+            name = weapon.get("name", "")
+            if not name:
+                continue
+            # the first inview entry of a name is the one handle_load_weapon_file picks
+            self.by_name.setdefault(name, weapon)
+
+            display_name = name
+            model = ""
+            if "wpn" in weapon:
+                display_name = weapon["wpn"].get("displayName", name)
+                model = weapon["wpn"].get("model", "")
+            if model:
+                self.by_model.setdefault(model, []).append(weapon)
+
+            desc_parts = []
+            if display_name != name:
+                desc_parts.append(f"{display_name}")
+            if model:
+                desc_parts.append(f"{model}")
+            description = (
+                " | ".join(desc_parts) if desc_parts else f"Inview weapon: {name}"
+            )
+            items.append((name, name, description))
+
+        if not items:
+            items.append(("None", "None", "No weapons found"))
+        items.sort(key=lambda x: x[1])
+
+        self.enum_items = items
+        self.search_index = search_index.SearchIndex(items)
+
+    def _load_items(self) -> None:
+        item_path = self._source_path(ITEM_FILE)
+        items: List[Tuple[str, str, str]] = []
+
+        if vfs.isfile(item_path):
+            try:
+                parsed_items = parse_cache.parse_file(item_path, parse_item_file)
+
+                for item in parsed_items:
+                    name = item.get("name", "")
+                    if not name:
+                        continue
+                    item_type = item.get("_type", "item")
+                    model = item.get("model", "")
+                    onsurf = item.get("onsurf", [])
+                    offsurf = item.get("offsurf", [])
+
+                    # Build description
+                    desc_parts = [f"Type: {item_type}"]
+                    if model:
+                        desc_parts.append(f"Model: {model}")
+                    if onsurf:
+                        desc_parts.append(f"OnSurf: {', '.join(onsurf)}")
+                    if offsurf:
+                        desc_parts.append(f"OffSurf: {', '.join(offsurf)}")
+                    items.append((name, name, " | ".join(desc_parts)))
+
+                    # Add to appropriate array based on type
+                    if item_type == "weapon":
+                        self.item_data["weapons"].append(item)
+                    else:
+                        self.item_data["items"].append(item)
+
+                    self.item_by_name.setdefault(name, item)
+                    if model:
+                        self.items_by_model.setdefault(model, []).append(item)
+
+                print(
+                    f"Loaded {len(parsed_items)} items from {ITEM_FILE} ({len(self.item_data['weapons'])} weapons, {len(self.item_data['items'])} items)"
+                )
+            except Exception as e:
+                print(f"Error parsing item file {item_path}: {e}")
+        else:
+            print(f"Item file not found: {item_path}")
+
+        if not items:
+            items.append(("None", "None", "No items found"))
+        self.item_enum_items = items
+
+    def get_weapon(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(name)
+
+    def weapons_for_model(self, model: str) -> List[Dict[str, Any]]:
+        return self.by_model.get(model, [])
+
+    def item_for_weapon(self, name: str) -> Optional[Dict[str, Any]]:
+        """The SOF2.item entry of a weapon: same name, or else the same .glm model."""
+        item = self.item_by_name.get(name)
+        if item is not None:
+            return item
+        weapon = self.by_name.get(name)
+        if weapon is None:
+            return None
+        model = weapon.get("wpn", {}).get("model", "")
+        matches = self.items_by_model.get(model) if model else None
+        return matches[0] if matches else None
+
+
+# one catalog per base folder
+_catalogs: Dict[str, WeaponCatalog] = {}
+
+
+def get_weapon_catalog(basepath: str) -> WeaponCatalog:
+    """Return the WeaponCatalog of basepath, rebuilt only if one of its three source files changed."""
+    key = os.path.normcase(os.path.abspath(basepath or ""))
+    catalog = _catalogs.get(key)
+    if catalog is not None and catalog.is_current():
+        if log_level == "DEBUG":
+            print(f"Using cached weapon catalog for basepath: {basepath}")
+        return catalog
+    catalog = WeaponCatalog(basepath)
+    _catalogs[key] = catalog
+    return catalog
+
+
+def reset_weapon_catalog() -> None:
+    _catalogs.clear()
@@ -2,6 +2,9 @@ import json
 import re
 from typing import Dict, List, Any, Tuple, Union
 
+# bump with changes to the parsed weapon dicts (parse cache)
+PARSER_VERSION = 1
+
 
 def _strip_inline_comment(s: str) -> str:
     return re.sub(r"//.*$", "", s).strip()